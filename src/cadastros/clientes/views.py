@@ -11,6 +11,7 @@ from cadastros.clientes.forms import ClientesForm
 
 class ClientesListView(LoginRequiredMixin, EscopoEmpresaQuerysetMixin, AtivosQuerysetMixin, PessoasListView):
     model = Cliente
+    tipo_sugestoes = 'clientes'
 
     def get_context_data(self, *args, **kwargs):
         contexto = super().get_context_data(*args, **kwargs)
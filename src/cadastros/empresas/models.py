@@ -45,8 +45,11 @@ class Empresa(BaseModel):
         on_delete=models.PROTECT
     )
 
-    def __str__(self):
-        return f"{self.id} - {self.nome_fantasia}"
+    campos_str = ('id', 'nome_fantasia')
+
+    @classmethod
+    def formatar_str(cls, id, nome_fantasia) -> str:
+        return f"{id} - {nome_fantasia}"
 
 class BaseAssociadoEmpresa(BaseModel):
     empresa = models.ForeignKey(
@@ -59,3 +62,11 @@ class BaseAssociadoEmpresa(BaseModel):
 
     class Meta:
         abstract = True
+        indexes = [
+            # listagens: registros ativos da empresa, mais recentes primeiro (ver BaseDynamicListView)
+            models.Index(
+                fields=['empresa', 'data_criado'],
+                condition=models.Q(ativo=True),
+                name='%(class)s_ativos_criado_idx'
+            ),
+        ]
@@ -3,5 +3,5 @@ from cadastros.empresas.models import BaseAssociadoEmpresa
 class BaseCadastrosModel(BaseAssociadoEmpresa):
     module_label = "cadastros"
     
-    class Meta:
+    class Meta(BaseAssociadoEmpresa.Meta):
         abstract = True
\ No newline at end of file
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TrabalhadoresConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cadastros.trabalhadores'
+
+    def ready(self):
+        from cadastros.trabalhadores import signals # noqa: F401 (registra os receivers)
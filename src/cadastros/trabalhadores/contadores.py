@@ -0,0 +1,103 @@
+"""
+Contadores de agendamentos por trabalhador (ContadoresTrabalhador).
+
+Cada alteração de um Agendamento ativo soma ou subtrai 1 das colunas do status anterior
+e do atual, com UPDATE ... SET coluna = coluna + n (F()) na mesma transação do save:
+transações concorrentes não perdem incrementos. A listagem de trabalhadores lê os
+contadores por um join 1:1, sem agregar o histórico de agendamentos.
+Agendamentos inativos não são contados.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from cadastros.trabalhadores.models import ContadoresTrabalhador, Trabalhador
+from servicos.agendamentos.types import EstadoAgendamento
+from servicos.agendamentos.choices import (
+    AGENDAMENTO_STATUS_PENDENTE,
+    AGENDAMENTO_STATUS_FINALIZADO,
+    AGENDAMENTO_STATUS_CANCELADO
+)
+
+
+TAMANHO_LOTE_RECONCILIACAO = 2000
+CAMPOS_STATUS = {
+    AGENDAMENTO_STATUS_PENDENTE: 'pendentes',
+    AGENDAMENTO_STATUS_FINALIZADO: 'finalizados',
+    AGENDAMENTO_STATUS_CANCELADO: 'cancelados',
+}
+
+
+def calcular_variacoes(anterior: EstadoAgendamento | None, atual: EstadoAgendamento | None) -> dict[int, Counter]:
+    """Variação de cada contador, por trabalhador, entre os dois estados de um agendamento."""
+    variacoes: dict[int, Counter] = {}
+    for estado, sinal in ((anterior, -1), (atual, 1)):
+        if estado is None or not estado.ativo or estado.status not in CAMPOS_STATUS:
+            continue
+        variacoes.setdefault(estado.trabalhador_id, Counter())[CAMPOS_STATUS[estado.status]] += sinal
+    return variacoes
+
+
+def atualizar_contadores(anterior: EstadoAgendamento | None, atual: EstadoAgendamento | None) -> None:
+    for trabalhador_id, variacao in calcular_variacoes(anterior, atual).items():
+        valores = {campo: F(campo) + quantidade for campo, quantidade in variacao.items() if quantidade}
+        if not valores:
+            continue
+        if not ContadoresTrabalhador.objects.filter(pk=trabalhador_id).update(**valores):
+            # trabalhador ainda sem contadores: contados a partir dos agendamentos, já com esta alteração
+            criar_contadores(trabalhador_id)
+
+
+def _contagens(trabalhadores):
+    filtro_ativos = Q(agendamentos__ativo=True)
+    return trabalhadores.annotate(**{
+        campo: Count('agendamentos', filter=filtro_ativos & Q(agendamentos__status=status))
+        for status, campo in CAMPOS_STATUS.items()
+    }).values('pk', 'empresa_id', *CAMPOS_STATUS.values()).order_by()
+
+
+def criar_contadores(trabalhador_id: int) -> None:
+    linha = _contagens(Trabalhador.objects.filter(pk=trabalhador_id)).first()
+    if linha is None:
+        return
+    try:
+        with transaction.atomic():
+            ContadoresTrabalhador.objects.create(trabalhador_id=linha.pop('pk'), **linha)
+    except IntegrityError:
+        # criados por outra transação entre a contagem e o insert (divergências: ver reconciliar_contadores)
+        pass
+
+
+def reconciliar_contadores(empresa=None) -> tuple[int, int]:
+    """
+    Recalcula os contadores de todos os trabalhadores (de uma empresa ou de todos) a partir
+    dos agendamentos, em uma consulta. Retorna (contadores gravados, contadores que estavam divergentes).
+    """
+    trabalhadores = Trabalhador.objects.all()
+    contadores = ContadoresTrabalhador.objects.all()
+    if empresa is not None:
+        trabalhadores = trabalhadores.filter(empresa=empresa)
+        contadores = contadores.filter(empresa=empresa)
+
+    campos = tuple(CAMPOS_STATUS.values())
+    total = divergentes = 0
+    with transaction.atomic():
+        anteriores = {linha[0]: linha[1:] for linha in contadores.values_list('pk', *campos)}
+        contadores.delete()
+
+        lote: list[ContadoresTrabalhador] = []
+        for linha in _contagens(trabalhadores).iterator(chunk_size=TAMANHO_LOTE_RECONCILIACAO):
+            trabalhador_id = linha.pop('pk')
+            if anteriores.get(trabalhador_id, (0,) * len(campos)) != tuple(linha[campo] for campo in campos):
+                divergentes += 1
+            lote.append(ContadoresTrabalhador(trabalhador_id=trabalhador_id, **linha))
+            if len(lote) >= TAMANHO_LOTE_RECONCILIACAO:
+                ContadoresTrabalhador.objects.bulk_create(lote)
+                total += len(lote)
+                lote = []
+
+        ContadoresTrabalhador.objects.bulk_create(lote)
+        total += len(lote)
+
+    return total, divergentes
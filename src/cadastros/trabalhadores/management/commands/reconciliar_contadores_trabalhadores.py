@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cadastros.empresas.models import Empresa
+from cadastros.trabalhadores.contadores import reconciliar_contadores
+
+
+class Command(BaseCommand):
+    help = "Confere e corrige os contadores de agendamentos (pendentes, finalizados, cancelados) de cada trabalhador"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresa',
+            type=int,
+            nargs='*',
+            help="IDs das empresas a reconciliar. Sem valor, reconcilia todas."
+        )
+
+    def handle(self, *args, **kwargs):
+        empresas_ids: list[int] | None = kwargs.get('empresa')
+
+        if not empresas_ids:
+            total, divergentes = reconciliar_contadores()
+            self.stdout.write(self.style.SUCCESS(
+                f"{total} contadores de trabalhadores reconciliados para todas as empresas ({divergentes} corrigidos)."
+            ))
+            return
+
+        for empresa_id in empresas_ids:
+            try:
+                empresa = Empresa.objects.get(pk=empresa_id)
+            except Empresa.DoesNotExist:
+                raise CommandError(f"Empresa {empresa_id} não existe.")
+
+            total, divergentes = reconciliar_contadores(empresa)
+            self.stdout.write(self.style.SUCCESS(
+                f"{total} contadores de trabalhadores reconciliados para {empresa} ({divergentes} corrigidos)."
+            ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cadastros.empresas.models import Empresa
+from cadastros.trabalhadores.ocupacao import reconstruir_estados
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o estado atual dos trabalhadores (agendamento em execução e desde quando) a partir dos agendamentos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresa',
+            type=int,
+            nargs='*',
+            help="IDs das empresas a reconstruir. Sem valor, reconstrói todas."
+        )
+
+    def handle(self, *args, **kwargs):
+        empresas_ids: list[int] | None = kwargs.get('empresa')
+
+        if not empresas_ids:
+            total = reconstruir_estados()
+            self.stdout.write(self.style.SUCCESS(f"{total} estados de trabalhadores reconstruídos para todas as empresas."))
+            return
+
+        for empresa_id in empresas_ids:
+            try:
+                empresa = Empresa.objects.get(pk=empresa_id)
+            except Empresa.DoesNotExist:
+                raise CommandError(f"Empresa {empresa_id} não existe.")
+
+            total = reconstruir_estados(empresa)
+            self.stdout.write(self.style.SUCCESS(f"{total} estados de trabalhadores reconstruídos para {empresa}."))
@@ -1,6 +1,97 @@
+from django.db import models
+
 from core.pessoas.models import Pessoa
 
 
 class Trabalhador(Pessoa):
+    class Meta(Pessoa.Meta):
+        verbose_name_plural = "Trabalhadores"
+
+class EstadoTrabalhador(models.Model):
+    """
+    Estado atual de um trabalhador: o agendamento em execução e desde quando. O próximo pendente
+    depende da hora e é resolvido na leitura (ver cadastros.trabalhadores.ocupacao.proximos_pendentes).
+    Mantido por cadastros.trabalhadores.ocupacao a cada alteração de Agendamento; reconstruível com
+    'manage.py reconstruir_estados_trabalhadores'.
+    """
+    trabalhador = models.OneToOneField(
+        Trabalhador,
+        verbose_name="Trabalhador",
+        on_delete=models.CASCADE,
+        related_name='estado',
+        primary_key=True
+    )
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        verbose_name="Empresa",
+        on_delete=models.CASCADE,
+        related_name='estados_trabalhadores'
+    )
+    agendamento_atual = models.ForeignKey(
+        'agendamentos.Agendamento',
+        verbose_name="Agendamento em execução",
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True
+    )
+    ocupado_desde = models.DateTimeField(
+        verbose_name="Ocupado desde",
+        null=True,
+        blank=True
+    )
+    data_atualizado = models.DateTimeField(
+        verbose_name="Data de Atualização",
+        auto_now=True
+    )
+
+    @property
+    def ocupado(self) -> bool:
+        return self.agendamento_atual_id is not None
+
+    def __str__(self):
+        return f"{self.trabalhador_id} - {'ocupado' if self.ocupado else 'disponível'}"
+
+    class Meta:
+        verbose_name = "Estado do Trabalhador"
+        verbose_name_plural = "Estados dos Trabalhadores"
+
+
+class ContadoresTrabalhador(models.Model):
+    """
+    Quantidade de agendamentos ativos do trabalhador por status, para a listagem sem agregações.
+    Atualizada com F() a cada transição (cadastros.trabalhadores.contadores); conferida e corrigida
+    com 'manage.py reconciliar_contadores_trabalhadores'.
+    """
+    trabalhador = models.OneToOneField(
+        Trabalhador,
+        verbose_name="Trabalhador",
+        on_delete=models.CASCADE,
+        related_name='contadores',
+        primary_key=True
+    )
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        verbose_name="Empresa",
+        on_delete=models.CASCADE,
+        related_name='contadores_trabalhadores'
+    )
+    pendentes = models.IntegerField(
+        verbose_name="Agendamentos pendentes",
+        default=0
+    )
+    finalizados = models.IntegerField(
+        verbose_name="Agendamentos finalizados",
+        default=0
+    )
+    cancelados = models.IntegerField(
+        verbose_name="Agendamentos cancelados",
+        default=0
+    )
+
+    def __str__(self):
+        return f"{self.trabalhador_id} - {self.pendentes}P/{self.finalizados}F/{self.cancelados}C"
+
     class Meta:
-        verbose_name_plural = "Trabalhadores"
\ No newline at end of file
+        verbose_name = "Contadores do Trabalhador"
+        verbose_name_plural = "Contadores dos Trabalhadores"
@@ -0,0 +1,128 @@
+"""
+Manutenção do estado atual dos trabalhadores (EstadoTrabalhador).
+
+Cada alteração que coloca um Agendamento em execução ou o tira dela recalcula, dentro
+da mesma transação do save, o estado dos trabalhadores envolvidos: uma consulta pelo
+índice (trabalhador, status, data_agendado) e a gravação da linha do trabalhador. O
+quadro de status da equipe e os indicadores da Home leem daqui, com custo independente
+do volume de agendamentos.
+
+O próximo agendamento pendente não é guardado: ele muda com a hora (à meia-noite os
+atrasados de ontem deixam de ser o próximo) sem nenhuma gravação, então é buscado na
+leitura com proximos_pendentes, pelo mesmo índice.
+"""
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from core.helpers import PeriodoHelper
+from cadastros.trabalhadores.models import EstadoTrabalhador, Trabalhador
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.types import EstadoAgendamento
+from servicos.agendamentos.choices import AGENDAMENTO_STATUS_PENDENTE, AGENDAMENTO_STATUS_EXECUTANDO
+
+
+TAMANHO_LOTE_RECONSTRUCAO = 2000
+# status que aparecem no quadro da equipe (em execução e próximo pendente)
+STATUS_OCUPACAO = (AGENDAMENTO_STATUS_PENDENTE, AGENDAMENTO_STATUS_EXECUTANDO)
+
+
+def _em_execucao(agendamentos):
+    return agendamentos.filter(status=AGENDAMENTO_STATUS_EXECUTANDO, ativo=True).order_by('-data_agendado')
+
+
+def proximos_pendentes(agendamentos, agora: datetime | None = None):
+    """Pendentes a partir de hoje: os atrasados do dia continuam sendo o próximo atendimento."""
+    inicio_hoje = PeriodoHelper.inicio_do_dia(timezone.localdate(agora))
+    return agendamentos.filter(
+        status=AGENDAMENTO_STATUS_PENDENTE, ativo=True, data_agendado__gte=inicio_hoje
+    ).order_by('data_agendado')
+
+
+def atualizar_estado(trabalhador_id: int, empresa_id: int, agora: datetime | None = None) -> EstadoTrabalhador:
+    agendamentos = Agendamento.objects.filter(trabalhador_id=trabalhador_id)
+    atual_id = _em_execucao(agendamentos).values_list('pk', flat=True).first()
+
+    estado = (
+        EstadoTrabalhador.objects.filter(pk=trabalhador_id).first()
+        or EstadoTrabalhador(trabalhador_id=trabalhador_id)
+    )
+    if atual_id is None:
+        estado.ocupado_desde = None
+    elif estado.agendamento_atual_id != atual_id:
+        # momento da transição para execução, registrado aqui (e não lido do data_modificado do agendamento)
+        estado.ocupado_desde = agora or timezone.now()
+
+    estado.empresa_id = empresa_id
+    estado.agendamento_atual_id = atual_id
+
+    if estado._state.adding:
+        try:
+            with transaction.atomic():
+                estado.save(force_insert=True)
+            return estado
+        except IntegrityError:
+            # criado por outra transação entre a leitura e o insert
+            pass
+    estado.save(force_update=True)
+    return estado
+
+
+def atualizar_estados(anterior: EstadoAgendamento | None, atual: EstadoAgendamento | None) -> None:
+    if anterior is not None and atual is not None and (
+        (anterior.status, anterior.trabalhador_id, anterior.ativo, anterior.data_agendado)
+        == (atual.status, atual.trabalhador_id, atual.ativo, atual.data_agendado)
+    ):
+        return
+
+    trabalhadores = {
+        estado.trabalhador_id: estado.empresa_id
+        for estado in (anterior, atual)
+        if estado is not None and estado.status == AGENDAMENTO_STATUS_EXECUTANDO
+    }
+    for trabalhador_id, empresa_id in trabalhadores.items():
+        atualizar_estado(trabalhador_id, empresa_id)
+
+
+def reconstruir_estados(empresa=None) -> int:
+    """
+    Recalcula o estado de todos os trabalhadores (de uma empresa ou de todas), em uma consulta.
+    O "ocupado desde" já registrado é mantido quando o agendamento em execução é o mesmo; sem
+    registro, a última alteração do agendamento é a melhor estimativa da transição.
+    Retorna a quantidade de estados criados.
+    """
+    trabalhadores = Trabalhador.objects.all()
+    estados = EstadoTrabalhador.objects.all()
+    if empresa is not None:
+        trabalhadores = trabalhadores.filter(empresa=empresa)
+        estados = estados.filter(empresa=empresa)
+
+    agendamentos = Agendamento.objects.filter(trabalhador=OuterRef('pk'))
+    em_execucao = _em_execucao(agendamentos)
+    linhas = trabalhadores.annotate(
+        agendamento_atual_id=Subquery(em_execucao.values('pk')[:1]),
+        ocupado_desde=Subquery(em_execucao.values('data_modificado')[:1]),
+    ).values('pk', 'empresa_id', 'agendamento_atual_id', 'ocupado_desde').order_by()
+
+    total = 0
+    with transaction.atomic():
+        registrados = dict(
+            estados.filter(agendamento_atual__isnull=False).values_list('agendamento_atual_id', 'ocupado_desde')
+        )
+        estados.delete()
+
+        lote: list[EstadoTrabalhador] = []
+        for linha in linhas.iterator(chunk_size=TAMANHO_LOTE_RECONSTRUCAO):
+            linha['ocupado_desde'] = registrados.get(linha['agendamento_atual_id'], linha['ocupado_desde'])
+            lote.append(EstadoTrabalhador(trabalhador_id=linha.pop('pk'), **linha))
+            if len(lote) >= TAMANHO_LOTE_RECONSTRUCAO:
+                EstadoTrabalhador.objects.bulk_create(lote)
+                total += len(lote)
+                lote = []
+
+        EstadoTrabalhador.objects.bulk_create(lote)
+        total += len(lote)
+
+    return total
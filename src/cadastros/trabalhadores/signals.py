@@ -0,0 +1,15 @@
+from django.dispatch import receiver
+
+from servicos.agendamentos.signals import agendamento_alterado
+from cadastros.trabalhadores.ocupacao import atualizar_estados
+from cadastros.trabalhadores.contadores import atualizar_contadores
+
+
+@receiver(agendamento_alterado)
+def atualizar_estados_trabalhadores(sender, anterior, atual, **kwargs):
+    atualizar_estados(anterior, atual)
+
+
+@receiver(agendamento_alterado)
+def atualizar_contadores_trabalhadores(sender, anterior, atual, **kwargs):
+    atualizar_contadores(anterior, atual)
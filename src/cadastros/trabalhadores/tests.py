@@ -0,0 +1,189 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.metricas import listar_status_trabalhadores
+from cadastros.empresas.models import Empresa
+from cadastros.clientes.models import Cliente
+from cadastros.trabalhadores.models import ContadoresTrabalhador, EstadoTrabalhador, Trabalhador
+from cadastros.trabalhadores.ocupacao import reconstruir_estados
+from cadastros.trabalhadores.contadores import reconciliar_contadores
+from servicos.tipo_servicos.models import TipoServico
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.choices import (
+    AGENDAMENTO_STATUS_PENDENTE,
+    AGENDAMENTO_STATUS_EXECUTANDO,
+    AGENDAMENTO_STATUS_FINALIZADO,
+    AGENDAMENTO_STATUS_CANCELADO
+)
+
+
+class BaseTrabalhadoresTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="dono", password="senha")
+        cls.empresa = Empresa.objects.create(
+            cnpj="11222333000181", nome_fantasia="Salão", razao_social="Salão LTDA", user=cls.user
+        )
+        cls.cliente = Cliente.objects.create(
+            nome="Cliente", cpf="52998224725", telefone="+5511999990000", endereco="Rua A", empresa=cls.empresa
+        )
+        cls.servico = TipoServico.objects.create(nome="Corte", preco=Decimal("50.00"), empresa=cls.empresa)
+        cls.ana = Trabalhador.objects.create(
+            nome="Ana", cpf="11144477735", telefone="+5511988880001", endereco="Rua B", empresa=cls.empresa
+        )
+        cls.bia = Trabalhador.objects.create(
+            nome="Bia", cpf="39053344705", telefone="+5511988880002", endereco="Rua C", empresa=cls.empresa
+        )
+
+    def agendar(self, minutos: int, trabalhador=None, status=AGENDAMENTO_STATUS_PENDENTE) -> Agendamento:
+        return Agendamento.objects.create(
+            data_agendado=timezone.now() + timedelta(minutes=minutos), status=status, cliente=self.cliente,
+            servico=self.servico, trabalhador=trabalhador or self.ana, empresa=self.empresa
+        )
+
+
+
+class EstadoTrabalhadorTestCase(BaseTrabalhadoresTestCase):
+    def estado(self, trabalhador=None) -> EstadoTrabalhador:
+        return EstadoTrabalhador.objects.get(trabalhador=trabalhador or self.ana)
+
+    def status(self, trabalhador=None, agora=None) -> dict:
+        trabalhador = trabalhador or self.ana
+        return listar_status_trabalhadores(self.empresa, trabalhador_ids=[trabalhador.pk], agora=agora)[0]
+
+    def test_transicoes_de_status(self):
+        primeiro = self.agendar(5)
+        segundo = self.agendar(60)
+        # pendentes não alteram o estado gravado
+        self.assertFalse(EstadoTrabalhador.objects.filter(trabalhador=self.ana).exists())
+        self.assertEqual(self.status()['status'], "disponível")
+        self.assertEqual(self.status()['proximo_agendamento_data'], primeiro.data_agendado)
+
+        antes = timezone.now()
+        primeiro.status = AGENDAMENTO_STATUS_EXECUTANDO
+        primeiro.save(update_fields=['status'])
+        estado = self.estado()
+        self.assertEqual(estado.agendamento_atual, primeiro)
+        # o momento da transição, não o data_modificado (que update_fields=['status'] não grava)
+        self.assertGreaterEqual(estado.ocupado_desde, antes)
+        self.assertLessEqual(estado.ocupado_desde, timezone.now())
+        self.assertEqual(self.status()['proximo_agendamento_data'], segundo.data_agendado)
+
+        # outra alteração do agendamento em execução não muda o "ocupado desde"
+        primeiro.data_agendado += timedelta(minutes=1)
+        primeiro.save()
+        self.assertEqual(self.estado().ocupado_desde, estado.ocupado_desde)
+
+        primeiro.status = AGENDAMENTO_STATUS_FINALIZADO
+        primeiro.save(update_fields=['status'])
+        segundo.delete()
+        estado = self.estado()
+        self.assertFalse(estado.ocupado)
+        self.assertIsNone(estado.ocupado_desde)
+        self.assertIsNone(self.status()['proximo_agendamento_data'])
+
+    def test_proximo_agendamento_muda_com_o_dia_sem_gravacao(self):
+        self.agendar(5)
+        amanha = timezone.now() + timedelta(days=1)
+
+        # o pendente de hoje passa a ser um atrasado de ontem: deixa de ser o próximo
+        self.assertIsNotNone(self.status()['proximo_agendamento_data'])
+        self.assertIsNone(self.status(agora=amanha)['proximo_agendamento_data'])
+
+    def test_reconstrucao_igual_a_manutencao_incremental(self):
+        self.agendar(-5, status=AGENDAMENTO_STATUS_EXECUTANDO)
+        self.agendar(30, trabalhador=self.bia)
+        self.agendar(-60 * 24 * 2, trabalhador=self.bia)  # pendente atrasado de outro dia: não é o próximo
+        campos = ('trabalhador', 'empresa', 'agendamento_atual', 'ocupado_desde')
+        incremental = list(EstadoTrabalhador.objects.order_by('pk').values_list(*campos))
+        status_incremental = listar_status_trabalhadores(self.empresa)
+
+        self.assertEqual(reconstruir_estados(self.empresa), 2)
+        # sem agendamento em execução, o estado reconstruído equivale à ausência de estado
+        reconstruido = EstadoTrabalhador.objects.order_by('pk')
+        self.assertEqual(list(reconstruido.filter(agendamento_atual__isnull=False).values_list(*campos)), incremental)
+        self.assertEqual(listar_status_trabalhadores(self.empresa), status_incremental)
+
+    def test_status_da_equipe_em_uma_consulta(self):
+        self.agendar(-5, status=AGENDAMENTO_STATUS_EXECUTANDO)
+        self.agendar(30, trabalhador=self.bia)
+        for _ in range(20):
+            self.agendar(90)
+
+        with self.assertNumQueries(1):
+            status_list = listar_status_trabalhadores(self.empresa)
+
+        self.assertEqual(
+            [(trabalhador['nome'], trabalhador['status']) for trabalhador in status_list],
+            [("Bia", "disponível"), ("Ana", "ocupado")]
+        )
+        self.assertIsNotNone(status_list[0]['proximo_agendamento_data'])
+
+
+class ContadoresTrabalhadorTestCase(BaseTrabalhadoresTestCase):
+    def contadores(self, trabalhador=None) -> tuple[int, int, int]:
+        contadores = ContadoresTrabalhador.objects.get(trabalhador=trabalhador or self.ana)
+        return contadores.pendentes, contadores.finalizados, contadores.cancelados
+
+    def test_transicoes_de_status(self):
+        primeiro = self.agendar(5)
+        segundo = self.agendar(60)
+        self.assertEqual(self.contadores(), (2, 0, 0))
+
+        primeiro.status = AGENDAMENTO_STATUS_EXECUTANDO
+        primeiro.save(update_fields=['status'])
+        self.assertEqual(self.contadores(), (1, 0, 0))
+        primeiro.status = AGENDAMENTO_STATUS_FINALIZADO
+        primeiro.save(update_fields=['status'])
+        segundo.status = AGENDAMENTO_STATUS_CANCELADO
+        segundo.save(update_fields=['status'])
+        self.assertEqual(self.contadores(), (0, 1, 1))
+
+        # troca de trabalhador, inativação e remoção
+        segundo.trabalhador = self.bia
+        segundo.save()
+        self.assertEqual(self.contadores(), (0, 1, 0))
+        self.assertEqual(self.contadores(self.bia), (0, 0, 1))
+        primeiro.ativo = False
+        primeiro.save()
+        segundo.delete()
+        self.assertEqual(self.contadores(), (0, 0, 0))
+        self.assertEqual(self.contadores(self.bia), (0, 0, 0))
+
+    def test_reconciliacao_corrige_divergencias(self):
+        self.agendar(5)
+        self.agendar(-60, status=AGENDAMENTO_STATUS_FINALIZADO)
+        self.agendar(30, trabalhador=self.bia)
+        # alterações sem signals (ex.: QuerySet.update) deixam os contadores divergentes
+        Agendamento.objects.filter(trabalhador=self.bia).update(status=AGENDAMENTO_STATUS_CANCELADO)
+
+        self.assertEqual(reconciliar_contadores(self.empresa), (2, 1))
+        self.assertEqual(self.contadores(), (1, 1, 0))
+        self.assertEqual(self.contadores(self.bia), (0, 0, 1))
+        self.assertEqual(reconciliar_contadores(self.empresa), (2, 0))
+
+    def test_listagem_sem_agregacao(self):
+        self.agendar(5)
+        self.agendar(-60, status=AGENDAMENTO_STATUS_FINALIZADO)
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['empresa_id'] = self.empresa.id
+        session.save()
+
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(reverse('cadastros:trabalhadores:list'))
+        linhas = {linha['nome']: linha for linha in resposta.context['object_dicts']}
+        self.assertEqual(linhas["Ana"]['agendamentos_totais_finalizados'], 1)
+        self.assertEqual(linhas["Ana"]['agendamentos_pendentes'], 1)
+        self.assertEqual(linhas["Bia"]['agendamentos_pendentes'], 0)
+
+        listagem = next(consulta['sql'] for consulta in consultas.captured_queries if "ORDER BY" in consulta['sql'])
+        self.assertNotIn("COUNT(", listagem)
+        self.assertNotIn("GROUP BY", listagem)
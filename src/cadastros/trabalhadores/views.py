@@ -1,11 +1,11 @@
-from django.db.models import Count, Q
+from django.db.models import F
+from django.db.models.functions import Coalesce
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 
 from core.pessoas.views import PessoasListView, PessoasCreateView, PessoasDeleteView
 from core.bases.mixins import AtivosQuerysetMixin, RedirecionarOrigemMixin
-from servicos.agendamentos.choices import AGENDAMENTO_STATUS_PENDENTE, AGENDAMENTO_STATUS_FINALIZADO
 from cadastros.empresas.mixins import EscopoEmpresaQuerysetMixin, EscopoEmpresaFormMixin
 from cadastros.trabalhadores.models import Trabalhador
 from cadastros.trabalhadores.forms import TrabalhadoresForm
@@ -13,12 +13,14 @@ from cadastros.trabalhadores.forms import TrabalhadoresForm
 
 class TrabalhadoresListView(LoginRequiredMixin, EscopoEmpresaQuerysetMixin, AtivosQuerysetMixin, PessoasListView):
     model = Trabalhador
+    tipo_sugestoes = 'trabalhadores'
 
     def get_queryset(self, **kwargs):
         queryset = super().get_queryset(**kwargs)
+        # contadores mantidos a cada transição (cadastros.trabalhadores.contadores): join 1:1, sem agregação
         queryset = queryset.annotate(
-            agendamentos_totais_finalizados=Count('agendamentos', filter=Q(agendamentos__status=AGENDAMENTO_STATUS_FINALIZADO)),
-            agendamentos_pendentes=Count('agendamentos', filter=Q(agendamentos__status=AGENDAMENTO_STATUS_PENDENTE))
+            agendamentos_totais_finalizados=Coalesce(F('contadores__finalizados'), 0),
+            agendamentos_pendentes=Coalesce(F('contadores__pendentes'), 0)
         )
         return queryset
 
@@ -1,20 +1,12 @@
-from datetime import date, datetime, timedelta 
+from datetime import datetime
 
-from django.db.models import Q, Sum, OuterRef, Subquery
+from django.db.models import Q
 from django.urls import reverse_lazy
-from django.utils import timezone
 from django.utils.http import url_has_allowed_host_and_scheme
 
-from core.helpers import ConversionHelper
-from core.types import QuickActionItem, QuickInfoItem, TableOptionItemModal
-from cadastros.clientes.models import Cliente
-from cadastros.trabalhadores.models import Trabalhador
-from servicos.agendamentos.models import Agendamento
-from servicos.agendamentos.choices import (
-    AGENDAMENTO_STATUS_PENDENTE,
-    AGENDAMENTO_STATUS_EXECUTANDO, 
-    AGENDAMENTO_STATUS_FINALIZADO
-)
+from core.helpers import ConversionHelper, PeriodoHelper
+from core.metricas import HORAS_ATENDIMENTOS_SEGUINTES, get_metricas_home, listar_status_trabalhadores
+from core.types import MetricasHome, QuickActionItem, QuickInfoItem, TableOptionItemModal
 
 
 class AtivosQuerysetMixin:
@@ -66,9 +58,10 @@ class RedirecionarOrigemMixin:
 
 
 class DateSearchMixin:
-    def get_query_range_dates(self) -> tuple:
-        data_1 = self.request.GET.get("data_1")
-        data_2 = self.request.GET.get("data_2")
+    def get_query_range_dates(self) -> tuple[datetime | None, datetime | None]:
+        """Datas dos filtros convertidas para o fuso atual (inválidas são ignoradas)."""
+        data_1 = PeriodoHelper.parse_data_hora(self.request.GET.get("data_1"))
+        data_2 = PeriodoHelper.parse_data_hora(self.request.GET.get("data_2"))
         return (data_1, data_2)
 
     def get_queryset(self):
@@ -100,7 +93,8 @@ class ViewComQuickInfoMixin:
                 'value': '[valor/query]',
                 'conclusion': '[valor/query]',
                 'fa_icon': '[classe FontAwesome, sem 'fa-']',
-                'link_module: 'reverse_lazy('caminho:pelo:namespace')'
+                'link_module: 'reverse_lazy('caminho:pelo:namespace')',
+                'chave': '[opcional, identifica o item nas atualizações em tempo real]'
             }
         """
         return [
@@ -120,7 +114,8 @@ class ViewComQuickInfoMixin:
                 value=info.get('value'),
                 conclusion=info.get('conclusion'),
                 fa_icon=info.get('fa_icon'),
-                link_module=info.get('link_module')
+                link_module=info.get('link_module'),
+                chave=info.get('chave')
             )
             for info in self.get_item_querys()[:max_items]
         ]
@@ -173,40 +168,11 @@ class ViewComQuickActionMixin:
 
 class ViewComWorkerStatusMixin:
     def get_trabalhadores_status(self, limit: int = 20) -> list[dict]:
-        agora = timezone.now()
-        start = agora - timedelta(hours=1)
-        end = agora + timedelta(hours=1)
-
-        # Subquery: último agendamento agendado na última hora
-        ultimos_agendamentos_datas = Subquery(
-            Agendamento.objects.filter(
-                empresa=self.request.empresa,
-                trabalhador=OuterRef('pk'),
-                status=AGENDAMENTO_STATUS_EXECUTANDO,
-                data_agendado__gte=start,
-                data_agendado__lte=end
-            )
-            .order_by('-data_agendado')
-            .values('data_agendado')[:1]
-        )
-
-        trabalhadores_ultimos_agendamentos = (
-            Trabalhador.objects.filter(empresa=self.request.empresa)
-            .annotate(ultimo_agendamento_data=ultimos_agendamentos_datas)
-            .values('id', 'nome', 'telefone', 'ultimo_agendamento_data')
-            .order_by('ultimo_agendamento_data')[:limit]
-        )
-
-        return list(trabalhadores_ultimos_agendamentos)
+        return listar_status_trabalhadores(self.request.empresa, limite=limit)
 
     def get_context_data(self, **kwargs):
         contexto = super().get_context_data(**kwargs)
-
-        trabalhadores_status_list = self.get_trabalhadores_status()
-        for trabalhador in trabalhadores_status_list:
-            trabalhador['status'] = "ocupado" if trabalhador['ultimo_agendamento_data'] else "disponível"
-
-        contexto['trabalhadores_status_list'] = trabalhadores_status_list
+        contexto['trabalhadores_status_list'] = self.get_trabalhadores_status()
         return contexto
 
 
@@ -236,13 +202,15 @@ class BaseViewComTableOptionsMixin:
     def get_item_options_for_obj(self, obj) -> list[TableOptionItemModal]:
         """
         Generate item options with TableOptionItemModal for a single object, injecting the pk.
+        'obj' can be an instance or a values() row (as in BaseDynamicListView).
         """
+        pk = obj['pk'] if isinstance(obj, dict) else obj.pk
         actions = []
         for blueprint in self.get_item_options_blueprint():
             reverse_name = blueprint.get("reverse_name")
             # reverse the URL with obj.pk
             if reverse_name:
-                link = reverse_lazy(reverse_name, args=[obj.pk])
+                link = reverse_lazy(reverse_name, args=[pk])
             else:
                 link = None
             actions.append(
@@ -272,141 +240,51 @@ class BaseViewComTableOptionsMixin:
 
 #* Mixins especializados
 class HomeQuickInfoMixin(AtivosQuerysetMixin, ViewComQuickInfoMixin):
-    DEFAULT_TOLERANCIA_ATENDIMENTOS_SEGUINTES: int = 2
-
-    def get_novos_clientes_ultimos_dias(self, tolerancia_dias: int = 7) -> str:
-        """
-        Especialização para menu Home/
-
-        Args:
-            tolerancia_dias (int, optional): quantos dias atrás. Default: 7.
-        """
-        hoje = timezone.make_aware(datetime.combine(date.today(), datetime.max.time()))
-        start = hoje - timedelta(days=tolerancia_dias)
-        end = hoje
-        quantidade = Cliente.objects.filter(
-            Q(data_criado__gte=start, data_criado__lte=end) & self.empresa_filter & self.ativos_filter
-        ).count()
-
-        return f"+{quantidade}"
-
-    def get_faturamento_da_semana(self) -> str:
-        hoje = timezone.make_aware(datetime.combine(date.today(), datetime.max.time()))
-        start = (hoje - timedelta(days=hoje.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
-        end = hoje
-        total = Agendamento.objects.aggregate(
-            sum=Sum(
-                'servico__preco',
-                filter=Q(
-                    data_agendado__gte=start,
-                    data_agendado__lte=end,
-                    status=AGENDAMENTO_STATUS_FINALIZADO,
-                ) & self.empresa_filter & self.ativos_filter
-            )
-        ).get('sum') or 0
-
-        return ConversionHelper.formatar_moeda(total)
-
-    def get_faturamento_do_mes(self) -> str:
-        hoje = timezone.make_aware(datetime.combine(date.today(), datetime.max.time()))
-        start = datetime.combine(hoje.replace(day=1), datetime.min.time())
-        end = hoje
-        total = Agendamento.objects.aggregate(
-                sum=Sum('servico__preco', filter=(
-                        Q(
-                            data_agendado__gte=start,
-                            data_agendado__lte=end,
-                            status=AGENDAMENTO_STATUS_FINALIZADO
-                        ) & self.empresa_filter & self.ativos_filter
-                    )
-                )
-            ).get('sum') or 0
-        
-        return f"{ConversionHelper.formatar_moeda(total)} no mês"
-
-    def get_atendimentos_proximas_horas(self, tolerancia_horas: int = DEFAULT_TOLERANCIA_ATENDIMENTOS_SEGUINTES) -> str:
-        """
-        Args:
-            horas (int, optional): quantas horas a partir de agora. Default: 1.
-        """
-        agora = timezone.now()
-        start = agora
-        end = agora + timedelta(hours=tolerancia_horas)
-        
-        quantidade = (
-            Agendamento.objects.filter(
-                Q(
-                    data_agendado__gte=start,
-                    data_agendado__lte=end,
-                    status__in=[AGENDAMENTO_STATUS_PENDENTE, AGENDAMENTO_STATUS_EXECUTANDO]
-                ) & self.empresa_filter & self.ativos_filter
-            ).count()
-        )
-
-        return f"{quantidade}"
-
-    def get_trabalhadores_ocupados_agora(self, tolerancia_minutos: int = 20) -> str:
-        """
-        Args:
-            tolerancia_minutos (int, optional): quantos minutos antes e depois de agora. Default: 20 (min.).
-        """
-        agora = timezone.now()
-        start = agora - timedelta(minutes=tolerancia_minutos)
-        end = agora + timedelta(minutes=tolerancia_minutos)
-        
-        quantidade = (
-            Trabalhador.objects.filter(
-                Q(
-                    agendamentos__status=AGENDAMENTO_STATUS_EXECUTANDO,
-                    agendamentos__data_agendado__gte=start,
-                    agendamentos__data_agendado__lte=end
-                ) & self.empresa_filter & self.ativos_filter
-            ).distinct().count()
-        )
-        
-        return f"{quantidade}"
-
-    def get_porcentagem_trabalhadores_ocupados(self) -> str:
-        total_ocupados_str = self.get_trabalhadores_ocupados_agora()
-        total_ocupados = int(total_ocupados_str) if total_ocupados_str.isdigit() else 0
-        total_trabalhadores = Trabalhador.objects.filter(
-            self.empresa_filter & self.ativos_filter
-        ).count()
-
-        if total_trabalhadores == 0:
-            return "0%"
-        porcentagem = (total_ocupados / total_trabalhadores) * 100
-        return f"{porcentagem:.0f}%"
+    """
+    Especialização para menu Home/
+    Os números vêm de core.metricas: uma consulta, em cache por empresa.
+    """
+    def get_metricas(self) -> MetricasHome:
+        if not hasattr(self, '_metricas'):
+            self._metricas = get_metricas_home(self.request.empresa)
+        return self._metricas
 
     def get_item_querys(self):
-        tolerancia_novos_clientes = 7
+        return self.montar_itens(self.get_metricas())
 
+    @staticmethod
+    def montar_itens(metricas: MetricasHome) -> list[dict]:
+        """Itens exibidos a partir dos indicadores; 'chave' identifica o item nas atualizações em tempo real."""
         return [
             {
+                'chave': 'clientes',
                 'header': 'Clientes novos na semana',
-                'value': self.get_novos_clientes_ultimos_dias(tolerancia_novos_clientes),
-                'conclusion': f'de um total de {Cliente.objects.filter(self.empresa_filter & self.ativos_filter).count()} atuais',
+                'value': f"+{metricas.clientes_novos}",
+                'conclusion': f'de um total de {metricas.clientes_total} atuais',
                 'fa_icon': 'user',
                 'link_module': reverse_lazy('cadastros:clientes:list')
             },
             {
+                'chave': 'faturamento',
                 'header': 'Faturamento da semana',
-                'value': self.get_faturamento_da_semana(),
-                'conclusion': self.get_faturamento_do_mes(),
+                'value': ConversionHelper.formatar_moeda(metricas.faturamento_semana),
+                'conclusion': f"{ConversionHelper.formatar_moeda(metricas.faturamento_mes)} no mês",
                 'fa_icon': 'dollar-sign',
                 'link_module': reverse_lazy('servicos:tipo_servicos:list')
             },
             {
+                'chave': 'atendimentos',
                 'header': 'Atendimentos a seguir',
-                'value': self.get_atendimentos_proximas_horas(),
-                'conclusion': f'nas próximas {self.DEFAULT_TOLERANCIA_ATENDIMENTOS_SEGUINTES} horas',
+                'value': f"{metricas.atendimentos_seguintes}",
+                'conclusion': f'nas próximas {HORAS_ATENDIMENTOS_SEGUINTES} horas',
                 'fa_icon': 'clock',
                 'link_module': reverse_lazy('servicos:agendamentos:list')
             },
             {
+                'chave': 'trabalhadores',
                 'header': 'Trabalhadores ocupados',
-                'value': self.get_trabalhadores_ocupados_agora(),
-                'conclusion': f'{self.get_porcentagem_trabalhadores_ocupados()} de todos estão ocupados',
+                'value': f"{metricas.trabalhadores_ocupados}",
+                'conclusion': f'{metricas.porcentagem_trabalhadores_ocupados:.0f}% de todos estão ocupados',
                 'fa_icon': 'briefcase',
                 'link_module': reverse_lazy('cadastros:trabalhadores:list')
             }
@@ -21,8 +21,16 @@ class BaseModel(models.Model):
         blank=False
     )
 
+    # campos que compõem o __str__: as listagens montam o texto a partir dessas colunas,
+    # sem carregar a instância (ver BaseDynamicListView)
+    campos_str: tuple[str, ...] = ('id', 'nome')
+
+    @classmethod
+    def formatar_str(cls, id, nome) -> str:
+        return f"{id} - {nome}"
+
     def __str__(self):
-        return f"{self.id} - {self.nome}"
+        return self.formatar_str(*(getattr(self, campo) for campo in self.campos_str))
 
     class Meta:
         abstract = True
@@ -1,12 +1,19 @@
-from django.core.exceptions import ImproperlyConfigured
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import FileField
 from django.views.generic import TemplateView, ListView, FormView, UpdateView #, CreateView, UpdateView #? DeleteView não recomendado, apenas inativar o registro.
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import NoReverseMatch, reverse
 from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.text import slugify
 from django.shortcuts import redirect
 from django.contrib import messages
 
 from core.bases.mixins import DateSearchMixin, HomeQuickInfoMixin, HomeQuickActionMixin, ViewComWorkerStatusMixin
+from core.exportacao import gerar_csv
+from core.paginacao import PARAMETRO_ANTES, PARAMETRO_APOS, paginar_por_cursor, url_com_cursor
+from core.types import ColunaListagem, EspecificacaoListagem, PaginaCursor
 from cadastros.empresas.models import Empresa
 from cadastros.empresas.mixins import EscopoEmpresaQuerysetMixin
 
@@ -28,9 +35,63 @@ class BaseDynamicListView(DateSearchMixin, ListView):
     Uma view para iterar sobre campos de objetos.
     var 'model' deve ser definido.
     método 'get_field_order' deve ser definido.
+    Paginada por cursor em (data_criado, pk): 'paginate_by' registros por página.
+    Cabeçalhos, colunas e URL de criação são calculados na primeira request de cada
+    classe (ver get_especificacao): 'get_fields_display' não deve depender da request.
+    Com '?formato=csv', exporta todos os registros filtrados (ver core.exportacao).
     """
+    paginate_by = 50
+    parametro_formato = "formato"
+    tipo_sugestoes: str | None = None # chave de core.sugestoes.CONSULTAS, para sugerir enquanto digita
+    export_chunk_size = 2000 # registros por fetch do iterator() na exportação
+
+    # registro das especificações por classe de view, compartilhado entre requests
+    _especificacoes: dict[type, EspecificacaoListagem] = {}
+
     def get_queryset(self):
-        return super().get_queryset().order_by("-data_criado")
+        return super().get_queryset().order_by("-data_criado", "-pk")
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get(self.parametro_formato) == "csv":
+            self.object_list = self.get_queryset()
+            return self.exportar_csv()
+        return super().get(request, *args, **kwargs)
+
+    def exportar_csv(self) -> StreamingHttpResponse:
+        """
+        Todos os registros da listagem (busca e filtros de data atuais, sem paginação)
+        com as mesmas colunas, em CSV gerado durante o envio.
+        """
+        especificacao = self.get_especificacao()
+        linhas = (
+            [coluna.exibir(linha) for coluna in especificacao.colunas]
+            for linha in self.object_list.values(*especificacao.valores).iterator(chunk_size=self.export_chunk_size)
+        )
+
+        response = StreamingHttpResponse(gerar_csv(especificacao.cabecalhos, linhas), content_type='text/csv; charset=utf-8')
+        nome = f"{slugify(self.model._meta.verbose_name_plural)}_{timezone.localdate():%Y-%m-%d}.csv"
+        response['Content-Disposition'] = f'attachment; filename="{nome}"'
+        return response
+
+    def get_url_exportar_csv(self) -> str:
+        """Query string da exportação: mesmos filtros, sem o cursor da página."""
+        parametros = self.request.GET.copy()
+        parametros.pop(PARAMETRO_APOS, None)
+        parametros.pop(PARAMETRO_ANTES, None)
+        parametros[self.parametro_formato] = "csv"
+        return f"?{parametros.urlencode()}"
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Substitui o Paginator do Django (COUNT(*) e OFFSET, mais lento a cada página)
+        pela paginação por cursor de core.paginacao.
+        """
+        itens, cursor_anterior, cursor_proximo = paginar_por_cursor(queryset, self.request.GET, page_size)
+        pagina = PaginaCursor(
+            url_anterior=url_com_cursor(self.request.GET, PARAMETRO_ANTES, cursor_anterior) if cursor_anterior else None,
+            url_proxima=url_com_cursor(self.request.GET, PARAMETRO_APOS, cursor_proximo) if cursor_proximo else None
+        )
+        return (None, pagina, itens, pagina.tem_outras_paginas)
 
     def get_fields_display(self):
         """
@@ -68,64 +129,108 @@ class BaseDynamicListView(DateSearchMixin, ListView):
 
             return (app_name_plural, url)
         
-    def create_object_dict_for_display(self, obj: object, fields: list[str], getter: list) -> dict:
-        """Cria um dicionário para um único objeto usando os acessadores pré-calculados."""
-        object_dict = {
-            field: accessor(obj)
-            for field, accessor in zip(fields, getter)
-        }
-        object_dict['pk'] = obj.pk  # certifique-se que pk está incluído
+    def criar_coluna(self, campo: str) -> ColunaListagem:
+        """
+        Colunas buscadas para exibir 'campo', e como exibi-las:
+        choices pelo dict de rótulos, FKs pelo __str__ do relacionado montado das colunas do join
+        (ver BaseModel.campos_str), arquivos pela URL do storage.
+        """
+        try:
+            field = self.model._meta.get_field(campo)
+        except FieldDoesNotExist:
+            # anotação (annotation) do queryset
+            return ColunaListagem(campo, (campo,))
+
+        if field.many_to_one:
+            relacionado = field.related_model
+            campos_str = getattr(relacionado, 'campos_str', None)
+            if campos_str is None:
+                return ColunaListagem(campo, (f"{campo}_id",))
+
+            def formatar_relacionado(*valores, formatar=relacionado.formatar_str):
+                # FK nula: nenhuma coluna do join vem preenchida
+                if all(valor is None for valor in valores):
+                    return None
+                return formatar(*valores)
+
+            return ColunaListagem(campo, tuple(f"{campo}__{c}" for c in campos_str), formatar_relacionado)
+
+        if field.choices:
+            rotulos = dict(field.flatchoices)
+            return ColunaListagem(campo, (campo,), lambda valor: rotulos.get(valor, valor))
+
+        if isinstance(field, FileField):
+            storage = field.storage
+            return ColunaListagem(campo, (campo,), lambda nome: storage.url(nome) if nome else "")
+
+        return ColunaListagem(campo, (campo,))
+
+    def get_colunas(self) -> list[ColunaListagem]:
+        return [self.criar_coluna(campo) for campo in self.get_fields_display()]
+
+    def get_verbose_name(self, campo: str) -> str:
+        """Obtém o verbose_name de um campo do modelo ou retorna o nome do campo."""
+        try:
+            return self.model._meta.get_field(campo).verbose_name
+        except FieldDoesNotExist:
+            # O campo pode ser uma anotação (annotation) ou propriedade, que não está em _meta.
+            # Retorna o nome do campo formatado.
+            return campo.replace('_', ' ').title()
+
+    def criar_especificacao(self) -> EspecificacaoListagem:
+        colunas = self.get_colunas()
+        app_name = url_create = None
+        if not self.model is Empresa:
+            app_name, url_create = self.get_create_form_app_name_and_url()
+
+        return EspecificacaoListagem(
+            # Adiciona os campos anotados aos nomes de exibição
+            cabecalhos=tuple(self.get_verbose_name(coluna.nome) for coluna in colunas),
+            colunas=tuple(colunas),
+            valores=tuple(dict.fromkeys(['pk', 'data_criado', *(valor for coluna in colunas for valor in coluna.valores)])),
+            app_name=app_name,
+            url_create=url_create,
+            url_sugestoes=reverse('core:sugestoes', args=[self.tipo_sugestoes]) if self.tipo_sugestoes else None
+        )
+
+    def get_especificacao(self) -> EspecificacaoListagem:
+        """Especificação desta classe de view: calculada na primeira request, depois reutilizada."""
+        especificacao = self._especificacoes.get(type(self))
+        if especificacao is None:
+            # corrida entre threads só recalcula o mesmo valor
+            especificacao = self._especificacoes[type(self)] = self.criar_especificacao()
+        return especificacao
+
+    def create_object_dict_for_display(self, linha: dict, colunas: tuple[ColunaListagem, ...]) -> dict:
+        """Cria o dicionário exibido para uma linha de values()."""
+        object_dict = {coluna.nome: coluna.exibir(linha) for coluna in colunas}
+        object_dict['pk'] = linha['pk']  # certifique-se que pk está incluído
         return object_dict
 
     def get_context_data(self, **kwargs):
-        def get_verbose_name(field_name):
-            """Obtém o verbose_name de um campo do modelo ou retorna o nome do campo."""
-            try:
-                return self.model._meta.get_field(field_name).verbose_name
-            except Exception:
-                # O campo pode ser uma anotação (annotation) ou propriedade, que não está em _meta.
-                # Retorna o nome do campo formatado.
-                return field_name.replace('_', ' ').title()
-        
-
-        contexto = super().get_context_data(**kwargs)
-
-        field_order = self.get_fields_display()
-
-        # Adiciona os campos anotados aos nomes de exibição
-        # (A validação anterior foi removida para permitir campos anotados)
-        contexto['field_names'] = [
-            get_verbose_name(field) for field in field_order
-        ]
-
+        especificacao = self.get_especificacao()
 
-        # Otimização: Em vez de verificar a existência de 'get_..._display' para cada célula,
-        # criamos uma lista de "getters" uma vez e a reutilizamos para cada objeto.
-        fields_getters = []
-        for field in field_order:
-            # Tenta obter o método get_<field>_display
-            display_method = getattr(self.model, f"get_{field}_display", None)
-            if callable(display_method):
-                # Se o método existir no modelo (ex: de um choices), usa ele.
-                # Usamos uma lambda para capturar o 'field' e aplicá-lo ao objeto na iteração.
-                fields_getters.append(lambda obj, f=field: getattr(obj, f"get_{f}_display")())
-            else:
-                # Caso contrário, acessa o atributo diretamente.
-                fields_getters.append(lambda obj, f=field: getattr(obj, f))
+        # Otimização: em vez de carregar as instâncias inteiras (imagem, endereço, FKs...),
+        # busca só as colunas exibidas com values(); os rótulos são resolvidos por coluna, uma vez.
+        kwargs.setdefault('object_list', self.object_list.values(*especificacao.valores))
 
+        contexto = super().get_context_data(**kwargs)
 
+        contexto['field_names'] = list(especificacao.cabecalhos)
         contexto['object_dicts'] = [
-            self.create_object_dict_for_display(obj, field_order, fields_getters)
-            for obj in contexto['object_list']
+            self.create_object_dict_for_display(linha, especificacao.colunas)
+            for linha in contexto['object_list']
         ]
 
         if not self.model is Empresa:
-            contexto['app_name'], contexto['url_submodule_create'] = self.get_create_form_app_name_and_url()
+            contexto['app_name'], contexto['url_submodule_create'] = especificacao.app_name, especificacao.url_create
 
         contexto["project_title"] = settings.PROJECT_TITLE
         contexto['description'] = f"Veja a listagem de tudo, verifique e modifique os dados que precisar."
-        contexto['search'] = self.request.GET.get("search", "")
+        contexto['search'] = self.request.GET.get("query", "")
         contexto['data_search_name'] = "de Criação"
+        contexto['url_exportar_csv'] = self.get_url_exportar_csv()
+        contexto['url_sugestoes'] = especificacao.url_sugestoes
         contexto["sidebar"] = True
 
         return contexto
@@ -243,6 +348,7 @@ class DynamicSubmodulesView(LoginRequiredMixin, EscopoEmpresaQuerysetMixin, Base
 
 class SelecaoDynamicListView(BaseDynamicListView):
     template_name = "selection-menu.html"
+    selecao_multipla = False # checkboxes em vez de radio buttons
 
     def get_selecao_or_redirect(self, request) -> str:
         selecao_id = request.POST.get("selecao_id")
@@ -250,3 +356,12 @@ class SelecaoDynamicListView(BaseDynamicListView):
             redirect(self.request.path)
 
         return selecao_id
+
+    def get_selecoes(self, request) -> list[int]:
+        """IDs marcados (selecao_multipla); valores que não são números são ignorados."""
+        return [int(selecao_id) for selecao_id in request.POST.getlist("selecao_id") if selecao_id.isdigit()]
+
+    def get_context_data(self, **kwargs):
+        contexto = super().get_context_data(**kwargs)
+        contexto['selecao_multipla'] = self.selecao_multipla
+        return contexto
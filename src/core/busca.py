@@ -0,0 +1,276 @@
+"""
+Busca textual das listagens (parâmetro 'query') com índices FTS5 do SQLite.
+
+Cada model buscável tem uma tabela virtual FTS5 (rowid = pk do registro, empresa_id
+não indexado para o escopo da empresa), mantida por triggers na tabela de origem:
+inserts, updates e deletes, inclusive bulk_create e QuerySet.update, atualizam o
+índice na mesma transação. Os nomes de cliente, serviço e trabalhador exibidos no
+índice dos agendamentos também são atualizados quando mudam nas suas tabelas.
+
+O tokenizer ignora acentos e maiúsculas, e cada palavra buscada é um prefixo
+("jose sil" encontra "José da Silva"). Como o repositório não versiona migrations,
+os índices são removidos antes de cada migrate e recriados após ele (ver core.signals;
+as triggers impediriam o SQLite de recriar as tabelas de origem ao alterar um campo) e
+podem ser recriados com o comando 'reconstruir_busca'. Em outros bancos, ou num SQLite sem FTS5, as views
+usam os filtros icontains de antes.
+"""
+import logging
+import re
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from core.types import IndiceBusca
+from cadastros.clientes.models import Cliente
+from cadastros.trabalhadores.models import Trabalhador
+from servicos.tipo_servicos.models import TipoServico
+from servicos.agendamentos.models import Agendamento
+
+
+logger = logging.getLogger(__name__)
+
+TOKENIZER = "unicode61 remove_diacritics 2"
+PREFIXOS = "2 3" # tamanhos de prefixo pré-indexados
+LIMITE_RESULTADOS = 50
+
+_PALAVRA = re.compile(r"\w+")
+_DIGITO = re.compile(r"\d")
+
+
+def _telefone(linha: str) -> str:
+    # só dígitos, com e sem o código do país: "11 99999" encontra "+55 (11) 99999-0000"
+    digitos = f"replace(replace(replace({linha}.telefone, '+', ''), '-', ''), '.', '')"
+    return f"{digitos} || CASE WHEN {linha}.telefone LIKE '+55%' THEN ' ' || substr({digitos}, 3) ELSE '' END"
+
+
+def _colunas_pessoa(linha: str) -> dict[str, str]:
+    return {
+        'nome': f"{linha}.nome",
+        'cpf': f"{linha}.cpf",
+        'telefone': _telefone(linha),
+        'endereco': f"{linha}.endereco",
+    }
+
+
+def _nome_relacionado(model: type, fk: str):
+    return lambda linha: f"(SELECT nome FROM {model._meta.db_table} WHERE id = {linha}.{fk})"
+
+
+CAMPOS_PESSOA = ('nome', 'cpf', 'telefone', 'endereco', 'empresa_id')
+PESOS_PESSOA = (10.0, 5.0, 5.0, 1.0) # o nome pesa mais que o endereço
+
+INDICES: tuple[IndiceBusca, ...] = (
+    IndiceBusca(
+        tabela="busca_clientes",
+        model=Cliente,
+        colunas=_colunas_pessoa,
+        campos=CAMPOS_PESSOA,
+        pesos=PESOS_PESSOA
+    ),
+    IndiceBusca(
+        tabela="busca_trabalhadores",
+        model=Trabalhador,
+        colunas=_colunas_pessoa,
+        campos=CAMPOS_PESSOA,
+        pesos=PESOS_PESSOA
+    ),
+    IndiceBusca(
+        tabela="busca_tipo_servicos",
+        model=TipoServico,
+        colunas=lambda linha: {'nome': f"{linha}.nome"},
+        campos=('nome', 'empresa_id')
+    ),
+    IndiceBusca(
+        tabela="busca_agendamentos",
+        model=Agendamento,
+        colunas=lambda linha: {
+            'cliente': _nome_relacionado(Cliente, 'cliente_id')(linha),
+            'servico': _nome_relacionado(TipoServico, 'servico_id')(linha),
+            'trabalhador': _nome_relacionado(Trabalhador, 'trabalhador_id')(linha),
+        },
+        campos=('cliente_id', 'servico_id', 'trabalhador_id', 'empresa_id'),
+        dependencias=(
+            (Cliente, 'cliente_id', ('nome',)),
+            (TipoServico, 'servico_id', ('nome',)),
+            (Trabalhador, 'trabalhador_id', ('nome',)),
+        )
+    ),
+)
+
+_INDICES_POR_MODEL: dict[type, IndiceBusca] = {indice.model: indice for indice in INDICES}
+
+# aliases de banco com os índices criados: só o resultado positivo é guardado, então um
+# processo que iniciou antes do migrate passa a usar os índices quando eles são criados
+_disponivel: dict[str, bool] = {}
+
+
+#* Definição (DDL)
+def _inserir(indice: IndiceBusca, linha: str, origem: str = "") -> str:
+    colunas = indice.colunas(linha)
+    return (
+        f"INSERT INTO {indice.tabela}(rowid, empresa_id, {', '.join(colunas)}) "
+        f"SELECT {linha}.id, {linha}.empresa_id, {', '.join(colunas.values())} {origem};"
+    )
+
+
+def _alterou(campos: tuple[str, ...]) -> str:
+    # UPDATE OF dispara com a coluna no SET, mesmo sem mudar (o save() grava todas as colunas)
+    return " OR ".join(f"old.{campo} IS NOT new.{campo}" for campo in campos)
+
+
+def sql_criacao(indice: IndiceBusca) -> list[str]:
+    """Tabela virtual e triggers de sincronização do índice."""
+    origem = indice.model._meta.db_table
+    colunas = ", ".join(indice.colunas("new"))
+    comandos = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {indice.tabela} USING fts5("
+        f"empresa_id UNINDEXED, {colunas}, tokenize='{TOKENIZER}', prefix='{PREFIXOS}')",
+
+        f"CREATE TRIGGER IF NOT EXISTS {indice.tabela}_ai AFTER INSERT ON {origem} BEGIN "
+        f"{_inserir(indice, 'new')} END",
+
+        f"CREATE TRIGGER IF NOT EXISTS {indice.tabela}_ad AFTER DELETE ON {origem} BEGIN "
+        f"DELETE FROM {indice.tabela} WHERE rowid = old.id; END",
+
+        f"CREATE TRIGGER IF NOT EXISTS {indice.tabela}_au AFTER UPDATE OF {', '.join(indice.campos)} ON {origem} "
+        f"WHEN {_alterou(indice.campos)} BEGIN "
+        f"DELETE FROM {indice.tabela} WHERE rowid = old.id; {_inserir(indice, 'new')} END",
+    ]
+    if indice.pesos:
+        # 'rank' passa a usar os pesos (empresa_id, não indexado, tem peso 0)
+        pesos = ", ".join(str(peso) for peso in (0, *indice.pesos))
+        comandos.append(f"INSERT INTO {indice.tabela}({indice.tabela}, rank) VALUES ('rank', 'bm25({pesos})')")
+    for model, fk, campos in indice.dependencias:
+        relacionado = model._meta.db_table
+        comandos.append(
+            f"CREATE TRIGGER IF NOT EXISTS {indice.tabela}_{relacionado}_au "
+            f"AFTER UPDATE OF {', '.join(campos)} ON {relacionado} WHEN {_alterou(campos)} BEGIN "
+            f"DELETE FROM {indice.tabela} WHERE rowid IN (SELECT id FROM {origem} WHERE {fk} = new.id); "
+            f"{_inserir(indice, 'o', f'FROM {origem} o WHERE o.{fk} = new.id')} END"
+        )
+    return comandos
+
+
+def sql_remocao(indice: IndiceBusca) -> list[str]:
+    gatilhos = [f"{indice.tabela}_ai", f"{indice.tabela}_ad", f"{indice.tabela}_au"]
+    gatilhos += [f"{indice.tabela}_{model._meta.db_table}_au" for model, _, _ in indice.dependencias]
+    return [f"DROP TRIGGER IF EXISTS {gatilho}" for gatilho in gatilhos] + [f"DROP TABLE IF EXISTS {indice.tabela}"]
+
+
+def _tabela_existe(cursor, tabela: str) -> bool:
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [tabela])
+    return cursor.fetchone() is not None
+
+
+def criar_indices(using: str = "default", recriar: bool = False) -> int:
+    """
+    Cria os índices que ainda não existem, preenchidos com os registros atuais
+    ('recriar' apaga e recria todos, para mudanças na definição). Retorna quantos foram preenchidos.
+    """
+    conexao = connections[using]
+    if conexao.vendor != 'sqlite':
+        return 0
+
+    preenchidos = 0
+    try:
+        with transaction.atomic(using=using), conexao.cursor() as cursor:
+            for indice in INDICES:
+                if recriar:
+                    for comando in sql_remocao(indice):
+                        cursor.execute(comando)
+                novo = not _tabela_existe(cursor, indice.tabela)
+                for comando in sql_criacao(indice):
+                    cursor.execute(comando)
+                if novo:
+                    cursor.execute(_inserir(indice, 'o', f"FROM {indice.model._meta.db_table} o"))
+                    preenchidos += 1
+    except DatabaseError as e:
+        # SQLite compilado sem FTS5: as buscas continuam com icontains
+        logger.warning("Índices de busca FTS5 não foram criados (%s); usando buscas por icontains.", e)
+        _disponivel.pop(using, None)
+        return 0
+
+    _disponivel[using] = True
+    return preenchidos
+
+
+def remover_indices(using: str = "default") -> None:
+    """Remove os índices e suas triggers (recriados e preenchidos de novo por criar_indices)."""
+    conexao = connections[using]
+    if conexao.vendor != 'sqlite':
+        return
+
+    _disponivel.pop(using, None)
+    with transaction.atomic(using=using), conexao.cursor() as cursor:
+        for indice in INDICES:
+            for comando in sql_remocao(indice):
+                cursor.execute(comando)
+
+
+def busca_disponivel(using: str = "default") -> bool:
+    if _disponivel.get(using):
+        return True
+
+    conexao = connections[using]
+    if conexao.vendor != 'sqlite':
+        return False
+    with conexao.cursor() as cursor:
+        if all(_tabela_existe(cursor, indice.tabela) for indice in INDICES):
+            _disponivel[using] = True
+            return True
+    return False
+
+
+#* Consulta
+def expressao_busca(query: str) -> str | None:
+    """
+    Expressão MATCH do FTS5: todas as palavras, cada uma como prefixo. Se houver dígitos
+    separados por pontuação (CPF, telefone), também os dígitos juntos, como um prefixo.
+    """
+    palavras = _PALAVRA.findall(query)
+    if not palavras:
+        return None
+
+    expressao = " ".join(f'"{palavra}"*' for palavra in palavras)
+    digitos = "".join(_DIGITO.findall(query))
+    if digitos and palavras != [digitos]:
+        expressao = f'({expressao}) OR "{digitos}"*'
+    return expressao
+
+
+def _consulta(indice: IndiceBusca, expressao: str, empresa_id: int | None) -> tuple[str, list]:
+    sql = f"SELECT rowid FROM {indice.tabela} WHERE {indice.tabela} MATCH %s"
+    parametros = [expressao]
+    if empresa_id is not None:
+        sql += " AND empresa_id = %s"
+        parametros.append(empresa_id)
+    return sql, parametros
+
+
+def buscar_ids(model: type, query: str, empresa_id: int | None, limite: int = LIMITE_RESULTADOS) -> list[int]:
+    """IDs de 'model' que correspondem a 'query', do mais relevante (bm25) ao menos."""
+    expressao = expressao_busca(query)
+    if expressao is None or not busca_disponivel():
+        return []
+
+    sql, parametros = _consulta(_INDICES_POR_MODEL[model], expressao, empresa_id)
+    with connections['default'].cursor() as cursor:
+        cursor.execute(f"{sql} ORDER BY rank LIMIT %s", [*parametros, limite])
+        return [pk for pk, in cursor.fetchall()]
+
+
+def filtro_busca(model: type, query: str, empresa_id: int | None, alternativa: Q) -> Q:
+    """
+    Filtro dos registros de 'model' que correspondem a 'query', como subconsulta ao índice
+    (a ordem da listagem é mantida). Sem índice, ou sem palavras na busca, usa 'alternativa'.
+    """
+    expressao = expressao_busca(query)
+    if expressao is None or not busca_disponivel():
+        return alternativa
+
+    return Q(pk__in=RawSQL(*_consulta(_INDICES_POR_MODEL[model], expressao, empresa_id)))
+
+
+def filtrar_busca(queryset: QuerySet, query: str, empresa_id: int | None, alternativa: Q) -> QuerySet:
+    return queryset.filter(filtro_busca(queryset.model, query, empresa_id, alternativa))
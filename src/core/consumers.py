@@ -0,0 +1,46 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from core.tempo_real import grupo_empresa
+from cadastros.empresas.models import Empresa
+
+
+class DashboardConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Websocket da Home e da planilha diária: entra no grupo da empresa da sessão
+    e repassa ao navegador os eventos enviados por core.tempo_real. Somente leitura.
+    """
+    grupo: str | None = None
+
+    async def connect(self):
+        empresa_id = await self.get_empresa_id()
+        if empresa_id is None:
+            await self.close()
+            return
+
+        self.grupo = grupo_empresa(empresa_id)
+        await self.channel_layer.group_add(self.grupo, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if self.grupo:
+            await self.channel_layer.group_discard(self.grupo, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        pass
+
+    async def dashboard_evento(self, mensagem: dict):
+        await self.send_json({'evento': mensagem['evento'], 'dados': mensagem['dados']})
+
+    @database_sync_to_async
+    def get_empresa_id(self) -> int | None:
+        """Empresa selecionada na sessão, se pertence ao usuário logado (como em ContextoEmpresaMixin)."""
+        user = self.scope.get('user')
+        session = self.scope.get('session')
+        if user is None or not user.is_authenticated or session is None:
+            return None
+
+        empresa_id = session.get("empresa_id", None)
+        if not empresa_id or not Empresa.objects.filter(id=empresa_id, user_id=user.id).exists():
+            return None
+        return empresa_id
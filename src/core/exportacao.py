@@ -0,0 +1,49 @@
+"""
+Exportação das listagens (BaseDynamicListView) em CSV, gerado aos poucos.
+
+As linhas vêm de um iterator() do queryset e o texto é enviado em blocos de
+LINHAS_POR_BLOCO linhas pelo StreamingHttpResponse: a memória usada não depende do
+tamanho da listagem, e nenhum template é renderizado.
+O formato segue o Excel em pt-BR: ';' como separador, números e datas localizados
+e BOM UTF-8 (acentos corretos ao abrir o arquivo).
+"""
+import csv
+import io
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime
+
+from django.utils import formats, timezone
+
+
+DELIMITADOR = ";"
+LINHAS_POR_BLOCO = 500
+CARACTERES_FORMULA = ("=", "+", "-", "@", "\t", "\r") # início de fórmula no Excel
+
+
+def valor_csv(valor) -> str:
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        valor = timezone.localtime(valor) if timezone.is_aware(valor) else valor
+        return formats.date_format(valor, "SHORT_DATETIME_FORMAT")
+    if isinstance(valor, date):
+        return formats.date_format(valor, "SHORT_DATE_FORMAT")
+    if isinstance(valor, str):
+        # texto digitado pelo usuário não é executado como fórmula ao abrir a planilha
+        return f"'{valor}" if valor.startswith(CARACTERES_FORMULA) else valor
+    return formats.localize(valor)
+
+
+def gerar_csv(cabecalhos: Iterable[str], linhas: Iterable[Iterable], linhas_por_bloco: int = LINHAS_POR_BLOCO) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=DELIMITADOR)
+
+    buffer.write("\ufeff") # BOM: o Excel reconhece o UTF-8
+    writer.writerow(cabecalhos)
+    for numero, linha in enumerate(linhas, start=1):
+        writer.writerow([valor_csv(valor) for valor in linha])
+        if numero % linhas_por_bloco == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,290 @@
+"""
+Gerador de massa de dados para testes de desempenho.
+
+Cria empresas completas (clientes, trabalhadores, serviços e anos de agendamentos)
+com 'bulk_create' em lotes e distribuições próximas das reais: poucos clientes
+concentram muitos agendamentos, o movimento cresce ao longo do tempo, domingos
+são raros e o status depende de o agendamento já ter passado ou não.
+
+Tudo é derivado de ConfiguracaoGerador.seed (e da data de referência), então a
+mesma configuração gera os mesmos dados em um banco vazio.
+"""
+import random
+from collections.abc import Callable
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from core.bases.models import BaseModel
+from core.types import ConfiguracaoGerador
+from cadastros.empresas.models import Empresa
+from cadastros.clientes.models import Cliente
+from cadastros.trabalhadores.models import Trabalhador
+from servicos.tipo_servicos.models import TipoServico
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.choices import (
+    AGENDAMENTO_STATUS_PENDENTE,
+    AGENDAMENTO_STATUS_EXECUTANDO,
+    AGENDAMENTO_STATUS_FINALIZADO,
+    AGENDAMENTO_STATUS_CANCELADO
+)
+from cadastros.trabalhadores.ocupacao import reconstruir_estados
+from cadastros.trabalhadores.contadores import reconciliar_contadores
+from relatorios.rollups import reconstruir_resumos
+
+
+# (nome, preço mínimo, preço máximo, peso na procura, duração em minutos)
+CATALOGO_SERVICOS = [
+    ("Corte Masculino", 35, 70, 10, 30),
+    ("Corte Feminino", 60, 120, 8, 60),
+    ("Barba", 25, 50, 6, 30),
+    ("Escova", 40, 80, 5, 45),
+    ("Manicure", 30, 50, 6, 45),
+    ("Pedicure", 35, 60, 4, 45),
+    ("Hidratação", 60, 150, 3, 60),
+    ("Sobrancelha", 25, 45, 3, 15),
+    ("Coloração", 120, 300, 2, 120),
+    ("Penteado", 90, 200, 1, 90),
+    ("Progressiva", 180, 400, 1, 180),
+    ("Luzes", 200, 450, 1, 180),
+]
+PREFIXOS_EMPRESA = ["Salão", "Barbearia", "Studio", "Espaço", "Ateliê"]
+DDDS = ["11", "21", "31", "41", "51", "61", "71", "81"]
+
+# horários de atendimento: 08:00 às 19:30, a cada 30 minutos
+HORARIOS = [time(hora, minuto) for hora in range(8, 20) for minuto in (0, 30)]
+JANELA_EXECUTANDO = timedelta(hours=1)
+MODELS_GERADOS = [Empresa, Cliente, Trabalhador, TipoServico, Agendamento]
+
+
+def digito_verificador(digitos: str, pesos) -> str:
+    """Dígito verificador módulo 11, usado por CPF e CNPJ."""
+    resto = sum(int(digito) * peso for digito, peso in zip(digitos, pesos)) % 11
+    return "0" if resto < 2 else str(11 - resto)
+
+
+def gerar_cpf(numero: int) -> str:
+    cpf = f"{100_000_000 + numero:09d}"
+    for _ in range(2):
+        cpf += digito_verificador(cpf, range(len(cpf) + 1, 1, -1))
+    return cpf
+
+
+def gerar_cnpj(numero: int) -> str:
+    cnpj = f"{10_000_000 + numero:08d}0001"
+    for _ in range(2):
+        # pesos de 2 a 9, repetidos da direita para a esquerda
+        cnpj += digito_verificador(cnpj, [2 + indice % 8 for indice in range(len(cnpj))][::-1])
+    return cnpj
+
+
+@contextmanager
+def datas_manuais():
+    """
+    Desliga auto_now/auto_now_add de 'data_criado'/'data_modificado' (BaseModel),
+    para que o histórico gerado tenha as próprias datas já no INSERT.
+    Apenas para uso em comandos: a alteração vale para o processo inteiro.
+    """
+    campos = [
+        model._meta.get_field(nome)
+        for model in MODELS_GERADOS
+        for nome in ('data_criado', 'data_modificado')
+    ]
+    originais = [(campo.auto_now, campo.auto_now_add) for campo in campos]
+    for campo in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, (auto_now, auto_now_add) in zip(campos, originais):
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+class GeradorDados:
+    def __init__(self, configuracao: ConfiguracaoGerador, usuario, hoje: date | None = None,
+                 ao_progredir: Callable[[str], None] | None = None):
+        self.configuracao = configuracao
+        self.usuario = usuario
+        self.hoje = hoje or timezone.localdate()
+        self.ao_progredir = ao_progredir or (lambda mensagem: None)
+
+        self.rng = random.Random(configuracao.seed)
+        self.fake = Faker('pt_BR')
+        self.fake.seed_instance(configuracao.seed)
+
+        # 'hoje' informado: execução reproduzível, ancorada no dia de referência; senão, o momento atual
+        self.reproduzivel = hoje is not None
+        self.agora = self.momento(self.hoje, time(12)) if self.reproduzivel else timezone.now()
+        self.dias_historico = max(1, round(configuracao.anos * 365))
+        self.primeiro_dia = self.hoje - timedelta(days=self.dias_historico)
+
+        # documentos e telefones sequenciais: únicos sem consultar o banco a cada registro
+        self.proximo_documento = Empresa.objects.count() + Cliente.objects.count() + Trabalhador.objects.count()
+
+    def proximo_numero(self) -> int:
+        self.proximo_documento += 1
+        return self.proximo_documento
+
+    def gerar_telefone(self, numero: int) -> str:
+        return f"+55{self.rng.choice(DDDS)}9{numero:08d}"
+
+    def momento(self, dia: date, horario: time) -> datetime:
+        return timezone.make_aware(datetime.combine(dia, horario))
+
+    def criar_em_lotes(self, model, objetos: list) -> list:
+        return model.objects.bulk_create(objetos, batch_size=self.configuracao.tamanho_lote)
+
+    def datar(self, objeto: BaseModel, criado: datetime, modificado: datetime | None = None) -> BaseModel:
+        objeto.data_criado = criado
+        objeto.data_modificado = modificado or criado
+        return objeto
+
+    #* Geração
+
+    def gerar(self) -> dict[str, int]:
+        """Gera todas as empresas da configuração e retorna os totais criados por model."""
+        totais = {'empresas': 0, 'clientes': 0, 'trabalhadores': 0, 'servicos': 0, 'agendamentos': 0}
+        for indice in range(self.configuracao.empresas):
+            with transaction.atomic(), datas_manuais():
+                empresa, criados = self.gerar_empresa()
+                # bulk_create não dispara os signals: dados derivados são reconstruídos ao final
+                reconstruir_resumos(empresa)
+                reconstruir_estados(empresa)
+                reconciliar_contadores(empresa)
+
+            totais['empresas'] += 1
+            for chave, quantidade in criados.items():
+                totais[chave] += quantidade
+            self.ao_progredir(f"[{indice + 1}/{self.configuracao.empresas}] {empresa}: {criados['agendamentos']} agendamentos")
+        return totais
+
+    def gerar_empresa(self) -> tuple[Empresa, dict[str, int]]:
+        configuracao = self.configuracao
+        inicio = self.momento(self.primeiro_dia - timedelta(days=30), time(9))
+
+        nome = f"{self.rng.choice(PREFIXOS_EMPRESA)} {self.fake.first_name()}"
+        empresa = Empresa(
+            cnpj=gerar_cnpj(self.proximo_numero()),
+            nome_fantasia=nome,
+            razao_social=f"{nome} {self.fake.company_suffix()}",
+            user=self.usuario
+        )
+        self.datar(empresa, inicio).save()
+
+        servicos = self.gerar_servicos(empresa, inicio)
+        trabalhadores = self.criar_pessoas(Trabalhador, empresa, configuracao.trabalhadores, inicio)
+        clientes = self.criar_pessoas(Cliente, empresa, configuracao.clientes, inicio)
+
+        total_agendamentos = self.gerar_agendamentos(empresa, clientes, trabalhadores, servicos)
+
+        return empresa, {
+            'clientes': len(clientes),
+            'trabalhadores': len(trabalhadores),
+            'servicos': len(servicos),
+            'agendamentos': total_agendamentos,
+        }
+
+    def gerar_servicos(self, empresa: Empresa, inicio: datetime) -> list[tuple[TipoServico, float]]:
+        """Serviços do catálogo (com variações, se pedidos mais que o catálogo), com o peso de procura de cada um."""
+        servicos = []
+        for indice in range(self.configuracao.servicos):
+            nome, minimo, maximo, peso, duracao = CATALOGO_SERVICOS[indice % len(CATALOGO_SERVICOS)]
+            variacao = indice // len(CATALOGO_SERVICOS)
+            if variacao:
+                nome, peso = f"{nome} Premium {variacao}", peso / 2
+            preco = Decimal(self.rng.randrange(minimo, maximo + 1, 5)) * (1 + variacao)
+            servico = TipoServico(nome=nome, preco=preco, duracao=duracao, empresa=empresa)
+            servicos.append((self.datar(servico, inicio), peso))
+
+        criados = self.criar_em_lotes(TipoServico, [servico for servico, _ in servicos])
+        return [(servico, peso) for servico, (_, peso) in zip(criados, servicos)]
+
+    def criar_pessoas(self, model, empresa: Empresa, quantidade: int, inicio: datetime) -> list:
+        pessoas = []
+        for _ in range(quantidade):
+            numero = self.proximo_numero()
+            pessoas.append(self.datar(model(
+                nome=self.fake.name(),
+                cpf=gerar_cpf(numero),
+                telefone=self.gerar_telefone(numero),
+                endereco=self.fake.street_address(),
+                empresa=empresa
+            ), inicio))
+        return self.criar_em_lotes(model, pessoas)
+
+    def sortear_momento(self) -> datetime:
+        """Dia com movimento crescente ao longo do histórico, poucos domingos, em horário comercial."""
+        total_dias = self.dias_historico + self.configuracao.dias_futuros
+        dia = self.primeiro_dia + timedelta(days=int(self.rng.triangular(0, total_dias, total_dias * 0.8)))
+        if dia.weekday() == 6 and self.rng.random() < 0.9:
+            dia -= timedelta(days=1)
+        return self.momento(dia, self.rng.choice(HORARIOS))
+
+    def sortear_status(self, data_agendado: datetime) -> str:
+        configuracao = self.configuracao
+        sorteio = self.rng.random()
+        if data_agendado > self.agora:
+            return AGENDAMENTO_STATUS_CANCELADO if sorteio < configuracao.proporcao_cancelados_futuros else AGENDAMENTO_STATUS_PENDENTE
+        if sorteio < configuracao.proporcao_cancelados:
+            return AGENDAMENTO_STATUS_CANCELADO
+        if self.agora - data_agendado < JANELA_EXECUTANDO:
+            return AGENDAMENTO_STATUS_EXECUTANDO
+        if sorteio < configuracao.proporcao_cancelados + configuracao.proporcao_finalizados:
+            return AGENDAMENTO_STATUS_FINALIZADO
+        return AGENDAMENTO_STATUS_PENDENTE
+
+    def gerar_agendamentos(self, empresa: Empresa, clientes: list[Cliente], trabalhadores: list[Trabalhador],
+                           servicos: list[tuple[TipoServico, float]]) -> int:
+        """
+        Agendamentos em lotes; clientes recorrentes seguem uma distribuição de Pareto.
+        Ao final, cada cliente recebe como 'data_criado' o momento do seu primeiro agendamento.
+        """
+        total = self.configuracao.agendamentos
+        if not (clientes and trabalhadores and servicos):
+            return 0
+
+        pesos_clientes = list(accumulate(min(self.rng.paretovariate(1.2), 50) for _ in clientes))
+        pesos_trabalhadores = list(accumulate(self.rng.uniform(0.6, 1.4) for _ in trabalhadores))
+        pesos_servicos = list(accumulate(peso for _, peso in servicos))
+        primeiro_agendamento: dict[int, datetime] = {}
+
+        gerados = 0
+        while gerados < total:
+            quantidade = min(self.configuracao.tamanho_lote, total - gerados)
+            lote_clientes = self.rng.choices(clientes, cum_weights=pesos_clientes, k=quantidade)
+            lote_trabalhadores = self.rng.choices(trabalhadores, cum_weights=pesos_trabalhadores, k=quantidade)
+            lote_servicos = self.rng.choices(servicos, cum_weights=pesos_servicos, k=quantidade)
+
+            agendamentos = []
+            for cliente, trabalhador, (servico, _) in zip(lote_clientes, lote_trabalhadores, lote_servicos):
+                data_agendado = self.sortear_momento()
+                # marcado de algumas horas a algumas semanas antes
+                criado = min(data_agendado - timedelta(hours=self.rng.randint(2, 24 * 21)), self.agora)
+                if criado < primeiro_agendamento.get(cliente.pk, self.agora):
+                    primeiro_agendamento[cliente.pk] = criado
+
+                agendamentos.append(self.datar(Agendamento(
+                    data_agendado=data_agendado,
+                    status=self.sortear_status(data_agendado),
+                    cliente=cliente,
+                    servico=servico,
+                    preco=servico.preco,
+                    trabalhador=trabalhador,
+                    empresa=empresa
+                ), criado, min(data_agendado, self.agora)))
+
+            self.criar_em_lotes(Agendamento, agendamentos)
+            gerados += quantidade
+
+        clientes_datados = [
+            self.datar(cliente, primeiro_agendamento[cliente.pk])
+            for cliente in clientes if cliente.pk in primeiro_agendamento
+        ]
+        # UPDATE com CASE por linha: lotes menores para não degradar no SQLite
+        Cliente.objects.bulk_update(clientes_datados, ['data_criado', 'data_modificado'], batch_size=500)
+        return gerados
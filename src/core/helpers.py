@@ -1,4 +1,11 @@
+import calendar
 import locale
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.types import Periodo
 
 
 locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
@@ -11,6 +18,57 @@ class ConversionHelper:
         return locale.currency(value or 0.0, grouping=True, symbol=True)
 
 
+class PeriodoHelper:
+    """
+    Dias, semanas e meses como intervalos [inicio, fim) de datetimes aware, no fuso atual.
+    Use 'Periodo.filtro(campo)' no lugar de lookups '__date', que viram uma função
+    aplicada a cada linha e impedem o uso de índices na coluna.
+    """
+    @staticmethod
+    def inicio_do_dia(dia: date) -> datetime:
+        return timezone.make_aware(datetime.combine(dia, time.min))
+
+    @staticmethod
+    def dias(dia_inicio: date, dia_fim: date) -> Periodo:
+        """De 'dia_inicio' até 'dia_fim', inclusivos."""
+        return Periodo(
+            PeriodoHelper.inicio_do_dia(dia_inicio),
+            PeriodoHelper.inicio_do_dia(dia_fim + timedelta(days=1))
+        )
+
+    @staticmethod
+    def dia(dia: date) -> Periodo:
+        return PeriodoHelper.dias(dia, dia)
+
+    @staticmethod
+    def semana(dia: date) -> Periodo:
+        """Semana (segunda a domingo) que contém 'dia'."""
+        segunda = dia - timedelta(days=dia.weekday())
+        return PeriodoHelper.dias(segunda, segunda + timedelta(days=6))
+
+    @staticmethod
+    def mes(ano: int, mes: int) -> Periodo:
+        _, ultimo_dia = calendar.monthrange(ano, mes)
+        return PeriodoHelper.dias(date(ano, mes, 1), date(ano, mes, ultimo_dia))
+
+    @staticmethod
+    def ultimos_dias(quantidade: int, ate: date | None = None) -> Periodo:
+        """Os últimos 'quantidade' dias, terminando em 'ate' (padrão: hoje) inclusive."""
+        ate = ate or timezone.localdate()
+        return PeriodoHelper.dias(ate - timedelta(days=quantidade - 1), ate)
+
+    @staticmethod
+    def parse_data_hora(valor: str | None) -> datetime | None:
+        """Converte 'AAAA-MM-DD' ou 'AAAA-MM-DDTHH:MM' (inputs de filtro) para datetime aware."""
+        if not valor:
+            return None
+        try:
+            momento = parse_datetime(valor) or datetime.combine(date.fromisoformat(valor), time.min)
+        except ValueError:
+            return None
+        return momento if timezone.is_aware(momento) else timezone.make_aware(momento)
+
+
 class NegativeIntUrlConverter:
     regex = '-?\d+'
 
@@ -0,0 +1,43 @@
+import timeit
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from core.bases.views import BaseDynamicListView
+
+
+def listar_views(classe: type) -> list[type]:
+    """Subclasses concretas (com 'model') de 'classe', em ordem de nome."""
+    views = []
+    for subclasse in classe.__subclasses__():
+        if getattr(subclasse, 'model', None) is not None:
+            views.append(subclasse)
+        views += listar_views(subclasse)
+    return sorted(set(views), key=lambda view: view.__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Microbenchmark dos metadados das listagens (BaseDynamicListView): compara o custo por request "
+        "de recalcular cabeçalhos, colunas e URL de criação com o da especificação em cache por classe."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=2000, help="Chamadas medidas por view.")
+
+    def handle(self, *args, **kwargs):
+        repeticoes = kwargs['repeticoes']
+        import_module(settings.ROOT_URLCONF) # importa as views das listagens
+
+        request = RequestFactory().get("/")
+        self.stdout.write(f"{'view':<32}{'recalculado (µs)':>18}{'em cache (µs)':>16}")
+        for classe in listar_views(BaseDynamicListView):
+            view = classe()
+            view.setup(request)
+            view.get_especificacao() # primeira request da classe
+
+            recalculado = timeit.timeit(view.criar_especificacao, number=repeticoes) / repeticoes
+            em_cache = timeit.timeit(view.get_especificacao, number=repeticoes) / repeticoes
+            self.stdout.write(f"{classe.__name__:<32}{recalculado * 1e6:>18.1f}{em_cache * 1e6:>16.2f}")
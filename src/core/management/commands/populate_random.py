@@ -1,88 +1,68 @@
-from random import choice, random
+import time
+from datetime import date
 
-from django.core.management.base import BaseCommand
-from django.db import IntegrityError, models
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 User = get_user_model()
-from faker import Faker
-from validate_docbr import CPF, CNPJ
 
-from cadastros.clientes.models import Cliente
-from servicos.tipo_servicos.models import TipoServico
-from cadastros.trabalhadores.models import Trabalhador
-from cadastros.empresas.models import Empresa
-from servicos.agendamentos.models import Agendamento, C_TIPO_STATUS_AGENDAMENTO
+from core.gerador import GeradorDados
+from core.types import ConfiguracaoGerador
 
 
 class Command(BaseCommand):
-    help = "Cria dados aleatórios no banco de dados, para cada model"
+    help = (
+        "Cria dados aleatórios no banco de dados: empresas completas, com clientes, trabalhadores, "
+        "serviços e histórico de agendamentos. Determinístico a partir de --seed, para testes de desempenho."
+    )
 
     def add_arguments(self, parser):
+        padrao = ConfiguracaoGerador()
         parser.add_argument(
             'times',
             type=int,
             nargs='?',
-            default=1,
-            help="Número de registros de todos os models que o script deve gerar e commitar"
+            default=padrao.empresas,
+            help="Número de empresas a gerar"
+        )
+        parser.add_argument('--clientes', type=int, default=padrao.clientes, help="Clientes por empresa.")
+        parser.add_argument('--trabalhadores', type=int, default=padrao.trabalhadores, help="Trabalhadores por empresa.")
+        parser.add_argument('--servicos', type=int, default=padrao.servicos, help="Tipos de serviço por empresa.")
+        parser.add_argument('--agendamentos', type=int, default=padrao.agendamentos, help="Agendamentos por empresa.")
+        parser.add_argument('--anos', type=float, default=padrao.anos, help="Anos de histórico de agendamentos.")
+        parser.add_argument('--seed', type=int, default=padrao.seed, help="Semente dos dados gerados.")
+        parser.add_argument('--lote', type=int, default=padrao.tamanho_lote, help="Registros por INSERT.")
+        parser.add_argument(
+            '--hoje',
+            type=date.fromisoformat,
+            help="Data de referência (AAAA-MM-DD), para reproduzir a mesma massa em outro dia. Padrão: hoje."
+        )
+        parser.add_argument(
+            '--usuario',
+            help="Username dono das empresas geradas. Padrão: o primeiro usuário cadastrado."
         )
 
     def handle(self, *args, **kwargs):
-        total: int = kwargs.get('times', 1)
-        fake = Faker()
-        cpf = CPF()
-        cnpj = CNPJ()
+        if kwargs.get('usuario'):
+            usuario = User.objects.filter(username=kwargs['usuario']).first()
+        else:
+            usuario = User.objects.order_by('pk').first()
+        if usuario is None:
+            raise CommandError("Nenhum usuário encontrado: crie um (createsuperuser) ou informe --usuario.")
 
-        #cria manualmente objetos de model empresa
-        for _ in range(total):
-            nova_empresa = Empresa(
-                cnpj=cnpj.generate(),
-                nome_fantasia=fake.name(),
-                razao_social=fake.company(),
-                user=User.objects.first()
-            )
-            additions: list[models.Model] = [
-                nova_empresa,
-                Cliente(
-                    nome=fake.name(),
-                    cpf=cpf.generate(),
-                    telefone=fake.phone_number(),
-                    endereco=fake.address(),
-                    empresa=nova_empresa
-                ),
-                TipoServico(
-                    nome=f"{choice(['Corte', 'Limpeza', 'Hidratação'])}" + f" {choice(['Simples', 'Complexo', 'Completo', 'Barba'])}",
-                    preco=random() * 100,
-                    empresa=nova_empresa
-                ),
-                Trabalhador(
-                    nome=fake.name(),
-                    cpf=cpf.generate(),
-                    telefone=fake.phone_number(),
-                    endereco=fake.address(),
-                    empresa=nova_empresa
-                ),
-            ]
-            novo_agendamento = Agendamento(
-                data_agendado=fake.future_datetime(),
-                status=choice(C_TIPO_STATUS_AGENDAMENTO)[0],
-                empresa=additions[0],
-                cliente=additions[1],
-                servico=additions[2],
-                trabalhador=additions[3],
-            )
-            additions.append(novo_agendamento)
+        configuracao = ConfiguracaoGerador(
+            empresas=kwargs['times'],
+            clientes=kwargs['clientes'],
+            trabalhadores=kwargs['trabalhadores'],
+            servicos=kwargs['servicos'],
+            agendamentos=kwargs['agendamentos'],
+            anos=kwargs['anos'],
+            seed=kwargs['seed'],
+            tamanho_lote=kwargs['lote']
+        )
 
-            #insere no banco
-            for addition in additions:
-                try:
-                    addition.save()
-                except IntegrityError:
-                    failed_class = addition.__class__
-                    index_addition = additions.index(addition)
+        inicio = time.perf_counter()
+        gerador = GeradorDados(configuracao, usuario, hoje=kwargs.get('hoje'), ao_progredir=self.stdout.write)
+        totais = gerador.gerar()
 
-                    #replace with what might exist
-                    additions[index_addition] = failed_class.objects.first()
-                    print(additions[index_addition])
-                except Exception as err:
-                    print("não salvou: " + str(err) + repr(addition))
-                    pass
+        resumo = ", ".join(f"{quantidade} {nome}" for nome, quantidade in totais.items())
+        self.stdout.write(self.style.SUCCESS(f"Criados {resumo} em {time.perf_counter() - inicio:.1f}s."))
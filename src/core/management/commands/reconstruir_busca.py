@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.busca import INDICES, criar_indices
+
+
+class Command(BaseCommand):
+    help = (
+        "Recria os índices de busca FTS5 (clientes, trabalhadores, serviços e agendamentos) "
+        "e seus triggers, preenchidos com os registros atuais."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Alias do banco de dados.")
+
+    def handle(self, *args, **kwargs):
+        using = kwargs['database']
+        if connections[using].vendor != 'sqlite':
+            raise CommandError("Os índices de busca usam FTS5 e só existem no SQLite.")
+
+        total = criar_indices(using, recriar=True)
+        if total < len(INDICES):
+            raise CommandError("Não foi possível criar os índices de busca (ver o aviso acima).")
+        self.stdout.write(self.style.SUCCESS(f"{total} índices de busca reconstruídos."))
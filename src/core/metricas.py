@@ -0,0 +1,145 @@
+"""
+Indicadores do resumo da Home.
+
+Todos os números são calculados em uma única consulta (subconsultas escalares por
+tabela, cada uma servida pelos índices da empresa) e guardados no cache por
+settings.HOME_METRICAS_TTL segundos. Alterações em clientes, trabalhadores e
+agendamentos trocam a versão da empresa no cache (ver core.signals), então
+o valor guardado deixa de ser lido sem esperar o TTL.
+"""
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Q, QuerySet, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.helpers import PeriodoHelper
+from core.types import MetricasHome
+from cadastros.empresas.models import Empresa
+from cadastros.clientes.models import Cliente
+from cadastros.trabalhadores.models import EstadoTrabalhador, Trabalhador
+from cadastros.trabalhadores.ocupacao import proximos_pendentes
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.choices import (
+    AGENDAMENTO_STATUS_PENDENTE,
+    AGENDAMENTO_STATUS_EXECUTANDO,
+    AGENDAMENTO_STATUS_FINALIZADO
+)
+from relatorios.models import ResumoDiarioAgendamento
+
+
+DIAS_CLIENTES_NOVOS = 7
+HORAS_ATENDIMENTOS_SEGUINTES = 2
+
+
+def _por_empresa(queryset: QuerySet, agregado, output_field) -> Coalesce:
+    """Agregado de 'queryset' para a empresa da consulta externa, como subconsulta escalar (0 sem linhas)."""
+    subconsulta = (
+        queryset.filter(empresa=OuterRef('pk'))
+        .order_by()
+        .values('empresa')
+        .annotate(valor=agregado)
+        .values('valor')
+    )
+    return Coalesce(Subquery(subconsulta, output_field=output_field), Value(0), output_field=output_field)
+
+
+def calcular_metricas_home(empresa: Empresa, agora: datetime | None = None) -> MetricasHome:
+    agora = agora or timezone.now()
+    hoje = timezone.localdate(agora)
+    inicio_semana = hoje - timedelta(days=hoje.weekday())
+    inicio_mes = hoje.replace(day=1)
+
+    clientes = Cliente.objects.filter(ativo=True)
+    trabalhadores_ocupados = EstadoTrabalhador.objects.filter(agendamento_atual__isnull=False, trabalhador__ativo=True)
+    faturamento = ResumoDiarioAgendamento.objects.filter(
+        dia__gte=min(inicio_semana, inicio_mes),
+        dia__lte=hoje,
+        status=AGENDAMENTO_STATUS_FINALIZADO
+    )
+    decimal = DecimalField(max_digits=14, decimal_places=2)
+
+    valores = Empresa.objects.filter(pk=empresa.pk).values(
+        clientes_novos=_por_empresa(
+            clientes, Count('pk', filter=PeriodoHelper.ultimos_dias(DIAS_CLIENTES_NOVOS, hoje).filtro('data_criado')),
+            IntegerField()
+        ),
+        clientes_total=_por_empresa(clientes, Count('pk'), IntegerField()),
+        faturamento_semana=_por_empresa(faturamento, Sum('faturamento', filter=Q(dia__gte=inicio_semana)), decimal),
+        faturamento_mes=_por_empresa(faturamento, Sum('faturamento', filter=Q(dia__gte=inicio_mes)), decimal),
+        atendimentos_seguintes=_por_empresa(
+            Agendamento.objects.filter(
+                status__in=[AGENDAMENTO_STATUS_PENDENTE, AGENDAMENTO_STATUS_EXECUTANDO],
+                data_agendado__gte=agora,
+                data_agendado__lte=agora + timedelta(hours=HORAS_ATENDIMENTOS_SEGUINTES),
+                ativo=True
+            ),
+            Count('pk'),
+            IntegerField()
+        ),
+        trabalhadores_ocupados=_por_empresa(trabalhadores_ocupados, Count('pk'), IntegerField()),
+        trabalhadores_total=_por_empresa(Trabalhador.objects.filter(ativo=True), Count('pk'), IntegerField()),
+    ).get()
+
+    return MetricasHome(calculado_em=agora, **valores)
+
+
+def listar_status_trabalhadores(
+    empresa: Empresa | int, limite: int | None = 20, trabalhador_ids=None, agora: datetime | None = None
+) -> list[dict]:
+    """
+    Trabalhadores ativos com o estado mantido em EstadoTrabalhador (ver cadastros.trabalhadores.ocupacao):
+    'ocupado' se há um agendamento em execução, 'disponível' se não. O próximo pendente (a partir
+    de hoje) é buscado na mesma consulta, por trabalhador, pelo índice (trabalhador, status, data_agendado).
+    'trabalhador_ids' restringe aos trabalhadores alterados (atualizações em tempo real).
+    """
+    proximo = proximos_pendentes(Agendamento.objects.filter(trabalhador=OuterRef('pk')), agora)
+    trabalhadores = Trabalhador.objects.filter(empresa=empresa, ativo=True)
+    if trabalhador_ids is not None:
+        trabalhadores = trabalhadores.filter(pk__in=trabalhador_ids)
+    trabalhadores = (
+        trabalhadores
+        .values(
+            'id', 'nome', 'telefone',
+            ocupado_desde=F('estado__ocupado_desde'),
+            proximo_agendamento_data=Subquery(proximo.values('data_agendado')[:1])
+        )
+        .order_by(F('ocupado_desde').asc(nulls_first=True), 'nome')
+    )
+    if limite is not None:
+        trabalhadores = trabalhadores[:limite]
+
+    status_list = list(trabalhadores)
+    for trabalhador in status_list:
+        trabalhador['status'] = "ocupado" if trabalhador['ocupado_desde'] else "disponível"
+    return status_list
+
+
+#* Cache
+
+def _chave_versao(empresa_id: int) -> str:
+    return f"home:metricas:{empresa_id}:versao"
+
+
+def _nova_versao() -> int:
+    # única mesmo se a versão anterior foi descartada pelo cache
+    return time.time_ns()
+
+
+def invalidar_metricas_home(empresa_id: int) -> None:
+    """Nova versão para a empresa: o que já está no cache (ou sendo calculado agora) não é mais lido."""
+    cache.set(_chave_versao(empresa_id), _nova_versao(), timeout=None)
+
+
+def get_metricas_home(empresa: Empresa) -> MetricasHome:
+    versao = cache.get_or_set(_chave_versao(empresa.pk), _nova_versao, timeout=None)
+    chave = f"home:metricas:{empresa.pk}:{versao}"
+
+    metricas = cache.get(chave)
+    if metricas is None:
+        metricas = calcular_metricas_home(empresa)
+        cache.set(chave, metricas, timeout=settings.HOME_METRICAS_TTL)
+    return metricas
@@ -0,0 +1,94 @@
+"""
+Paginação por cursor (keyset) das listagens, em ordem decrescente de (data_criado, pk).
+
+O cursor é a chave do último (ou primeiro) registro exibido: a página seguinte filtra
+a partir dela e usa o índice (empresa, data_criado) das listagens, então qualquer página
+custa o mesmo que a primeira. Para saber se há mais registros, busca um a mais que o
+tamanho da página, sem COUNT(*).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q, QuerySet
+from django.http import QueryDict
+
+
+PARAMETRO_APOS = "apos"     # registros mais antigos que o cursor (próxima página)
+PARAMETRO_ANTES = "antes"   # registros mais recentes que o cursor (página anterior)
+
+_EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSSEGUNDO = timedelta(microseconds=1)
+
+
+def codificar_cursor(data_criado: datetime, pk: int) -> str:
+    return f"{(data_criado - _EPOCA) // _MICROSSEGUNDO}.{pk}"
+
+
+def decodificar_cursor(cursor: str | None) -> tuple[datetime, int] | None:
+    """(data_criado, pk) do cursor, ou None se ausente ou inválido (volta à primeira página)."""
+    if not cursor:
+        return None
+    try:
+        microssegundos, pk = (int(parte) for parte in cursor.split("."))
+        return _EPOCA + microssegundos * _MICROSSEGUNDO, pk
+    except (ValueError, OverflowError):
+        return None
+
+
+def _filtro_cursor(data_criado: datetime, pk: int, mais_antigos: bool) -> Q:
+    # o primeiro termo limita a faixa do índice por data_criado; o segundo desempata pelo pk
+    if mais_antigos:
+        return Q(data_criado__lte=data_criado) & (Q(data_criado__lt=data_criado) | Q(pk__lt=pk))
+    return Q(data_criado__gte=data_criado) & (Q(data_criado__gt=data_criado) | Q(pk__gt=pk))
+
+
+def _chave(item) -> tuple[datetime, int]:
+    # instâncias ou linhas de values() (as listagens buscam só as colunas exibidas)
+    if isinstance(item, dict):
+        return item['data_criado'], item['pk']
+    return item.data_criado, item.pk
+
+
+def paginar_por_cursor(queryset: QuerySet, parametros: QueryDict, tamanho: int) -> tuple[list, str | None, str | None]:
+    """
+    Página de 'queryset' indicada pelos parâmetros da request.
+    Retorna (itens, cursor da página anterior, cursor da próxima página); None quando não há.
+    """
+    apos = decodificar_cursor(parametros.get(PARAMETRO_APOS))
+    antes = decodificar_cursor(parametros.get(PARAMETRO_ANTES)) if apos is None else None
+
+    itens = []
+    if antes is not None:
+        itens = list(
+            queryset.filter(_filtro_cursor(*antes, mais_antigos=False))
+            .order_by('data_criado', 'pk')[:tamanho + 1]
+        )
+        tem_anterior, tem_proxima = len(itens) > tamanho, True
+        itens = itens[:tamanho][::-1]
+        if len(itens) < tamanho:
+            # perto do início: a página anterior seria menor; volta à primeira, com o tamanho cheio
+            itens = []
+    if not itens:
+        # primeira página, ou página seguinte a 'apos' (também quando 'antes' não completa uma página)
+        if apos is not None:
+            queryset = queryset.filter(_filtro_cursor(*apos, mais_antigos=True))
+        itens = list(queryset.order_by('-data_criado', '-pk')[:tamanho + 1])
+        tem_anterior, tem_proxima = apos is not None, len(itens) > tamanho
+        itens = itens[:tamanho]
+
+    if not itens:
+        return itens, None, None
+
+    return (
+        itens,
+        codificar_cursor(*_chave(itens[0])) if tem_anterior else None,
+        codificar_cursor(*_chave(itens[-1])) if tem_proxima else None,
+    )
+
+
+def url_com_cursor(parametros: QueryDict, nome: str, cursor: str) -> str:
+    """Query string com os mesmos filtros (busca, datas...) e o novo cursor."""
+    parametros = parametros.copy()
+    parametros.pop(PARAMETRO_APOS, None)
+    parametros.pop(PARAMETRO_ANTES, None)
+    parametros[nome] = cursor
+    return f"?{parametros.urlencode()}"
@@ -38,5 +38,5 @@ class Pessoa(BaseCadastrosModel):
         blank=False
     )
 
-    class Meta:
+    class Meta(BaseCadastrosModel.Meta):
         abstract = True
\ No newline at end of file
@@ -1,6 +1,7 @@
 from django.views.generic import CreateView
 from django.db.models import Q
 
+from core.busca import filtrar_busca
 from core.bases.views import BaseDynamicListView, BaseDynamicFormView, BaseDeleteView
 from core.bases.mixins import FormComArquivoMixin
 
@@ -19,8 +20,10 @@ class PessoasListView(BaseDynamicListView):
             condicao_telefone = Q(telefone__icontains=query.replace('(', '').replace(')', '').replace('-', ''))
             condicao_endereco = Q(endereco__icontains=query)
 
-            queryset = queryset.filter(
-                condicao_nome | condicao_cpf | condicao_telefone | condicao_endereco
+            empresa = getattr(self.request, 'empresa', None)
+            queryset = filtrar_busca(
+                queryset, query, empresa and empresa.id,
+                alternativa=condicao_nome | condicao_cpf | condicao_telefone | condicao_endereco
             )
 
         return queryset
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from core.consumers import DashboardConsumer
+
+
+websocket_urlpatterns = [
+    path("ws/dashboard/", DashboardConsumer.as_asgi()), # type: ignore
+]
@@ -0,0 +1,98 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_migrate
+from django.dispatch import receiver
+
+from cadastros.clientes.models import Cliente
+from cadastros.trabalhadores.models import Trabalhador
+from servicos.tipo_servicos.models import TipoServico
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.signals import agendamento_alterado
+from core.busca import criar_indices, remover_indices
+from core.metricas import invalidar_metricas_home
+from core.sugestoes import invalidar_sugestoes
+from core.tempo_real import publicar_alteracao_agendamento
+from servicos.agendamentos.planilha import invalidar_dias, invalidar_empresa
+
+
+def invalidar_apos_commit(empresa_id: int) -> None:
+    # após o commit: um recálculo concorrente não pode guardar os dados antigos na versão nova
+    transaction.on_commit(lambda: invalidar_metricas_home(empresa_id))
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_delete, sender=Cliente)
+@receiver(post_save, sender=Trabalhador)
+@receiver(post_delete, sender=Trabalhador)
+def invalidar_metricas_cadastro(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidar_apos_commit(instance.empresa_id)
+
+
+@receiver(agendamento_alterado)
+def invalidar_metricas_agendamento(sender, anterior, atual, **kwargs):
+    for empresa_id in {estado.empresa_id for estado in (anterior, atual) if estado is not None}:
+        invalidar_apos_commit(empresa_id)
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_delete, sender=Cliente)
+@receiver(post_save, sender=Trabalhador)
+@receiver(post_delete, sender=Trabalhador)
+@receiver(post_save, sender=TipoServico)
+@receiver(post_delete, sender=TipoServico)
+def invalidar_sugestoes_cadastro(sender, instance, raw=False, **kwargs):
+    if not raw:
+        empresa_id = instance.empresa_id
+        transaction.on_commit(lambda: invalidar_sugestoes(empresa_id, sender))
+
+
+@receiver(agendamento_alterado)
+def invalidar_sugestoes_agendamento(sender, anterior, atual, **kwargs):
+    for empresa_id in {estado.empresa_id for estado in (anterior, atual) if estado is not None}:
+        transaction.on_commit(lambda empresa_id=empresa_id: invalidar_sugestoes(empresa_id, Agendamento))
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_delete, sender=Cliente)
+@receiver(post_save, sender=Trabalhador)
+@receiver(post_delete, sender=Trabalhador)
+@receiver(post_save, sender=TipoServico)
+@receiver(post_delete, sender=TipoServico)
+def invalidar_planilha_cadastro(sender, instance, raw=False, created=False, **kwargs):
+    # um cadastro novo ainda não aparece em nenhum card
+    if not raw and not created:
+        empresa_id = instance.empresa_id
+        transaction.on_commit(lambda: invalidar_empresa(empresa_id))
+
+
+@receiver(agendamento_alterado)
+def invalidar_planilha_agendamento(sender, anterior, atual, **kwargs):
+    dias_por_empresa: dict[int, set] = {}
+    for estado in (anterior, atual):
+        if estado is not None:
+            dias_por_empresa.setdefault(estado.empresa_id, set()).add(estado.dia)
+
+    for empresa_id, dias in dias_por_empresa.items():
+        # já na transação (o mesmo processo não lê o dia antigo) e de novo após o commit
+        # (um preaquecimento concorrente não guarda o dia antigo na versão nova)
+        invalidar_dias(empresa_id, dias)
+        transaction.on_commit(lambda empresa_id=empresa_id, dias=dias: invalidar_dias(empresa_id, dias))
+
+
+@receiver(agendamento_alterado)
+def publicar_agendamento(sender, anterior, atual, **kwargs):
+    publicar_alteracao_agendamento(anterior, atual)
+
+
+@receiver(pre_migrate)
+def remover_indices_busca(sender, using, **kwargs):
+    # no SQLite, alterar um campo recria a tabela, e as triggers de busca que a referenciam impediriam o rename
+    if sender.label == Agendamento._meta.app_label:
+        remover_indices(using)
+
+
+@receiver(post_migrate)
+def criar_indices_busca(sender, using, **kwargs):
+    # uma vez por migrate (o sinal é enviado por app, após todas as migrations)
+    if sender.label == Agendamento._meta.app_label:
+        criar_indices(using)
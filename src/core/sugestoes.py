@@ -0,0 +1,172 @@
+"""
+Sugestões da busca enquanto o usuário digita (JSON, ver core.views.SugestoesView).
+
+Cada consulta devolve poucos registros e poucas colunas: os mais relevantes para
+o prefixo digitado, pelos índices FTS5 de core.busca (sem o índice, por istartswith).
+Os prefixos mais buscados de cada empresa ficam num LRU em memória, por processo,
+com validade de settings.SUGESTOES_CACHE_TTL segundos. Alterações nos cadastros e
+agendamentos da empresa trocam a versão das sugestões afetadas no cache padrão (ver
+core.signals). Esse cache é compartilhado pelos processos (ver settings.CACHES), então o
+LRU de todos eles deixa de servir os resultados antigos; com um cache por processo
+(ex.: LocMemCache), os outros processos só veriam a alteração ao fim do TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from core.busca import buscar_ids, busca_disponivel
+from cadastros.clientes.models import Cliente
+from cadastros.trabalhadores.models import Trabalhador
+from servicos.tipo_servicos.models import TipoServico
+from servicos.agendamentos.models import Agendamento
+
+
+TAMANHO_MINIMO_PREFIXO = 2 # menor prefixo pré-indexado (core.busca.PREFIXOS)
+LIMITE_PADRAO = 8
+# com o índice, busca alguns ids a mais: inativos são descartados depois do ranking
+FATOR_EXCEDENTE = 3
+
+
+@dataclass(frozen=True)
+class ConsultaSugestoes:
+    model: type
+    valores: tuple[str, ...] # colunas buscadas com values()
+    formatar: Callable[[dict], str] # texto exibido na sugestão
+    campo_busca: str = 'nome' # valor que encontra o registro na busca da listagem
+    ordenacao: tuple[str, ...] = ('nome',) # sem o índice FTS5
+    campos_prefixo: tuple[str, ...] = ('nome',) # sem o índice FTS5: campos comparados com istartswith
+
+
+def _texto_pessoa(linha: dict) -> str:
+    return linha['nome']
+
+
+def _texto_servico(linha: dict) -> str:
+    return TipoServico.formatar_str(linha['nome'], linha['preco'])
+
+
+def _texto_agendamento(linha: dict) -> str:
+    data = timezone.localtime(linha['data_agendado']).strftime("%d/%m %H:%M")
+    return f"{linha['cliente__nome']}, {linha['servico__nome']} com {linha['trabalhador__nome']} em {data}"
+
+
+CONSULTAS: dict[str, ConsultaSugestoes] = {
+    'clientes': ConsultaSugestoes(Cliente, ('nome',), _texto_pessoa),
+    'trabalhadores': ConsultaSugestoes(Trabalhador, ('nome',), _texto_pessoa),
+    'servicos': ConsultaSugestoes(TipoServico, ('nome', 'preco'), _texto_servico),
+    'agendamentos': ConsultaSugestoes(
+        Agendamento,
+        ('data_agendado', 'cliente__nome', 'servico__nome', 'trabalhador__nome'),
+        _texto_agendamento,
+        campo_busca='cliente__nome',
+        ordenacao=('-data_agendado',),
+        campos_prefixo=('cliente__nome', 'servico__nome', 'trabalhador__nome')
+    ),
+}
+
+
+# tipos cujas sugestões exibem dados de cada model (os agendamentos exibem os nomes)
+TIPOS_AFETADOS: dict[type, tuple[str, ...]] = {
+    Cliente: ('clientes', 'agendamentos'),
+    Trabalhador: ('trabalhadores', 'agendamentos'),
+    TipoServico: ('servicos', 'agendamentos'),
+    Agendamento: ('agendamentos',),
+}
+
+
+#* Versão por empresa e tipo (compartilhada entre processos pelo cache padrão, ver settings.CACHES)
+def _chave_versao(empresa_id: int, tipo: str) -> str:
+    return f"sugestoes:{empresa_id}:{tipo}:versao"
+
+
+def invalidar_sugestoes(empresa_id: int, model: type) -> None:
+    agora = time.time_ns()
+    cache.set_many({_chave_versao(empresa_id, tipo): agora for tipo in TIPOS_AFETADOS[model]}, timeout=None)
+
+
+def get_versao(empresa_id: int, tipo: str) -> int:
+    return cache.get_or_set(_chave_versao(empresa_id, tipo), time.time_ns, timeout=None)
+
+
+#* LRU em memória
+class CacheSugestoes:
+    """LRU de resultados por empresa: cada empresa guarda até 'tamanho' prefixos."""
+    def __init__(self, tamanho: int, ttl: float):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self._empresas: dict[int, OrderedDict] = {}
+        self._lock = threading.Lock()
+
+    def obter(self, empresa_id: int, chave: tuple, versao: int) -> list[dict] | None:
+        with self._lock:
+            entradas = self._empresas.get(empresa_id)
+            entrada = entradas.get(chave) if entradas else None
+            if entrada is None:
+                return None
+            versao_entrada, expira, resultados = entrada
+            if versao_entrada != versao or expira < time.monotonic():
+                del entradas[chave]
+                return None
+            entradas.move_to_end(chave)
+            return resultados
+
+    def guardar(self, empresa_id: int, chave: tuple, versao: int, resultados: list[dict]) -> None:
+        with self._lock:
+            entradas = self._empresas.setdefault(empresa_id, OrderedDict())
+            entradas[chave] = (versao, time.monotonic() + self.ttl, resultados)
+            entradas.move_to_end(chave)
+            while len(entradas) > self.tamanho:
+                entradas.popitem(last=False)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._empresas.clear()
+
+
+cache_sugestoes = CacheSugestoes(settings.SUGESTOES_CACHE_TAMANHO, settings.SUGESTOES_CACHE_TTL)
+
+
+#* Consulta
+def normalizar_prefixo(prefixo: str) -> str:
+    return " ".join(prefixo.lower().split())
+
+
+def _consultar(consulta: ConsultaSugestoes, prefixo: str, empresa_id: int, limite: int) -> list[dict]:
+    queryset = consulta.model.objects.filter(empresa_id=empresa_id, ativo=True)
+
+    if busca_disponivel():
+        ids = buscar_ids(consulta.model, prefixo, empresa_id, limite=limite * FATOR_EXCEDENTE)
+        linhas = {linha['pk']: linha for linha in queryset.filter(pk__in=ids).values('pk', *consulta.valores)}
+        ordenadas = [linhas[pk] for pk in ids if pk in linhas][:limite]
+    else:
+        condicao = Q()
+        for campo in consulta.campos_prefixo:
+            condicao |= Q(**{f"{campo}__istartswith": prefixo})
+        ordenadas = list(queryset.filter(condicao).order_by(*consulta.ordenacao).values('pk', *consulta.valores)[:limite])
+
+    return [
+        {'id': linha['pk'], 'texto': consulta.formatar(linha), 'busca': linha[consulta.campo_busca]}
+        for linha in ordenadas
+    ]
+
+
+def buscar_sugestoes(tipo: str, prefixo: str, empresa_id: int, limite: int = LIMITE_PADRAO) -> list[dict]:
+    """Até 'limite' sugestões ({'id', 'texto', 'busca'}) de 'tipo' (chave de CONSULTAS) para o prefixo digitado."""
+    prefixo = normalizar_prefixo(prefixo)
+    if len(prefixo) < TAMANHO_MINIMO_PREFIXO:
+        return []
+
+    chave = (tipo, prefixo, limite)
+    versao = get_versao(empresa_id, tipo)
+    resultados = cache_sugestoes.obter(empresa_id, chave, versao)
+    if resultados is None:
+        resultados = _consultar(CONSULTAS[tipo], prefixo, empresa_id, limite)
+        cache_sugestoes.guardar(empresa_id, chave, versao, resultados)
+    return resultados
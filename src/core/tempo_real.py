@@ -0,0 +1,227 @@
+"""
+Atualizações em tempo real da Home e da planilha diária (Django Channels).
+
+Cada empresa tem um grupo no channel layer (ver core.consumers). Quando um agendamento
+é criado, removido, ou muda de status, dia ou trabalhador, após o commit são enviados
+ao grupo:
+
+* 'agendamento': o card que deve mudar de coluna (ou sair) na planilha;
+* 'trabalhador': o estado dos trabalhadores envolvidos (ver cadastros.trabalhadores.ocupacao);
+* 'quick_info': os indicadores da Home recalculados (uma consulta, já guardada no cache),
+  só quando a alteração muda algum deles.
+
+As alterações de uma mesma transação são enviadas juntas, com o estado já gravado dos
+agendamentos: os indicadores e os status são calculados uma vez por empresa, não uma vez
+por agendamento, e o que foi desfeito por um rollback não é enviado.
+"""
+import threading
+from dataclasses import dataclass, field
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from core.bases.mixins import HomeQuickInfoMixin
+from core.metricas import get_metricas_home, listar_status_trabalhadores
+from cadastros.empresas.models import Empresa
+from cadastros.trabalhadores.ocupacao import STATUS_OCUPACAO
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.signals import carregar_estados
+from servicos.agendamentos.choices import AGENDAMENTO_STATUS_EXECUTANDO, COLUNAS_PLANILHA
+from servicos.agendamentos.types import EstadoAgendamento
+
+
+TIPO_MENSAGEM = "dashboard.evento" # -> DashboardConsumer.dashboard_evento
+
+_local = threading.local()
+
+
+def grupo_empresa(empresa_id: int) -> str:
+    return f"dashboard_empresa_{empresa_id}"
+
+
+def enviar_evento(empresa_id: int, evento: str, dados) -> None:
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(
+        grupo_empresa(empresa_id),
+        {'type': TIPO_MENSAGEM, 'evento': evento, 'dados': dados}
+    )
+
+
+def alterou_dashboard(anterior: EstadoAgendamento | None, atual: EstadoAgendamento | None) -> bool:
+    """Se a alteração muda algo nos dashboards (preço, cliente... só aparecem ao recarregar)."""
+    if anterior is None or atual is None:
+        return True
+    return (
+        (anterior.status, anterior.dia, anterior.ativo, anterior.trabalhador_id)
+        != (atual.status, atual.dia, atual.ativo, atual.trabalhador_id)
+    )
+
+
+def alterou_metricas(anterior: EstadoAgendamento | None, atual: EstadoAgendamento | None) -> bool:
+    """Se a alteração muda os indicadores da Home (ver core.metricas.calcular_metricas_home)."""
+    if anterior is None or atual is None:
+        return True
+    if AGENDAMENTO_STATUS_EXECUTANDO in (anterior.status, atual.status) and anterior.trabalhador_id != atual.trabalhador_id:
+        return True  # trabalhadores ocupados
+    return (
+        (anterior.status, anterior.data_agendado, anterior.ativo, anterior.preco)
+        != (atual.status, atual.data_agendado, atual.ativo, atual.preco)
+    )
+
+
+def serializar_agendamento(anterior: EstadoAgendamento | None, atual: EstadoAgendamento | None) -> dict:
+    estado = atual or anterior
+    if estado is None:
+        raise ValueError("Alteração sem estado anterior nem atual.")
+    # sem estado atual (removido) ou inativo: o card sai da planilha
+    visivel = atual if atual is not None and atual.ativo else None
+    return {
+        'id': estado.pk,
+        'status': visivel.status if visivel else None,
+        'coluna': COLUNAS_PLANILHA.get(visivel.status) if visivel else None,
+        'dia': visivel.dia.isoformat() if visivel else None,
+        'dia_anterior': anterior.dia.isoformat() if anterior is not None else None,
+        'horario': timezone.localtime(estado.data_agendado).strftime("%H:%M"),
+        'card_url': reverse('servicos:agendamentos:planilha_card', args=[estado.pk]) if visivel else None,
+    }
+
+
+def serializar_trabalhador(trabalhador: dict) -> dict:
+    ocupado_desde = trabalhador['ocupado_desde']
+    proximo = trabalhador['proximo_agendamento_data']
+    return {
+        'id': trabalhador['id'],
+        'status': trabalhador['status'],
+        'ocupado_desde': timezone.localtime(ocupado_desde).strftime("%H:%M") if ocupado_desde else None,
+        'proximo': timezone.localtime(proximo).strftime("%d/%m %H:%M") if proximo else None,
+    }
+
+
+@dataclass
+class LoteEmpresa:
+    agendamentos: list[dict] = field(default_factory=list)
+    trabalhador_ids: set[int] = field(default_factory=set)
+    metricas: bool = False
+
+
+@dataclass
+class AlteracoesAgendamento:
+    anterior: EstadoAgendamento | None  # antes da primeira alteração
+    estados: list[EstadoAgendamento | None]  # após cada alteração, em ordem
+
+
+class LoteTempoReal:
+    """
+    Agendamentos alterados nas transações do thread, enviados no commit com o estado já gravado.
+
+    Sem acesso aos callbacks pendentes da conexão, o lote não sabe quais alterações foram
+    desfeitas por um rollback (de um savepoint ou da transação toda). No envio, um agendamento
+    só entra se o estado gravado é o de uma das suas alterações registradas; e uma alteração
+    que não parte do último estado registrado recomeça o registro daquele agendamento.
+    """
+    def __init__(self):
+        self.alteracoes: dict[int, AlteracoesAgendamento] = {}
+        self.enviado = False
+
+    def adicionar(self, anterior: EstadoAgendamento | None, atual: EstadoAgendamento | None) -> None:
+        estado = atual or anterior
+        if estado is None:
+            return
+        alteracoes = self.alteracoes.get(estado.pk)
+        if alteracoes is None or alteracoes.estados[-1] != anterior:
+            alteracoes = self.alteracoes[estado.pk] = AlteracoesAgendamento(anterior, [])
+        alteracoes.estados.append(atual)
+
+    def agrupar(self) -> dict[int, LoteEmpresa]:
+        """Alterações efetivas (gravadas e diferentes do estado anterior), por empresa."""
+        gravados = {
+            estado.pk: estado
+            for estado in carregar_estados(Agendamento.objects.filter(pk__in=list(self.alteracoes)))
+        }
+
+        empresas: dict[int, LoteEmpresa] = {}
+        for pk, alteracoes in self.alteracoes.items():
+            anterior, atual = alteracoes.anterior, gravados.get(pk)
+            estado = atual or anterior
+            if estado is None or atual not in alteracoes.estados:
+                continue  # criado e removido antes do commit, ou desfeito
+
+            dashboard, metricas = alterou_dashboard(anterior, atual), alterou_metricas(anterior, atual)
+            if not (dashboard or metricas):
+                continue
+            lote = empresas.setdefault(estado.empresa_id, LoteEmpresa())
+            lote.metricas = lote.metricas or metricas
+            if dashboard:
+                lote.agendamentos.append(serializar_agendamento(anterior, atual))
+                lote.trabalhador_ids.update(
+                    outro.trabalhador_id for outro in (anterior, atual)
+                    if outro is not None and outro.status in STATUS_OCUPACAO
+                )
+        return empresas
+
+    def __call__(self):
+        # registrado uma vez por alteração (ver _lote_da_transacao): só o primeiro callback envia
+        if self.enviado:
+            return
+        self.enviado = True
+        if getattr(_local, 'lote', None) is self:
+            _local.lote = None
+
+        for empresa_id, lote in self.agrupar().items():
+            enviar_lote(empresa_id, lote)
+
+
+def enviar_lote(empresa_id: int, lote: LoteEmpresa) -> None:
+    for agendamento in lote.agendamentos:
+        enviar_evento(empresa_id, 'agendamento', agendamento)
+
+    if lote.trabalhador_ids:
+        trabalhadores = listar_status_trabalhadores(empresa_id, limite=None, trabalhador_ids=lote.trabalhador_ids)
+        enviar_evento(empresa_id, 'trabalhador', [serializar_trabalhador(trabalhador) for trabalhador in trabalhadores])
+
+    if not lote.metricas:
+        return
+    empresa = Empresa.objects.filter(pk=empresa_id).first()
+    if empresa is None:
+        return
+    # a versão das métricas já foi trocada: core.signals registra a invalidação antes deste callback
+    itens = HomeQuickInfoMixin.montar_itens(get_metricas_home(empresa))
+    enviar_evento(empresa_id, 'quick_info', [
+        {'chave': item['chave'], 'value': item['value'], 'conclusion': item['conclusion']}
+        for item in itens
+    ])
+
+
+def _lote_da_transacao(using=None) -> LoteTempoReal | None:
+    """Lote enviado no commit da transação atual (None fora de um bloco atomic)."""
+    if not transaction.get_connection(using).in_atomic_block:
+        return None
+
+    lote = getattr(_local, 'lote', None)
+    if lote is None:
+        lote = _local.lote = LoteTempoReal()
+    # registrado no savepoint de cada alteração: o envio só é descartado se todas forem desfeitas.
+    # Um lote que sobra de uma transação desfeita vai no próximo commit (ver LoteTempoReal.agrupar).
+    transaction.on_commit(lote, using=using)
+    return lote
+
+
+def publicar_alteracao_agendamento(anterior: EstadoAgendamento | None, atual: EstadoAgendamento | None) -> None:
+    if get_channel_layer() is None:
+        return
+    if not (alterou_dashboard(anterior, atual) or alterou_metricas(anterior, atual)):
+        return
+
+    lote = _lote_da_transacao()
+    if lote is None:
+        # autocommit: a alteração já está gravada
+        lote = LoteTempoReal()
+        lote.adicionar(anterior, atual)
+        lote()
+    else:
+        lote.adicionar(anterior, atual)
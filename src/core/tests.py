@@ -0,0 +1,765 @@
+import json
+import re
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Min, Q, Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from validate_docbr import CPF, CNPJ
+
+from cadastros.empresas.models import Empresa
+from cadastros.clientes.models import Cliente
+from cadastros.clientes.views import ClientesListView
+from cadastros.trabalhadores.models import Trabalhador
+from servicos.tipo_servicos.models import TipoServico
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.choices import (
+    AGENDAMENTO_STATUS_PENDENTE,
+    AGENDAMENTO_STATUS_EXECUTANDO,
+    AGENDAMENTO_STATUS_FINALIZADO,
+    AGENDAMENTO_STATUS_CANCELADO
+)
+from core.bases.views import BaseDynamicListView
+from core import busca
+from core.busca import busca_disponivel, buscar_ids
+from core.consumers import DashboardConsumer
+from core.exportacao import gerar_csv
+from core.gerador import GeradorDados
+from core.metricas import calcular_metricas_home, get_metricas_home
+from core.paginacao import codificar_cursor, decodificar_cursor
+from core.sugestoes import LIMITE_PADRAO, CacheSugestoes, buscar_sugestoes, cache_sugestoes
+from core.tempo_real import grupo_empresa
+from core.types import ConfiguracaoGerador
+from relatorios.models import ResumoDiarioAgendamento
+
+
+def explicar(sql: str, params=()) -> str:
+    """Saída do EXPLAIN QUERY PLAN (SQLite), uma etapa por linha."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return "\n".join(linha[-1] for linha in cursor.fetchall())
+
+
+def plano_consulta(queryset) -> str:
+    return explicar(*queryset.query.sql_with_params())
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN do SQLite")
+class PlanosConsultaTestCase(TestCase):
+    """
+    Regressão dos planos de consulta das páginas principais: nenhuma consulta
+    pode varrer por inteiro as tabelas das empresas, e os filtros mais comuns
+    (empresa + ativo + data/status) devem usar os índices compostos.
+    """
+    tabelas_empresa = [model._meta.db_table for model in (Cliente, Trabalhador, TipoServico, Agendamento)]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="dono", password="senha")
+        cls.empresa = Empresa.objects.create(
+            cnpj="11222333000181", nome_fantasia="Salão", razao_social="Salão LTDA", user=cls.user
+        )
+        cliente = Cliente.objects.create(
+            nome="Cliente", cpf="52998224725", telefone="+5511999990000", endereco="Rua A", empresa=cls.empresa
+        )
+        servico = TipoServico.objects.create(nome="Corte", preco=Decimal("50.00"), empresa=cls.empresa)
+        trabalhador = Trabalhador.objects.create(
+            nome="Ana", cpf="11144477735", telefone="+5511988880001", endereco="Rua B", empresa=cls.empresa
+        )
+        agora = timezone.now()
+        for minutos, status in ((0, 'P'), (10, 'E'), (20, 'F')):
+            Agendamento.objects.create(
+                data_agendado=agora + timedelta(minutes=minutos), status=status, cliente=cliente,
+                servico=servico, trabalhador=trabalhador, empresa=cls.empresa
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['empresa_id'] = self.empresa.id
+        session.save()
+
+    def get_planos(self, url: str) -> list[tuple[str, str]]:
+        """(sql, plano) de cada SELECT executado ao abrir 'url'."""
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+
+        return [
+            (consulta['sql'], explicar(consulta['sql']))
+            for consulta in consultas.captured_queries
+            if consulta['sql'].startswith("SELECT")
+        ]
+
+    def assertSemVarreduraCompleta(self, planos: list[tuple[str, str]]):
+        varredura = re.compile(rf"^SCAN ({'|'.join(self.tabelas_empresa)})\b(?! USING)", re.MULTILINE)
+        for sql, plano in planos:
+            self.assertIsNone(varredura.search(plano), f"Varredura completa em:\n{sql}\n{plano}")
+
+    def assertUsaIndice(self, planos: list[tuple[str, str]], indice: str):
+        self.assertTrue(
+            any(f"INDEX {indice} " in plano for _, plano in planos),
+            f"Nenhuma consulta usou '{indice}':\n" + "\n".join(plano for _, plano in planos)
+        )
+
+    def test_listagens(self):
+        paginas = {
+            'cadastros:clientes:list': 'cliente_ativos_criado_idx',
+            'cadastros:trabalhadores:list': 'trabalhador_ativos_criado_idx',
+            'servicos:tipo_servicos:list': 'tiposervico_ativos_criado_idx',
+            'servicos:agendamentos:list': 'agendamento_ativos_criado_idx',
+        }
+        for nome_url, indice in paginas.items():
+            with self.subTest(nome_url):
+                planos = self.get_planos(reverse(nome_url))
+                self.assertSemVarreduraCompleta(planos)
+                self.assertUsaIndice(planos, indice)
+
+    @override_settings(PLANILHA_PREAQUECIMENTO_THREADS=0)
+    def test_planilha_diaria(self):
+        cache.clear()  # dias em cache não executariam as consultas
+        planos = self.get_planos(reverse('servicos:agendamentos:planilha_diaria', args=[0]))
+        self.assertSemVarreduraCompleta(planos)
+        # o dia inteiro, todos os status, em uma consulta pela faixa de datas da empresa
+        self.assertUsaIndice(planos, 'agendamento_empresa_data_idx')
+
+    def test_planilha_periodo(self):
+        planos = self.get_planos(reverse('servicos:agendamentos:planilha_periodo', args=[0]))
+        self.assertSemVarreduraCompleta(planos)
+        self.assertUsaIndice(planos, 'agendamento_empresa_data_idx')
+
+    def test_home(self):
+        cache.clear()  # indicadores em cache não executariam as consultas
+        planos = self.get_planos(reverse('home'))
+        self.assertSemVarreduraCompleta(planos)
+        self.assertUsaIndice(planos, 'cliente_ativos_criado_idx')
+        self.assertUsaIndice(planos, 'agendamento_status_data_idx')
+
+
+class PaginacaoCursorTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="dono", password="senha")
+        cls.empresa = Empresa.objects.create(
+            cnpj="11222333000181", nome_fantasia="Salão", razao_social="Salão LTDA", user=cls.user
+        )
+        # mesmo data_criado em todos os do bulk_create: o desempate pelo pk precisa manter a ordem
+        Cliente.objects.bulk_create([
+            Cliente(
+                nome=f"Cliente {indice}", cpf=f"{indice:011d}", telefone=f"+55119999{indice:05d}",
+                endereco="Rua A", empresa=cls.empresa
+            )
+            for indice in range(12)
+        ])
+        Cliente.objects.filter(pk__in=Cliente.objects.order_by('pk').values('pk')[:4]).update(
+            data_criado=timezone.now() - timedelta(days=1)
+        )
+        Cliente.objects.filter(nome="Cliente 11").update(ativo=False)
+        cls.ordem = list(
+            Cliente.objects.filter(ativo=True).order_by('-data_criado', '-pk').values_list('pk', flat=True)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['empresa_id'] = self.empresa.id
+        session.save()
+
+    def get_pagina(self, url: str):
+        resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        return [item['pk'] for item in resposta.context['object_dicts']], resposta.context['page_obj']
+
+    @mock.patch.object(ClientesListView, 'paginate_by', 5)
+    def test_percorre_as_paginas_nos_dois_sentidos(self):
+        url = reverse('cadastros:clientes:list')
+
+        vistos, pagina, paginas = [], None, 0
+        while url:
+            pks, pagina = self.get_pagina(url)
+            vistos += pks
+            paginas += 1
+            url = pagina.url_proxima and reverse('cadastros:clientes:list') + pagina.url_proxima
+        self.assertEqual(vistos, self.ordem)
+        self.assertEqual(paginas, 3)
+
+        # de volta a partir da última página
+        url = reverse('cadastros:clientes:list') + pagina.url_anterior
+        voltando = []
+        while url:
+            pks, pagina = self.get_pagina(url)
+            voltando = pks + voltando
+            url = pagina.url_anterior and reverse('cadastros:clientes:list') + pagina.url_anterior
+        self.assertEqual(voltando, self.ordem[:10])
+        self.assertIsNotNone(pagina.url_proxima)
+
+    @mock.patch.object(ClientesListView, 'paginate_by', 5)
+    def test_pagina_anterior_curta_volta_a_primeira_pagina(self):
+        # cursor do terceiro registro (ex.: a página seguinte perdeu registros desde o link): só 2 mais recentes
+        cliente = Cliente.objects.get(pk=self.ordem[2])
+        url = reverse('cadastros:clientes:list') + f"?antes={codificar_cursor(cliente.data_criado, cliente.pk)}"
+
+        pks, pagina = self.get_pagina(url)
+        self.assertEqual(pks, self.ordem[:5])
+        self.assertIsNone(pagina.url_anterior)
+        self.assertIsNotNone(pagina.url_proxima)
+
+    @mock.patch.object(ClientesListView, 'paginate_by', 5)
+    def test_links_mantem_os_filtros_sem_count(self):
+        with CaptureQueriesContext(connection) as consultas:
+            pks, pagina = self.get_pagina(reverse('cadastros:clientes:list') + "?query=Cliente&data_1=2000-01-01")
+        self.assertEqual(pks, self.ordem[:5])
+        self.assertIn("query=Cliente", pagina.url_proxima)
+        self.assertIn("data_1=2000-01-01", pagina.url_proxima)
+        self.assertIsNone(pagina.url_anterior)
+        self.assertFalse(any("COUNT(" in consulta['sql'] for consulta in consultas.captured_queries))
+
+    def test_cursor(self):
+        momento = timezone.now()
+        self.assertEqual(decodificar_cursor(codificar_cursor(momento, 42)), (momento, 42))
+        for invalido in ("", "abc", "1.2.3", "99999999999999999999999.1"):
+            self.assertIsNone(decodificar_cursor(invalido))
+
+    @skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN do SQLite")
+    def test_pagina_seguinte_usa_o_indice(self):
+        data_criado, pk = decodificar_cursor(codificar_cursor(timezone.now(), 10))
+        queryset = (
+            Cliente.objects.filter(empresa=self.empresa, ativo=True)
+            .filter(Q(data_criado__lte=data_criado) & (Q(data_criado__lt=data_criado) | Q(pk__lt=pk)))
+            .order_by('-data_criado', '-pk')[:51]
+        )
+        plano = plano_consulta(queryset)
+        self.assertIn("cliente_ativos_criado_idx (empresa_id=? AND data_criado<?)", plano)
+        self.assertNotIn("TEMP B-TREE", plano)
+
+
+class ListagemProjecaoTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="dono", password="senha")
+        cls.empresa = Empresa.objects.create(
+            cnpj="11222333000181", nome_fantasia="Salão", razao_social="Salão LTDA", user=cls.user
+        )
+        cliente = Cliente.objects.create(
+            nome="Cliente", cpf="52998224725", telefone="+5511999990000", endereco="Rua A", empresa=cls.empresa
+        )
+        servico = TipoServico.objects.create(nome="Corte", preco=Decimal("50.00"), empresa=cls.empresa)
+        trabalhador = Trabalhador.objects.create(
+            nome="Ana", cpf="11144477735", telefone="+5511988880001", endereco="Rua B", empresa=cls.empresa
+        )
+        for status in (AGENDAMENTO_STATUS_PENDENTE, AGENDAMENTO_STATUS_FINALIZADO, AGENDAMENTO_STATUS_FINALIZADO):
+            cls.agendamento = Agendamento.objects.create(
+                data_agendado=timezone.now(), status=status, cliente=cliente,
+                servico=servico, trabalhador=trabalhador, empresa=cls.empresa
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['empresa_id'] = self.empresa.id
+        session.save()
+
+    def get_listagem(self, url: str):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        listagem = next(consulta['sql'] for consulta in consultas.captured_queries if "ORDER BY" in consulta['sql'])
+        return resposta.context['object_dicts'], listagem
+
+    def test_linhas_montadas_so_com_as_colunas_exibidas(self):
+        linhas, sql = self.get_listagem(reverse('servicos:agendamentos:list'))
+
+        self.assertEqual(len(linhas), 3)
+        linha = linhas[0]
+        agendamento = self.agendamento
+        self.assertEqual(linha['pk'], agendamento.pk)
+        self.assertEqual(linha['status'], agendamento.get_status_display())
+        self.assertEqual(linha['cliente'], str(agendamento.cliente))
+        self.assertEqual(linha['servico'], str(agendamento.servico))
+        self.assertEqual(linha['trabalhador'], str(agendamento.trabalhador))
+        # só as colunas exibidas (e a chave do cursor), sem carregar os relacionados inteiros
+        self.assertNotIn('"endereco"', sql)
+        self.assertNotIn('"imagem"', sql)
+
+    def test_anotacoes_e_arquivos(self):
+        linhas, sql = self.get_listagem(reverse('cadastros:trabalhadores:list'))
+
+        self.assertEqual(len(linhas), 1)
+        self.assertEqual(linhas[0]['agendamentos_totais_finalizados'], 2)
+        self.assertEqual(linhas[0]['agendamentos_pendentes'], 1)
+        self.assertEqual(linhas[0]['imagem'], Trabalhador.objects.get().imagem.url)
+        self.assertNotIn('"data_modificado"', sql.split(" FROM ")[0])
+
+    def test_exportacao_csv_com_os_filtros_da_listagem(self):
+        url = reverse('servicos:agendamentos:list')
+        resposta = self.client.get(url + "?query=ana&formato=csv&apos=1.1")
+
+        self.assertTrue(resposta.streaming)
+        self.assertIn("attachment", resposta['Content-Disposition'])
+        conteudo = b"".join(resposta.streaming_content).decode("utf-8-sig")
+        linhas = [linha.split(";") for linha in conteudo.splitlines()]
+        self.assertEqual(linhas[0], ["Data Agendada", "Estado", "Cliente", "Serviço", "Trabalhador"])
+        # sem paginação: o cursor é ignorado e vêm todos os registros
+        self.assertEqual(len(linhas), 4)
+        self.assertEqual(linhas[1][1:], [
+            self.agendamento.get_status_display(), str(self.agendamento.cliente),
+            str(self.agendamento.servico), str(self.agendamento.trabalhador)
+        ])
+
+        resposta = self.client.get(url + "?query=ninguem&formato=csv")
+        self.assertEqual(len(b"".join(resposta.streaming_content).decode("utf-8-sig").splitlines()), 1)
+
+        resposta = self.client.get(url + "?apos=1.1&query=ana")
+        self.assertEqual(resposta.context['url_exportar_csv'], "?query=ana&formato=csv")
+
+    def test_csv_gerado_em_blocos(self):
+        blocos = list(gerar_csv(["Nome", "Valor"], [["=SOMA(A1)", Decimal("1.5")], ["B", None], ["C", 3]], linhas_por_bloco=2))
+        self.assertEqual(len(blocos), 2)
+        self.assertEqual("".join(blocos), "\ufeffNome;Valor\r\n'=SOMA(A1);1,5\r\nB;\r\nC;3\r\n")
+
+    def test_especificacao_calculada_uma_vez_por_classe(self):
+        BaseDynamicListView._especificacoes.pop(ClientesListView, None)
+        url = reverse('cadastros:clientes:list')
+        with mock.patch.object(ClientesListView, 'criar_especificacao', autospec=True,
+                               side_effect=BaseDynamicListView.criar_especificacao) as criar:
+            primeira = self.client.get(url)
+            segunda = self.client.get(url + "?query=Cliente")
+        self.assertEqual(criar.call_count, 1)
+        self.assertEqual(primeira.context['field_names'], segunda.context['field_names'])
+        self.assertEqual(segunda.context['url_submodule_create'], reverse('cadastros:clientes:create'))
+
+
+@skipUnless(connection.vendor == 'sqlite', "índices FTS5 do SQLite")
+class BuscaTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="dono", password="senha")
+        cls.empresa = Empresa.objects.create(
+            cnpj="11222333000181", nome_fantasia="Salão", razao_social="Salão LTDA", user=cls.user
+        )
+        outra = Empresa.objects.create(
+            cnpj="11444777000161", nome_fantasia="Outro", razao_social="Outro LTDA", user=cls.user
+        )
+        cls.jose = Cliente.objects.create(
+            nome="José da Silva", cpf="52998224725", telefone="+5511999990000",
+            endereco="Rua das Acácias", empresa=cls.empresa
+        )
+        cls.maria = Cliente.objects.create(
+            nome="Maria Souza", cpf="11144477735", telefone="+5521988880000",
+            endereco="Avenida Silva Jardim", empresa=cls.empresa
+        )
+        Cliente.objects.create(
+            nome="José Outro", cpf="39053344705", telefone="+5511977770000", endereco="Rua B", empresa=outra
+        )
+        cls.servico = TipoServico.objects.create(nome="Coloração", preco=Decimal("120.00"), empresa=cls.empresa)
+        trabalhador = Trabalhador.objects.create(
+            nome="Ana", cpf="71428793860", telefone="+5511966660000", endereco="Rua C", empresa=cls.empresa
+        )
+        cls.agendamento = Agendamento.objects.create(
+            data_agendado=timezone.now(), cliente=cls.jose, servico=cls.servico,
+            trabalhador=trabalhador, empresa=cls.empresa
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['empresa_id'] = self.empresa.id
+        session.save()
+
+    def buscar(self, model, query: str) -> list[int]:
+        return buscar_ids(model, query, self.empresa.id)
+
+    def test_prefixo_sem_acentos_e_escopo_da_empresa(self):
+        self.assertEqual(self.buscar(Cliente, "jose sil"), [self.jose.pk])
+        self.assertEqual(self.buscar(Cliente, "ACACIA"), [self.jose.pk])
+        self.assertEqual(self.buscar(Cliente, "mar"), [self.maria.pk])
+        self.assertEqual(self.buscar(Cliente, "lima"), [])
+        # CPF e telefone com pontuação, telefone sem o código do país
+        self.assertEqual(self.buscar(Cliente, "529.982.247-25"), [self.jose.pk])
+        self.assertEqual(self.buscar(Cliente, "(21) 98888"), [self.maria.pk])
+
+    def test_resultados_ordenados_por_relevancia(self):
+        # 'silva' no nome de um e no endereço do outro: o nome pesa mais
+        self.assertEqual(self.buscar(Cliente, "silva"), [self.jose.pk, self.maria.pk])
+        self.assertEqual(buscar_ids(Cliente, "silva", self.empresa.id, limite=1), [self.jose.pk])
+
+    def test_indice_acompanha_alteracoes(self):
+        self.assertEqual(self.buscar(Agendamento, "jose coloracao"), [self.agendamento.pk])
+
+        Cliente.objects.filter(pk=self.jose.pk).update(nome="Joaquim")
+        self.assertEqual(self.buscar(Cliente, "jose"), [])
+        self.assertEqual(self.buscar(Agendamento, "joaquim"), [self.agendamento.pk])
+
+        self.maria.delete()
+        self.assertEqual(self.buscar(Cliente, "maria"), [])
+
+    def test_save_sem_alteracao_nao_reescreve_o_indice(self):
+        def linhas_alteradas(registro) -> int:
+            # total_changes() inclui as linhas alteradas pelos triggers
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT total_changes()")
+                antes = cursor.fetchone()[0]
+                registro.save()
+                cursor.execute("SELECT total_changes()")
+                return cursor.fetchone()[0] - antes
+
+        self.assertEqual(linhas_alteradas(self.jose), 1)
+        self.assertEqual(linhas_alteradas(self.agendamento.trabalhador), 1)
+
+        self.jose.nome = "Joaquim"
+        self.assertGreater(linhas_alteradas(self.jose), 1)
+        self.assertEqual(self.buscar(Agendamento, "joaquim"), [self.agendamento.pk])
+
+    def test_indisponibilidade_nao_fica_no_cache(self):
+        busca._disponivel.clear()
+        with mock.patch('core.busca._tabela_existe', return_value=False):
+            self.assertFalse(busca_disponivel())
+        # índices criados depois (ex.: migrate com o servidor já rodando)
+        self.assertTrue(busca_disponivel())
+
+    def test_indices_removidos_durante_o_migrate_sao_preenchidos_de_novo(self):
+        busca.remover_indices()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'busca_%%'")
+            self.assertEqual(cursor.fetchall(), [])
+
+        # alteração feita sem as triggers (ex.: uma migration de dados)
+        Cliente.objects.filter(pk=self.jose.pk).update(nome="Joaquim")
+        busca.criar_indices()
+        self.assertEqual(self.buscar(Cliente, "joaquim"), [self.jose.pk])
+        self.assertEqual(self.buscar(Cliente, "jose"), [])
+
+    def test_listagens_usam_o_indice(self):
+        resposta = self.client.get(reverse('cadastros:clientes:list') + "?query=jose")
+        self.assertEqual([linha['pk'] for linha in resposta.context['object_dicts']], [self.jose.pk])
+
+        resposta = self.client.get(reverse('servicos:agendamentos:list') + "?query=ana")
+        self.assertEqual([linha['pk'] for linha in resposta.context['object_dicts']], [self.agendamento.pk])
+
+        # nome ou preço; buscas não numéricas não quebram mais a listagem
+        for query, esperado in (("color", [self.servico.pk]), ("120", [self.servico.pk]), ("corte", []), ("1e999999", [])):
+            resposta = self.client.get(reverse('servicos:tipo_servicos:list') + f"?query={query}")
+            self.assertEqual([linha['pk'] for linha in resposta.context['object_dicts']], esperado, query)
+
+
+@skipUnless(connection.vendor == 'sqlite', "índices FTS5 do SQLite")
+class SugestoesTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="dono", password="senha")
+        cls.empresa = Empresa.objects.create(
+            cnpj="11222333000181", nome_fantasia="Salão", razao_social="Salão LTDA", user=cls.user
+        )
+        outra = Empresa.objects.create(
+            cnpj="11444777000161", nome_fantasia="Outro", razao_social="Outro LTDA", user=cls.user
+        )
+        cls.clientes = Cliente.objects.bulk_create([
+            Cliente(
+                nome=f"Mariana {indice}", cpf=f"{indice:011d}", telefone=f"+55119999{indice:05d}",
+                endereco="Rua A", empresa=cls.empresa
+            )
+            for indice in range(12)
+        ])
+        Cliente.objects.filter(nome="Mariana 0").update(ativo=False)
+        Cliente.objects.create(
+            nome="Mariana Outra", cpf="52998224725", telefone="+5511977770000", endereco="Rua B", empresa=outra
+        )
+
+    def setUp(self):
+        cache.clear()
+        cache_sugestoes.limpar()
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['empresa_id'] = self.empresa.id
+        session.save()
+
+    def get_sugestoes(self, tipo: str, **parametros):
+        return self.client.get(reverse('core:sugestoes', args=[tipo]), parametros)
+
+    def test_prefixo_com_limite_e_poucas_colunas(self):
+        resposta = self.get_sugestoes('clientes', q="mari", limite=5)
+
+        self.assertEqual(resposta.status_code, 200)
+        resultados = resposta.json()['resultados']
+        self.assertEqual(len(resultados), 5)
+        self.assertEqual(set(resultados[0]), {'id', 'texto', 'busca'})
+        self.assertTrue(all(resultado['texto'].startswith("Mariana ") for resultado in resultados))
+        # só clientes ativos da empresa da sessão
+        self.assertNotIn("Mariana 0", [resultado['texto'] for resultado in resultados])
+        self.assertNotIn("Mariana Outra", [resultado['texto'] for resultado in resultados])
+
+        self.assertIn("private", resposta['Cache-Control'])
+        self.assertIn("max-age", resposta['Cache-Control'])
+
+        self.assertEqual(len(self.get_sugestoes('clientes', q="mari", limite=1000).json()['resultados']), 11)
+        self.assertEqual(self.get_sugestoes('clientes', q="m").json()['resultados'], [])
+        self.assertEqual(self.get_sugestoes('desconhecido', q="mari").status_code, 404)
+
+    def test_lru_e_invalidacao(self):
+        buscar_sugestoes('clientes', "Mari", self.empresa.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(buscar_sugestoes('clientes', " mari ", self.empresa.id)), LIMITE_PADRAO)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cliente = Cliente.objects.get(nome="Mariana 5")
+            cliente.nome = "Joana"
+            cliente.save()
+        textos = [resultado['texto'] for resultado in buscar_sugestoes('clientes', "mari", self.empresa.id, limite=20)]
+        self.assertNotIn("Mariana 5", textos)
+        self.assertEqual(buscar_sugestoes('clientes', "joa", self.empresa.id)[0]['id'], cliente.pk)
+
+    def test_lru_descarta_os_menos_usados(self):
+        lru = CacheSugestoes(tamanho=2, ttl=60)
+        for prefixo in ("aa", "bb"):
+            lru.guardar(1, (prefixo,), 1, [prefixo])
+        lru.obter(1, ("aa",), 1)
+        lru.guardar(1, ("cc",), 1, ["cc"])
+
+        self.assertEqual(lru.obter(1, ("aa",), 1), ["aa"])
+        self.assertIsNone(lru.obter(1, ("bb",), 1))
+        self.assertIsNone(lru.obter(1, ("cc",), 2)) # outra versão
+
+
+class MetricasHomeTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="dono", password="senha")
+        cls.empresa = Empresa.objects.create(
+            cnpj="11222333000181", nome_fantasia="Salão", razao_social="Salão LTDA", user=cls.user
+        )
+        cls.cliente = Cliente.objects.create(
+            nome="Cliente", cpf="52998224725", telefone="+5511999990000", endereco="Rua A", empresa=cls.empresa
+        )
+        servico = TipoServico.objects.create(nome="Corte", preco=Decimal("50.00"), empresa=cls.empresa)
+        ana = Trabalhador.objects.create(
+            nome="Ana", cpf="11144477735", telefone="+5511988880001", endereco="Rua B", empresa=cls.empresa
+        )
+        Trabalhador.objects.create(
+            nome="Bia", cpf="39053344705", telefone="+5511988880002", endereco="Rua C", empresa=cls.empresa
+        )
+
+        agora = timezone.now()
+        for minutos, status in ((-5, AGENDAMENTO_STATUS_EXECUTANDO), (-90, AGENDAMENTO_STATUS_FINALIZADO),
+                                (30, AGENDAMENTO_STATUS_PENDENTE), (60, AGENDAMENTO_STATUS_PENDENTE)):
+            Agendamento.objects.create(
+                data_agendado=agora + timedelta(minutes=minutos), status=status, cliente=cls.cliente,
+                servico=servico, trabalhador=ana, empresa=cls.empresa
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_indicadores_em_uma_consulta(self):
+        with self.assertNumQueries(1):
+            metricas = calcular_metricas_home(self.empresa)
+
+        self.assertEqual((metricas.clientes_novos, metricas.clientes_total), (1, 1))
+        self.assertEqual((metricas.trabalhadores_ocupados, metricas.trabalhadores_total), (1, 2))
+        self.assertEqual(metricas.porcentagem_trabalhadores_ocupados, 50)
+        self.assertEqual(metricas.atendimentos_seguintes, 2)
+        if timezone.localdate(timezone.now() - timedelta(minutes=90)) == timezone.localdate():
+            self.assertEqual(metricas.faturamento_mes, Decimal("50.00"))
+
+    def test_cache_invalidado_por_alteracoes(self):
+        get_metricas_home(self.empresa)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_metricas_home(self.empresa).clientes_total, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Cliente.objects.create(
+                nome="Outro", cpf="39053344705", telefone="+5511999990001", endereco="Rua D", empresa=self.empresa
+            )
+        self.assertEqual(get_metricas_home(self.empresa).clientes_total, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Agendamento.objects.filter(status=AGENDAMENTO_STATUS_PENDENTE).first().delete()
+        self.assertEqual(get_metricas_home(self.empresa).atendimentos_seguintes, 1)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class TempoRealTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="dono", password="senha")
+        cls.empresa = Empresa.objects.create(
+            cnpj="11222333000181", nome_fantasia="Salão", razao_social="Salão LTDA", user=cls.user
+        )
+        cliente = Cliente.objects.create(
+            nome="Cliente", cpf="52998224725", telefone="+5511999990000", endereco="Rua A", empresa=cls.empresa
+        )
+        servico = TipoServico.objects.create(nome="Corte", preco=Decimal("50.00"), empresa=cls.empresa)
+        cls.trabalhador = Trabalhador.objects.create(
+            nome="Ana", cpf="11144477735", telefone="+5511988880001", endereco="Rua B", empresa=cls.empresa
+        )
+        # bulk_create: sem sinais, nenhum envio pendente na transação da classe
+        cls.agendamentos = Agendamento.objects.bulk_create([
+            Agendamento(
+                data_agendado=timezone.now() + timedelta(minutes=minutos), cliente=cliente, servico=servico,
+                preco=servico.preco, trabalhador=cls.trabalhador, empresa=cls.empresa
+            )
+            for minutos in (5, 10)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.channel_layer = get_channel_layer()
+        self.canal = async_to_sync(self.channel_layer.new_channel)()
+        async_to_sync(self.channel_layer.group_add)(grupo_empresa(self.empresa.pk), self.canal)
+
+    def receber(self) -> dict:
+        return async_to_sync(self.channel_layer.receive)(self.canal)
+
+    def test_mudanca_de_status_enviada_apos_commit(self):
+        agendamento = self.agendamentos[0]
+        with self.captureOnCommitCallbacks() as callbacks:
+            agendamento.status = AGENDAMENTO_STATUS_EXECUTANDO
+            agendamento.save(update_fields=['status'])
+        # nada é enviado antes do commit
+        self.assertEqual(self.channel_layer.channels.get(self.canal, []), [])
+
+        for callback in callbacks:
+            callback()
+
+        card = self.receber()
+        self.assertEqual((card['evento'], card['dados']['id']), ('agendamento', agendamento.pk))
+        self.assertEqual(card['dados']['coluna'], 'executando')
+        self.assertEqual(card['dados']['dia'], timezone.localdate(agendamento.data_agendado).isoformat())
+
+        trabalhadores = self.receber()
+        self.assertEqual(trabalhadores['evento'], 'trabalhador')
+        self.assertEqual(
+            [(item['id'], item['status']) for item in trabalhadores['dados']],
+            [(self.trabalhador.pk, 'ocupado')]
+        )
+
+        quick_info = self.receber()
+        self.assertEqual(quick_info['evento'], 'quick_info')
+        ocupados = next(item for item in quick_info['dados'] if item['chave'] == 'trabalhadores')
+        self.assertEqual(ocupados['value'], "1")
+
+    def test_alteracoes_da_transacao_enviadas_juntas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for agendamento in self.agendamentos:
+                    agendamento.status = AGENDAMENTO_STATUS_CANCELADO
+                    agendamento.save(update_fields=['status'])
+            # sem alteração visível nos dashboards: nada a enviar
+            self.agendamentos[0].save()
+
+        eventos = [self.receber()['evento'] for _ in range(4)]
+        self.assertEqual(eventos, ['agendamento', 'agendamento', 'trabalhador', 'quick_info'])
+        self.assertEqual(self.channel_layer.channels.get(self.canal, []), [])
+
+    def test_indicadores_recalculados_so_quando_mudam(self):
+        outro = Trabalhador.objects.create(
+            nome="Bia", cpf="39053344705", telefone="+5511988880002", endereco="Rua C", empresa=self.empresa
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            agendamento = self.agendamentos[0]
+            agendamento.trabalhador = outro
+            agendamento.save()
+
+        eventos = [self.receber()['evento'] for _ in range(2)]
+        self.assertEqual(eventos, ['agendamento', 'trabalhador'])
+        self.assertEqual(self.channel_layer.channels.get(self.canal, []), [])
+
+    def test_rollback_descarta_alteracoes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.agendamentos[0].delete()
+                transaction.set_rollback(True)
+            Agendamento.objects.filter(pk=self.agendamentos[1].pk).first().delete()
+
+        removido = self.receber()
+        self.assertEqual(removido['dados']['id'], self.agendamentos[1].pk)
+        self.assertIsNone(removido['dados']['coluna'])
+        self.assertEqual(self.receber()['evento'], 'trabalhador')
+        self.assertEqual(self.receber()['evento'], 'quick_info')
+
+    async def conectar(self, **scope) -> tuple[ApplicationCommunicator, dict]:
+        """Handshake do websocket direto no consumer (channels.testing depende do daphne)."""
+        comunicador = ApplicationCommunicator(
+            DashboardConsumer.as_asgi(), {'type': 'websocket', 'path': "/ws/dashboard/", **scope}
+        )
+        await comunicador.send_input({'type': 'websocket.connect'})
+        return comunicador, await comunicador.receive_output()
+
+    async def test_consumer_entra_no_grupo_da_empresa_da_sessao(self):
+        comunicador, resposta = await self.conectar(user=self.user, session={'empresa_id': self.empresa.pk})
+        self.assertEqual(resposta['type'], 'websocket.accept')
+
+        await self.channel_layer.group_send(
+            grupo_empresa(self.empresa.pk), {'type': 'dashboard.evento', 'evento': 'teste', 'dados': [1]}
+        )
+        mensagem = await comunicador.receive_output()
+        self.assertEqual(json.loads(mensagem['text']), {'evento': 'teste', 'dados': [1]})
+
+        await comunicador.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await comunicador.wait()
+
+    async def test_consumer_recusa_empresa_de_outro_usuario(self):
+        outro = await database_sync_to_async(get_user_model().objects.create_user)(username="outro", password="senha")
+        for scope in ({'user': outro, 'session': {'empresa_id': self.empresa.pk}}, {'session': {}}):
+            with self.subTest(scope=scope):
+                _, resposta = await self.conectar(**scope)
+                self.assertEqual(resposta['type'], 'websocket.close')
+
+
+class GeradorDadosTestCase(TestCase):
+    configuracao = ConfiguracaoGerador(empresas=2, clientes=15, trabalhadores=3, servicos=14, agendamentos=300, seed=42)
+    hoje = date(2025, 6, 15)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="dono", password="senha")
+
+    def gerar(self) -> list[tuple]:
+        GeradorDados(self.configuracao, self.user, hoje=self.hoje).gerar()
+        return list(
+            Agendamento.objects.order_by('pk').values_list(
+                'empresa__cnpj', 'cliente__nome', 'trabalhador__cpf', 'servico__nome',
+                'servico__preco', 'data_agendado', 'status', 'data_criado'
+            )
+        )
+
+    def test_mesma_seed_gera_os_mesmos_dados(self):
+        with transaction.atomic():
+            primeira = self.gerar()
+            transaction.set_rollback(True)
+
+        self.assertEqual(self.gerar(), primeira)
+        self.assertEqual(len(primeira), 600)
+
+    def test_dados_consistentes(self):
+        self.gerar()
+        agora = timezone.make_aware(datetime.combine(self.hoje, time(12)))
+
+        self.assertTrue(all(CPF().validate(cpf) for cpf in Cliente.objects.values_list('cpf', flat=True)))
+        self.assertTrue(all(CNPJ().validate(cnpj) for cnpj in Empresa.objects.values_list('cnpj', flat=True)))
+        self.assertFalse(
+            Agendamento.objects.filter(data_agendado__gt=agora)
+            .exclude(status__in=[AGENDAMENTO_STATUS_PENDENTE, AGENDAMENTO_STATUS_CANCELADO]).exists()
+        )
+        # sem agendamentos de outra empresa
+        self.assertFalse(Agendamento.objects.exclude(cliente__empresa=F('empresa')).exists())
+        # cliente cadastrado no primeiro agendamento, histórico com as datas geradas
+        for cliente in Cliente.objects.annotate(primeiro=Min('agendamentos__data_criado')).exclude(primeiro=None):
+            self.assertEqual(cliente.data_criado, cliente.primeiro)
+        self.assertLess(Agendamento.objects.aggregate(Min('data_criado'))['data_criado__min'], agora - timedelta(days=300))
+
+        # resumos diários reconstruídos após o bulk_create
+        self.assertEqual(
+            ResumoDiarioAgendamento.objects.aggregate(total=Sum('quantidade'))['total'],
+            Agendamento.objects.count()
+        )
@@ -1,5 +1,11 @@
 # core/dashboard.py
+from collections.abc import Callable
 from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+from django.db.models import Q
 
 
 @dataclass
@@ -9,6 +15,7 @@ class QuickInfoItem:
     conclusion: str
     fa_icon: str
     link_module: str
+    chave: str | None = None
 
 
 @dataclass
@@ -24,4 +31,110 @@ class TableOptionItemModal:
     nome: str
     description: str
     fa_icon: str
-    link_module: str
\ No newline at end of file
+    link_module: str
+
+@dataclass(frozen=True)
+class ColunaListagem:
+    """
+    Coluna de uma listagem (BaseDynamicListView): as colunas buscadas com values()
+    e como exibi-las. Sem 'formatar', exibe o valor da única coluna.
+    """
+    nome: str
+    valores: tuple[str, ...]
+    formatar: Callable[..., Any] | None = None
+
+    def exibir(self, linha: dict):
+        if self.formatar is None:
+            return linha[self.valores[0]]
+        return self.formatar(*(linha[valor] for valor in self.valores))
+
+@dataclass(frozen=True)
+class EspecificacaoListagem:
+    """Metadados de uma classe de listagem, calculados uma vez e reutilizados entre requests."""
+    cabecalhos: tuple[str, ...]
+    colunas: tuple[ColunaListagem, ...]
+    valores: tuple[str, ...] # argumentos do values(): pk, chave do cursor e as colunas exibidas
+    app_name: str | None = None
+    url_create: str | None = None
+    url_sugestoes: str | None = None
+
+
+@dataclass(frozen=True)
+class IndiceBusca:
+    """
+    Índice de busca textual (FTS5) de um model, ver core.busca.
+    'colunas' recebe o alias da linha da tabela de origem (rowid = pk) e retorna
+    as colunas do índice com as expressões SQL dos seus valores.
+    """
+    tabela: str
+    model: type
+    colunas: Callable[[str], dict[str, str]]
+    campos: tuple[str, ...] # colunas da origem que alteram o texto indexado
+    # (model relacionado, FK na origem, campos do relacionado exibidos no índice)
+    dependencias: tuple[tuple[type, str, tuple[str, ...]], ...] = ()
+    pesos: tuple[float, ...] = () # peso de cada coluna na relevância (bm25); vazio = iguais
+
+
+@dataclass(frozen=True)
+class PaginaCursor:
+    """Navegação de uma listagem paginada por cursor (ver core.paginacao): links com os filtros atuais."""
+    url_anterior: str | None = None
+    url_proxima: str | None = None
+
+    @property
+    def tem_outras_paginas(self) -> bool:
+        return bool(self.url_anterior or self.url_proxima)
+
+
+@dataclass(frozen=True)
+class MetricasHome:
+    """Indicadores do resumo da Home de uma empresa (ver core.metricas)."""
+    clientes_novos: int
+    clientes_total: int
+    faturamento_semana: Decimal
+    faturamento_mes: Decimal
+    atendimentos_seguintes: int
+    trabalhadores_ocupados: int
+    trabalhadores_total: int
+    calculado_em: datetime
+
+    @property
+    def porcentagem_trabalhadores_ocupados(self) -> float:
+        if not self.trabalhadores_total:
+            return 0.0
+        return (self.trabalhadores_ocupados / self.trabalhadores_total) * 100
+
+
+@dataclass(frozen=True)
+class Periodo:
+    """Intervalo semiaberto [inicio, fim) de datetimes aware."""
+    inicio: datetime
+    fim: datetime
+
+    def __iter__(self):
+        return iter((self.inicio, self.fim))
+
+    def __contains__(self, momento: datetime) -> bool:
+        return self.inicio <= momento < self.fim
+
+    def filtro(self, campo: str) -> Q:
+        """Comparações diretas com a coluna, que podem usar índices (diferente de '__date')."""
+        return Q(**{f"{campo}__gte": self.inicio, f"{campo}__lt": self.fim})
+
+
+@dataclass(frozen=True)
+class ConfiguracaoGerador:
+    """Tamanho e distribuições da massa de dados gerada por core.gerador.GeradorDados."""
+    empresas: int = 1
+    clientes: int = 20          # por empresa
+    trabalhadores: int = 5      # por empresa
+    servicos: int = 8           # por empresa
+    agendamentos: int = 200     # por empresa
+    anos: float = 1.0           # histórico de agendamentos até hoje
+    dias_futuros: int = 30      # agenda já marcada após hoje
+    seed: int = 0
+    tamanho_lote: int = 2000
+    # status dos agendamentos passados; os futuros ficam pendentes, com alguns já cancelados
+    proporcao_finalizados: float = 0.80
+    proporcao_cancelados: float = 0.12
+    proporcao_cancelados_futuros: float = 0.08
@@ -1,9 +1,12 @@
 from django.urls import path, include
 
+from core.views import SugestoesView
+
 
 app_name = "bases"
 
 urlpatterns = [
     # path("bases/", include('core.bases.urls', namespace="bases")),
-    path("auth/", include('core.auth.urls', namespace="auth"))
+    path("auth/", include('core.auth.urls', namespace="auth")),
+    path("sugestoes/<str:tipo>/", SugestoesView.as_view(), name="sugestoes")
 ]
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, JsonResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views import View
+
+from cadastros.empresas.mixins import ContextoEmpresaMixin
+from core.sugestoes import CONSULTAS, LIMITE_PADRAO, buscar_sugestoes
+
+
+class SugestoesView(LoginRequiredMixin, ContextoEmpresaMixin, View):
+    """
+    Sugestões da busca enquanto o usuário digita: ?q=<prefixo>&limite=<n>.
+    Resposta pequena e guardada pelo navegador por 'max_age' segundos (ver core.sugestoes).
+    """
+    max_age = 15
+
+    def get_limite(self) -> int:
+        try:
+            limite = int(self.request.GET.get("limite", LIMITE_PADRAO))
+        except ValueError:
+            limite = LIMITE_PADRAO
+        return max(1, min(limite, settings.SUGESTOES_LIMITE_MAXIMO))
+
+    def get(self, request, tipo: str, *args, **kwargs):
+        if tipo not in CONSULTAS:
+            raise Http404("Tipo de sugestão inválido.")
+
+        resultados = buscar_sugestoes(tipo, request.GET.get("q", ""), request.empresa.id, self.get_limite())
+
+        response = JsonResponse({'resultados': resultados})
+        patch_cache_control(response, private=True, max_age=self.max_age)
+        patch_vary_headers(response, ['Cookie'])
+        return response
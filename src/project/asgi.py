@@ -2,6 +2,8 @@
 ASGI config for src project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP segue para o Django; websockets (atualizações em tempo real dos dashboards,
+ver core.routing) passam pela autenticação da sessão.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,7 +15,21 @@ from whitenoise import WhiteNoise
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
 
 # Wrap with WhiteNoise
-application = WhiteNoise(application, root=os.path.join(os.path.dirname(os.path.dirname(__file__)), "static"))
+django_application = WhiteNoise(django_application, root=os.path.join(os.path.dirname(os.path.dirname(__file__)), "static"))
+
+# importados após o setup do Django (get_asgi_application)
+from channels.auth import AuthMiddlewareStack
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import AllowedHostsOriginValidator
+
+from core.routing import websocket_urlpatterns
+
+application = ProtocolTypeRouter({
+    "http": django_application,
+    "websocket": AllowedHostsOriginValidator(
+        AuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+    ),
+})
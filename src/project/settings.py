@@ -192,4 +192,52 @@ MEDIA_ROOT = BASE_DIR.parent / 'media'
 
 #LoginRequiredMixin urls
 LOGIN_URL = "/core/auth/login/"
-LOGIN_REDIRECT_URL = '/home/'
\ No newline at end of file
+LOGIN_REDIRECT_URL = '/home/'
+
+# Cache padrão (indicadores da Home, versões das sugestões, cards da planilha): em disco, compartilhado
+# pelos processos do servidor, então uma versão trocada em um worker vale para todos. Com mais de um
+# host, trocar por um backend em rede (ex.: django.core.cache.backends.redis.RedisCache)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR.parent / 'cache' / 'django',
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000, # acima disso, 1/3 das entradas é descartado (versões descartadas só causam misses)
+        },
+    }
+}
+
+# Cache em disco dos PDFs de relatórios (LRU por tamanho total)
+RELATORIOS_CACHE_DIR = BASE_DIR.parent / 'cache' / 'relatorios'
+RELATORIOS_CACHE_TAMANHO_MAXIMO = 200 * 1024 * 1024 # 200 MB
+
+# Geração assíncrona de relatórios (relatorios.jobs)
+RELATORIOS_JOBS_MAX_PROCESSOS = 2 # processos dedicados à geração de PDFs (0: gera no próprio processo)
+RELATORIOS_JOBS_MAX_PENDENTES = 20 # jobs em andamento, somando todas as empresas
+RELATORIOS_JOBS_MAX_PENDENTES_EMPRESA = 3
+RELATORIOS_JOBS_TEMPO_LIMITE = 10 * 60 # segundos de execução até um job ser considerado abandonado
+RELATORIOS_JOBS_TEMPO_LIMITE_FILA = 60 * 60 # segundos na fila de outro host (processo não verificável) até o abandono
+RELATORIOS_JOBS_RETENCAO = 7 * 24 * 60 * 60 # segundos que jobs concluídos (e seus PDFs) são mantidos
+RELATORIOS_EXPORTACAO_MAX_ITENS = 240 # relatórios por exportação em lote pela view
+RELATORIOS_EXPORTACAO_EM_VOO = 1 # gerações simultâneas de uma exportação pela view (limitado a MAX_PROCESSOS - 1)
+
+# Indicadores da Home (core.metricas), guardados no cache padrão por empresa
+HOME_METRICAS_TTL = 30 # segundos; alterações nos registros invalidam antes
+
+# Sugestões da busca (core.sugestoes): LRU em memória por processo, com os prefixos mais buscados
+SUGESTOES_CACHE_TAMANHO = 128 # prefixos guardados por empresa
+SUGESTOES_CACHE_TTL = 60 # segundos; alterações nos registros invalidam antes
+SUGESTOES_LIMITE_MAXIMO = 20 # sugestões por resposta
+
+# Planilha diária (servicos.agendamentos.planilha): cards de cada dia no cache padrão, por empresa
+PLANILHA_CACHE_TTL = 10 * 60 # segundos; alterações nos agendamentos do dia invalidam antes
+PLANILHA_PREAQUECIMENTO_THREADS = 1 # threads que preaquecem os dias vizinhos (0: no próprio request)
+
+# Atualizações em tempo real dos dashboards (core.tempo_real), servidas pelo ASGI (ex.: uvicorn project.asgi:application)
+ASGI_APPLICATION = 'project.asgi.application'
+CHANNEL_LAYERS = {
+    'default': {
+        # em memória: um único processo; com mais de um worker, usar um layer compartilhado (ex.: channels_redis)
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    }
+}
@@ -0,0 +1,101 @@
+"""
+Cache em disco dos PDFs de relatórios.
+
+Cada PDF é endereçado pelo conteúdo que o define: classe do relatório, empresa,
+ano/mes, emissor e o carimbo de versão dos dados (BaseRelatorio.versao_dados).
+Qualquer alteração nos registros relevantes muda a chave, então entradas antigas
+nunca são servidas e apenas envelhecem até serem removidas pela política LRU,
+limitada por settings.RELATORIOS_CACHE_TAMANHO_MAXIMO.
+"""
+import hashlib
+import os
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+
+from django.conf import settings
+
+
+class CacheRelatorios:
+    extensao = '.pdf'
+
+    def __init__(self, diretorio: Path | None = None, tamanho_maximo: int | None = None):
+        self.diretorio = Path(diretorio or settings.RELATORIOS_CACHE_DIR)
+        self.tamanho_maximo = (
+            tamanho_maximo if tamanho_maximo is not None
+            else settings.RELATORIOS_CACHE_TAMANHO_MAXIMO
+        )
+
+    @staticmethod
+    def gerar_chave(relatorio) -> str:
+        partes = [
+            f"{type(relatorio).__module__}.{type(relatorio).__qualname__}",
+            str(relatorio.empresa.pk),
+            f"{relatorio.ano:04d}-{relatorio.mes:02d}",
+            relatorio.emissor_nome,
+            relatorio.versao_dados(),
+        ]
+        return hashlib.sha256("|".join(partes).encode()).hexdigest()
+
+    def get_caminho(self, chave: str) -> Path:
+        return self.diretorio / f"{chave}{self.extensao}"
+
+    def obter(self, chave: str) -> Path | None:
+        """Retorna o caminho do PDF em cache, marcando-o como usado recentemente."""
+        caminho = self.get_caminho(chave)
+        try:
+            os.utime(caminho)
+        except FileNotFoundError:
+            return None
+        return caminho
+
+    def gerar(self, chave: str, escrever: Callable[[Path], None]) -> Path:
+        """
+        Cria a entrada chamando 'escrever' com um caminho temporário no diretório do cache
+        (ex.: BaseRelatorio.salvar_pdf), que então é renomeado de forma atômica.
+        Aplica o limite de tamanho ao final.
+        """
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        caminho = self.get_caminho(chave)
+
+        descritor, caminho_temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+        os.close(descritor)
+        caminho_temporario = Path(caminho_temporario)
+        try:
+            escrever(caminho_temporario)
+            os.replace(caminho_temporario, caminho)
+        except BaseException:
+            caminho_temporario.unlink(missing_ok=True)
+            raise
+
+        self.liberar_espaco(preservar=caminho)
+        return caminho
+
+    def salvar(self, chave: str, conteudo: bytes) -> Path:
+        return self.gerar(chave, lambda caminho: caminho.write_bytes(conteudo))
+
+    def liberar_espaco(self, preservar: Path | None = None) -> int:
+        """
+        Remove os PDFs usados há mais tempo até o total caber em 'tamanho_maximo'.
+        Retorna a quantidade de arquivos removidos.
+        """
+        entradas = []
+        for caminho in self.diretorio.glob(f"*{self.extensao}"):
+            try:
+                estado = caminho.stat()
+            except FileNotFoundError:
+                continue
+            entradas.append((estado.st_mtime, estado.st_size, caminho))
+
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        removidos = 0
+        for _, tamanho, caminho in sorted(entradas, key=lambda entrada: entrada[0]):
+            if total <= self.tamanho_maximo:
+                break
+            if caminho == preservar:
+                continue
+            caminho.unlink(missing_ok=True)
+            total -= tamanho
+            removidos += 1
+
+        return removidos
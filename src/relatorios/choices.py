@@ -0,0 +1,28 @@
+#RelatorioJob.status
+RELATORIO_JOB_STATUS_PENDENTE = 'P'
+RELATORIO_JOB_STATUS_EXECUTANDO = 'E'
+RELATORIO_JOB_STATUS_FINALIZADO = 'F'
+RELATORIO_JOB_STATUS_ERRO = 'X'
+
+C_TIPO_STATUS_RELATORIO_JOB = (
+    (RELATORIO_JOB_STATUS_PENDENTE, "Na fila"),
+    (RELATORIO_JOB_STATUS_EXECUTANDO, "Gerando"),
+    (RELATORIO_JOB_STATUS_FINALIZADO, "Pronto"),
+    (RELATORIO_JOB_STATUS_ERRO, "Erro"),
+)
+
+RELATORIO_JOB_STATUS_EM_ANDAMENTO = (
+    RELATORIO_JOB_STATUS_PENDENTE,
+    RELATORIO_JOB_STATUS_EXECUTANDO,
+)
+
+RELATORIO_JOB_STATUS_CONCLUIDO = (
+    RELATORIO_JOB_STATUS_FINALIZADO,
+    RELATORIO_JOB_STATUS_ERRO,
+)
+
+#RelatorioJob.tipo (chaves de relatorios.relatorios.RELATORIOS_REGISTRADOS)
+C_TIPO_RELATORIO = (
+    ('atividade-mensal', "Relatório de Atividade Mensal"),
+    ('clientes-mensal', "Relatório de Clientes Mensal"),
+)
@@ -0,0 +1,161 @@
+"""
+Camada de coleta de dados dos relatórios.
+
+Os coletores leem dos resumos diários (relatorios.rollups), executando uma única query
+com agregações condicionais por período; os rankings (top N) são derivados em memória
+a partir do resultado já carregado.
+"""
+from datetime import date, datetime
+
+from django.db.models import Q, F, Sum, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from cadastros.clientes.models import Cliente
+from servicos.agendamentos.choices import (
+    AGENDAMENTO_STATUS_PENDENTE,
+    AGENDAMENTO_STATUS_EXECUTANDO,
+    AGENDAMENTO_STATUS_FINALIZADO,
+    AGENDAMENTO_STATUS_CANCELADO
+)
+from relatorios.models import ResumoDiarioAgendamento
+from relatorios.rollups import resumos_periodo
+
+
+STATUS_VALIDOS = [
+    AGENDAMENTO_STATUS_PENDENTE,
+    AGENDAMENTO_STATUS_EXECUTANDO,
+    AGENDAMENTO_STATUS_FINALIZADO
+]
+
+
+def ranking(itens: list[dict], chave: str, limite: int = 3) -> list[dict]:
+    """Ordena os itens de forma decrescente por 'chave' e retorna os 'limite' primeiros."""
+    return sorted(itens, key=lambda item: item.get(chave) or 0, reverse=True)[:limite]
+
+
+def soma_quantidade(filtro: Q | None = None):
+    return Coalesce(Sum('quantidade', filter=filtro), 0)
+
+
+def soma_faturamento(filtro: Q | None = None):
+    return Sum('faturamento', filter=filtro)
+
+
+def coletar_totais_agendamentos(empresa, dia_inicio: date, dia_fim: date) -> dict:
+    """
+    Totais de agendamentos do período em uma só query.
+
+    - Returns:
+        dict com 'faturamento_finalizado', 'total_finalizados',
+        'faturamento_cancelado' e 'total_cancelados'.
+    """
+    filtro_finalizados = Q(status=AGENDAMENTO_STATUS_FINALIZADO)
+    filtro_cancelados = Q(status=AGENDAMENTO_STATUS_CANCELADO)
+
+    totais = resumos_periodo(empresa, dia_inicio, dia_fim).aggregate(
+        faturamento_finalizado=soma_faturamento(filtro_finalizados),
+        total_finalizados=soma_quantidade(filtro_finalizados),
+        faturamento_cancelado=soma_faturamento(filtro_cancelados),
+        total_cancelados=soma_quantidade(filtro_cancelados),
+    )
+
+    totais['faturamento_finalizado'] = totais['faturamento_finalizado'] or 0.0
+    totais['faturamento_cancelado'] = totais['faturamento_cancelado'] or 0.0
+    return totais
+
+
+def coletar_atividade_trabalhadores(empresa, dia_inicio: date, dia_fim: date) -> list[dict]:
+    """
+    Uma linha por trabalhador com agendamentos no período, com
+    'total_finalizados', 'total_cancelados' e 'valor_arrecadado_total'.
+    """
+    filtro_finalizados = Q(status=AGENDAMENTO_STATUS_FINALIZADO)
+
+    return list(
+        resumos_periodo(empresa, dia_inicio, dia_fim)
+        .filter(trabalhador__ativo=True)
+        .values('trabalhador_id', nome=F('trabalhador__nome'))
+        .annotate(
+            total_finalizados=soma_quantidade(filtro_finalizados),
+            total_cancelados=soma_quantidade(Q(status=AGENDAMENTO_STATUS_CANCELADO)),
+            valor_arrecadado_total=soma_faturamento(filtro_finalizados)
+        )
+        .order_by()
+    )
+
+
+def coletar_atividade_clientes(empresa, dia_inicio: date, dia_fim: date) -> list[dict]:
+    """
+    Uma linha por cliente com agendamentos no período, com 'total_marcados', 'total_finalizados',
+    'total_cancelados', 'total_agendamentos' (não cancelados) e 'faturamento_total' (finalizados).
+    """
+    filtro_finalizados = Q(status=AGENDAMENTO_STATUS_FINALIZADO)
+
+    return list(
+        resumos_periodo(empresa, dia_inicio, dia_fim)
+        .filter(cliente__ativo=True)
+        .values('cliente_id', nome=F('cliente__nome'), telefone=F('cliente__telefone'))
+        .annotate(
+            total_marcados=soma_quantidade(),
+            total_finalizados=soma_quantidade(filtro_finalizados),
+            total_cancelados=soma_quantidade(Q(status=AGENDAMENTO_STATUS_CANCELADO)),
+            total_agendamentos=soma_quantidade(Q(status__in=STATUS_VALIDOS)),
+            faturamento_total=soma_faturamento(filtro_finalizados)
+        )
+        .order_by()
+    )
+
+
+def coletar_clientes_recorrentes_antigos(empresa, dia_inicio: date, dia_fim: date,
+                                         criados_antes: datetime, limite: int = 3) -> list[dict]:
+    """Clientes cadastrados antes de 'criados_antes' com mais de 1 agendamento válido no período."""
+    return list(
+        resumos_periodo(empresa, dia_inicio, dia_fim)
+        .filter(
+            cliente__ativo=True,
+            cliente__data_criado__lt=criados_antes,
+            status__in=STATUS_VALIDOS
+        )
+        .values('cliente_id', nome=F('cliente__nome'))
+        .annotate(total_agendamentos=Sum('quantidade'))
+        .filter(total_agendamentos__gt=1)
+        .order_by('-total_agendamentos')[:limite]
+    )
+
+
+def coletar_clientes_inativos(empresa, dia_inicio: date, dia_fim: date, limite: int = 3):
+    """
+    Clientes ativos sem nenhum agendamento no período.
+
+    - Returns:
+        (total de inativos, até 'limite' inativos que já foram recorrentes, mais recentes primeiro)
+
+    O total geral considera apenas agendamentos até 'dia_fim', para que o relatório
+    de um mês fechado não mude com agendamentos futuros.
+    """
+    agendamentos_no_periodo = ResumoDiarioAgendamento.objects.filter(
+        cliente=OuterRef('pk'),
+        dia__gte=dia_inicio,
+        dia__lte=dia_fim
+    )
+    total_agendamentos_geral = (
+        ResumoDiarioAgendamento.objects
+        .filter(cliente=OuterRef('pk'), status__in=STATUS_VALIDOS, dia__lte=dia_fim)
+        .values('cliente')
+        .annotate(total=Sum('quantidade'))
+        .values('total')
+    )
+
+    clientes_inativos = (
+        Cliente.objects
+        .filter(ativo=True, empresa=empresa)
+        .filter(~Exists(agendamentos_no_periodo))
+        .order_by("-data_criado")
+    )
+
+    antigos_recorrentes = list(
+        clientes_inativos
+        .annotate(total_agendamentos_geral=Subquery(total_agendamentos_geral))
+        .filter(total_agendamentos_geral__gt=1)[:limite]
+    )
+    return clientes_inativos.count(), antigos_recorrentes
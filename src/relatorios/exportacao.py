@@ -0,0 +1,188 @@
+"""
+Exportação em lote de relatórios: várias combinações de (relatório, empresa, mês)
+geradas em paralelo no pool de processos e entregues como um único arquivo ZIP,
+escrito em blocos à medida que cada PDF fica pronto.
+
+Usada pelo comando 'exportar_relatorios' e pela view de exportação.
+"""
+import logging
+import zipfile
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+
+from django.db import close_old_connections
+
+from cadastros.empresas.models import Empresa
+from relatorios.cache import CacheRelatorios
+from relatorios.types import ItemExportacao, ProgressoExportacao
+
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_BLOCO = 64 * 1024
+ARQUIVO_RESUMO = 'resumo.txt'
+
+
+def meses_entre(inicio: tuple[int, int], fim: tuple[int, int]) -> Iterator[tuple[int, int]]:
+    """(ano, mes) de 'inicio' até 'fim', inclusivos."""
+    ano, mes = inicio
+    while (ano, mes) <= fim:
+        yield ano, mes
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+
+
+def montar_itens(empresas: Iterable[Empresa], tipos: Iterable[str], meses: Iterable[tuple[int, int]],
+                 emissor: str | Callable[[Empresa], str]) -> list[ItemExportacao]:
+    """Produto cartesiano empresas x meses x tipos, com o emissor fixo ou calculado por empresa."""
+    tipos, meses = list(tipos), list(meses)
+    itens = []
+    for empresa in empresas:
+        emissor_nome = emissor(empresa) if callable(emissor) else emissor
+        for ano, mes in meses:
+            for tipo in tipos:
+                itens.append(ItemExportacao(
+                    tipo=tipo,
+                    empresa_id=empresa.pk,
+                    empresa_nome=empresa.nome_fantasia,
+                    ano=ano,
+                    mes=mes,
+                    emissor_nome=emissor_nome
+                ))
+    return itens
+
+
+#* Geração (dentro do processo do pool)
+
+def gerar_arquivo_relatorio(item: ItemExportacao) -> str:
+    """Gera (ou reaproveita do cache) o PDF do item e retorna o caminho do arquivo."""
+    from relatorios.relatorios import RELATORIOS_REGISTRADOS
+
+    close_old_connections()
+    try:
+        relatorio = RELATORIOS_REGISTRADOS[item.tipo](
+            empresa=Empresa.objects.get(pk=item.empresa_id),
+            ano=item.ano,
+            mes=item.mes,
+            emissor_nome=item.emissor_nome
+        )
+
+        cache = CacheRelatorios()
+        chave = cache.gerar_chave(relatorio)
+        caminho = cache.obter(chave) or cache.gerar(chave, relatorio.salvar_pdf)
+        return str(caminho)
+    finally:
+        close_old_connections()
+
+
+def gerar_relatorios(itens: list[ItemExportacao], executor: Executor | None = None,
+                     em_voo: int = 4) -> Iterator[tuple[ItemExportacao, str | None, Exception | None]]:
+    """
+    Gera os itens, entregando (item, caminho, erro) na ordem de conclusão.
+    No máximo 'em_voo' itens ficam submetidos ao pool ao mesmo tempo, para que um lote
+    grande não ocupe a fila do pool à frente dos demais relatórios.
+    Sem executor, gera em sequência no próprio processo.
+    """
+    if executor is None:
+        for item in itens:
+            try:
+                yield item, gerar_arquivo_relatorio(item), None
+            except Exception as e:
+                yield item, None, e
+        return
+
+    pendentes = iter(itens)
+    em_execucao: dict[Future, ItemExportacao] = {}
+    try:
+        while True:
+            for item in pendentes:
+                em_execucao[executor.submit(gerar_arquivo_relatorio, item)] = item
+                if len(em_execucao) >= em_voo:
+                    break
+            if not em_execucao:
+                return
+
+            concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for future in concluidos:
+                item = em_execucao.pop(future)
+                erro = future.exception()
+                yield item, (None if erro else future.result()), erro
+    finally:
+        # gerador encerrado antes do fim (ex.: download interrompido)
+        for future in em_execucao:
+            future.cancel()
+
+
+#* ZIP
+
+class _SaidaZip:
+    """Destino sem 'seek' para o zipfile: acumula os bytes até o gerador entregá-los."""
+    def __init__(self):
+        self._partes: list[bytes] = []
+
+    def write(self, dados) -> int:
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def coletar(self) -> bytes:
+        dados = b''.join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+def montar_resumo(progresso: ProgressoExportacao, falhas: list[tuple[ItemExportacao, Exception]]) -> str:
+    linhas = [
+        f"Relatórios exportados: {progresso.concluidos - progresso.falhas} de {progresso.total}",
+        f"Tempo total: {progresso.decorrido:.1f}s ({progresso.relatorios_por_segundo:.2f} relatórios/s)",
+        f"Tamanho: {progresso.bytes_escritos / (1024 * 1024):.1f} MB",
+    ]
+    if falhas:
+        linhas.append("")
+        linhas.append("Falhas:")
+        linhas.extend(f"- {item.nome_arquivo}: {erro}" for item, erro in falhas)
+    return "\n".join(linhas) + "\n"
+
+
+def exportar_zip(itens: list[ItemExportacao], executor: Executor | None = None,
+                 ao_progredir: Callable[[ProgressoExportacao, ItemExportacao, Exception | None], None] | None = None,
+                 em_voo: int = 4) -> Iterator[bytes]:
+    """
+    Gera o ZIP em blocos: cada PDF é copiado para o arquivo assim que fica pronto,
+    sem montar o ZIP inteiro em memória. Falhas não interrompem a exportação e
+    são listadas no 'resumo.txt' ao final do arquivo.
+    """
+    saida = _SaidaZip()
+    progresso = ProgressoExportacao(total=len(itens))
+    falhas: list[tuple[ItemExportacao, Exception]] = []
+
+    # PDFs já são comprimidos (deflate): armazenados sem nova compressão
+    with zipfile.ZipFile(saida, 'w', compression=zipfile.ZIP_STORED) as arquivo_zip:
+        for item, caminho, erro in gerar_relatorios(itens, executor, em_voo=em_voo):
+            if erro is None:
+                try:
+                    with open(caminho, 'rb') as pdf, arquivo_zip.open(item.nome_arquivo, 'w') as destino:
+                        while bloco := pdf.read(TAMANHO_BLOCO):
+                            destino.write(bloco)
+                            progresso.bytes_escritos += len(bloco)
+                            if dados := saida.coletar():
+                                yield dados
+                except OSError as e:
+                    erro = e
+
+            if erro is not None:
+                logger.warning("Falha ao exportar %s: %s", item.nome_arquivo, erro)
+                falhas.append((item, erro))
+                progresso.falhas += 1
+
+            progresso.concluidos += 1
+            if ao_progredir is not None:
+                ao_progredir(progresso, item, erro)
+            if dados := saida.coletar():
+                yield dados
+
+        arquivo_zip.writestr(ARQUIVO_RESUMO, montar_resumo(progresso, falhas))
+
+    if dados := saida.coletar():
+        yield dados
@@ -0,0 +1,279 @@
+"""
+Fila de geração assíncrona de relatórios (RelatorioJob).
+
+Os jobs são persistidos no banco e executados em um ProcessPoolExecutor limitado
+por settings.RELATORIOS_JOBS_MAX_PROCESSOS, fora dos workers que atendem as páginas.
+A fila também é limitada (por empresa e no total): acima do limite, a submissão é
+recusada em vez de acumular trabalho atrás dos relatórios já pendentes.
+
+Jobs concluídos há mais que settings.RELATORIOS_JOBS_RETENCAO são removidos com seus
+PDFs (ver limpar_jobs_antigos e o comando 'limpar_jobs_relatorios').
+"""
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from relatorios.cache import CacheRelatorios
+from relatorios.choices import (
+    RELATORIO_JOB_STATUS_PENDENTE,
+    RELATORIO_JOB_STATUS_EXECUTANDO,
+    RELATORIO_JOB_STATUS_FINALIZADO,
+    RELATORIO_JOB_STATUS_ERRO,
+    RELATORIO_JOB_STATUS_EM_ANDAMENTO,
+    RELATORIO_JOB_STATUS_CONCLUIDO
+)
+from relatorios.models import RelatorioJob
+from relatorios.processos import criar_executor
+
+
+logger = logging.getLogger(__name__)
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+class FilaRelatoriosCheiaError(Exception):
+    """Limite de jobs em andamento atingido."""
+
+
+#* Pool de processos
+
+def get_executor() -> ProcessPoolExecutor | None:
+    """
+    Pool compartilhado do processo do servidor.
+    Com RELATORIOS_JOBS_MAX_PROCESSOS = 0 retorna None e os relatórios são gerados
+    no próprio processo (desenvolvimento/testes).
+    """
+    global _executor
+
+    if not settings.RELATORIOS_JOBS_MAX_PROCESSOS:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = criar_executor(settings.RELATORIOS_JOBS_MAX_PROCESSOS)
+        return _executor
+
+
+def _descartar_executor() -> None:
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+#* Execução (dentro do processo do pool)
+
+def executar_job(job_id: int) -> str:
+    """
+    Gera o PDF do job e o salva em 'arquivo'. Reaproveita o cache de relatórios,
+    então um mês já gerado (e sem alterações) é apenas copiado.
+    Retorna o status final do job.
+    """
+    from relatorios.relatorios import RELATORIOS_REGISTRADOS
+
+    close_old_connections()
+    try:
+        atualizados = RelatorioJob.objects.filter(
+            pk=job_id, status=RELATORIO_JOB_STATUS_PENDENTE
+        ).update(
+            status=RELATORIO_JOB_STATUS_EXECUTANDO,
+            data_inicio_execucao=timezone.now(),
+            data_modificado=timezone.now()
+        )
+        if not atualizados:
+            # já executado/expirado
+            return RelatorioJob.objects.filter(pk=job_id).values_list('status', flat=True).first()
+
+        job = RelatorioJob.objects.select_related('empresa').get(pk=job_id)
+        try:
+            relatorio = RELATORIOS_REGISTRADOS[job.tipo](
+                empresa=job.empresa,
+                ano=job.ano,
+                mes=job.mes,
+                emissor_nome=job.emissor_nome
+            )
+
+            cache = CacheRelatorios()
+            chave = cache.gerar_chave(relatorio)
+            caminho = cache.obter(chave)
+            if caminho is None:
+                caminho = cache.gerar(chave, relatorio.salvar_pdf)
+
+            with open(caminho, 'rb') as pdf:
+                job.arquivo.save(f"{job.tipo}_{job.ano}-{job.mes:02d}_{job.pk}.pdf", File(pdf), save=False)
+            job.status = RELATORIO_JOB_STATUS_FINALIZADO
+
+        except Exception as e:
+            logger.exception("Falha ao gerar o relatório do job %s", job_id)
+            job.status = RELATORIO_JOB_STATUS_ERRO
+            job.erro = str(e)
+
+        concluido = RelatorioJob.objects.filter(pk=job_id, status=RELATORIO_JOB_STATUS_EXECUTANDO).update(
+            status=job.status,
+            arquivo=job.arquivo.name,
+            erro=job.erro,
+            data_fim_execucao=timezone.now(),
+            data_modificado=timezone.now()
+        )
+        if not concluido:
+            # expirado durante a geração (ver expirar_jobs_abandonados): o PDF não é mais entregue
+            if job.arquivo:
+                job.arquivo.delete(save=False)
+            return RelatorioJob.objects.filter(pk=job_id).values_list('status', flat=True).first()
+        return job.status
+
+    finally:
+        close_old_connections()
+
+
+#* Submissão (no processo do servidor)
+
+def servidor_atual() -> str:
+    # calculado a cada uso: servidores que fazem fork após importar o projeto mudam de pid
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def servidor_ativo(servidor: str) -> bool | None:
+    """Se o processo do servidor ("host:pid") ainda existe; None se não há como verificar deste host."""
+    host, _, pid = servidor.rpartition(':')
+    # no Windows, os.kill encerra o processo em vez de só verificá-lo
+    if host != socket.gethostname() or not pid.isdigit() or os.name != 'posix':
+        return None
+
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # existe, mas é de outro usuário
+    return True
+
+
+def expirar_jobs_abandonados() -> int:
+    """
+    Marca como erro os jobs abandonados, liberando espaço na fila:
+
+    * em execução há mais que settings.RELATORIOS_JOBS_TEMPO_LIMITE;
+    * na fila de um servidor que não existe mais (ex.: reiniciado), ou, quando o servidor é de
+      outro host, na fila há mais que settings.RELATORIOS_JOBS_TEMPO_LIMITE_FILA.
+
+    Jobs apenas aguardando em uma fila cheia de um servidor ativo não expiram.
+    """
+    agora = timezone.now()
+    pendentes = RelatorioJob.objects.filter(status=RELATORIO_JOB_STATUS_PENDENTE)
+
+    inativos, nao_verificaveis = [], []
+    for servidor in pendentes.order_by().values_list('servidor', flat=True).distinct():
+        ativo = servidor_ativo(servidor)
+        if ativo is False:
+            inativos.append(servidor)
+        elif ativo is None:
+            nao_verificaveis.append(servidor)
+
+    return RelatorioJob.objects.filter(
+        Q(
+            status=RELATORIO_JOB_STATUS_EXECUTANDO,
+            data_inicio_execucao__lt=agora - timedelta(seconds=settings.RELATORIOS_JOBS_TEMPO_LIMITE)
+        )
+        | Q(status=RELATORIO_JOB_STATUS_PENDENTE, servidor__in=inativos)
+        | Q(
+            status=RELATORIO_JOB_STATUS_PENDENTE,
+            servidor__in=nao_verificaveis,
+            data_criado__lt=agora - timedelta(seconds=settings.RELATORIOS_JOBS_TEMPO_LIMITE_FILA)
+        )
+    ).update(
+        status=RELATORIO_JOB_STATUS_ERRO,
+        erro="Tempo limite de geração excedido.",
+        data_modificado=timezone.now()
+    )
+
+
+def limpar_jobs_antigos() -> int:
+    """
+    Remove os jobs concluídos (prontos ou com erro) há mais que settings.RELATORIOS_JOBS_RETENCAO,
+    com os seus PDFs. Retorna a quantidade de jobs removidos.
+    """
+    limite = timezone.now() - timedelta(seconds=settings.RELATORIOS_JOBS_RETENCAO)
+    antigos = RelatorioJob.objects.filter(status__in=RELATORIO_JOB_STATUS_CONCLUIDO, data_modificado__lt=limite)
+
+    for job in antigos.exclude(arquivo='').exclude(arquivo__isnull=True).only('pk', 'arquivo').iterator():
+        job.arquivo.delete(save=False)
+    return antigos.delete()[0]
+
+
+def _ao_concluir(job_id: int, future: Future) -> None:
+    """Callback no processo do servidor: registra falhas do próprio pool (ex.: processo encerrado)."""
+    if future.cancelled():
+        erro = "Geração cancelada."
+    elif future.exception() is not None:
+        erro = f"Falha no processo de geração: {future.exception()}"
+    else:
+        return
+
+    if not future.cancelled():
+        # pool quebrado (BrokenProcessPool): recria no próximo submit
+        _descartar_executor()
+
+    RelatorioJob.objects.filter(
+        pk=job_id, status__in=RELATORIO_JOB_STATUS_EM_ANDAMENTO
+    ).update(status=RELATORIO_JOB_STATUS_ERRO, erro=erro, data_modificado=timezone.now())
+    close_old_connections()
+
+
+def _submeter(job_id: int) -> None:
+    executor = get_executor()
+    if executor is None:
+        executar_job(job_id)
+        return
+
+    future = executor.submit(executar_job, job_id)
+    future.add_done_callback(lambda future: _ao_concluir(job_id, future))
+
+
+def enfileirar_relatorio(empresa, tipo: str, ano: int, mes: int, emissor_nome: str, solicitante=None) -> RelatorioJob:
+    """
+    Cria o job e o envia ao pool após o commit.
+    Um job idêntico ainda em andamento é reaproveitado em vez de duplicado.
+
+    - Raises:
+        FilaRelatoriosCheiaError quando o limite de jobs em andamento é atingido.
+    """
+    expirar_jobs_abandonados()
+    limpar_jobs_antigos()
+
+    em_andamento = RelatorioJob.objects.filter(status__in=RELATORIO_JOB_STATUS_EM_ANDAMENTO)
+
+    existente = em_andamento.filter(
+        empresa=empresa, tipo=tipo, ano=ano, mes=mes, emissor_nome=emissor_nome
+    ).first()
+    if existente is not None:
+        return existente
+
+    if em_andamento.filter(empresa=empresa).count() >= settings.RELATORIOS_JOBS_MAX_PENDENTES_EMPRESA:
+        raise FilaRelatoriosCheiaError("Aguarde a conclusão dos relatórios em andamento.")
+    if em_andamento.count() >= settings.RELATORIOS_JOBS_MAX_PENDENTES:
+        raise FilaRelatoriosCheiaError("Muitos relatórios em geração no momento, tente novamente em instantes.")
+
+    job = RelatorioJob.objects.create(
+        empresa=empresa,
+        solicitante=solicitante,
+        tipo=tipo,
+        ano=ano,
+        mes=mes,
+        emissor_nome=emissor_nome,
+        servidor=servidor_atual()
+    )
+    transaction.on_commit(lambda: _submeter(job.pk))
+    return job
@@ -0,0 +1,231 @@
+"""
+Layout em fluxo para os relatórios em PDF.
+
+O LayoutFluxo mantém o cursor vertical do documento e abre uma nova página sempre
+que o próximo bloco não cabe na atual, então as seções não precisam controlar
+'ponto.y' nem o fim da página. Tabelas repetem o cabeçalho a cada quebra de página.
+"""
+from collections.abc import Callable, Iterable, Sequence
+from contextlib import contextmanager
+
+import pymupdf
+
+from relatorios.types import ColunaTabela, RecursosRelatorio
+
+
+ALINHAMENTO_ESQUERDA = 'esquerda'
+ALINHAMENTO_DIREITA = 'direita'
+
+COR_CABECALHO_TABELA = (0.92, 0.92, 0.92)
+COR_DIVISORIA_TABELA = (0.75, 0.75, 0.75)
+
+
+class LayoutFluxo:
+    def __init__(self, doc: pymupdf.Document, recursos: RecursosRelatorio, font_sizes: dict[str, int],
+                 ao_abrir_pagina: Callable[['LayoutFluxo'], None] | None = None,
+                 margem_superior: float = 72, margem_inferior: float = 60,
+                 margem_esquerda: float = 50, largura: float = 500):
+        self.doc = doc
+        self.recursos = recursos
+        self.font_sizes = font_sizes
+        self.ao_abrir_pagina = ao_abrir_pagina
+
+        self.margem_superior = margem_superior
+        self.margem_inferior = margem_inferior
+        self.margem_esquerda = margem_esquerda
+        self.largura = largura
+
+        if recursos.fontes_customizadas:
+            self.font_regular = recursos.fonte_regular.alias
+            self.font_bold = recursos.fonte_negrito.alias
+            self._medidores = {False: recursos.fonte_regular.fonte, True: recursos.fonte_negrito.fonte}
+        else:
+            # fontes padrão do PyMuPDF (Base-14)
+            self.font_regular = "helv"   # Helvetica Regular
+            self.font_bold = "hebo"      # Helvetica Bold
+            self._medidores = {False: pymupdf.Font("helv"), True: pymupdf.Font("hebo")}
+
+        self.page: pymupdf.Page | None = None
+        self.recuo = 0.0
+        self.y = 0.0
+
+    #* Páginas
+
+    @property
+    def x(self) -> float:
+        return self.margem_esquerda + self.recuo
+
+    @property
+    def limite_inferior(self) -> float:
+        return self.page.rect.height - self.margem_inferior
+
+    def nova_pagina(self) -> pymupdf.Page:
+        self.page = self.doc.new_page()
+        if self.recursos.fontes_customizadas:
+            # a mesma fonte é reaproveitada (mesmo xref) por todas as páginas do documento
+            for fonte in (self.recursos.fonte_regular, self.recursos.fonte_negrito):
+                self.page.insert_font(fontname=fonte.alias, fontbuffer=fonte.buffer)
+
+        self.y = self.margem_superior
+        if self.ao_abrir_pagina is not None:
+            recuo, self.recuo = self.recuo, 0.0
+            self.ao_abrir_pagina(self)
+            self.recuo = recuo
+        return self.page
+
+    def garantir_espaco(self, altura: float) -> bool:
+        """Abre uma nova página se 'altura' não cabe na atual. Retorna True se quebrou a página."""
+        if self.page is None or self.y + altura > self.limite_inferior:
+            self.nova_pagina()
+            return True
+        return False
+
+    def espaco(self, altura: float) -> None:
+        """Avança o cursor; no fim da página, apenas segue para a próxima."""
+        self.y += altura
+        if self.page is not None and self.y > self.limite_inferior:
+            self.nova_pagina()
+
+    @contextmanager
+    def recuado(self, pontos: float):
+        self.recuo += pontos
+        try:
+            yield
+        finally:
+            self.recuo -= pontos
+
+    #* Texto
+
+    def fonte(self, negrito: bool = False) -> str:
+        return self.font_bold if negrito else self.font_regular
+
+    def medir(self, texto: str, tamanho: str = 'small', negrito: bool = False) -> float:
+        return self._medidores[negrito].text_length(texto, fontsize=self.font_sizes[tamanho])
+
+    def ajustar(self, texto: str, largura: float, tamanho: str = 'small', negrito: bool = False) -> str:
+        """Corta o texto com reticências para caber em 'largura'."""
+        if self.medir(texto, tamanho, negrito) <= largura:
+            return texto
+        while texto and self.medir(texto + "…", tamanho, negrito) > largura:
+            texto = texto[:-1]
+        return texto + "…"
+
+    def texto(self, texto: str, tamanho: str = 'small', negrito: bool = False, antes: float | None = None) -> None:
+        """
+        Escreve uma linha 'antes' pontos abaixo do cursor (por padrão, proporcional ao tamanho da fonte).
+        O cursor fica na linha de base do texto escrito.
+        """
+        if antes is None:
+            antes = self.font_sizes[tamanho] * 2
+        self.garantir_espaco(antes)
+        self.y += antes
+
+        self.page.insert_text(
+            pymupdf.Point(self.x, self.y),
+            self.ajustar(texto, self.largura - self.recuo, tamanho, negrito),
+            fontsize=self.font_sizes[tamanho],
+            fontname=self.fonte(negrito)
+        )
+
+    def titulo(self, texto: str, reserva: float = 80) -> None:
+        """Título de seção; abre nova página antes se não houver 'reserva' pontos para o conteúdo logo abaixo."""
+        self.garantir_espaco(reserva)
+        self.texto(texto, 'title', negrito=True, antes=0)
+
+    def texto_rotulado(self, rotulo: str, valor, tamanho: str = 'small', antes: float | None = None) -> None:
+        """'rotulo' regular seguido de 'valor' em negrito, na mesma linha."""
+        self.texto(rotulo, tamanho, antes=antes)
+        self.page.insert_text(
+            pymupdf.Point(self.x + self.medir(rotulo + " ", tamanho), self.y),
+            str(valor),
+            fontsize=self.font_sizes[tamanho],
+            fontname=self.font_bold
+        )
+
+    def lista_numerada(self, itens: Iterable[str], vazio: str, recuo: float = 17, antes: float = 20) -> None:
+        with self.recuado(recuo):
+            escritos = 0
+            for escritos, item in enumerate(itens, start=1):
+                self.texto(f"{escritos}. {item}", antes=antes)
+            if not escritos:
+                self.texto(vazio, antes=antes)
+
+    def divisoria(self, antes: float = 10, depois: float = 25) -> None:
+        self.espaco(antes)
+        self.page.draw_line(pymupdf.Point(self.x, self.y), pymupdf.Point(self.margem_esquerda + self.largura, self.y))
+        self.espaco(depois)
+
+    #* Tabelas
+
+    def _desenhar_linha_tabela(self, colunas: Sequence[ColunaTabela], valores: Sequence, altura: float,
+                               negrito: bool = False, fundo: tuple | None = None) -> None:
+        topo = self.y
+        largura_total = sum(coluna.largura for coluna in colunas)
+        if fundo is not None:
+            self.page.draw_rect(pymupdf.Rect(self.x, topo, self.x + largura_total, topo + altura), color=None, fill=fundo)
+
+        tamanho = self.font_sizes['small']
+        linha_base = topo + (altura + tamanho * 0.7) / 2
+        x = self.x
+        for coluna, valor in zip(colunas, valores):
+            texto = coluna.formatar(valor) if (coluna.formatar and not negrito) else str(valor if valor is not None else "")
+            texto = self.ajustar(texto, coluna.largura - 8, negrito=negrito)
+
+            if coluna.alinhamento == ALINHAMENTO_DIREITA:
+                inicio = x + coluna.largura - 4 - self.medir(texto, negrito=negrito)
+            else:
+                inicio = x + 4
+            self.page.insert_text(pymupdf.Point(inicio, linha_base), texto, fontsize=tamanho, fontname=self.fonte(negrito))
+            x += coluna.largura
+
+        self.y = topo + altura
+        self.page.draw_line(
+            pymupdf.Point(self.x, self.y), pymupdf.Point(self.x + largura_total, self.y),
+            color=COR_DIVISORIA_TABELA, width=0.5
+        )
+
+    def tabela(self, colunas: Sequence[ColunaTabela], linhas: Iterable[Sequence],
+               vazio: str = "Nenhum registro encontrado.", altura_linha: float = 16, antes: float = 12) -> int:
+        """
+        Desenha as linhas uma a uma, quebrando a página quando necessário e repetindo
+        o cabeçalho no topo de cada nova página. 'linhas' pode ser um gerador.
+        Retorna a quantidade de linhas desenhadas.
+        """
+        def cabecalho():
+            self._desenhar_linha_tabela(
+                colunas, [coluna.titulo for coluna in colunas], altura_linha,
+                negrito=True, fundo=COR_CABECALHO_TABELA
+            )
+
+        self.garantir_espaco(antes + altura_linha * 2)
+        self.y += antes
+        cabecalho()
+
+        total = 0
+        for linha in linhas:
+            if self.garantir_espaco(altura_linha):
+                cabecalho()
+            self._desenhar_linha_tabela(colunas, linha, altura_linha)
+            total += 1
+
+        if not total:
+            self.texto(vazio, antes=altura_linha)
+        return total
+
+    #* Finalização
+
+    def numerar_paginas(self, texto_rodape: str = "") -> None:
+        """Escreve 'Página N de M' (e 'texto_rodape') no rodapé de todas as páginas."""
+        total = self.doc.page_count
+        tamanho = self.font_sizes['small'] - 1
+        for numero, page in enumerate(self.doc, start=1):
+            y = page.rect.height - self.margem_inferior / 2
+            paginacao = f"Página {numero} de {total}"
+            largura_paginacao = self._medidores[False].text_length(paginacao, fontsize=tamanho)
+
+            if texto_rodape:
+                page.insert_text(pymupdf.Point(self.margem_esquerda, y), texto_rodape, fontsize=tamanho, fontname=self.font_regular)
+            page.insert_text(
+                pymupdf.Point(self.margem_esquerda + self.largura - largura_paginacao, y),
+                paginacao, fontsize=tamanho, fontname=self.font_regular
+            )
@@ -0,0 +1,102 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cadastros.empresas.models import Empresa
+from relatorios.exportacao import exportar_zip, meses_entre, montar_itens
+from relatorios.processos import criar_executor
+from relatorios.relatorios import RELATORIOS_REGISTRADOS
+
+
+def ano_mes(valor: str) -> tuple[int, int]:
+    try:
+        ano, mes = (int(parte) for parte in valor.split('-'))
+        date(ano, mes, 1)
+    except ValueError:
+        raise CommandError(f"Mês inválido '{valor}', use o formato AAAA-MM.")
+    return ano, mes
+
+
+class Command(BaseCommand):
+    help = "Exporta relatórios de várias empresas e meses para um único arquivo ZIP, gerando-os em paralelo"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'saida',
+            help="Caminho do arquivo ZIP a ser criado."
+        )
+        parser.add_argument(
+            '--empresa',
+            type=int,
+            nargs='*',
+            help="IDs das empresas. Sem valor, exporta todas as empresas ativas."
+        )
+        parser.add_argument(
+            '--tipo',
+            nargs='*',
+            choices=list(RELATORIOS_REGISTRADOS),
+            help="Relatórios a exportar. Sem valor, exporta todos."
+        )
+        parser.add_argument(
+            '--inicio',
+            type=ano_mes,
+            help="Primeiro mês (AAAA-MM). Padrão: mês atual."
+        )
+        parser.add_argument(
+            '--fim',
+            type=ano_mes,
+            help="Último mês (AAAA-MM). Padrão: igual ao início."
+        )
+        parser.add_argument(
+            '--processos',
+            type=int,
+            default=settings.RELATORIOS_JOBS_MAX_PROCESSOS,
+            help="Processos em paralelo (0 gera no próprio processo)."
+        )
+        parser.add_argument(
+            '--emissor',
+            default="Exportação em lote",
+            help="Nome exibido como emissor nos relatórios."
+        )
+
+    def handle(self, *args, **kwargs):
+        hoje = date.today()
+        inicio = kwargs.get('inicio') or (hoje.year, hoje.month)
+        fim = kwargs.get('fim') or inicio
+        if fim < inicio:
+            raise CommandError("O mês final deve ser igual ou posterior ao inicial.")
+
+        empresas = Empresa.objects.filter(ativo=True).order_by('pk')
+        if kwargs.get('empresa'):
+            empresas = Empresa.objects.filter(pk__in=kwargs['empresa']).order_by('pk')
+            faltando = set(kwargs['empresa']) - set(empresas.values_list('pk', flat=True))
+            if faltando:
+                raise CommandError(f"Empresas inexistentes: {', '.join(map(str, sorted(faltando)))}.")
+
+        itens = montar_itens(
+            empresas,
+            kwargs.get('tipo') or list(RELATORIOS_REGISTRADOS),
+            meses_entre(inicio, fim),
+            emissor=kwargs['emissor']
+        )
+        if not itens:
+            raise CommandError("Nenhum relatório a exportar.")
+
+        processos: int = kwargs['processos']
+        self.stdout.write(f"Exportando {len(itens)} relatórios com {processos or 'nenhum'} processo(s) em paralelo...")
+
+        def ao_progredir(progresso, item, erro):
+            situacao = self.style.ERROR(f"ERRO: {erro}") if erro else "ok"
+            self.stdout.write(f"{progresso} {item.nome_arquivo} {situacao}")
+
+        executor = criar_executor(processos) if processos else None
+        try:
+            with open(kwargs['saida'], 'wb') as arquivo:
+                for bloco in exportar_zip(itens, executor, ao_progredir=ao_progredir, em_voo=max(processos, 1) * 2):
+                    arquivo.write(bloco)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(f"Exportação salva em {kwargs['saida']}."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from relatorios.jobs import expirar_jobs_abandonados, limpar_jobs_antigos
+
+
+class Command(BaseCommand):
+    help = "Expira os jobs de relatórios abandonados e remove os jobs concluídos antigos, com seus PDFs"
+
+    def handle(self, *args, **kwargs):
+        expirados = expirar_jobs_abandonados()
+        removidos = limpar_jobs_antigos()
+        self.stdout.write(self.style.SUCCESS(f"{expirados} jobs expirados, {removidos} jobs antigos removidos."))
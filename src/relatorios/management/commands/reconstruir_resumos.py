@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cadastros.empresas.models import Empresa
+from relatorios.rollups import reconstruir_resumos
+
+
+class Command(BaseCommand):
+    help = "Reconstrói os resumos diários de agendamentos a partir dos agendamentos ativos, corrigindo divergências"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresa',
+            type=int,
+            nargs='*',
+            help="IDs das empresas a reconstruir. Sem valor, reconstrói todas."
+        )
+
+    def handle(self, *args, **kwargs):
+        empresas_ids: list[int] | None = kwargs.get('empresa')
+
+        if not empresas_ids:
+            total = reconstruir_resumos()
+            self.stdout.write(self.style.SUCCESS(f"{total} resumos reconstruídos para todas as empresas."))
+            return
+
+        for empresa_id in empresas_ids:
+            try:
+                empresa = Empresa.objects.get(pk=empresa_id)
+            except Empresa.DoesNotExist:
+                raise CommandError(f"Empresa {empresa_id} não existe.")
+
+            total = reconstruir_resumos(empresa)
+            self.stdout.write(self.style.SUCCESS(f"{total} resumos reconstruídos para {empresa}."))
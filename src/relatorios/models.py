@@ -0,0 +1,178 @@
+from django.conf import settings
+from django.db import models
+
+from core.bases.models import BaseModel
+from servicos.agendamentos.choices import C_TIPO_STATUS_AGENDAMENTO
+from relatorios.choices import (
+    C_TIPO_RELATORIO,
+    C_TIPO_STATUS_RELATORIO_JOB,
+    RELATORIO_JOB_STATUS_PENDENTE,
+    RELATORIO_JOB_STATUS_EM_ANDAMENTO,
+    RELATORIO_JOB_STATUS_FINALIZADO
+)
+
+
+class ResumoDiarioAgendamento(models.Model):
+    """
+    Rollup incremental dos agendamentos ativos, por empresa/dia/trabalhador/cliente/serviço/status.
+    Mantido por relatorios.rollups a cada alteração de Agendamento; reconstruível com
+    'manage.py reconstruir_resumos'.
+    """
+    dia = models.DateField(
+        verbose_name="Dia",
+        null=False,
+        blank=False
+    )
+    status = models.CharField(
+        verbose_name="Estado",
+        choices=C_TIPO_STATUS_AGENDAMENTO,
+        max_length=1,
+        null=False,
+        blank=False
+    )
+    quantidade = models.IntegerField(
+        verbose_name="Quantidade",
+        default=0
+    )
+    faturamento = models.DecimalField(
+        verbose_name="Faturamento",
+        max_digits=14,
+        decimal_places=2,
+        default=0
+    )
+
+    #FKs
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        verbose_name="Empresa",
+        on_delete=models.CASCADE,
+        related_name='resumos_diarios'
+    )
+    trabalhador = models.ForeignKey(
+        'trabalhadores.Trabalhador',
+        verbose_name="Trabalhador",
+        on_delete=models.CASCADE,
+        related_name='resumos_diarios'
+    )
+    cliente = models.ForeignKey(
+        'clientes.Cliente',
+        verbose_name="Cliente",
+        on_delete=models.CASCADE,
+        related_name='resumos_diarios'
+    )
+    servico = models.ForeignKey(
+        'tipo_servicos.TipoServico',
+        verbose_name="Serviço",
+        on_delete=models.CASCADE,
+        related_name='resumos_diarios'
+    )
+
+    def __str__(self):
+        return f"{self.dia} - {self.get_status_display()}: {self.quantidade}"
+
+    class Meta:
+        verbose_name = "Resumo Diário de Agendamentos"
+        verbose_name_plural = "Resumos Diários de Agendamentos"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['empresa', 'dia', 'trabalhador', 'cliente', 'servico', 'status'],
+                name='resumo_diario_chave_unica'
+            )
+        ]
+
+
+class RelatorioJob(BaseModel):
+    """
+    Geração assíncrona de um relatório, executada no pool de processos de relatorios.jobs.
+    O PDF pronto fica em 'arquivo' e é entregue pela view de download.
+    """
+    tipo = models.CharField(
+        verbose_name="Relatório",
+        choices=C_TIPO_RELATORIO,
+        max_length=50,
+        null=False,
+        blank=False
+    )
+    ano = models.PositiveSmallIntegerField(
+        verbose_name="Ano",
+        null=False,
+        blank=False
+    )
+    mes = models.PositiveSmallIntegerField(
+        verbose_name="Mês",
+        null=False,
+        blank=False
+    )
+    emissor_nome = models.CharField(
+        verbose_name="Emitido por",
+        max_length=150,
+        null=False,
+        blank=False
+    )
+    status = models.CharField(
+        verbose_name="Estado",
+        choices=C_TIPO_STATUS_RELATORIO_JOB,
+        default=RELATORIO_JOB_STATUS_PENDENTE,
+        max_length=1,
+        null=False,
+        blank=False
+    )
+    arquivo = models.FileField(
+        verbose_name="Arquivo",
+        upload_to='relatorios/jobs/',
+        null=True,
+        blank=True
+    )
+    erro = models.TextField(
+        verbose_name="Erro",
+        blank=True,
+        default=''
+    )
+    data_inicio_execucao = models.DateTimeField(
+        verbose_name="Início da Execução",
+        null=True,
+        blank=True
+    )
+    data_fim_execucao = models.DateTimeField(
+        verbose_name="Fim da Execução",
+        null=True,
+        blank=True
+    )
+    # processo do servidor em cujo pool o job aguarda ("host:pid"), ver relatorios.jobs.expirar_jobs_abandonados
+    servidor = models.CharField(
+        verbose_name="Servidor",
+        max_length=255,
+        blank=True,
+        default=''
+    )
+
+    #FKs
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        verbose_name="Empresa",
+        on_delete=models.CASCADE,
+        related_name='relatorio_jobs'
+    )
+    solicitante = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name="Solicitante",
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='relatorio_jobs'
+    )
+
+    @property
+    def em_andamento(self) -> bool:
+        return self.status in RELATORIO_JOB_STATUS_EM_ANDAMENTO
+
+    @property
+    def finalizado(self) -> bool:
+        return self.status == RELATORIO_JOB_STATUS_FINALIZADO
+
+    def __str__(self):
+        return f"{self.id} - {self.get_tipo_display()} {self.mes}/{self.ano} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = "Geração de Relatório"
+        verbose_name_plural = "Gerações de Relatórios"
+        ordering = ['-data_criado']
@@ -0,0 +1,30 @@
+"""
+Criação dos pools de processos de relatórios.
+
+Com o contexto 'spawn', cada processo novo importa o módulo do inicializador antes de
+configurar o Django; por isso este módulo não importa models no nível do módulo.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+
+def iniciar_processo(settings_module: str) -> None:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+
+    import django
+    django.setup()
+
+    # fontes carregadas na inicialização do processo, não no primeiro relatório
+    from relatorios.recursos import get_recursos
+    get_recursos()
+
+
+def criar_executor(max_workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        # spawn: processos limpos, sem herdar conexões de banco/threads do servidor
+        mp_context=get_context('spawn'),
+        initializer=iniciar_processo,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'project.settings'),)
+    )
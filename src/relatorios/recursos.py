@@ -0,0 +1,77 @@
+"""
+Registro de recursos compartilhados pelos relatórios em PDF.
+
+As fontes são resolvidas pelos staticfiles finders (que percorrem os diretórios
+'static' de todos os apps) e lidas do disco uma única vez por processo; cada
+relatório apenas registra os buffers já carregados no seu documento.
+"""
+import logging
+import threading
+import time
+
+from django.contrib.staticfiles import finders
+
+from relatorios.types import FonteRelatorio, RecursosRelatorio
+
+
+logger = logging.getLogger(__name__)
+
+# alias no PDF: caminho relativo nos staticfiles
+FONTES_RELATORIO = {
+    'F0-Regular': 'fonts/DejaVuSans.ttf',
+    'F1-Bold': 'fonts/DejaVuSans-Bold.ttf',
+}
+
+_recursos: RecursosRelatorio | None = None
+_recursos_lock = threading.Lock()
+
+
+def carregar_fonte(alias: str, caminho_relativo: str) -> FonteRelatorio:
+    caminho = finders.find(caminho_relativo)
+    if not caminho:
+        raise FileNotFoundError(f"Fonte '{caminho_relativo}' não encontrada via staticfiles finders.")
+
+    with open(caminho, 'rb') as arquivo:
+        return FonteRelatorio(alias=alias, caminho=caminho, buffer=arquivo.read())
+
+
+def carregar_recursos() -> RecursosRelatorio:
+    """Localiza e lê todas as fontes, medindo o tempo de carregamento."""
+    inicio = time.perf_counter()
+    try:
+        regular, negrito = (
+            carregar_fonte(alias, caminho) for alias, caminho in FONTES_RELATORIO.items()
+        )
+    except (OSError, ValueError) as e:
+        logger.warning("Fontes personalizadas não foram carregadas; usando fontes padrão do PyMuPDF. Detalhes: %s", e)
+        regular = negrito = None
+
+    recursos = RecursosRelatorio(
+        fonte_regular=regular,
+        fonte_negrito=negrito,
+        tempo_carregamento=time.perf_counter() - inicio
+    )
+    logger.info(
+        "Recursos de relatórios carregados em %.1f ms (%d bytes de fontes).",
+        recursos.tempo_carregamento * 1000, recursos.tamanho_fontes
+    )
+    return recursos
+
+
+def get_recursos() -> RecursosRelatorio:
+    """Recursos do processo atual, carregados na primeira chamada."""
+    global _recursos
+
+    if _recursos is None:
+        with _recursos_lock:
+            if _recursos is None:
+                _recursos = carregar_recursos()
+    return _recursos
+
+
+def descartar_recursos() -> None:
+    """Força um novo carregamento na próxima chamada de 'get_recursos' (ex.: após trocar as fontes)."""
+    global _recursos
+
+    with _recursos_lock:
+        _recursos = None
@@ -1,21 +1,26 @@
 import calendar
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 
-from django.db.models import Q, Count, Sum
-from django.contrib.staticfiles import finders
+from django.db.models import Count, Max, QuerySet
 import pymupdf
 
-from core.helpers import ConversionHelper
+from core.helpers import ConversionHelper, PeriodoHelper
 from cadastros.clientes.models import Cliente
+from cadastros.empresas.models import Empresa
 from cadastros.trabalhadores.models import Trabalhador
 from servicos.agendamentos.models import Agendamento
-from servicos.agendamentos.choices import (
-    AGENDAMENTO_STATUS_PENDENTE,
-    AGENDAMENTO_STATUS_EXECUTANDO,
-    AGENDAMENTO_STATUS_FINALIZADO,
-    AGENDAMENTO_STATUS_CANCELADO
-)
 from core.bases.mixins import AtivosQuerysetMixin
+from relatorios.layout import LayoutFluxo, ALINHAMENTO_DIREITA
+from relatorios.recursos import get_recursos
+from relatorios.types import ColunaTabela
+from relatorios.coletores import (
+    ranking,
+    coletar_totais_agendamentos,
+    coletar_atividade_trabalhadores,
+    coletar_atividade_clientes,
+    coletar_clientes_recorrentes_antigos,
+    coletar_clientes_inativos
+)
 
 
 class BaseRelatorio:
@@ -25,29 +30,22 @@ class BaseRelatorio:
     Esta classe lida com a inicialização do documento PDF e fornece
     métodos auxiliares que podem ser usados por qualquer relatório.
     """
-    def __init__(self, request, ano: int, mes: int):
-        self.request = request
+    def __init__(self, empresa, ano: int, mes: int, emissor_nome: str):
+        self.empresa = empresa
         self.ano = ano
         self.mes = mes
         self.nome = "Relatório Base"
         
         _, ultimo_dia = calendar.monthrange(self.ano, self.mes)
-        self.data_inicio = datetime(self.ano, self.mes, 1)
-        self.data_fim = datetime(self.ano, self.mes, ultimo_dia).replace(hour=23, minute=59, second=59)
+        self.dia_inicio = date(self.ano, self.mes, 1)
+        self.dia_fim = date(self.ano, self.mes, ultimo_dia)
+        # [início do mês, início do mês seguinte), aware: para filtros em campos DateTime
+        self.periodo = PeriodoHelper.mes(self.ano, self.mes)
 
         self.mes_referencia = f"{self.mes} / {self.ano}"
-        self.emissor_nome = (
-            self.request.user.get_full_name()
-            or self.request.user.username
-            or self.request.empresa.nome_fantasia
-        )
+        self.emissor_nome = emissor_nome
         self.lista_execucao = [] #adicionar aqui todos os métodos representando seções
 
-        # Passo 1: Criar um documento PDF em branco na memória.
-        self.doc = pymupdf.open()
-        # Passo 2: Adicionar uma página em branco ao documento.
-        self.page = self.doc.new_page()
-        
         # configs de tamanhos do doc
         self.font_sizes = {
             'title': 14,
@@ -55,75 +53,89 @@ class BaseRelatorio:
             'small': 9
         }
         self.ponto_inicial = (50, 72)
+        
+        self.ativos_filter = AtivosQuerysetMixin().ativos_filter
 
-        # Passo 3: Carregar e registrar fontes customizadas.
-        try:
-            # Localiza os arquivos de fonte usando o Django staticfiles finders
-            regular_font_path = finders.find('fonts/DejaVuSans.ttf')
-            bold_font_path = finders.find('fonts/DejaVuSans-Bold.ttf')
+    @staticmethod
+    def get_nome_emissor(user, empresa) -> str:
+        return user.get_full_name() or user.username or empresa.nome_fantasia
 
-            if not regular_font_path or not bold_font_path:
-                raise FileNotFoundError("Fontes customizadas não encontradas via staticfiles finders.")
+    def iniciar_documento(self):
+        """
+        Cria o documento em memória. Chamado apenas na geração, para que a
+        instância possa ser usada barata (ex.: cálculo da chave de cache).
+        """
+        # Passo 1: Criar um documento PDF em branco na memória.
+        self.doc = pymupdf.open()
 
-            # Registra as fontes na página com alias
-            self.page.insert_font(fontname="F0-Regular", fontfile=regular_font_path)
-            self.page.insert_font(fontname="F1-Bold", fontfile=bold_font_path)
+        # Passo 2: Layout em fluxo, que abre as páginas conforme o conteúdo
+        # e registra nelas as fontes já carregadas uma vez por processo.
+        self.recursos = get_recursos()
+        self.layout = LayoutFluxo(
+            self.doc,
+            self.recursos,
+            self.font_sizes,
+            ao_abrir_pagina=self.desenhar_cabecalho_continuacao,
+            margem_esquerda=self.ponto_inicial[0],
+            margem_superior=self.ponto_inicial[1]
+        )
+        self.font_regular = self.layout.font_regular
+        self.font_bold = self.layout.font_bold
 
-            self.font_regular = "F0-Regular"
-            self.font_bold = "F1-Bold"
+    def get_querysets_versao(self) -> list[QuerySet]:
+        """
+        Hook com os querysets cujos registros determinam o conteúdo do relatório.
+        Usado por 'versao_dados' para invalidar o cache de PDFs.
+        """
+        return [Empresa.objects.filter(pk=self.empresa.pk)]
 
-        except Exception as e:
-            print(f"Warning: fontes personalizadas não foram carregadas. Usando fontes padrão do PyMuPDF. Detalhes: {e}")
-            # Se não encontrar as fontes, usa as fontes padrão do módulo
-            self.font_regular = "helv"   # Helvetica Regular
-            self.font_bold = "helvB"     # Helvetica Bold
-        
-        self.ativos_filter = AtivosQuerysetMixin().ativos_filter
+    def versao_dados(self) -> str:
+        """
+        Carimbo de versão dos dados: maior 'data_modificado' e contagem de cada queryset
+        de 'get_querysets_versao' (a contagem cobre exclusões definitivas).
+        Inclui registros inativos, já que inativar também altera o relatório.
+        """
+        partes = []
+        for queryset in self.get_querysets_versao():
+            versao = queryset.order_by().aggregate(
+                ultima_modificacao=Max('data_modificado'),
+                total=Count('pk')
+            )
+            ultima_modificacao = versao['ultima_modificacao']
+            partes.append(f"{ultima_modificacao.isoformat() if ultima_modificacao else '-'}:{versao['total']}")
+        return ";".join(partes)
     
-    def desenhar_cabecalho(self) -> int:
-        # Passo 3: Definir um ponto de partida para inserir texto.
+    def desenhar_cabecalho(self):
         # As coordenadas (x, y) começam no canto superior esquerdo. O eixo Y cresce para baixo.
-        ponto = pymupdf.Point(*self.ponto_inicial)
-        
-        # Passo 4: Inserir texto na página (usa a fonte definida no __init__).
-        self.page.insert_text(ponto, f"{self.nome} - {self.request.empresa.razao_social}", fontsize=self.font_sizes['title'], fontname=self.font_bold)
-        
-        # Movemos o ponto para baixo para a próxima linha de texto.
-        ponto.y += 25
-        self.page.insert_text(ponto, f"Mês de referência: {self.mes_referencia}", fontsize=self.font_sizes['small'], fontname=self.font_regular)
+        layout = self.layout
+        layout.nova_pagina()
+
+        layout.texto(f"{self.nome} - {self.empresa.razao_social}", 'title', negrito=True, antes=0)
+        layout.texto(f"Mês de referência: {self.mes_referencia}", antes=25)
+        layout.texto(f"Emitido por: {self.emissor_nome}", antes=20)
 
-        ponto.y += 20
-        self.page.insert_text(ponto, f"Emitido por: {self.emissor_nome}", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-        
         # Adiciona uma linha horizontal para separar o cabeçalho.
-        ponto.y += 20
-        self.page.draw_line(ponto, pymupdf.Point(ponto.x + 500, ponto.y))
-        
-        # Retorna a próxima posição Y disponível para continuar desenhando.
-        return ponto.y + 35
+        layout.divisoria(antes=20, depois=35)
 
-    def desenhar_corpo(self, y_inicial: int) -> int:
-        ponto = pymupdf.Point(50, y_inicial)
+    def desenhar_cabecalho_continuacao(self, layout: LayoutFluxo):
+        """Cabeçalho reduzido das páginas seguintes à primeira."""
+        if self.doc.page_count == 1:
+            return
+
+        layout.texto(f"{self.nome} - {self.empresa.razao_social} ({self.mes_referencia})", negrito=True, antes=0)
+        layout.divisoria(antes=10, depois=25)
+
+    def desenhar_corpo(self):
+        layout = self.layout
 
         if len(self.lista_execucao) > 0:
             for funcao in self.lista_execucao:
-                ponto.y = funcao(ponto.y)
+                funcao()
 
                 # after section, add some spacing
-                ponto.y += 10
-                self.page.draw_line(ponto, pymupdf.Point(ponto.x + 500, ponto.y))
-
-                # leave more padding for next section
-                ponto.y += 25
+                layout.divisoria(antes=10, depois=25)
         else:
-            self.page.insert_text(
-                ponto,
-                "Corpo base. Adicione novas seções na lista de execução.",
-                fontsize=self.font_sizes['title'],
-                fontname=self.font_bold,
-            )
-
-        return ponto.y
+            layout.texto("Corpo base. Adicione novas seções na lista de execução.", 'title', negrito=True, antes=0)
 
     def coletar_dados(self):
         """
@@ -132,21 +144,44 @@ class BaseRelatorio:
         """
         raise NotImplementedError("Subclasses devem implementar o método 'coletar_dados'.")
 
-    def desenhar(self) -> bytes:
+    def desenhar(self):
         """
         Orquestra principal para geração e impressão do PDF.
         """
         self.coletar_dados()
 
-        y_pos = self.desenhar_cabecalho()
-        self.desenhar_corpo(y_pos)
-    
+        self.desenhar_cabecalho()
+        self.desenhar_corpo()
+        self.layout.numerar_paginas(f"{self.nome} - {self.mes_referencia}")
+
+    def renderizar(self):
+        self.iniciar_documento()
+        self.desenhar()
+
+        if self.recursos.fontes_customizadas:
+            # embute apenas os glifos usados, em vez das fontes completas
+            self.doc.subset_fonts()
+
     def gerar_pdf(self) -> bytes:
         """
         Entrega o documento em bytes para download.
         """
-        self.desenhar()
-        return self.doc.tobytes()
+        self.renderizar()
+        try:
+            return self.doc.tobytes(garbage=3, deflate=True)
+        finally:
+            self.doc.close()
+
+    def salvar_pdf(self, caminho) -> None:
+        """
+        Grava o documento direto em 'caminho', sem manter uma cópia em bytes
+        do PDF inteiro na memória (usado pelo cache de relatórios).
+        """
+        self.renderizar()
+        try:
+            self.doc.save(str(caminho), garbage=3, deflate=True)
+        finally:
+            self.doc.close()
 
 
 #* Especializados
@@ -158,428 +193,259 @@ class RelatorioAtividadeMensal(BaseRelatorio):
     Este relatório mostra um resumo do faturamento e do número de atendimentos
     para um determinado mês.
     """
-    def __init__(self, request, ano, mes):
-        super().__init__(request, ano, mes)
+    def __init__(self, empresa, ano, mes, emissor_nome):
+        super().__init__(empresa, ano, mes, emissor_nome)
         self.nome = "Relatório de Atividade Mensal"
         self.lista_execucao = [
             self.desenhar_relatorio_agendamentos,
-            self.desenhar_relatorio_trabalhadores
+            self.desenhar_relatorio_trabalhadores,
+            self.desenhar_tabela_trabalhadores
+        ]
+
+    def get_querysets_versao(self) -> list[QuerySet]:
+        return super().get_querysets_versao() + [
+            Agendamento.objects.filter(self.periodo.filtro('data_agendado'), empresa=self.empresa),
+            Trabalhador.objects.filter(empresa=self.empresa),
         ]
 
     def coletar_dados(self):
         """Busca e calcula os dados necessários no banco de dados."""
-        #* Agendamentos
-        base_agendamentos_mes = Agendamento.objects.filter(
-            self.ativos_filter,
-            empresa=self.request.empresa,
-            data_agendado__date__gte=self.data_inicio,
-            data_agendado__date__lte=self.data_fim
-        )
+        #* Agendamentos: uma query agregada para todos os totais do mês
+        totais = coletar_totais_agendamentos(self.empresa, self.dia_inicio, self.dia_fim)
 
-        agendamentos_finalizados = base_agendamentos_mes.filter(status=AGENDAMENTO_STATUS_FINALIZADO)
-        agendamentos_cancelados = base_agendamentos_mes.filter(status=AGENDAMENTO_STATUS_CANCELADO)
-
-        self.faturamento_total_mes = agendamentos_finalizados.aggregate(total=Sum('servico__preco'))['total'] or 0.0
-        self.total_agendamentos_finalizados = agendamentos_finalizados.count()
-        self.faturamento_total_cancelado = agendamentos_cancelados.aggregate(total=Sum('servico__preco'))['total'] or 0.0
-        self.total_agendamentos_cancelados = agendamentos_cancelados.count()
-
-
-        #* Trabalhadores
-        base_trabalhadores_atividade = (
-            Trabalhador.objects.filter(
-                self.ativos_filter,
-                empresa=self.request.empresa,
-                agendamentos__ativo=True,
-                agendamentos__data_agendado__date__gte=self.data_inicio,
-                agendamentos__data_agendado__date__lte=self.data_fim
-            ).annotate(
-                total_finalizados=Count(
-                    "agendamentos", 
-                    filter=(
-                        Q(
-                            agendamentos__status=AGENDAMENTO_STATUS_FINALIZADO, 
-                            agendamentos__ativo=True
-                        )
-                    )
-                ),
-                total_cancelados=Count(
-                    "agendamentos", 
-                    filter=(
-                        Q(
-                            agendamentos__status=AGENDAMENTO_STATUS_CANCELADO, 
-                            agendamentos__ativo=True
-                        )
-                    )
-                ),
-                valor_arrecadado_total=Sum(
-                    "agendamentos__servico__preco",
-                    filter=(
-                        Q(
-                            agendamentos__status=AGENDAMENTO_STATUS_FINALIZADO, 
-                            agendamentos__ativo=True
-                        )
-                    )
-                )
-            )
-        )
+        self.faturamento_total_mes = totais['faturamento_finalizado']
+        self.total_agendamentos_finalizados = totais['total_finalizados']
+        self.faturamento_total_cancelado = totais['faturamento_cancelado']
+        self.total_agendamentos_cancelados = totais['total_cancelados']
 
-        self.trabalhadores_mais_agendamentos_finalizados = (
-            base_trabalhadores_atividade
-            .values("id", "nome")
-            .order_by('-total_finalizados')[:3]
-        )
-        self.trabalhadores_mais_agendamentos_total = (
-            base_trabalhadores_atividade
-            .values("id", "nome")
-            .order_by('-total_cancelados')[:3]
-        )
-        self.trabalhadores_maior_faturamento_total = (
-            base_trabalhadores_atividade
-            .values("id", "nome")
-            .order_by('-valor_arrecadado_total')[:3]
-        )
+        #* Trabalhadores: anotações carregadas uma vez, rankings derivados em memória
+        self.atividade_trabalhadores = coletar_atividade_trabalhadores(self.empresa, self.dia_inicio, self.dia_fim)
+
+        self.trabalhadores_mais_agendamentos_finalizados = ranking(self.atividade_trabalhadores, 'total_finalizados')
+        self.trabalhadores_mais_agendamentos_total = ranking(self.atividade_trabalhadores, 'total_cancelados')
+        self.trabalhadores_maior_faturamento_total = ranking(self.atividade_trabalhadores, 'valor_arrecadado_total')
 
 
-    def desenhar_relatorio_agendamentos(self, y_inicial: int) -> int:
+    def desenhar_relatorio_agendamentos(self):
         #Agendamentos
-        ponto = pymupdf.Point(50, y_inicial)
-        self.page.insert_text(ponto, "Resumo do Mês", fontsize=self.font_sizes['title'], fontname=self.font_bold)
+        layout = self.layout
+        layout.titulo("Resumo do Mês")
 
-        ponto.x += 20
-        
-        ponto.y += 25
-        self.page.insert_text(ponto, f"Faturamento Total: {ConversionHelper.formatar_moeda(self.faturamento_total_mes)}", fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-        ponto.y += 17
-        self.page.insert_text(ponto, f"Total de Atendimentos Realizados/Finalizados: {self.total_agendamentos_finalizados}", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-
-        ponto.y += 25
-        self.page.insert_text(ponto, f"Faturamento Total Perdido: {ConversionHelper.formatar_moeda(self.faturamento_total_cancelado)}", fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-        ponto.y += 17
-        self.page.insert_text(ponto, f"Total de Atendimentos Cancelados: {self.total_agendamentos_cancelados}", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-
-        return ponto.y
-
-
-    def desenhar_relatorio_trabalhadores(self, y_inicial: int) -> int:
-        ponto = pymupdf.Point(50, y_inicial)
-        self.page.insert_text(ponto, "Resumo de funcionários", fontsize=self.font_sizes['title'], fontname=self.font_bold)
-
-        ponto.x += 20
-
-        ponto.y += 30
-        i: int = 0
-        self.page.insert_text(ponto, f"Top 3 funcionários com mais atendimentos finalizados", fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-        for item in self.trabalhadores_mais_agendamentos_finalizados:
-            i += 1
-            ponto.y += 20
-            ponto_indentado = pymupdf.Point(ponto.x + 20, ponto.y)
-            self.page.insert_text(ponto_indentado, f"{i}. {item.get('nome', '')}: {item.get('total_finalizados')} atendimentos finalizados.", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-
-        ponto.y += 30
-        i: int = 0
-        self.page.insert_text(ponto, f"Top 3 funcionários com mais atendimentos cancelados", fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-        for item in self.trabalhadores_mais_agendamentos_total:
-            i += 1
-            ponto.y += 20
-            ponto_indentado = pymupdf.Point(ponto.x + 20, ponto.y)
-            self.page.insert_text(ponto_indentado, f"{i}. {item.get('nome', '')}: {item.get('total_cancelados')} atendimentos cancelados.", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-
-        ponto.y += 30
-        i: int = 0
-        self.page.insert_text(ponto, f"Top 3 funcionários que geraram maior faturamento", fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-        for item in self.trabalhadores_maior_faturamento_total:
-            i += 1
-            ponto.y += 20
-            ponto_indentado = pymupdf.Point(ponto.x + 20, ponto.y)
-            self.page.insert_text(ponto_indentado, f"{i}. {item.get('nome', '')}: {ConversionHelper.formatar_moeda(item.get('valor_arrecadado_total'))} total.", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-
-        return ponto.y
+        with layout.recuado(20):
+            layout.texto(f"Faturamento Total: {ConversionHelper.formatar_moeda(self.faturamento_total_mes)}", 'sub-title', negrito=True, antes=25)
+            layout.texto(f"Total de Atendimentos Realizados/Finalizados: {self.total_agendamentos_finalizados}", antes=17)
+
+            layout.texto(f"Faturamento Total Perdido: {ConversionHelper.formatar_moeda(self.faturamento_total_cancelado)}", 'sub-title', negrito=True, antes=25)
+            layout.texto(f"Total de Atendimentos Cancelados: {self.total_agendamentos_cancelados}", antes=17)
+
+
+    def desenhar_relatorio_trabalhadores(self):
+        layout = self.layout
+        layout.titulo("Resumo de funcionários")
+
+        with layout.recuado(20):
+            layout.texto("Top 3 funcionários com mais atendimentos finalizados", 'sub-title', negrito=True, antes=30)
+            layout.lista_numerada(
+                (f"{item.get('nome', '')}: {item.get('total_finalizados')} atendimentos finalizados." for item in self.trabalhadores_mais_agendamentos_finalizados),
+                vazio="Nenhum funcionário encontrado.", recuo=20
+            )
+
+            layout.texto("Top 3 funcionários com mais atendimentos cancelados", 'sub-title', negrito=True, antes=30)
+            layout.lista_numerada(
+                (f"{item.get('nome', '')}: {item.get('total_cancelados')} atendimentos cancelados." for item in self.trabalhadores_mais_agendamentos_total),
+                vazio="Nenhum funcionário encontrado.", recuo=20
+            )
+
+            layout.texto("Top 3 funcionários que geraram maior faturamento", 'sub-title', negrito=True, antes=30)
+            layout.lista_numerada(
+                (f"{item.get('nome', '')}: {ConversionHelper.formatar_moeda(item.get('valor_arrecadado_total'))} total." for item in self.trabalhadores_maior_faturamento_total),
+                vazio="Nenhum funcionário encontrado.", recuo=20
+            )
+
+
+    def desenhar_tabela_trabalhadores(self):
+        """Listagem completa, um funcionário por linha."""
+        self.layout.titulo("Atividade por funcionário")
+        self.layout.tabela(
+            colunas=[
+                ColunaTabela("Funcionário", 230),
+                ColunaTabela("Finalizados", 80, ALINHAMENTO_DIREITA),
+                ColunaTabela("Cancelados", 80, ALINHAMENTO_DIREITA),
+                ColunaTabela("Faturamento", 110, ALINHAMENTO_DIREITA, formatar=ConversionHelper.formatar_moeda),
+            ],
+            linhas=(
+                (item['nome'], item['total_finalizados'], item['total_cancelados'], item['valor_arrecadado_total'])
+                for item in sorted(self.atividade_trabalhadores, key=lambda item: item['nome'])
+            ),
+            vazio="Nenhum funcionário com agendamentos no mês."
+        )
 
 class RelatorioClientesMensal(BaseRelatorio):
-    def __init__(self, request, ano, mes):
-        super().__init__(request, ano, mes)
+    def __init__(self, empresa, ano, mes, emissor_nome):
+        super().__init__(empresa, ano, mes, emissor_nome)
         self.nome = "Relatório de Clientes Mensal"
         self.lista_execucao = [
             self.desenhar_relatorio_clientes_atuais,
             self.desenhar_relatorio_clientes_recorrentes,
-            self.desenhar_relatorio_clientes_inativos
+            self.desenhar_relatorio_clientes_inativos,
+            self.desenhar_tabela_clientes
+        ]
+
+    def get_querysets_versao(self) -> list[QuerySet]:
+        # histórico inteiro até o fim do mês: o total geral de agendamentos dos inativos depende dele
+        return super().get_querysets_versao() + [
+            Agendamento.objects.filter(empresa=self.empresa, data_agendado__lt=self.periodo.fim),
+            Cliente.objects.filter(empresa=self.empresa),
         ]
 
     def coletar_dados(self):
+        empresa = self.empresa
+        dia_inicio_janela = self.dia_inicio - timedelta(days=30 * 6) # Últimos 6 meses
+
         #* Clientes Atuais
-        base_clientes = Cliente.objects.filter(self.ativos_filter, empresa=self.request.empresa)
-
-        self.total_clientes_novos = base_clientes.filter(
-            data_criado__gte=self.data_inicio,
-            data_criado__lte=self.data_fim
-        ).count()
-
-        base_clientes_atividade = (
-            base_clientes.filter(
-                agendamentos__ativo=True,
-                agendamentos__data_agendado__gte=self.data_inicio,
-                agendamentos__data_agendado__lte=self.data_fim
-            )
-            .values("id", "nome")
-            .annotate(
-                total_marcados=Count("agendamentos"),
-                total_finalizados=Count(
-                    "agendamentos", 
-                    filter=(
-                        Q(
-                            agendamentos__status=AGENDAMENTO_STATUS_FINALIZADO, 
-                            agendamentos__ativo=True
-                        )
-                    )
-                ),
-                total_cancelados=Count(
-                    "agendamentos", 
-                    filter=(
-                        Q(
-                            agendamentos__status=AGENDAMENTO_STATUS_CANCELADO, 
-                            agendamentos__ativo=True
-                        )
-                    )
-                ),
-            )
-        )
+        base_clientes = Cliente.objects.filter(self.ativos_filter, empresa=empresa)
+
+        self.total_clientes_novos = base_clientes.filter(self.periodo.filtro('data_criado')).count()
+
+        self.atividade_clientes = coletar_atividade_clientes(empresa, self.dia_inicio, self.dia_fim)
 
         #quais clientes com mais atendimentos marcados
-        self.clientes_mais_agendamentos_marcados = (
-            base_clientes_atividade
-            .order_by('-total_marcados')[:3]
-        )
+        self.clientes_mais_agendamentos_marcados = ranking(self.atividade_clientes, 'total_marcados')
         #quais clientes com mais atendimentos finalizados
-        self.clientes_mais_agendamentos_finalizados = (
-            base_clientes_atividade
-            .order_by('-total_finalizados')[:3]
-        )
+        self.clientes_mais_agendamentos_finalizados = ranking(self.atividade_clientes, 'total_finalizados')
         #quais clientes com mais atendimentos cancelados
-        self.clientes_mais_agendamentos_cancelados = (
-            base_clientes_atividade
-            .order_by('-total_cancelados')[:3]
+        self.clientes_mais_agendamentos_cancelados = ranking(self.atividade_clientes, 'total_cancelados')
+
+        #Cliente que gerou maior faturamento (finalizados) no mês
+        self.cliente_maior_faturamento_total = next(
+            (
+                cliente for cliente in ranking(self.atividade_clientes, 'faturamento_total', limite=1)
+                if (cliente['faturamento_total'] or 0) > 0
+            ),
+            None
         )
 
-        #Cliente que gerou maior faturamento
-        self.cliente_maior_faturamento_total = (
-            base_clientes
-            .annotate(faturamento_total=Sum("agendamentos__servico__preco"))
-            .order_by("-faturamento_total")
-            .first()
-        )
-        if self.cliente_maior_faturamento_total and self.cliente_maior_faturamento_total.faturamento_total <= 0:
-            self.cliente_maior_faturamento_total = None
-
         #* Clientes recorrentes
-        base_agendamentos_clientes_mes = base_clientes.filter(
-            agendamentos__ativo=True,
-            agendamentos__data_agendado__gte=self.data_inicio,
-            agendamentos__data_agendado__lte=self.data_fim,
-        )
-        self.total_clientes_unicos = base_agendamentos_clientes_mes.distinct().count()
-
-        self.clientes_recorrentes = (
-            base_agendamentos_clientes_mes
-            .values("id", "nome", "telefone")
-            .annotate(
-                total_agendamentos=Count("agendamentos", 
-                    filter=(
-                        Q(agendamentos__status__in=[
-                            AGENDAMENTO_STATUS_PENDENTE,
-                            AGENDAMENTO_STATUS_EXECUTANDO, 
-                            AGENDAMENTO_STATUS_FINALIZADO
-                        ], agendamentos__ativo=True)
-                    )
-                )
-            ).filter(total_agendamentos__gt=1)
-            .order_by('-total_agendamentos')
-        )
+        self.total_clientes_unicos = len(self.atividade_clientes)
+
+        self.clientes_recorrentes = [
+            cliente for cliente in self.atividade_clientes if cliente['total_agendamentos'] > 1
+        ]
+        self.total_clientes_recorrentes = len(self.clientes_recorrentes)
 
         # nn%
         try:
-            calculo_recorrencia = (self.clientes_recorrentes.count() / self.total_clientes_unicos) * 100
+            calculo_recorrencia = (self.total_clientes_recorrentes / self.total_clientes_unicos) * 100
         except ZeroDivisionError:
             calculo_recorrencia = 0
         self.porcentagem_recorrencia = f"{calculo_recorrencia:.2f}%"
 
-        self.top_clientes_recorrentes = (
-            self.clientes_recorrentes.order_by('-total_agendamentos')[:3]
-        )
+        self.top_clientes_recorrentes = ranking(self.clientes_recorrentes, 'total_agendamentos')
 
-        self.top_clientes_antigos_recorrentes = (
-            base_clientes.filter(
-                agendamentos__ativo=True,
-                data_criado__lt=self.data_inicio,
-                agendamentos__data_agendado__gte=(self.data_inicio - timedelta(days=30 * 6)), # Últimos 6 meses
-                agendamentos__data_agendado__lte=self.data_fim # Até o final do mês atual
-            ).annotate(
-                total_agendamentos=Count("agendamentos", 
-                    filter=(
-                        Q(agendamentos__status__in=[
-                            AGENDAMENTO_STATUS_PENDENTE,
-                            AGENDAMENTO_STATUS_EXECUTANDO, 
-                            AGENDAMENTO_STATUS_FINALIZADO
-                        ], agendamentos__ativo=True)
-                    )
-                )
-            ).filter(total_agendamentos__gt=1) # Clientes com mais de 1 agendamento no período
-            .order_by('-total_agendamentos')
-        )[:3]
+        # Clientes com mais de 1 agendamento nos últimos 6 meses, até o final do mês atual
+        self.top_clientes_antigos_recorrentes = coletar_clientes_recorrentes_antigos(
+            empresa, dia_inicio_janela, self.dia_fim, criados_antes=self.periodo.inicio
+        )
 
-        
         #* Clientes inativos
-        # Clientes que não tiveram agendamentos nos últimos 3 meses
-        clientes_inativos = (
-            base_clientes
-            .annotate(
-                total_agendamentos_periodo=Count(
-                    "agendamentos",
-                    filter=Q(
-                        agendamentos__ativo=True,
-                        agendamentos__data_agendado__gte=(self.data_inicio - timedelta(days=30 * 6)), # Últimos 6 meses
-                        agendamentos__data_agendado__lte=self.data_fim, # Até o final do mês atual
-                    ),
-                )
+        # Clientes que não tiveram agendamentos nos últimos 6 meses,
+        # e entre eles, os que já foram recorrentes no passado
+        self.total_clientes_inativos, self.clientes_inativos_antigos_recorrentes = coletar_clientes_inativos(
+            empresa, dia_inicio_janela, self.dia_fim
+        )
+
+
+    def desenhar_relatorio_clientes_atuais(self):
+        layout = self.layout
+        layout.titulo("Resumo de Clientes Atuais")
+        layout.texto_rotulado("Total de Clientes Novos:", self.total_clientes_novos, 'sub-title', antes=25)
+
+        with layout.recuado(20):
+            layout.texto("Top 3 clientes com mais agendamentos marcados", 'sub-title', negrito=True, antes=26)
+            layout.lista_numerada(
+                (f"{item.get('nome', '')}: {item.get('total_marcados')} agendamentos." for item in self.clientes_mais_agendamentos_marcados),
+                vazio="Nenhum cliente encontrado."
+            )
+
+            layout.texto("Top 3 clientes com mais agendamentos finalizados", 'sub-title', negrito=True, antes=20)
+            layout.lista_numerada(
+                (f"{item.get('nome', '')}: {item.get('total_finalizados')} agendamentos." for item in self.clientes_mais_agendamentos_finalizados),
+                vazio="Nenhum cliente encontrado."
+            )
+
+            layout.texto("Top 3 clientes com mais agendamentos cancelados", 'sub-title', negrito=True, antes=20)
+            layout.lista_numerada(
+                (f"{item.get('nome', '')}: {item.get('total_cancelados')} agendamentos." for item in self.clientes_mais_agendamentos_cancelados),
+                vazio="Nenhum cliente encontrado."
             )
-            .filter(total_agendamentos_periodo=0)  # Nenhum agendamento nos últimos 6 meses
-            .order_by("-data_criado")
+
+            layout.texto("Cliente que gerou maior faturamento total no mês", 'sub-title', negrito=True, antes=30)
+            with layout.recuado(17):
+                if not self.cliente_maior_faturamento_total:
+                    layout.texto("Nenhum cliente com faturamento encontrado.", antes=20)
+                else:
+                    cliente = self.cliente_maior_faturamento_total
+                    layout.texto(f"{cliente.get('nome', '')}: {ConversionHelper.formatar_moeda(cliente.get('faturamento_total'))} em atendimentos finalizados.", antes=20)
+                    layout.texto(f"(telefone: {cliente.get('telefone')})", antes=15)
+
+    def desenhar_relatorio_clientes_recorrentes(self):
+        layout = self.layout
+        layout.titulo("Resumo de Clientes Recorrentes")
+
+        layout.texto_rotulado("Total de Clientes Únicos:", self.total_clientes_unicos, antes=25)
+        layout.texto_rotulado("Total de Clientes Recorrentes:", self.total_clientes_recorrentes, antes=15)
+        layout.texto(f"Porcentagem de recorrência do mês: {self.porcentagem_recorrencia} dos clientes.", 'sub-title', negrito=True, antes=15)
+
+        layout.texto("Top 3 clientes mais recorrentes", 'sub-title', negrito=True, antes=30)
+        layout.lista_numerada(
+            (f"{item.get('nome', '')}: {item.get('total_agendamentos')} agendamentos." for item in self.top_clientes_recorrentes),
+            vazio="Nenhum cliente recorrente encontrado."
         )
-        
-        self.total_clientes_inativos = clientes_inativos.count()
-
-        # Entre os inativos, pega os que já foram recorrentes no passado
-        self.clientes_inativos_antigos_recorrentes = (
-            clientes_inativos.annotate(
-                total_agendamentos_geral=Count("agendamentos", 
-                    filter=(
-                        Q(agendamentos__status__in=[
-                            AGENDAMENTO_STATUS_PENDENTE,
-                            AGENDAMENTO_STATUS_EXECUTANDO, 
-                            AGENDAMENTO_STATUS_FINALIZADO
-                        ], agendamentos__ativo=True)
-                    )
-                )
-            ).filter(
-                total_agendamentos_geral__gt=1
-            ).order_by("-data_criado")
-        )[:3]
-
-
-    def desenhar_relatorio_clientes_atuais(self, y_inicial: int) -> int:
-        ponto = pymupdf.Point(50, y_inicial)
-        self.page.insert_text(ponto, "Resumo de Clientes Atuais", fontsize=self.font_sizes['title'], fontname=self.font_bold)
-
-        ponto.y += 25
-        self.page.insert_text(ponto, "Total de Clientes Novos:", fontsize=self.font_sizes['sub-title'], fontname=self.font_regular)
-        # Ajuste de posicionamento para o valor do total de clientes novos
-        self.page.insert_text(pymupdf.Point(ponto.x + 136, ponto.y), str(self.total_clientes_novos), fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-
-        ponto.x += 20
-
-        ponto.y += 26
-        i: int = 0
-        self.page.insert_text(ponto, f"Top 3 clientes com mais agendamentos marcados", fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-        for item in self.clientes_mais_agendamentos_marcados:
-            i += 1
-            ponto.y += 20
-            ponto_indentado = pymupdf.Point(ponto.x + 17, ponto.y)
-            self.page.insert_text(ponto_indentado, f"{i}. {item.get('nome', '')}: {item.get('total_marcados')} agendamentos.", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-
-        ponto.y += 20
-        i: int = 0
-        self.page.insert_text(ponto, f"Top 3 clientes com mais agendamentos finalizados", fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-        for item in self.clientes_mais_agendamentos_finalizados:
-            i += 1
-            ponto.y += 20
-            ponto_indentado = pymupdf.Point(ponto.x + 17, ponto.y)
-            self.page.insert_text(ponto_indentado, f"{i}. {item.get('nome', '')}: {item.get('total_finalizados')} agendamentos.", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-
-        ponto.y += 20
-        i: int = 0
-        self.page.insert_text(ponto, f"Top 3 clientes com mais agendamentos cancelados", fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-        for item in self.clientes_mais_agendamentos_cancelados:
-            i += 1
-            ponto.y += 20
-            ponto_indentado = pymupdf.Point(ponto.x + 17, ponto.y)
-            self.page.insert_text(ponto_indentado, f"{i}. {item.get('nome', '')}: {item.get('total_cancelados')} agendamentos.", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-
-        ponto.y += 30
-        self.page.insert_text(ponto, f"Cliente que gerou maior faturamento total no mês", fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-        ponto.y += 20
-        ponto_indentado = pymupdf.Point(ponto.x + 17, ponto.y)
-        if not self.cliente_maior_faturamento_total:
-            self.page.insert_text(ponto_indentado, "Nenhum cliente com faturamento encontrado.", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-            return ponto.y
-        else: 
-            self.page.insert_text(ponto_indentado, f"{self.cliente_maior_faturamento_total.nome}: {ConversionHelper.formatar_moeda(self.cliente_maior_faturamento_total.faturamento_total)} agendamentos.", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-        ponto.y += 15
-        ponto_indentado = pymupdf.Point(ponto.x + 17, ponto.y)
-        self.page.insert_text(ponto_indentado, f"(telefone: {self.cliente_maior_faturamento_total.telefone})", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-
-        return ponto.y
-    
-    def desenhar_relatorio_clientes_recorrentes(self, y_inicial: int) -> int:
-        ponto = pymupdf.Point(50, y_inicial)
-        self.page.insert_text(ponto, "Resumo de Clientes Recorrentes", fontsize=self.font_sizes['title'], fontname=self.font_bold)
-
-        ponto.y += 25
-        self.page.insert_text(ponto, "Total de Clientes Únicos:", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-        # Ajuste de posicionamento para o valor do total de clientes únicos
-        self.page.insert_text(pymupdf.Point(ponto.x + 114, ponto.y), str(self.total_clientes_unicos), fontsize=self.font_sizes['small'], fontname=self.font_bold)
-        
-        ponto.y += 15
-        self.page.insert_text(ponto, "Total de Clientes Recorrentes:", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-        # Ajuste de posicionamento para o valor do total de clientes recorrentes
-        self.page.insert_text(pymupdf.Point(ponto.x + 139, ponto.y), str(self.clientes_recorrentes.count()), fontsize=self.font_sizes['small'], fontname=self.font_bold)
-        
-        ponto.y += 15
-        self.page.insert_text(ponto, f"Porcentagem de recorrência do mês: {self.porcentagem_recorrencia} dos clientes.", fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-
-        ponto.y += 30
-        i: int = 0
-        self.page.insert_text(ponto, f"Top 3 clientes mais recorrentes", fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-        for item in self.top_clientes_recorrentes:
-            i += 1
-            ponto.y += 20
-            ponto_indentado = pymupdf.Point(ponto.x + 17, ponto.y)
-            self.page.insert_text(ponto_indentado, f"{i}. {item.get('nome', '')}: {item.get('total_agendamentos')} agendamentos.", fontsize=self.font_sizes['small'], fontname=self.font_regular)
-
-        ponto.y += 20
-        i: int = 0
-        self.page.insert_text(ponto, f"Top 3 clientes recorrentes antigos (nos últimos 6 meses)", fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-
-        if len(self.top_clientes_antigos_recorrentes) == 0:
-            ponto.y += 20
-            self.page.insert_text(pymupdf.Point(ponto.x + 15, ponto.y), "Nenhum recorrente antigo encontrado.", fontsize=self.font_sizes['small'])
-        else:
-            for item in self.top_clientes_antigos_recorrentes:
-                i += 1
-                ponto.y += 20
-                ponto_indentado = pymupdf.Point(ponto.x + 17, ponto.y)
-                self.page.insert_text(ponto_indentado, f"{i}. {item.nome}: {item.total_agendamentos} agendamentos.", fontsize=self.font_sizes['small'], fontname=self.font_regular)
 
-        return ponto.y
-    
-    def desenhar_relatorio_clientes_inativos(self, y_inicial: int) -> int:
-        ponto = pymupdf.Point(50, y_inicial)
-        self.page.insert_text(ponto, "Resumo de Clientes Inativos", fontsize=self.font_sizes['title'], fontname=self.font_bold)
+        layout.texto("Top 3 clientes recorrentes antigos (nos últimos 6 meses)", 'sub-title', negrito=True, antes=20)
+        layout.lista_numerada(
+            (f"{item.get('nome', '')}: {item.get('total_agendamentos')} agendamentos." for item in self.top_clientes_antigos_recorrentes),
+            vazio="Nenhum recorrente antigo encontrado."
+        )
 
-        ponto.y += 25
-        self.page.insert_text(ponto, f"Total de Clientes Inativos (nos últimos 6 meses): {self.total_clientes_inativos}", fontsize=self.font_sizes['small'], fontname=self.font_regular)
+    def desenhar_relatorio_clientes_inativos(self):
+        layout = self.layout
+        layout.titulo("Resumo de Clientes Inativos")
 
-        ponto.y += 20
-        i: int = 0
-        self.page.insert_text(ponto, f"Top 3 recorrentes atualmente inativos (nos últimos 6 meses)", fontsize=self.font_sizes['sub-title'], fontname=self.font_bold)
-        
-        if len(self.clientes_inativos_antigos_recorrentes) == 0: # Alterado para a lista correta de inativos recorrentes
-            ponto.y += 20
-            self.page.insert_text(pymupdf.Point(ponto.x + 15, ponto.y), "Nenhum recorrente inativo encontrado.", fontsize=self.font_sizes['small'])
-        else:
-            for item in self.clientes_inativos_antigos_recorrentes: # Limitar aos top 3
-                i += 1
-                ponto.y += 20
-                ponto_indentado = pymupdf.Point(ponto.x + 17, ponto.y)
-                self.page.insert_text(ponto_indentado, f"{i}. {item.nome}: {item.total_agendamentos_geral} agendamentos.", fontsize=self.font_sizes['small'], fontname=self.font_regular)
+        layout.texto(f"Total de Clientes Inativos (nos últimos 6 meses): {self.total_clientes_inativos}", antes=25)
+
+        layout.texto("Top 3 recorrentes atualmente inativos (nos últimos 6 meses)", 'sub-title', negrito=True, antes=20)
+        layout.lista_numerada(
+            (f"{item.nome}: {item.total_agendamentos_geral} agendamentos." for item in self.clientes_inativos_antigos_recorrentes),
+            vazio="Nenhum recorrente inativo encontrado."
+        )
+
+    def desenhar_tabela_clientes(self):
+        """Listagem completa, um cliente com agendamentos no mês por linha."""
+        self.layout.titulo("Atividade por cliente")
+        self.layout.tabela(
+            colunas=[
+                ColunaTabela("Cliente", 130),
+                ColunaTabela("Telefone", 90),
+                ColunaTabela("Marcados", 62, ALINHAMENTO_DIREITA),
+                ColunaTabela("Finalizados", 70, ALINHAMENTO_DIREITA),
+                ColunaTabela("Cancelados", 68, ALINHAMENTO_DIREITA),
+                ColunaTabela("Faturamento", 80, ALINHAMENTO_DIREITA, formatar=ConversionHelper.formatar_moeda),
+            ],
+            linhas=(
+                (
+                    item['nome'], item['telefone'], item['total_marcados'],
+                    item['total_finalizados'], item['total_cancelados'], item['faturamento_total']
+                )
+                for item in sorted(self.atividade_clientes, key=lambda item: item['nome'])
+            ),
+            vazio="Nenhum cliente com agendamentos no mês."
+        )
+
+
+#* Registro: tipos de relatório disponíveis para geração assíncrona (relatorios.jobs)
 
-        return ponto.y
+RELATORIOS_REGISTRADOS: dict[str, type[BaseRelatorio]] = {
+    'atividade-mensal': RelatorioAtividadeMensal,
+    'clientes-mensal': RelatorioClientesMensal,
+}
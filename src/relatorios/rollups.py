@@ -0,0 +1,125 @@
+"""
+Manutenção e leitura dos resumos diários de agendamentos (ResumoDiarioAgendamento).
+
+Cada alteração de um Agendamento remove a contribuição do estado anterior e soma a do
+estado atual, dentro da mesma transação do save. Relatórios e quick infos leem daqui,
+então o custo não cresce com o histórico bruto de agendamentos.
+"""
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.types import EstadoAgendamento
+from relatorios.models import ResumoDiarioAgendamento
+
+
+TAMANHO_LOTE_RECONSTRUCAO = 2000
+
+
+def chave_resumo(estado: EstadoAgendamento) -> dict:
+    return {
+        'empresa_id': estado.empresa_id,
+        'dia': estado.dia,
+        'trabalhador_id': estado.trabalhador_id,
+        'cliente_id': estado.cliente_id,
+        'servico_id': estado.servico_id,
+        'status': estado.status,
+    }
+
+
+def aplicar_contribuicao(estado: EstadoAgendamento, sinal: int) -> None:
+    """Soma (sinal=1) ou remove (sinal=-1) um agendamento do resumo do seu dia."""
+    chave = chave_resumo(estado)
+    resumos = ResumoDiarioAgendamento.objects.filter(**chave)
+
+    atualizados = resumos.update(
+        quantidade=F('quantidade') + sinal,
+        faturamento=F('faturamento') + sinal * estado.preco
+    )
+    if atualizados:
+        if sinal < 0:
+            resumos.filter(quantidade__lte=0).delete()
+        return
+
+    if sinal < 0:
+        # linha inexistente: resumo já divergente, 'reconstruir_resumos' corrige.
+        return
+
+    try:
+        with transaction.atomic():
+            ResumoDiarioAgendamento.objects.create(**chave, quantidade=1, faturamento=estado.preco)
+    except IntegrityError:
+        # criada por outra transação entre o update e o create
+        resumos.update(quantidade=F('quantidade') + 1, faturamento=F('faturamento') + estado.preco)
+
+
+def atualizar_resumos(anterior: EstadoAgendamento | None, atual: EstadoAgendamento | None) -> None:
+    conta_anterior = anterior is not None and anterior.ativo
+    conta_atual = atual is not None and atual.ativo
+
+    if conta_anterior and conta_atual and (
+        chave_resumo(anterior) == chave_resumo(atual) and anterior.preco == atual.preco
+    ):
+        return
+
+    if conta_anterior:
+        aplicar_contribuicao(anterior, -1)
+    if conta_atual:
+        aplicar_contribuicao(atual, 1)
+
+
+def reconstruir_resumos(empresa=None) -> int:
+    """
+    Recalcula os resumos a partir dos agendamentos ativos (de uma empresa ou de todas).
+    Retorna a quantidade de linhas de resumo criadas.
+    """
+    agendamentos = Agendamento.objects.filter(ativo=True)
+    resumos = ResumoDiarioAgendamento.objects.all()
+    if empresa is not None:
+        agendamentos = agendamentos.filter(empresa=empresa)
+        resumos = resumos.filter(empresa=empresa)
+
+    linhas = (
+        agendamentos
+        .annotate(dia=TruncDate('data_agendado'))
+        .values('empresa_id', 'dia', 'trabalhador_id', 'cliente_id', 'servico_id', 'status')
+        .annotate(quantidade=Count('id'), faturamento=Sum('preco'))
+        .order_by()
+    )
+
+    total = 0
+    with transaction.atomic():
+        resumos.delete()
+
+        lote: list[ResumoDiarioAgendamento] = []
+        for linha in linhas.iterator(chunk_size=TAMANHO_LOTE_RECONSTRUCAO):
+            lote.append(ResumoDiarioAgendamento(**linha))
+            if len(lote) >= TAMANHO_LOTE_RECONSTRUCAO:
+                ResumoDiarioAgendamento.objects.bulk_create(lote)
+                total += len(lote)
+                lote = []
+
+        ResumoDiarioAgendamento.objects.bulk_create(lote)
+        total += len(lote)
+
+    return total
+
+
+#* Leitura
+
+def resumos_periodo(empresa, dia_inicio: date, dia_fim: date):
+    """Resumos da empresa entre dia_inicio e dia_fim (inclusivos)."""
+    return ResumoDiarioAgendamento.objects.filter(
+        empresa=empresa,
+        dia__gte=dia_inicio,
+        dia__lte=dia_fim
+    )
+
+
+def faturamento_periodo(empresa, dia_inicio: date, dia_fim: date, status: str):
+    return resumos_periodo(empresa, dia_inicio, dia_fim).filter(
+        status=status
+    ).aggregate(total=Sum('faturamento'))['total'] or 0
@@ -0,0 +1,9 @@
+from django.dispatch import receiver
+
+from servicos.agendamentos.signals import agendamento_alterado
+from relatorios.rollups import atualizar_resumos
+
+
+@receiver(agendamento_alterado)
+def atualizar_resumos_diarios(sender, anterior, atual, **kwargs):
+    atualizar_resumos(anterior, atual)
@@ -0,0 +1,82 @@
+// Geração assíncrona de relatórios: submissão e acompanhamento dos jobs
+document.addEventListener('DOMContentLoaded', () => {
+    const lista = document.getElementById('listaJobs');
+    const form = document.getElementById('formMesAno');
+    const INTERVALO_POLLING = 2000;
+
+    if (!lista) return;
+
+    const csrfToken = () => form.querySelector('[name=csrfmiddlewaretoken]').value;
+
+    const atualizarItem = (item, job) => {
+        item.dataset.status = job.status;
+        item.dataset.urlStatus = job.url_status;
+
+        const status = item.querySelector('.relatorio-job-status');
+        status.textContent = job.status_display;
+        status.title = job.erro || '';
+
+        const abrir = item.querySelector('.btn-abrir-relatorio');
+        if (job.url_download) {
+            abrir.href = job.url_download;
+            abrir.hidden = false;
+        }
+    };
+
+    const criarItem = job => {
+        const item = document.createElement('div');
+        item.className = 'relatorio-item relatorio-job';
+        item.innerHTML = `
+            <h4 class="relatorio-label"></h4>
+            <span class="relatorio-job-status"></span>
+            <a class="btn-abrir-relatorio" target="_blank" hidden>Abrir</a>
+        `;
+        item.querySelector('.relatorio-label').textContent = `${job.tipo_display} - ${job.mes} / ${job.ano}`;
+        atualizarItem(item, job);
+
+        lista.querySelector('.relatorio-jobs-vazio')?.remove();
+        lista.prepend(item);
+        return item;
+    };
+
+    const emAndamento = item => ['P', 'E'].includes(item.dataset.status);
+
+    const acompanhar = item => {
+        const consultar = async () => {
+            try {
+                const resposta = await fetch(item.dataset.urlStatus, { headers: { 'Accept': 'application/json' } });
+                if (!resposta.ok) return;
+                atualizarItem(item, await resposta.json());
+            } finally {
+                if (emAndamento(item)) setTimeout(consultar, INTERVALO_POLLING);
+            }
+        };
+        setTimeout(consultar, INTERVALO_POLLING);
+    };
+
+    const submeter = async (tipo, mes, ano) => {
+        const resposta = await fetch(lista.dataset.urlCriar, {
+            method: 'POST',
+            headers: { 'X-CSRFToken': csrfToken() },
+            body: new URLSearchParams({ tipo, mes, ano }),
+        });
+        const job = await resposta.json();
+
+        if (!resposta.ok) {
+            alert(job.erro || 'Não foi possível gerar o relatório.');
+            return;
+        }
+
+        // job idêntico já em andamento: reaproveita o item existente
+        const existente = [...lista.querySelectorAll('.relatorio-job')]
+            .find(item => item.dataset.urlStatus === job.url_status);
+        const item = existente || criarItem(job);
+        if (!existente) acompanhar(item);
+    };
+
+    lista.querySelectorAll('.relatorio-job').forEach(item => {
+        if (emAndamento(item)) acompanhar(item);
+    });
+
+    window.relatoriosJobs = { submeter };
+});
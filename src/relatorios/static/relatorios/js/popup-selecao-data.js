@@ -4,11 +4,13 @@ document.addEventListener('DOMContentLoaded', () => {
     const form = document.getElementById('formMesAno');
     const btnFechar = document.getElementById('btnFecharPopup');
     let currentUrl = null;
+    let currentTipo = null;
 
     // Open popup
     document.querySelectorAll('.btn-gerar-relatorio').forEach(btn => {
         btn.addEventListener('click', () => {
             currentUrl = btn.dataset.url;
+            currentTipo = btn.dataset.tipo || null;
             popup.style.display = 'block';
             overlay.style.display = 'block';
         });
@@ -27,7 +29,11 @@ document.addEventListener('DOMContentLoaded', () => {
         e.preventDefault();
         const mes = document.getElementById('mes').value;
         const ano = document.getElementById('ano').value;
-        if (currentUrl) {
+        if (currentTipo && window.relatoriosJobs) {
+            // geração em segundo plano, acompanhada na lista de relatórios gerados
+            window.relatoriosJobs.submeter(currentTipo, mes, ano);
+            fecharPopup();
+        } else if (currentUrl) {
             const url = new URL(currentUrl, window.location.origin);
             url.searchParams.set('mes', mes);
             url.searchParams.set('ano', ano);
@@ -1,3 +1,448 @@
-from django.test import TestCase
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import zipfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import pymupdf
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from cadastros.empresas.models import Empresa
+from cadastros.clientes.models import Cliente
+from cadastros.trabalhadores.models import Trabalhador
+from servicos.tipo_servicos.models import TipoServico
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.choices import (
+    AGENDAMENTO_STATUS_PENDENTE,
+    AGENDAMENTO_STATUS_FINALIZADO,
+    AGENDAMENTO_STATUS_CANCELADO
+)
+from relatorios.cache import CacheRelatorios
+from relatorios.choices import (
+    RELATORIO_JOB_STATUS_PENDENTE,
+    RELATORIO_JOB_STATUS_EXECUTANDO,
+    RELATORIO_JOB_STATUS_FINALIZADO,
+    RELATORIO_JOB_STATUS_ERRO
+)
+from relatorios.jobs import executar_job, expirar_jobs_abandonados, limpar_jobs_antigos, servidor_atual
+from relatorios.models import ResumoDiarioAgendamento, RelatorioJob
+from relatorios.layout import LayoutFluxo, ALINHAMENTO_DIREITA
+from relatorios.recursos import get_recursos, descartar_recursos
+from relatorios.types import ColunaTabela
+from relatorios.relatorios import RelatorioAtividadeMensal, RelatorioClientesMensal
+from relatorios.rollups import reconstruir_resumos
+
+
+class DadosRelatorioTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="dono", password="senha")
+        cls.empresa = Empresa.objects.create(
+            cnpj="11222333000181", nome_fantasia="Salão", razao_social="Salão LTDA", user=cls.user
+        )
+        cls.cliente = cliente = Cliente.objects.create(
+            nome="Cliente", cpf="52998224725", telefone="+5511999990000", endereco="Rua A", empresa=cls.empresa
+        )
+        cls.corte = corte = TipoServico.objects.create(nome="Corte", preco=Decimal("50.00"), empresa=cls.empresa)
+        barba = TipoServico.objects.create(nome="Barba", preco=Decimal("30.00"), empresa=cls.empresa)
+
+        cls.ana = Trabalhador.objects.create(
+            nome="Ana", cpf="11144477735", telefone="+5511988880001", endereco="Rua B", empresa=cls.empresa
+        )
+        cls.bia = Trabalhador.objects.create(
+            nome="Bia", cpf="39053344705", telefone="+5511988880002", endereco="Rua C", empresa=cls.empresa
+        )
+
+        def agendar(dia, status, servico, trabalhador):
+            Agendamento.objects.create(
+                data_agendado=timezone.make_aware(datetime(2025, 3, dia, 10)),
+                status=status, cliente=cliente, servico=servico,
+                trabalhador=trabalhador, empresa=cls.empresa
+            )
+
+        agendar(3, AGENDAMENTO_STATUS_FINALIZADO, corte, cls.ana)
+        agendar(4, AGENDAMENTO_STATUS_FINALIZADO, corte, cls.ana)
+        agendar(5, AGENDAMENTO_STATUS_FINALIZADO, barba, cls.bia)
+        agendar(6, AGENDAMENTO_STATUS_CANCELADO, barba, cls.bia)
+        agendar(7, AGENDAMENTO_STATUS_CANCELADO, corte, cls.bia)
+        agendar(8, AGENDAMENTO_STATUS_PENDENTE, corte, cls.ana)
+
+    def get_relatorio(self, relatorio_class=RelatorioAtividadeMensal):
+        return relatorio_class(empresa=self.empresa, ano=2025, mes=3, emissor_nome="dono")
+
+
+class RelatorioAtividadeMensalTests(DadosRelatorioTestCase):
+    def test_coletar_dados_em_duas_queries(self):
+        relatorio = self.get_relatorio()
+
+        # 1 agregação condicional dos totais + 1 anotação por trabalhador
+        with self.assertNumQueries(2):
+            relatorio.coletar_dados()
+
+    def test_totais_do_mes(self):
+        relatorio = self.get_relatorio()
+        relatorio.coletar_dados()
+
+        self.assertEqual(relatorio.faturamento_total_mes, Decimal("130.00"))
+        self.assertEqual(relatorio.total_agendamentos_finalizados, 3)
+        self.assertEqual(relatorio.faturamento_total_cancelado, Decimal("80.00"))
+        self.assertEqual(relatorio.total_agendamentos_cancelados, 2)
+
+    def test_rankings_derivados_em_memoria(self):
+        relatorio = self.get_relatorio()
+        relatorio.coletar_dados()
+
+        finalizados = relatorio.trabalhadores_mais_agendamentos_finalizados
+        cancelados = relatorio.trabalhadores_mais_agendamentos_total
+        faturamento = relatorio.trabalhadores_maior_faturamento_total
+
+        self.assertEqual([(t['nome'], t['total_finalizados']) for t in finalizados], [("Ana", 2), ("Bia", 1)])
+        self.assertEqual([(t['nome'], t['total_cancelados']) for t in cancelados], [("Bia", 2), ("Ana", 0)])
+        self.assertEqual(
+            [(t['nome'], t['valor_arrecadado_total']) for t in faturamento],
+            [("Ana", Decimal("100.00")), ("Bia", Decimal("30.00"))]
+        )
+
+    def test_gerar_pdf(self):
+        pdf = self.get_relatorio().gerar_pdf()
+        self.assertTrue(pdf.startswith(b"%PDF"))
+
+    def test_pdf_embute_subconjunto_das_fontes(self):
+        pdf = self.get_relatorio().gerar_pdf()
+
+        # as fontes completas somam ~1.4 MB
+        self.assertLess(len(pdf), get_recursos().tamanho_fontes // 4)
+        self.assertIn("Relatório de Atividade Mensal", pymupdf.open("pdf", pdf)[0].get_text())
+
+
+class RelatorioClientesMensalTests(DadosRelatorioTestCase):
+    def test_gerar_pdf(self):
+        relatorio = self.get_relatorio(RelatorioClientesMensal)
+        pdf = relatorio.gerar_pdf()
+
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertEqual(relatorio.total_clientes_unicos, 1)
+        self.assertEqual(relatorio.cliente_maior_faturamento_total['faturamento_total'], Decimal("130.00"))
+
+
+class RecursosRelatorioTests(SimpleTestCase):
+    def test_fontes_carregadas_uma_vez_por_processo(self):
+        descartar_recursos()
+        self.addCleanup(descartar_recursos)
+
+        recursos = get_recursos()
+        self.assertIs(get_recursos(), recursos)
+        self.assertTrue(recursos.fontes_customizadas)
+        self.assertGreaterEqual(recursos.tempo_carregamento, 0)
+
+
+class LayoutFluxoTests(SimpleTestCase):
+    def test_tabela_pagina_e_repete_cabecalho(self):
+        doc = pymupdf.open()
+        layout = LayoutFluxo(doc, get_recursos(), {'title': 14, 'sub-title': 11, 'small': 9})
+        layout.nova_pagina()
+
+        desenhadas = layout.tabela(
+            colunas=[ColunaTabela("Nome", 300), ColunaTabela("Total", 100, ALINHAMENTO_DIREITA)],
+            linhas=((f"Cliente {i}", i) for i in range(500))
+        )
+        layout.numerar_paginas()
+
+        self.assertEqual(desenhadas, 500)
+        self.assertGreater(doc.page_count, 1)
+        for page in doc:
+            texto = page.get_text()
+            self.assertIn("Nome", texto)
+            self.assertIn(f"de {doc.page_count}", texto)
+        self.assertIn("Cliente 499", doc[-1].get_text())
+
+
+class ResumoDiarioAgendamentoTests(DadosRelatorioTestCase):
+    def get_resumos(self) -> list[tuple]:
+        return sorted(
+            ResumoDiarioAgendamento.objects.values_list(
+                'dia', 'trabalhador_id', 'cliente_id', 'servico_id', 'status', 'quantidade', 'faturamento'
+            )
+        )
+
+    def test_resumos_iguais_a_reconstrucao(self):
+        incrementais = self.get_resumos()
+        reconstruir_resumos(self.empresa)
+        self.assertEqual(incrementais, self.get_resumos())
+
+    def test_mudanca_de_status(self):
+        agendamento = Agendamento.objects.get(status=AGENDAMENTO_STATUS_PENDENTE)
+        agendamento.status = AGENDAMENTO_STATUS_FINALIZADO
+        agendamento.save(update_fields=['status'])
+
+        relatorio = self.get_relatorio()
+        relatorio.coletar_dados()
+        self.assertEqual(relatorio.total_agendamentos_finalizados, 4)
+        self.assertEqual(relatorio.faturamento_total_mes, Decimal("180.00"))
+
+        incrementais = self.get_resumos()
+        reconstruir_resumos(self.empresa)
+        self.assertEqual(incrementais, self.get_resumos())
+
+    def test_reajuste_de_preco_nao_altera_agendamentos_ja_marcados(self):
+        agendamento = Agendamento.objects.filter(status=AGENDAMENTO_STATUS_FINALIZADO, servico=self.corte).first()
+        self.corte.preco = Decimal("60.00")
+        self.corte.save()
+
+        agendamento.status = AGENDAMENTO_STATUS_CANCELADO
+        agendamento.save()
+
+        relatorio = self.get_relatorio()
+        relatorio.coletar_dados()
+        self.assertEqual(relatorio.faturamento_total_mes, Decimal("80.00"))
+        self.assertFalse(ResumoDiarioAgendamento.objects.filter(faturamento__lt=0).exists())
+
+        incrementais = self.get_resumos()
+        reconstruir_resumos(self.empresa)
+        self.assertEqual(incrementais, self.get_resumos())
+
+    def test_inativacao_remove_do_resumo(self):
+        agendamento = Agendamento.objects.filter(status=AGENDAMENTO_STATUS_CANCELADO).first()
+        agendamento.ativo = False
+        agendamento.save()
+
+        relatorio = self.get_relatorio()
+        relatorio.coletar_dados()
+        self.assertEqual(relatorio.total_agendamentos_cancelados, 1)
+
+        incrementais = self.get_resumos()
+        reconstruir_resumos(self.empresa)
+        self.assertEqual(incrementais, self.get_resumos())
+
+
+class DiretorioTemporarioTestCase(DadosRelatorioTestCase):
+    """Cache de relatórios e arquivos de mídia em um diretório temporário, com o usuário logado."""
+    def setUp(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.diretorio = Path(diretorio.name)
+
+        configuracao = override_settings(
+            RELATORIOS_CACHE_DIR=self.diretorio / 'cache',
+            STORAGES={
+                **settings.STORAGES,
+                'default': {
+                    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                    'OPTIONS': {'location': self.diretorio / 'media'}
+                }
+            }
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['empresa_id'] = self.empresa.id
+        session.save()
+
+
+class CacheRelatoriosTests(DiretorioTemporarioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('relatorios:atividade-mensal') + '?ano=2025&mes=3'
+
+    def test_segunda_requisicao_servida_do_cache(self):
+        primeira = self.client.get(self.url)
+        conteudo = b''.join(primeira.streaming_content)
+        self.assertTrue(conteudo.startswith(b"%PDF"))
+        self.assertEqual(len(list((self.diretorio / 'cache').glob('*.pdf'))), 1)
+
+        # hit: apenas a sessão/empresa e o carimbo de versão são consultados
+        with self.assertNumQueries(6):
+            segunda = self.client.get(self.url)
+        self.assertEqual(b''.join(segunda.streaming_content), conteudo)
+        self.assertEqual(segunda['ETag'], primeira['ETag'])
+
+    def test_if_none_match_retorna_304(self):
+        etag = self.client.get(self.url)['ETag']
+        resposta = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(resposta.status_code, 304)
+
+    def test_alteracao_nos_dados_muda_a_chave(self):
+        etag = self.client.get(self.url)['ETag']
+
+        agendamento = Agendamento.objects.get(status=AGENDAMENTO_STATUS_PENDENTE)
+        agendamento.status = AGENDAMENTO_STATUS_FINALIZADO
+        agendamento.save()
+
+        resposta = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+
+    def test_mudanca_de_status_pela_view_muda_a_chave(self):
+        etag = self.client.get(self.url)['ETag']
+
+        agendamento = Agendamento.objects.get(status=AGENDAMENTO_STATUS_PENDENTE)
+        self.client.post(reverse('servicos:agendamentos:next-status', args=[agendamento.pk]))
+        agendamento.refresh_from_db()
+        self.assertNotEqual(agendamento.status, AGENDAMENTO_STATUS_PENDENTE)
+
+        resposta = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+
+    def test_lru_remove_menos_usados(self):
+        cache = CacheRelatorios(self.diretorio / 'cache', tamanho_maximo=10)
+        cache.salvar('a', b'12345')
+        cache.salvar('b', b'12345')
+        # 'a' usado depois de 'b' (datas explícitas: a resolução do mtime varia por filesystem)
+        os.utime(cache.get_caminho('b'), (1000, 1000))
+        os.utime(cache.get_caminho('a'), (2000, 2000))
+        cache.salvar('c', b'12345')
+
+        self.assertIsNotNone(cache.obter('a'))
+        self.assertIsNone(cache.obter('b'))
+        self.assertIsNotNone(cache.obter('c'))
+
+
+class RelatorioJobTests(DiretorioTemporarioTestCase):
+    def submeter(self, tipo='atividade-mensal'):
+        return self.client.post(reverse('relatorios:job-create'), {'tipo': tipo, 'ano': 2025, 'mes': 3})
+
+    def test_submeter_cria_job_pendente(self):
+        resposta = self.submeter()
+
+        self.assertEqual(resposta.status_code, 202)
+        job = RelatorioJob.objects.get(pk=resposta.json()['id'])
+        self.assertEqual(job.status, RELATORIO_JOB_STATUS_PENDENTE)
+        self.assertEqual(job.empresa, self.empresa)
+
+    def test_job_identico_em_andamento_reaproveitado(self):
+        primeiro = self.submeter().json()['id']
+        segundo = self.submeter().json()['id']
+        self.assertEqual(primeiro, segundo)
+
+    def test_tipo_invalido(self):
+        self.assertEqual(self.submeter(tipo='inexistente').status_code, 400)
+
+    @override_settings(RELATORIOS_JOBS_MAX_PENDENTES_EMPRESA=1)
+    def test_limite_de_jobs_em_andamento(self):
+        self.assertEqual(self.submeter('atividade-mensal').status_code, 202)
+        self.assertEqual(self.submeter('clientes-mensal').status_code, 429)
+
+    def test_executar_e_baixar(self):
+        job_id = self.submeter().json()['id']
+
+        self.assertEqual(executar_job(job_id), RELATORIO_JOB_STATUS_FINALIZADO)
+
+        status = self.client.get(reverse('relatorios:job-status', args=[job_id])).json()
+        self.assertFalse(status['em_andamento'])
+
+        download = self.client.get(status['url_download'])
+        self.assertTrue(b''.join(download.streaming_content).startswith(b"%PDF"))
+
+    def test_download_antes_de_finalizar(self):
+        job_id = self.submeter().json()['id']
+        resposta = self.client.get(reverse('relatorios:job-download', args=[job_id]))
+        self.assertEqual(resposta.status_code, 404)
+
+    def test_expira_execucao_longa_e_fila_de_servidor_encerrado(self):
+        antigo = timezone.now() - timedelta(seconds=settings.RELATORIOS_JOBS_TEMPO_LIMITE + 1)
+        processo = subprocess.Popen([sys.executable, '-c', ''])
+        processo.wait()
+        servidor_encerrado = servidor_atual().rsplit(':', 1)[0] + f":{processo.pid}"
+
+        jobs = {
+            # aguardando na fila de um servidor ativo: não expira, mesmo antigo
+            'fila': RelatorioJob(status=RELATORIO_JOB_STATUS_PENDENTE, servidor=servidor_atual()),
+            'orfao': RelatorioJob(status=RELATORIO_JOB_STATUS_PENDENTE, servidor=servidor_encerrado),
+            'executando': RelatorioJob(status=RELATORIO_JOB_STATUS_EXECUTANDO, data_inicio_execucao=antigo),
+            'recente': RelatorioJob(status=RELATORIO_JOB_STATUS_EXECUTANDO, data_inicio_execucao=timezone.now()),
+        }
+        for job in jobs.values():
+            job.empresa, job.tipo, job.ano, job.mes, job.emissor_nome = self.empresa, 'atividade-mensal', 2025, 3, "Dono"
+            job.save()
+        RelatorioJob.objects.update(data_criado=antigo, data_modificado=antigo)
+
+        self.assertEqual(expirar_jobs_abandonados(), 2)
+        self.assertEqual(
+            {nome: RelatorioJob.objects.get(pk=job.pk).status for nome, job in jobs.items()},
+            {
+                'fila': RELATORIO_JOB_STATUS_PENDENTE,
+                'orfao': RELATORIO_JOB_STATUS_ERRO,
+                'executando': RELATORIO_JOB_STATUS_ERRO,
+                'recente': RELATORIO_JOB_STATUS_EXECUTANDO,
+            }
+        )
+
+    def test_limpeza_remove_jobs_antigos_e_seus_arquivos(self):
+        antigo, recente = self.submeter().json()['id'], self.submeter('clientes-mensal').json()['id']
+        executar_job(antigo)
+        executar_job(recente)
+        arquivo = Path(RelatorioJob.objects.get(pk=antigo).arquivo.path)
+        self.assertTrue(arquivo.exists())
+
+        RelatorioJob.objects.filter(pk=antigo).update(
+            data_modificado=timezone.now() - timedelta(seconds=settings.RELATORIOS_JOBS_RETENCAO + 1)
+        )
+        self.assertEqual(limpar_jobs_antigos(), 1)
+
+        self.assertFalse(arquivo.exists())
+        self.assertEqual(list(RelatorioJob.objects.values_list('pk', flat=True)), [recente])
+
+
+@override_settings(RELATORIOS_JOBS_MAX_PROCESSOS=0)
+class ExportacaoRelatoriosTests(DiretorioTemporarioTestCase):
+    def exportar(self, **parametros):
+        return self.client.get(reverse('relatorios:exportar'), {'inicio': '2025-02', 'fim': '2025-03', **parametros})
+
+    def test_zip_com_todos_os_relatorios_do_periodo(self):
+        resposta = self.exportar()
+        self.assertEqual(resposta['Content-Type'], 'application/zip')
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(resposta.streaming_content))) as arquivo_zip:
+            nomes = arquivo_zip.namelist()
+            pdfs = [nome for nome in nomes if nome.endswith('.pdf')]
+            self.assertEqual(len(pdfs), 4) # 2 meses x 2 tipos
+            self.assertIn(f"salao-{self.empresa.pk}/2025-03_atividade-mensal.pdf", pdfs)
+            self.assertTrue(arquivo_zip.read(pdfs[0]).startswith(b"%PDF"))
+            self.assertIn("4 de 4", arquivo_zip.read('resumo.txt').decode())
+
+    def test_apenas_empresas_do_usuario(self):
+        outro = get_user_model().objects.create_user(username="outro", password="senha")
+        outra_empresa = Empresa.objects.create(
+            cnpj="11444777000161", nome_fantasia="Outra", razao_social="Outra LTDA", user=outro
+        )
+
+        resposta = self.exportar(empresa=[outra_empresa.pk], tipo='atividade-mensal')
+        self.assertEqual(resposta.status_code, 400)
+
+    def test_tipo_invalido(self):
+        self.assertEqual(self.exportar(tipo='inexistente').status_code, 400)
+
+    def test_empresa_invalida(self):
+        self.assertEqual(self.exportar(empresa='abc').status_code, 400)
+
+    @override_settings(RELATORIOS_JOBS_MAX_PROCESSOS=3, RELATORIOS_EXPORTACAO_EM_VOO=8)
+    def test_exportacao_nao_ocupa_todo_o_pool(self):
+        with mock.patch('relatorios.views.get_executor', return_value=None), \
+                mock.patch('relatorios.views.exportar_zip', return_value=iter([b''])) as exportar_zip:
+            self.exportar()
+        self.assertEqual(exportar_zip.call_args.kwargs['em_voo'], 2)
+
+    def test_comando(self):
+        saida = self.diretorio / 'exportacao.zip'
+        call_command(
+            'exportar_relatorios', str(saida), '--empresa', str(self.empresa.pk),
+            '--tipo', 'clientes-mensal', '--inicio', '2025-01', '--fim', '2025-03',
+            '--processos', '0', stdout=io.StringIO()
+        )
+
+        with zipfile.ZipFile(saida) as arquivo_zip:
+            self.assertEqual(len([nome for nome in arquivo_zip.namelist() if nome.endswith('.pdf')]), 3)
@@ -1,12 +1,94 @@
-from dataclasses import dataclass
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import pymupdf
+from django.utils.text import slugify
 
 
 @dataclass
 class RelatorioAcesso:
     nome: str
     url: str
+    tipo: str | None = None # chave em RELATORIOS_REGISTRADOS, quando disponível para geração assíncrona
 
 @dataclass
 class RelatorioGrupo:
     nome: str
-    relatorios: list[RelatorioAcesso]
\ No newline at end of file
+    relatorios: list[RelatorioAcesso]
+
+@dataclass(frozen=True)
+class FonteRelatorio:
+    alias: str # nome da fonte dentro do PDF
+    caminho: str
+    buffer: bytes = field(repr=False)
+
+    @cached_property
+    def fonte(self) -> pymupdf.Font:
+        """Fonte carregada para medir textos (largura de colunas, alinhamentos)."""
+        return pymupdf.Font(fontbuffer=self.buffer)
+
+@dataclass(frozen=True)
+class RecursosRelatorio:
+    fonte_regular: FonteRelatorio | None
+    fonte_negrito: FonteRelatorio | None
+    tempo_carregamento: float # segundos
+
+    @property
+    def fontes_customizadas(self) -> bool:
+        return self.fonte_regular is not None and self.fonte_negrito is not None
+
+    @property
+    def tamanho_fontes(self) -> int:
+        if not self.fontes_customizadas:
+            return 0
+        return len(self.fonte_regular.buffer) + len(self.fonte_negrito.buffer)
+
+@dataclass
+class ColunaTabela:
+    titulo: str
+    largura: float
+    alinhamento: str = 'esquerda' # relatorios.layout.ALINHAMENTO_*
+    formatar: Callable | None = None # aplicado aos valores (não ao cabeçalho)
+
+@dataclass(frozen=True)
+class ItemExportacao:
+    """Um relatório (tipo, empresa, mês) de uma exportação em lote; enviado aos processos do pool."""
+    tipo: str # chave em RELATORIOS_REGISTRADOS
+    empresa_id: int
+    empresa_nome: str
+    ano: int
+    mes: int
+    emissor_nome: str
+
+    @property
+    def nome_arquivo(self) -> str:
+        return f"{slugify(self.empresa_nome)}-{self.empresa_id}/{self.ano}-{self.mes:02d}_{self.tipo}.pdf"
+
+@dataclass
+class ProgressoExportacao:
+    total: int
+    concluidos: int = 0
+    falhas: int = 0
+    bytes_escritos: int = 0
+    inicio: float = field(default_factory=time.perf_counter)
+
+    @property
+    def decorrido(self) -> float:
+        return time.perf_counter() - self.inicio
+
+    @property
+    def relatorios_por_segundo(self) -> float:
+        return self.concluidos / self.decorrido if self.decorrido else 0.0
+
+    @property
+    def megabytes_por_segundo(self) -> float:
+        return self.bytes_escritos / (1024 * 1024) / self.decorrido if self.decorrido else 0.0
+
+    def __str__(self):
+        return (
+            f"[{self.concluidos}/{self.total}] {self.falhas} falha(s), "
+            f"{self.bytes_escritos / (1024 * 1024):.1f} MB em {self.decorrido:.1f}s "
+            f"({self.relatorios_por_segundo:.2f} relatórios/s, {self.megabytes_por_segundo:.2f} MB/s)"
+        )
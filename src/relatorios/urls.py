@@ -1,12 +1,28 @@
 from django.urls import path
-from relatorios.views import SelecaoRelatoriosView, RelatorioAtividadeMensalView, RelatorioClientesMensalView
+from relatorios.views import (
+    SelecaoRelatoriosView,
+    RelatorioAtividadeMensalView,
+    RelatorioClientesMensalView,
+    RelatorioJobCreateView,
+    RelatorioJobStatusView,
+    RelatorioJobDownloadView,
+    ExportacaoRelatoriosView
+)
 
 app_name = 'relatorios'
 
 urlpatterns = [
     path('', SelecaoRelatoriosView.as_view(), name='list'),
     path('atividade-mensal/', RelatorioAtividadeMensalView.as_view(), name='atividade-mensal'), # Exemplo de URL: /relatorios/atividade-mensal/?ano=2023&mes=10
-    path('clientes-mensal/', RelatorioClientesMensalView.as_view(), name='clientes-mensal')
+    path('clientes-mensal/', RelatorioClientesMensalView.as_view(), name='clientes-mensal'),
+
+    #geração assíncrona
+    path('jobs/', RelatorioJobCreateView.as_view(), name='job-create'),
+    path('jobs/<int:pk>/', RelatorioJobStatusView.as_view(), name='job-status'),
+    path('jobs/<int:pk>/download/', RelatorioJobDownloadView.as_view(), name='job-download'),
+
+    #exportação em lote (várias empresas/meses em um ZIP)
+    path('exportar/', ExportacaoRelatoriosView.as_view(), name='exportar')
 ]
 
 #selecione urlpatterns que devem se motrados na listagem de relatórios
@@ -1,21 +1,43 @@
+import logging
 from datetime import datetime
 from urllib.parse import urlencode
 
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse
-from django.urls import reverse_lazy
+from django.conf import settings
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotModified,
+    FileResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+    Http404
+)
+from django.shortcuts import get_object_or_404
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 
 from core.bases.views import BasePageView
 from cadastros.empresas.mixins import ContextoEmpresaMixin
-from .relatorios import RelatorioAtividadeMensal, RelatorioClientesMensal
+from cadastros.empresas.models import Empresa
+from .relatorios import BaseRelatorio, RelatorioAtividadeMensal, RelatorioClientesMensal, RELATORIOS_REGISTRADOS
+from relatorios.cache import CacheRelatorios
+from relatorios.exportacao import exportar_zip, meses_entre, montar_itens
+from relatorios.jobs import enfileirar_relatorio, get_executor, FilaRelatoriosCheiaError
+from relatorios.models import RelatorioJob
 from relatorios.types import RelatorioAcesso, RelatorioGrupo
 
 
+logger = logging.getLogger(__name__)
+
+
 class BaseReportView(LoginRequiredMixin, ContextoEmpresaMixin, View):
     """
     View base para gerar e retornar um relatório em PDF.
-    Subclasses devem implementar o método `generate_pdf`.
+    Subclasses devem implementar o método `get_relatorio` (com cache em disco
+    do PDF gerado) ou, para relatórios fora de BaseRelatorio, `generate_pdf`.
     """
     filename_prefix = 'relatorio'
 
@@ -23,6 +45,13 @@ class BaseReportView(LoginRequiredMixin, ContextoEmpresaMixin, View):
         timestamp = datetime.now().strftime('%Y-%m-%d_%Hh%Mm%Ss')
         return f'{self.filename_prefix} ({timestamp}).pdf'
 
+    def get_relatorio(self) -> BaseRelatorio | None:
+        """
+        Hook que retorna a instância de relatório a ser gerada.
+        Quando implementado, o PDF é servido pelo cache de relatórios.
+        """
+        return None
+
     def generate_pdf(self, *args, **kwargs) -> bytes:
         """
         Hook para implementação de geração do PDF.
@@ -30,18 +59,48 @@ class BaseReportView(LoginRequiredMixin, ContextoEmpresaMixin, View):
         - Returns:
             Este método precisa retornar os bytes do arquivo PDF.
         """
-        raise NotImplementedError(
-            "Subclasses de BaseReportView devem implementar o método \'generate_pdf\'."
-        )
+        relatorio = self.get_relatorio()
+        if relatorio is None:
+            raise NotImplementedError(
+                "Subclasses de BaseReportView devem implementar o método \'get_relatorio\' ou \'generate_pdf\'."
+            )
+        return relatorio.gerar_pdf()
 
-    def get(self, request, *args, **kwargs):
-        pdf_bytes = self.generate_pdf(request)
-        response = HttpResponse(pdf_bytes, content_type='application/pdf')
+    def get_pdf_response(self, response: HttpResponse) -> HttpResponse:
         response['Content-Disposition'] = f'inline; filename="{self.get_file_report_name()}"'
         return response
 
+    def get(self, request, *args, **kwargs):
+        relatorio = self.get_relatorio()
+        if relatorio is None:
+            pdf_bytes = self.generate_pdf(request)
+            return self.get_pdf_response(HttpResponse(pdf_bytes, content_type='application/pdf'))
+
+        cache = CacheRelatorios()
+        chave = cache.gerar_chave(relatorio)
+        etag = quote_etag(chave)
+
+        # o navegador já tem esta versão do PDF
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        caminho = cache.obter(chave)
+        if caminho is None:
+            # renderizado direto em disco e entregue em blocos a partir do arquivo
+            caminho = cache.gerar(chave, relatorio.salvar_pdf)
+
+        response = FileResponse(open(caminho, 'rb'), content_type='application/pdf')
+        response['ETag'] = etag
+        # sempre revalidar: a chave muda assim que os dados do mês mudam
+        patch_cache_control(response, private=True, no_cache=True)
+        return self.get_pdf_response(response)
+
 
 class BaseReportMensalView(BaseReportView):
+    relatorio_class: type[BaseRelatorio] | None = None
+
     def get_params_from_request(self):
         # Get year and month from GET parameters, defaulting to current year/month
         try:
@@ -52,11 +111,24 @@ class BaseReportMensalView(BaseReportView):
         except ValueError:
             raise Exception("Valores de ano e mês inseridos na geração de PDF não são válidos.")
 
+    def get_relatorio(self) -> BaseRelatorio | None:
+        if self.relatorio_class is None:
+            return None
+
+        params: dict = self.get_params_from_request()
+        return self.relatorio_class(
+            empresa=self.request.empresa,
+            ano=params['ano'],
+            mes=params['mes'],
+            emissor_nome=BaseRelatorio.get_nome_emissor(self.request.user, self.request.empresa)
+        )
+
 
 #* Especializados: page, relatórios
 
 class SelecaoRelatoriosView(LoginRequiredMixin, ContextoEmpresaMixin, BasePageView):
     template_name = 'relatorios/selecao-relatorios.html'
+    limite_jobs = 10
 
     def get_ano_mes(self) -> tuple[int, int]:
         """Retorna ano e mês da query params, ou defaults atuais."""
@@ -89,7 +161,8 @@ class SelecaoRelatoriosView(LoginRequiredMixin, ContextoEmpresaMixin, BasePageVi
                 url_completo = f"{reverse_lazy(f'relatorios:{url.name}')}?{query_string}"
                 relatorios.append(RelatorioAcesso(
                     nome=(nome_mostrado or url.name).replace("_", " ").title(),
-                    url=url_completo
+                    url=url_completo,
+                    tipo=url.name if url.name in RELATORIOS_REGISTRADOS else None
                 ))
         return relatorios
 
@@ -106,6 +179,15 @@ class SelecaoRelatoriosView(LoginRequiredMixin, ContextoEmpresaMixin, BasePageVi
         contexto["relatorios_grupos"] = [
             RelatorioGrupo(nome="Relatórios Mensais", relatorios=relatorios)
         ]
+        contexto["exportacao_empresas"] = Empresa.objects.filter(user=self.request.user, ativo=True).order_by('nome_fantasia')
+        contexto["exportacao_tipos"] = [
+            (relatorio.tipo, relatorio.nome) for relatorio in relatorios if relatorio.tipo
+        ]
+        contexto["relatorio_jobs"] = (
+            RelatorioJob.objects
+            .filter(empresa=self.request.empresa)
+            .order_by('-data_criado')[:self.limite_jobs]
+        )
         return contexto
 
 
@@ -115,15 +197,7 @@ class RelatorioAtividadeMensalView(BaseReportMensalView):
     faturamentos, e trabalhadores notaveis.
     """
     filename_prefix = 'relatorio_agendamentos_mensal'
-
-    def generate_pdf(self, *args, **kwargs) -> bytes:
-        params: dict = self.get_params_from_request()
-        relatorio = RelatorioAtividadeMensal(
-            request=self.request,
-            ano=params['ano'],
-            mes=params['mes']
-        )
-        return relatorio.gerar_pdf()
+    relatorio_class = RelatorioAtividadeMensal
 
 
 class RelatorioClientesMensalView(BaseReportMensalView):
@@ -132,12 +206,137 @@ class RelatorioClientesMensalView(BaseReportMensalView):
     faturamentos, e trabalhadores notaveis.
     """
     filename_prefix = 'relatorio_clientes_mensal'
+    relatorio_class = RelatorioClientesMensal
 
-    def generate_pdf(self, *args, **kwargs) -> bytes:
-        params: dict = self.get_params_from_request()
-        relatorio = RelatorioClientesMensal(
-            request=self.request,
-            ano=params['ano'],
-            mes=params['mes']
+
+#* Geração assíncrona (relatorios.jobs)
+
+class RelatorioJobMixin(LoginRequiredMixin, ContextoEmpresaMixin):
+    def get_job(self, pk: int) -> RelatorioJob:
+        return get_object_or_404(RelatorioJob, pk=pk, empresa=self.request.empresa)
+
+    @staticmethod
+    def serializar_job(job: RelatorioJob) -> dict:
+        return {
+            'id': job.pk,
+            'tipo': job.tipo,
+            'tipo_display': job.get_tipo_display(),
+            'ano': job.ano,
+            'mes': job.mes,
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'em_andamento': job.em_andamento,
+            'erro': job.erro,
+            'url_status': reverse('relatorios:job-status', args=[job.pk]),
+            'url_download': reverse('relatorios:job-download', args=[job.pk]) if job.finalizado else None,
+        }
+
+
+class RelatorioJobCreateView(RelatorioJobMixin, View):
+    """Enfileira a geração de um relatório; POST com 'tipo', 'ano' e 'mes'."""
+    def post(self, request, *args, **kwargs):
+        tipo = request.POST.get('tipo')
+        if tipo not in RELATORIOS_REGISTRADOS:
+            return JsonResponse({'erro': "Tipo de relatório inválido."}, status=400)
+
+        try:
+            ano = int(request.POST.get('ano', datetime.now().year))
+            mes = int(request.POST.get('mes', datetime.now().month))
+            datetime(ano, mes, 1)
+        except ValueError:
+            return JsonResponse({'erro': "Valores de ano e mês inseridos na geração de PDF não são válidos."}, status=400)
+
+        try:
+            job = enfileirar_relatorio(
+                empresa=request.empresa,
+                tipo=tipo,
+                ano=ano,
+                mes=mes,
+                emissor_nome=BaseRelatorio.get_nome_emissor(request.user, request.empresa),
+                solicitante=request.user
+            )
+        except FilaRelatoriosCheiaError as e:
+            return JsonResponse({'erro': str(e)}, status=429)
+
+        return JsonResponse(self.serializar_job(job), status=202)
+
+
+class RelatorioJobStatusView(RelatorioJobMixin, View):
+    def get(self, request, pk: int, *args, **kwargs):
+        return JsonResponse(self.serializar_job(self.get_job(pk)))
+
+
+class RelatorioJobDownloadView(RelatorioJobMixin, View):
+    def get(self, request, pk: int, *args, **kwargs):
+        job = self.get_job(pk)
+        if not job.finalizado or not job.arquivo:
+            raise Http404("Relatório ainda não disponível.")
+
+        response = FileResponse(job.arquivo.open('rb'), content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="{job.tipo} ({job.mes:02d}-{job.ano}).pdf"'
+        return response
+
+
+#* Exportação em lote (relatorios.exportacao)
+
+class ExportacaoRelatoriosView(LoginRequiredMixin, View):
+    """
+    Exporta vários relatórios (empresas do usuário x meses x tipos) em um ZIP entregue em streaming.
+    Parâmetros GET: 'empresa' e 'tipo' (múltiplos, padrão: todos), 'inicio' e 'fim' (AAAA-MM).
+    """
+    def get_ano_mes(self, parametro: str, padrao: tuple[int, int]) -> tuple[int, int]:
+        valor = self.request.GET.get(parametro)
+        if not valor:
+            return padrao
+
+        ano, mes = (int(parte) for parte in valor.split('-'))
+        datetime(ano, mes, 1)
+        return ano, mes
+
+    def get(self, request, *args, **kwargs):
+        empresas = Empresa.objects.filter(user=request.user, ativo=True).order_by('pk')
+        try:
+            empresas_ids = [int(empresa_id) for empresa_id in request.GET.getlist('empresa')]
+        except ValueError:
+            return HttpResponseBadRequest("Empresa inválida.")
+        if empresas_ids:
+            empresas = empresas.filter(pk__in=empresas_ids)
+
+        tipos = request.GET.getlist('tipo') or list(RELATORIOS_REGISTRADOS)
+        if any(tipo not in RELATORIOS_REGISTRADOS for tipo in tipos):
+            return HttpResponseBadRequest("Tipo de relatório inválido.")
+
+        agora = datetime.now()
+        try:
+            inicio = self.get_ano_mes('inicio', (agora.year, agora.month))
+            fim = self.get_ano_mes('fim', inicio)
+        except ValueError:
+            return HttpResponseBadRequest("Valores de ano e mês inseridos na exportação não são válidos.")
+
+        itens = montar_itens(
+            empresas, tipos, meses_entre(inicio, fim),
+            emissor=lambda empresa: BaseRelatorio.get_nome_emissor(request.user, empresa)
         )
-        return relatorio.gerar_pdf()
+        if not itens:
+            return HttpResponseBadRequest("Nenhum relatório selecionado para exportação.")
+        if len(itens) > settings.RELATORIOS_EXPORTACAO_MAX_ITENS:
+            return HttpResponseBadRequest(
+                f"Exportação muito grande ({len(itens)} relatórios), o limite é {settings.RELATORIOS_EXPORTACAO_MAX_ITENS}."
+            )
+
+        def ao_progredir(progresso, item, erro):
+            logger.info("Exportação de %s: %s", request.user, progresso)
+
+        response = StreamingHttpResponse(
+            exportar_zip(
+                itens,
+                get_executor(),
+                ao_progredir=ao_progredir,
+                # abaixo do tamanho do pool: sempre sobra processo para os jobs enfileirados pelas páginas
+                em_voo=max(min(settings.RELATORIOS_EXPORTACAO_EM_VOO, settings.RELATORIOS_JOBS_MAX_PROCESSOS - 1), 1)
+            ),
+            content_type='application/zip'
+        )
+        nome = f"relatorios_{inicio[0]}-{inicio[1]:02d}_{fim[0]}-{fim[1]:02d}.zip"
+        response['Content-Disposition'] = f'attachment; filename="{nome}"'
+        return response
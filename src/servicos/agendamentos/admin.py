@@ -1,10 +1,52 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
 from cadastros.empresas.admin import BaseAssociadoEmpresaAdmin
 from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.transicoes import transicionar_status
+from servicos.agendamentos.choices import (
+    AGENDAMENTO_STATUS_PENDENTE,
+    AGENDAMENTO_STATUS_EXECUTANDO,
+    AGENDAMENTO_STATUS_FINALIZADO,
+    AGENDAMENTO_STATUS_CANCELADO,
+    TRANSICAO_ATUALIZADO
+)
+
+
+def acao_transicao_status(status: str, descricao: str):
+    """Ação do admin que leva os agendamentos selecionados para 'status' (um UPDATE por empresa)."""
+    @admin.action(description=descricao)
+    def transicionar(modeladmin, request, queryset):
+        ids_por_empresa: dict[int, list[int]] = {}
+        for pk, empresa_id in queryset.values_list('pk', 'empresa_id'):
+            ids_por_empresa.setdefault(empresa_id, []).append(pk)
+
+        atualizados = ignorados = 0
+        for empresa_id, ids in ids_por_empresa.items():
+            for resultado in transicionar_status(empresa_id, ids, status).values():
+                if resultado == TRANSICAO_ATUALIZADO:
+                    atualizados += 1
+                else:
+                    ignorados += 1
+
+        modeladmin.message_user(request, f"{atualizados} agendamento(s) atualizado(s).", messages.SUCCESS)
+        if ignorados:
+            modeladmin.message_user(
+                request, f"{ignorados} agendamento(s) ignorado(s): status atual não permite a mudança ou inativo.",
+                messages.WARNING
+            )
+
+    transicionar.__name__ = f"transicionar_para_{status.lower()}"
+    return transicionar
+
 
 @admin.register(Agendamento)
 class AgendamentoAdmin(BaseAssociadoEmpresaAdmin):
+    actions = [
+        acao_transicao_status(AGENDAMENTO_STATUS_FINALIZADO, "Finalizar agendamentos selecionados"),
+        acao_transicao_status(AGENDAMENTO_STATUS_CANCELADO, "Cancelar agendamentos selecionados"),
+        acao_transicao_status(AGENDAMENTO_STATUS_EXECUTANDO, "Iniciar agendamentos selecionados"),
+        acao_transicao_status(AGENDAMENTO_STATUS_PENDENTE, "Voltar agendamentos selecionados para pendente"),
+    ]
     list_filter = "status", 
     raw_id_fields = "cliente", "servico", "trabalhador", "empresa"
     search_fields = "status", #! is getting only by enum values, not get_display
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AgendamentosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'servicos.agendamentos'
+
+    def ready(self):
+        from servicos.agendamentos import signals # noqa: F401 (registra os receivers)
@@ -9,4 +9,25 @@ C_TIPO_STATUS_AGENDAMENTO = (
     (AGENDAMENTO_STATUS_EXECUTANDO, "Executando"),
     (AGENDAMENTO_STATUS_FINALIZADO, "Finalizado"),
     (AGENDAMENTO_STATUS_CANCELADO, "Cancelado"),
-)
\ No newline at end of file
+)
+
+# Status de origem permitidos para cada status de destino (transições em lote, ver servicos.agendamentos.transicoes)
+TRANSICOES_STATUS = {
+    AGENDAMENTO_STATUS_PENDENTE: (AGENDAMENTO_STATUS_EXECUTANDO, AGENDAMENTO_STATUS_CANCELADO),
+    AGENDAMENTO_STATUS_EXECUTANDO: (AGENDAMENTO_STATUS_PENDENTE, AGENDAMENTO_STATUS_FINALIZADO),
+    AGENDAMENTO_STATUS_FINALIZADO: (AGENDAMENTO_STATUS_PENDENTE, AGENDAMENTO_STATUS_EXECUTANDO),
+    AGENDAMENTO_STATUS_CANCELADO: (AGENDAMENTO_STATUS_PENDENTE, AGENDAMENTO_STATUS_EXECUTANDO),
+}
+
+# Resultado de cada agendamento em uma transição em lote
+TRANSICAO_ATUALIZADO = 'atualizado'
+TRANSICAO_STATUS_INVALIDO = 'status_invalido' # status atual não permite a transição
+TRANSICAO_NAO_ENCONTRADO = 'nao_encontrado' # de outra empresa, inativo ou inexistente
+
+# Colunas da planilha diária (e das atualizações em tempo real), por status
+COLUNAS_PLANILHA = {
+    AGENDAMENTO_STATUS_PENDENTE: "pendente",
+    AGENDAMENTO_STATUS_EXECUTANDO: "executando",
+    AGENDAMENTO_STATUS_FINALIZADO: "finalizado",
+    AGENDAMENTO_STATUS_CANCELADO: "cancelado",
+}
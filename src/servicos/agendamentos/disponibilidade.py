@@ -0,0 +1,129 @@
+"""
+Disponibilidade dos trabalhadores: conflitos de horário e horários livres.
+
+Cada agendamento ocupa [data_agendado, data_agendado + duração do serviço).
+AgendaTrabalhadores carrega os agendamentos de um período em uma consulta e guarda,
+por trabalhador, os intervalos em ordem de início com o maior fim acumulado até cada
+um. Um conflito é uma busca binária pelo fim do horário pedido, voltando só enquanto
+algum intervalo anterior ainda pode terminar depois do início; os horários livres
+saem de uma varredura dos intervalos do período. Nada volta ao banco depois do carregamento.
+Agendamentos cancelados ou inativos não ocupam a agenda.
+"""
+from bisect import bisect_left
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from cadastros.trabalhadores.models import Trabalhador
+from servicos.tipo_servicos.models import TipoServico, DURACAO_MAXIMA_MINUTOS
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.types import HorarioLivre, IntervaloAgenda
+from servicos.agendamentos.choices import AGENDAMENTO_STATUS_CANCELADO
+
+
+# agendamentos que começam até esse tempo antes do período ainda podem ocupá-lo
+DURACAO_MAXIMA = timedelta(minutes=DURACAO_MAXIMA_MINUTOS)
+
+
+class AgendaTrabalhador:
+    """Intervalos ocupados de um trabalhador, indexados pelo início."""
+    def __init__(self, intervalos: Iterable[IntervaloAgenda] = ()):
+        self.intervalos = sorted(intervalos, key=lambda intervalo: intervalo.inicio)
+        self.inicios = [intervalo.inicio for intervalo in self.intervalos]
+        # maior fim entre os intervalos até cada posição: para de voltar quando nenhum anterior alcança o início
+        self.fins_acumulados = list(accumulate((intervalo.fim for intervalo in self.intervalos), max))
+
+    def conflitos(self, inicio: datetime, fim: datetime, ignorar: int | None = None) -> list[IntervaloAgenda]:
+        """Intervalos que se sobrepõem a [inicio, fim), exceto o do agendamento 'ignorar' (edição)."""
+        conflitos = []
+        for posicao in range(bisect_left(self.inicios, fim) - 1, -1, -1):
+            if self.fins_acumulados[posicao] <= inicio:
+                break
+            intervalo = self.intervalos[posicao]
+            if intervalo.fim > inicio and intervalo.agendamento_id != ignorar:
+                conflitos.append(intervalo)
+        conflitos.reverse()
+        return conflitos
+
+    def livres(self, inicio: datetime, fim: datetime, duracao: timedelta) -> list[tuple[datetime, datetime]]:
+        """Intervalos livres entre 'inicio' e 'fim' com pelo menos 'duracao'."""
+        livres = []
+        posicao = bisect_left(self.inicios, inicio)
+        cursor = max(inicio, self.fins_acumulados[posicao - 1]) if posicao else inicio
+        for intervalo in self.intervalos[posicao:]:
+            if intervalo.inicio >= fim:
+                break
+            if intervalo.inicio - cursor >= duracao:
+                livres.append((cursor, intervalo.inicio))
+            cursor = max(cursor, intervalo.fim)
+        if fim - cursor >= duracao:
+            livres.append((cursor, fim))
+        return livres
+
+
+class AgendaTrabalhadores:
+    """Agendas dos trabalhadores de uma empresa em um período [inicio, fim), carregadas em uma consulta."""
+    def __init__(self, inicio: datetime, fim: datetime, agendas: dict[int, AgendaTrabalhador]):
+        self.inicio = inicio
+        self.fim = fim
+        self.agendas = agendas
+
+    @classmethod
+    def carregar(cls, empresa_id: int, inicio: datetime, fim: datetime,
+                 trabalhadores: Iterable[int] | None = None) -> "AgendaTrabalhadores":
+        agendamentos = Agendamento.objects.filter(
+            empresa_id=empresa_id,
+            ativo=True,
+            data_agendado__gte=inicio - DURACAO_MAXIMA,
+            data_agendado__lt=fim
+        ).exclude(status=AGENDAMENTO_STATUS_CANCELADO)
+        if trabalhadores is not None:
+            agendamentos = agendamentos.filter(trabalhador_id__in=list(trabalhadores))
+
+        intervalos: dict[int, list[IntervaloAgenda]] = {}
+        for pk, trabalhador_id, data_agendado, duracao in agendamentos.values_list(
+            'pk', 'trabalhador_id', 'data_agendado', 'servico__duracao'
+        ).order_by():
+            intervalos.setdefault(trabalhador_id, []).append(
+                IntervaloAgenda(pk, data_agendado, data_agendado + timedelta(minutes=duracao))
+            )
+
+        return cls(inicio, fim, {
+            trabalhador_id: AgendaTrabalhador(intervalos_trabalhador)
+            for trabalhador_id, intervalos_trabalhador in intervalos.items()
+        })
+
+    def _verificar_periodo(self, inicio: datetime, fim: datetime) -> None:
+        if inicio < self.inicio or fim > self.fim:
+            raise ValueError(f"Horário fora do período carregado ({self.inicio} a {self.fim}).")
+
+    def agenda(self, trabalhador_id: int) -> AgendaTrabalhador:
+        return self.agendas.get(trabalhador_id) or AgendaTrabalhador()
+
+    def conflitos(self, trabalhador_id: int, inicio: datetime, fim: datetime,
+                  ignorar: int | None = None) -> list[IntervaloAgenda]:
+        self._verificar_periodo(inicio, fim)
+        return self.agenda(trabalhador_id).conflitos(inicio, fim, ignorar)
+
+    def horarios_livres(self, duracao: timedelta, trabalhadores: Iterable[int],
+                        inicio: datetime | None = None, fim: datetime | None = None) -> list[HorarioLivre]:
+        """Horários livres com pelo menos 'duracao', por trabalhador e em ordem de início."""
+        inicio, fim = inicio or self.inicio, fim or self.fim
+        self._verificar_periodo(inicio, fim)
+        horarios = [
+            HorarioLivre(trabalhador_id, inicio_livre, fim_livre)
+            for trabalhador_id in trabalhadores
+            for inicio_livre, fim_livre in self.agenda(trabalhador_id).livres(inicio, fim, duracao)
+        ]
+        return sorted(horarios, key=lambda horario: (horario.inicio, horario.trabalhador_id))
+
+
+def horarios_livres_servico(empresa_id: int, servico: TipoServico, inicio: datetime, fim: datetime,
+                            trabalhadores: Iterable[int] | None = None) -> list[HorarioLivre]:
+    """Horários entre 'inicio' e 'fim' em que cabe 'servico', de cada trabalhador (padrão: os ativos da empresa)."""
+    if trabalhadores is None:
+        trabalhadores = Trabalhador.objects.filter(empresa_id=empresa_id, ativo=True).values_list('pk', flat=True)
+    trabalhadores = list(trabalhadores)
+
+    agenda = AgendaTrabalhadores.carregar(empresa_id, inicio, fim, trabalhadores)
+    return agenda.horarios_livres(servico.duracao_timedelta, trabalhadores)
@@ -1,12 +1,22 @@
 from django import forms
+from django.utils import timezone
 
+from core.helpers import PeriodoHelper
 from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.disponibilidade import AgendaTrabalhadores
+from servicos.agendamentos.choices import AGENDAMENTO_STATUS_CANCELADO
 from cadastros.clientes.models import Cliente
 from cadastros.trabalhadores.models import Trabalhador
 from servicos.tipo_servicos.models import TipoServico
 
 
+def _horario(momento) -> str:
+    return timezone.localtime(momento).strftime("%H:%M")
+
+
 class AgendamentoForm(forms.ModelForm):
+    maximo_sugestoes = 3
+
     class Meta:
         model = Agendamento
         fields = ['data_agendado', 'status', 'cliente', 'servico', 'trabalhador']
@@ -22,6 +32,8 @@ class AgendamentoForm(forms.ModelForm):
         empresa = kwargs.pop("empresa", None)  # remove do kwargs antes do super() falhar
         
         super().__init__(*args, **kwargs)     
+        self.empresa = empresa
+        self.horarios_sugeridos: list[str] = []
         
         fields_models = {
             "cliente": Cliente,
@@ -39,3 +51,40 @@ class AgendamentoForm(forms.ModelForm):
                 )
         else:
             raise Exception(f"Erro no form {self.__class__.__name__}, empresa não está na sessão.")
+
+    def clean(self):
+        cleaned_data = super().clean()
+
+        data_agendado = cleaned_data.get("data_agendado")
+        servico = cleaned_data.get("servico")
+        trabalhador = cleaned_data.get("trabalhador")
+        if data_agendado and servico and trabalhador and cleaned_data.get("status") != AGENDAMENTO_STATUS_CANCELADO:
+            self.verificar_disponibilidade(data_agendado, servico, trabalhador)
+
+        return cleaned_data
+
+    def verificar_disponibilidade(self, inicio, servico, trabalhador):
+        """Recusa horários que se sobrepõem a outro agendamento do trabalhador, sugerindo horários livres do dia."""
+        fim = inicio + servico.duracao_timedelta
+        dia = PeriodoHelper.dia(timezone.localdate(inicio))
+        # todos os trabalhadores do dia em uma consulta: conflito e sugestões sem voltar ao banco
+        agenda = AgendaTrabalhadores.carregar(self.empresa.pk, min(dia.inicio, inicio), max(dia.fim, fim))
+
+        conflitos = agenda.conflitos(trabalhador.pk, inicio, fim, ignorar=self.instance.pk)
+        if not conflitos:
+            return
+
+        ocupado = ", ".join(f"{_horario(conflito.inicio)} às {_horario(conflito.fim)}" for conflito in conflitos)
+        self.add_error(
+            "data_agendado",
+            f"{trabalhador.nome} já tem agendamento neste horário ({ocupado})."
+        )
+
+        # próximos horários livres do mesmo trabalhador no dia, e quem está livre no horário pedido
+        for livre in agenda.horarios_livres(servico.duracao_timedelta, [trabalhador.pk], inicio, dia.fim)[:self.maximo_sugestoes]:
+            # o fim do dia é a meia-noite seguinte: "até 00:00" pareceria outro dia
+            ate = "o fim do dia" if livre.fim >= dia.fim else _horario(livre.fim)
+            self.horarios_sugeridos.append(f"{trabalhador.nome}: a partir das {_horario(livre.inicio)} (livre até {ate})")
+        for outro in self.fields["trabalhador"].queryset.exclude(pk=trabalhador.pk):
+            if not agenda.conflitos(outro.pk, inicio, fim):
+                self.horarios_sugeridos.append(f"{outro.nome}: livre às {_horario(inicio)}")
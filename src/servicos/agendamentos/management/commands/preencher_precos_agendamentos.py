@@ -0,0 +1,26 @@
+"""
+Preenche Agendamento.preco com o preço atual do serviço nos agendamentos gravados antes do campo existir.
+
+Em um banco criado antes do campo, a coluna não pode nascer NOT NULL (o makemigrations pediria
+um valor único para todas as linhas):
+    1. declarar 'preco' com null=True, 'manage.py makemigrations agendamentos' e 'migrate';
+    2. 'manage.py preencher_precos_agendamentos';
+    3. voltar a null=False, 'makemigrations agendamentos' (opção "Ignore for now": não há mais
+       linhas nulas) e 'migrate'.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import OuterRef, Subquery
+
+from servicos.agendamentos.models import Agendamento
+from servicos.tipo_servicos.models import TipoServico
+
+
+class Command(BaseCommand):
+    help = "Preenche o preço dos agendamentos sem preço com o preço atual do serviço"
+
+    def handle(self, *args, **kwargs):
+        # UPDATE único, sem sinais: os resumos já usavam o preço atual do serviço para estes agendamentos
+        total = Agendamento.objects.filter(preco__isnull=True).update(
+            preco=Subquery(TipoServico.objects.filter(pk=OuterRef('servico_id')).values('preco')[:1])
+        )
+        self.stdout.write(self.style.SUCCESS(f"{total} agendamentos com o preço preenchido."))
@@ -1,5 +1,6 @@
 from django.db.models import Q
 
+from core.busca import filtrar_busca
 from core.bases.mixins import BaseViewComTableOptionsMixin
 
 class AgendamentosSearchMixin:
@@ -12,8 +13,10 @@ class AgendamentosSearchMixin:
             condicao_servico = Q(servico__nome__icontains=query)
             condicao_trabalhador = Q(trabalhador__nome__icontains=query)
 
-            queryset = queryset.filter(
-                condicao_cliente | condicao_servico | condicao_trabalhador
+            empresa = getattr(self.request, 'empresa', None)
+            queryset = filtrar_busca(
+                queryset, query, empresa and empresa.id,
+                alternativa=condicao_cliente | condicao_servico | condicao_trabalhador
             )
 
         data_inicio, data_fim = self.get_query_range_dates()
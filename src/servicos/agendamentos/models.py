@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 from servicos.models import BaseServicosModel
 from servicos.agendamentos.choices import C_TIPO_STATUS_AGENDAMENTO, AGENDAMENTO_STATUS_PENDENTE
@@ -18,6 +18,13 @@ class Agendamento(BaseServicosModel):
         null=False,
         blank=False
     )
+    # preço do serviço no momento da marcação: resumos e faturamento não mudam quando o TipoServico é reajustado
+    preco = models.DecimalField(
+        verbose_name="Preço",
+        max_digits=12,
+        decimal_places=2,
+        editable=False
+    )
 
     #FKs
     cliente = models.ForeignKey(
@@ -44,3 +51,29 @@ class Agendamento(BaseServicosModel):
 
     def __str__(self):
         return f"{self.cliente.nome}, {self.servico.nome} at {self.data_agendado.date()}"
+
+    def save(self, *args, **kwargs):
+        if self.preco is None:
+            self.preco = self.servico.preco
+
+        # dados derivados (ver signals.agendamento_alterado) são gravados na mesma transação
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+    class Meta(BaseServicosModel.Meta):
+        indexes = BaseServicosModel.Meta.indexes + [
+            # faixas de data por empresa (relatórios, rollups): ver core.helpers.PeriodoHelper
+            models.Index(fields=['empresa', 'data_agendado'], name='agendamento_empresa_data_idx'),
+            # agendamentos ativos por status em uma faixa de datas (planilha, home)
+            models.Index(
+                fields=['empresa', 'status', 'data_agendado'],
+                condition=models.Q(ativo=True),
+                name='agendamento_status_data_idx'
+            ),
+            # agenda de cada trabalhador (status dos trabalhadores, ocupação)
+            models.Index(fields=['trabalhador', 'status', 'data_agendado'], name='agendamento_trab_status_idx'),
+        ]
@@ -0,0 +1,263 @@
+"""
+Cards da planilha diária de agendamentos.
+
+Os agendamentos do dia são buscados em uma consulta, só com as colunas exibidas
+(values() com os nomes de cliente, serviço e trabalhador), e separados por status
+em Python. Cada card já leva as URLs das suas ações, e o template não resolve URLs
+nem acessa relacionamentos.
+
+Os cards de cada dia ficam no cache padrão (compartilhado pelos processos, ver
+settings.CACHES), por empresa e dia, com uma versão por dia (trocada quando um
+agendamento daquele dia muda) e uma por empresa (trocada quando clientes, serviços
+ou trabalhadores mudam): ver core.signals. Depois de servir um dia,
+a view preaquece o anterior e o seguinte em uma thread, e a navegação entre os dias
+não consulta o banco.
+
+A planilha por período (semana ou intervalo escolhido) busca todos os dias em uma
+consulta pela faixa de datas e monta a grade (trabalhador x dia, cards por status)
+em memória.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.urls import reverse
+
+from core.helpers import PeriodoHelper
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.types import (
+    AcaoCard,
+    CardAgendamento,
+    GradePlanilha,
+    LinhaGradePlanilha,
+    TotalDiaPlanilha
+)
+from servicos.agendamentos.choices import (
+    AGENDAMENTO_STATUS_PENDENTE,
+    AGENDAMENTO_STATUS_EXECUTANDO,
+    AGENDAMENTO_STATUS_FINALIZADO,
+    AGENDAMENTO_STATUS_CANCELADO,
+    COLUNAS_PLANILHA
+)
+
+
+logger = logging.getLogger(__name__)
+
+URL_VOLTAR_STATUS = 'servicos:agendamentos:last-status'
+URL_AVANCAR_STATUS = 'servicos:agendamentos:next-status'
+
+# (status em que a ação aparece, url, atributos do botão), na ordem de exibição
+ACOES_CARD: tuple[tuple[tuple[str, ...], str, dict], ...] = (
+    (
+        (AGENDAMENTO_STATUS_EXECUTANDO, AGENDAMENTO_STATUS_FINALIZADO),
+        URL_VOLTAR_STATUS,
+        {'size': "small", 'status_update': "previous", 'button_class': "revert", 'fa_icon': "chevron-left"}
+    ),
+    (
+        (AGENDAMENTO_STATUS_PENDENTE, AGENDAMENTO_STATUS_EXECUTANDO),
+        URL_AVANCAR_STATUS,
+        {'button_class': "next", 'fa_icon': "chevron-right", 'button_text': "Avançar"}
+    ),
+    (
+        (AGENDAMENTO_STATUS_PENDENTE, AGENDAMENTO_STATUS_EXECUTANDO),
+        URL_AVANCAR_STATUS,
+        {'size': "small", 'status_update': AGENDAMENTO_STATUS_CANCELADO, 'button_class': "cancel", 'fa_icon': "circle-xmark"}
+    ),
+    (
+        (AGENDAMENTO_STATUS_CANCELADO,),
+        URL_AVANCAR_STATUS,
+        {
+            'size': "medium", 'status_update': AGENDAMENTO_STATUS_PENDENTE, 'button_class': "voltar-pendente",
+            'fa_icon': "rotate-left", 'button_text': "Pendente"
+        }
+    ),
+)
+
+CAMPOS_CARD = (
+    'pk', 'status', 'data_agendado', 'cliente__nome', 'servico__nome', 'preco', 'trabalhador__nome'
+)
+
+
+def agendamentos_visiveis(empresa_id: int):
+    """Agendamentos que aparecem na planilha: ativos, de clientes ativos."""
+    return Agendamento.objects.filter(empresa_id=empresa_id, ativo=True, cliente__ativo=True)
+
+
+def montar_card(linha: dict) -> CardAgendamento:
+    pk, status = linha['pk'], linha['status']
+    return CardAgendamento(
+        pk=pk,
+        status=status,
+        data_agendado=linha['data_agendado'],
+        cliente=linha['cliente__nome'],
+        servico=linha['servico__nome'],
+        preco=linha['preco'],
+        trabalhador=linha['trabalhador__nome'],
+        acoes=tuple(
+            AcaoCard(url=reverse(url, args=[pk]), **atributos)
+            for status_acao, url, atributos in ACOES_CARD
+            if status in status_acao
+        )
+    )
+
+
+def calcular_cards_do_dia(empresa_id: int, dia: date) -> dict[str, list[CardAgendamento]]:
+    """Cards do dia por coluna da planilha (COLUNAS_PLANILHA), em ordem de horário."""
+    colunas: dict[str, list[CardAgendamento]] = {coluna: [] for coluna in COLUNAS_PLANILHA.values()}
+    linhas = agendamentos_visiveis(empresa_id).filter(
+        PeriodoHelper.dia(dia).filtro('data_agendado')
+    ).order_by('data_agendado').values(*CAMPOS_CARD)
+
+    for linha in linhas:
+        coluna = COLUNAS_PLANILHA.get(linha['status'])
+        if coluna is not None:
+            colunas[coluna].append(montar_card(linha))
+    return colunas
+
+
+def card_agendamento(empresa_id: int, pk: int) -> CardAgendamento | None:
+    linha = agendamentos_visiveis(empresa_id).filter(pk=pk).values(*CAMPOS_CARD).first()
+    return montar_card(linha) if linha else None
+
+
+def grade_do_periodo(empresa_id: int, inicio: date, fim: date) -> GradePlanilha:
+    """
+    Grade de 'inicio' a 'fim' (inclusivos): uma linha por trabalhador com agendamentos no
+    período (em ordem de nome), uma célula por dia, e os totais de cada dia por coluna.
+    """
+    dias = tuple(inicio + timedelta(days=n) for n in range((fim - inicio).days + 1))
+    indice_dia = {dia: indice for indice, dia in enumerate(dias)}
+    colunas = tuple(COLUNAS_PLANILHA.values())
+
+    totais = [dict.fromkeys(colunas, 0) for _ in dias]
+    celulas: dict[int, list[dict[str, list[CardAgendamento]]]] = {}
+    nomes: dict[int, str] = {}
+
+    linhas = agendamentos_visiveis(empresa_id).filter(
+        PeriodoHelper.dias(inicio, fim).filtro('data_agendado')
+    ).order_by('data_agendado').values('trabalhador_id', *CAMPOS_CARD)
+
+    for linha in linhas:
+        coluna = COLUNAS_PLANILHA.get(linha['status'])
+        if coluna is None:
+            continue
+        card = montar_card(linha)
+        indice = indice_dia[card.horario.date()]
+        trabalhador_id = linha['trabalhador_id']
+        if trabalhador_id not in celulas:
+            celulas[trabalhador_id] = [{coluna: [] for coluna in colunas} for _ in dias]
+            nomes[trabalhador_id] = card.trabalhador
+
+        celulas[trabalhador_id][indice][coluna].append(card)
+        totais[indice][coluna] += 1
+
+    return GradePlanilha(
+        dias=tuple(TotalDiaPlanilha(dia=dia, por_coluna=totais[indice]) for indice, dia in enumerate(dias)),
+        linhas=tuple(sorted(
+            (LinhaGradePlanilha(trabalhador=nomes[trabalhador_id], celulas=tuple(celulas_trabalhador))
+             for trabalhador_id, celulas_trabalhador in celulas.items()),
+            key=lambda linha: linha.trabalhador.casefold()
+        ))
+    )
+
+
+#* Cache
+
+def _chave_versao_empresa(empresa_id: int) -> str:
+    return f"planilha:{empresa_id}:versao"
+
+
+def _chave_versao_dia(empresa_id: int, dia: date) -> str:
+    return f"planilha:{empresa_id}:{dia.isoformat()}:versao"
+
+
+def invalidar_dias(empresa_id: int, dias) -> None:
+    """Nova versão para os dias: os cards já guardados (ou sendo calculados agora) não são mais lidos."""
+    agora = time.time_ns()
+    cache.set_many({_chave_versao_dia(empresa_id, dia): agora for dia in dias}, timeout=None)
+
+
+def invalidar_empresa(empresa_id: int) -> None:
+    """Nova versão para todos os dias da empresa (nomes, preços ou clientes inativados)."""
+    cache.set(_chave_versao_empresa(empresa_id), time.time_ns(), timeout=None)
+
+
+def _chave_cards(empresa_id: int, dia: date) -> str:
+    chave_empresa, chave_dia = _chave_versao_empresa(empresa_id), _chave_versao_dia(empresa_id, dia)
+    versoes = cache.get_many([chave_empresa, chave_dia])
+    faltando = {chave: time.time_ns() for chave in (chave_empresa, chave_dia) if chave not in versoes}
+    if faltando:
+        # add(): outro processo pode ter criado a versão no meio tempo
+        for chave, versao in faltando.items():
+            cache.add(chave, versao, timeout=None)
+        versoes = cache.get_many([chave_empresa, chave_dia])
+    return f"planilha:{empresa_id}:{dia.isoformat()}:{versoes.get(chave_empresa)}:{versoes.get(chave_dia)}"
+
+
+def cards_do_dia(empresa_id: int, dia: date) -> dict[str, list[CardAgendamento]]:
+    """Cards do dia (calcular_cards_do_dia), pelo cache quando a versão do dia não mudou."""
+    chave = _chave_cards(empresa_id, dia)
+    colunas = cache.get(chave)
+    if colunas is None:
+        colunas = calcular_cards_do_dia(empresa_id, dia)
+        cache.set(chave, colunas, timeout=settings.PLANILHA_CACHE_TTL)
+    return colunas
+
+
+#* Preaquecimento dos dias vizinhos
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor | None:
+    """
+    Threads compartilhadas do processo. Com PLANILHA_PREAQUECIMENTO_THREADS = 0 retorna None
+    e os dias vizinhos são calculados no próprio request, após a resposta ser renderizada (testes).
+    """
+    global _executor
+
+    if not settings.PLANILHA_PREAQUECIMENTO_THREADS:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PLANILHA_PREAQUECIMENTO_THREADS, thread_name_prefix="planilha"
+            )
+        return _executor
+
+
+def dias_vizinhos(dia: date) -> tuple[date, date]:
+    return dia - timedelta(days=1), dia + timedelta(days=1)
+
+
+def preaquecer_dias(empresa_id: int, dias) -> None:
+    for dia in dias:
+        cards_do_dia(empresa_id, dia)
+
+
+def _preaquecer_em_thread(empresa_id: int, dias) -> None:
+    close_old_connections()
+    try:
+        preaquecer_dias(empresa_id, dias)
+    except Exception:
+        # só adianta trabalho: a view calcula o dia normalmente se o preaquecimento falhar
+        logger.exception("Falha ao preaquecer a planilha da empresa %s (%s).", empresa_id, dias)
+    finally:
+        close_old_connections()
+
+
+def agendar_preaquecimento(empresa_id: int, dia: date) -> None:
+    """Calcula o dia anterior e o seguinte a 'dia' (se não estiverem no cache) fora do request."""
+    dias = dias_vizinhos(dia)
+    executor = get_executor()
+    if executor is None:
+        preaquecer_dias(empresa_id, dias)
+    else:
+        executor.submit(_preaquecer_em_thread, empresa_id, dias)
@@ -0,0 +1,59 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.types import EstadoAgendamento
+
+
+CAMPOS_ESTADO = ['empresa_id', 'cliente_id', 'servico_id', 'trabalhador_id', 'data_agendado', 'status', 'ativo', 'preco']
+
+# Enviado dentro da transação do save/delete de um Agendamento (e de cada linha das transições em lote).
+# kwargs: instance (None nas transições em lote), anterior (EstadoAgendamento | None), atual (EstadoAgendamento | None)
+agendamento_alterado = Signal()
+
+
+def carregar_estado(pk: int) -> EstadoAgendamento | None:
+    """Estado persistido de um agendamento, em uma query."""
+    valores = Agendamento.objects.filter(pk=pk).values(*CAMPOS_ESTADO).first()
+    if valores is None:
+        return None
+    return EstadoAgendamento(pk=pk, **valores)
+
+
+def carregar_estados(agendamentos) -> list[EstadoAgendamento]:
+    """Estados persistidos dos agendamentos de um queryset, em uma query."""
+    return [EstadoAgendamento(**valores) for valores in agendamentos.values('pk', *CAMPOS_ESTADO)]
+
+
+def estado_da_instancia(instance: Agendamento) -> EstadoAgendamento:
+    return EstadoAgendamento(pk=instance.pk, **{campo: getattr(instance, campo) for campo in CAMPOS_ESTADO})
+
+
+@receiver(pre_save, sender=Agendamento)
+def capturar_estado_anterior(sender, instance: Agendamento, raw=False, **kwargs):
+    if raw or instance._state.adding or instance.pk is None:
+        instance._estado_anterior = None
+    else:
+        instance._estado_anterior = anterior = carregar_estado(instance.pk)
+        if anterior is not None and anterior.servico_id != instance.servico_id:
+            # troca de serviço: o agendamento passa a valer o preço atual do novo serviço
+            instance.preco = instance.servico.preco
+
+
+@receiver(post_save, sender=Agendamento)
+def notificar_agendamento_salvo(sender, instance: Agendamento, raw=False, **kwargs):
+    if raw:
+        return
+
+    anterior = getattr(instance, '_estado_anterior', None)
+    atual = estado_da_instancia(instance)
+    instance._estado_anterior = atual
+
+    if anterior != atual:
+        agendamento_alterado.send(sender=Agendamento, instance=instance, anterior=anterior, atual=atual)
+
+
+@receiver(post_delete, sender=Agendamento)
+def notificar_agendamento_removido(sender, instance: Agendamento, **kwargs):
+    anterior = estado_da_instancia(instance)
+    agendamento_alterado.send(sender=Agendamento, instance=instance, anterior=anterior, atual=None)
@@ -0,0 +1,489 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.helpers import PeriodoHelper
+from core.tests import plano_consulta
+from cadastros.empresas.models import Empresa
+from cadastros.clientes.models import Cliente
+from cadastros.trabalhadores.models import Trabalhador
+from servicos.tipo_servicos.models import TipoServico
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.choices import (
+    AGENDAMENTO_STATUS_CANCELADO,
+    AGENDAMENTO_STATUS_FINALIZADO,
+    COLUNAS_PLANILHA,
+    TRANSICAO_ATUALIZADO,
+    TRANSICAO_STATUS_INVALIDO,
+    TRANSICAO_NAO_ENCONTRADO
+)
+from servicos.agendamentos.disponibilidade import AgendaTrabalhador, AgendaTrabalhadores, horarios_livres_servico
+from servicos.agendamentos.forms import AgendamentoForm
+from servicos.agendamentos import transicoes
+from servicos.agendamentos.transicoes import transicionar_status
+from servicos.agendamentos.types import IntervaloAgenda
+
+
+class PeriodoHelperTestCase(SimpleTestCase):
+    def test_dia_semiaberto_no_fuso_atual(self):
+        inicio, fim = PeriodoHelper.dia(date(2025, 3, 5))
+
+        self.assertEqual(inicio, timezone.make_aware(datetime(2025, 3, 5)))
+        self.assertEqual(fim, timezone.make_aware(datetime(2025, 3, 6)))
+        self.assertIn(timezone.make_aware(datetime(2025, 3, 5, 23, 59, 59)), PeriodoHelper.dia(date(2025, 3, 5)))
+        self.assertNotIn(fim, PeriodoHelper.dia(date(2025, 3, 5)))
+
+    def test_semana_e_mes(self):
+        semana = PeriodoHelper.semana(date(2025, 3, 5))  # quarta-feira
+        self.assertEqual(semana.inicio, timezone.make_aware(datetime(2025, 3, 3)))
+        self.assertEqual(semana.fim, timezone.make_aware(datetime(2025, 3, 10)))
+
+        dezembro = PeriodoHelper.mes(2025, 12)
+        self.assertEqual(dezembro.inicio, timezone.make_aware(datetime(2025, 12, 1)))
+        self.assertEqual(dezembro.fim, timezone.make_aware(datetime(2026, 1, 1)))
+
+        ultimos = PeriodoHelper.ultimos_dias(7, ate=date(2025, 3, 10))
+        self.assertEqual(ultimos.inicio, timezone.make_aware(datetime(2025, 3, 4)))
+        self.assertEqual(ultimos.fim, timezone.make_aware(datetime(2025, 3, 11)))
+
+    def test_parse_data_hora(self):
+        self.assertEqual(
+            PeriodoHelper.parse_data_hora("2025-03-05T14:30"),
+            timezone.make_aware(datetime(2025, 3, 5, 14, 30))
+        )
+        self.assertEqual(PeriodoHelper.parse_data_hora("2025-03-05"), timezone.make_aware(datetime(2025, 3, 5)))
+        self.assertIsNone(PeriodoHelper.parse_data_hora("05/03/2025"))
+        self.assertIsNone(PeriodoHelper.parse_data_hora(""))
+
+
+@override_settings(PLANILHA_PREAQUECIMENTO_THREADS=0) # dias vizinhos preaquecidos no próprio request
+class PlanilhaDiariaTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="dono", password="senha")
+        cls.empresa = Empresa.objects.create(
+            cnpj="11222333000181", nome_fantasia="Salão", razao_social="Salão LTDA", user=cls.user
+        )
+        cliente = Cliente.objects.create(
+            nome="Cliente", cpf="52998224725", telefone="+5511999990000", endereco="Rua A", empresa=cls.empresa
+        )
+        servico = TipoServico.objects.create(nome="Corte", preco=Decimal("50.00"), empresa=cls.empresa)
+        trabalhador = Trabalhador.objects.create(
+            nome="Ana", cpf="11144477735", telefone="+5511988880001", endereco="Rua B", empresa=cls.empresa
+        )
+
+        cls.hoje = hoje = timezone.localdate()
+        for momento in (
+            datetime.combine(hoje, time.min),                 # início do dia
+            datetime.combine(hoje, time(23, 59, 59)),         # fim do dia
+            datetime.combine(hoje + timedelta(days=1), time.min),  # dia seguinte
+        ):
+            Agendamento.objects.create(
+                data_agendado=timezone.make_aware(momento), cliente=cliente, servico=servico,
+                trabalhador=trabalhador, empresa=cls.empresa
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['empresa_id'] = self.empresa.id
+        session.save()
+
+    def test_planilha_lista_apenas_o_dia_local(self):
+        resposta = self.client.get(reverse('servicos:agendamentos:planilha_diaria', args=[0]))
+
+        self.assertEqual(resposta.status_code, 200)
+        pendentes = resposta.context['agendamentos_fluxo_dict']['pendente']
+        self.assertEqual(
+            [timezone.localtime(agendamento.data_agendado).date() for agendamento in pendentes],
+            [self.hoje, self.hoje]
+        )
+
+    def test_planilha_busca_o_dia_em_uma_consulta(self):
+        agendamento = Agendamento.objects.filter(empresa=self.empresa).earliest('data_agendado')
+        agendamento.status = AGENDAMENTO_STATUS_CANCELADO
+        agendamento.save(update_fields=['status'])
+
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(reverse('servicos:agendamentos:planilha_diaria', args=[0]))
+        # uma consulta por dia: o pedido e os dois vizinhos, preaquecidos após a renderização
+        self.assertEqual(self.consultas_agendamentos(consultas), 3)
+
+        colunas = resposta.context['agendamentos_fluxo_dict']
+        self.assertEqual([len(colunas[coluna]) for coluna in COLUNAS_PLANILHA.values()], [1, 0, 0, 1])
+        pendente, = colunas['pendente']
+        self.assertEqual(pendente.cliente, "Cliente")
+        self.assertEqual(pendente.servico, "Corte")
+        # pendente: avançar e cancelar; cancelado: voltar para pendente
+        avancar = reverse('servicos:agendamentos:next-status', args=[pendente.pk])
+        self.assertEqual([(acao.url, acao.status_update) for acao in pendente.acoes], [(avancar, None), (avancar, "C")])
+        cancelado, = colunas['cancelado']
+        self.assertEqual([acao.status_update for acao in cancelado.acoes], ["P"])
+        self.assertContains(resposta, f'action="{avancar}"', count=2)
+
+    def consultas_agendamentos(self, consultas: CaptureQueriesContext) -> int:
+        tabela = Agendamento._meta.db_table
+        return len([consulta for consulta in consultas.captured_queries if f'FROM "{tabela}"' in consulta['sql']])
+
+    def test_navegacao_entre_dias_usa_o_cache(self):
+        self.client.get(reverse('servicos:agendamentos:planilha_diaria', args=[0]))
+
+        # o dia seguinte já foi preaquecido; só o novo vizinho (+2) é calculado
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(reverse('servicos:agendamentos:planilha_diaria', args=[1]))
+        self.assertEqual(self.consultas_agendamentos(consultas), 1)
+        self.assertEqual(len(resposta.context['agendamentos_fluxo_dict']['pendente']), 1)
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse('servicos:agendamentos:planilha_diaria', args=[0]))
+        self.assertEqual(self.consultas_agendamentos(consultas), 0)
+
+    def test_alteracao_invalida_apenas_o_dia(self):
+        url_hoje = reverse('servicos:agendamentos:planilha_diaria', args=[0])
+        self.client.get(url_hoje)
+
+        agendamento = Agendamento.objects.filter(empresa=self.empresa).earliest('data_agendado')
+        with self.captureOnCommitCallbacks(execute=True):
+            agendamento.status = AGENDAMENTO_STATUS_CANCELADO
+            agendamento.save(update_fields=['status'])
+
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url_hoje)
+        self.assertEqual(self.consultas_agendamentos(consultas), 1) # só hoje: os vizinhos continuam no cache
+        self.assertEqual(len(resposta.context['agendamentos_fluxo_dict']['cancelado']), 1)
+
+        # nomes exibidos nos cards: todos os dias da empresa
+        with self.captureOnCommitCallbacks(execute=True):
+            Cliente.objects.filter(empresa=self.empresa).first().save()
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(url_hoje)
+        self.assertEqual(self.consultas_agendamentos(consultas), 3)
+
+    def test_planilha_por_periodo_em_uma_consulta(self):
+        url = reverse('servicos:agendamentos:planilha_periodo', args=[0])
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url)
+        self.assertEqual(self.consultas_agendamentos(consultas), 1)
+        grade = resposta.context['grade']
+        self.assertEqual(len(grade.dias), 7)
+        self.assertEqual(grade.dias[0].dia.weekday(), 0)
+        self.assertIn(self.hoje, [dia.dia for dia in grade.dias])
+
+        # intervalo escolhido: hoje e amanhã, com um segundo trabalhador
+        agendamento = Agendamento.objects.filter(empresa=self.empresa).latest('data_agendado')
+        bia = Trabalhador.objects.create(
+            nome="Bia", cpf="39053344705", telefone="+5511988880002", endereco="Rua C", empresa=self.empresa
+        )
+        agendamento.trabalhador = bia
+        agendamento.status = AGENDAMENTO_STATUS_CANCELADO
+        agendamento.save()
+
+        amanha = self.hoje + timedelta(days=1)
+        resposta = self.client.get(url, {'inicio': self.hoje.isoformat(), 'fim': amanha.isoformat()})
+        grade = resposta.context['grade']
+        self.assertEqual([dia.dia for dia in grade.dias], [self.hoje, amanha])
+        self.assertEqual([dia.por_coluna['pendente'] for dia in grade.dias], [2, 0])
+        self.assertEqual([dia.por_coluna['cancelado'] for dia in grade.dias], [0, 1])
+        self.assertEqual([linha.trabalhador for linha in grade.linhas], ["Ana", "Bia"])
+        ana, bia = grade.linhas
+        self.assertEqual([len(celula['pendente']) for celula in ana.celulas], [2, 0])
+        self.assertEqual([len(celula['cancelado']) for celula in bia.celulas], [0, 1])
+        self.assertContains(resposta, f'data-agendamento="{agendamento.pk}"')
+
+    def test_planilha_por_periodo_invalido_mostra_a_semana(self):
+        url = reverse('servicos:agendamentos:planilha_periodo', args=[0])
+        for parametros in (
+            {'inicio': self.hoje.isoformat(), 'fim': (self.hoje - timedelta(days=1)).isoformat()},
+            {'inicio': self.hoje.isoformat(), 'fim': (self.hoje + timedelta(days=31)).isoformat()},
+            {'inicio': "amanhã", 'fim': ""},
+        ):
+            with self.subTest(parametros):
+                resposta = self.client.get(url, parametros)
+                self.assertEqual(len(resposta.context['grade'].dias), 7)
+                self.assertFalse(resposta.context['personalizado'])
+
+    @skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN do SQLite")
+    def test_faixa_de_datas_usa_indice(self):
+        periodo = PeriodoHelper.dia(self.hoje)
+        plano = plano_consulta(
+            Agendamento.objects.filter(periodo.filtro('data_agendado'), empresa=self.empresa)
+        )
+        self.assertIn("agendamento_empresa_data_idx", plano)
+        self.assertIn("data_agendado>? AND data_agendado<?", plano)
+
+        # referência: '__date' aplica a conversão em cada linha e não restringe o índice pela data
+        plano_date = plano_consulta(
+            Agendamento.objects.filter(empresa=self.empresa, data_agendado__date=self.hoje)
+        )
+        self.assertNotIn("data_agendado>?", plano_date)
+
+    def test_card_da_planilha(self):
+        agendamento = Agendamento.objects.filter(empresa=self.empresa).first()
+        url = reverse('servicos:agendamentos:planilha_card', args=[agendamento.pk])
+
+        resposta = self.client.get(url, {'next': "/planilha/"})
+        self.assertContains(resposta, f'data-agendamento="{agendamento.pk}"')
+        self.assertContains(resposta, 'name="next" value="/planilha/"')
+
+        agendamento.ativo = False
+        agendamento.save(update_fields=['ativo'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class AgendaTrabalhadorTestCase(SimpleTestCase):
+    def momento(self, hora: int, minuto: int = 0) -> datetime:
+        return timezone.make_aware(datetime(2025, 3, 5, hora, minuto))
+
+    def intervalo(self, pk: int, inicio: tuple, fim: tuple) -> IntervaloAgenda:
+        return IntervaloAgenda(pk, self.momento(*inicio), self.momento(*fim))
+
+    def test_conflitos(self):
+        agenda = AgendaTrabalhador([
+            self.intervalo(2, (10,), (10, 30)),
+            self.intervalo(1, (8,), (12,)),  # longo: cobre os seguintes
+            self.intervalo(3, (14,), (15,)),
+        ])
+        pks = lambda conflitos: [conflito.agendamento_id for conflito in conflitos]
+
+        self.assertEqual(pks(agenda.conflitos(self.momento(11), self.momento(11, 30))), [1])
+        self.assertEqual(pks(agenda.conflitos(self.momento(10, 15), self.momento(14, 15))), [1, 2, 3])
+        self.assertEqual(pks(agenda.conflitos(self.momento(12), self.momento(14))), [])  # encostados não conflitam
+        self.assertEqual(pks(agenda.conflitos(self.momento(14), self.momento(15), ignorar=3)), [])
+
+    def test_livres(self):
+        agenda = AgendaTrabalhador([
+            self.intervalo(1, (7,), (9,)),  # começa antes do período
+            self.intervalo(2, (9, 30), (10,)),
+            self.intervalo(3, (10, 15), (11,)),
+        ])
+        livres = agenda.livres(self.momento(8), self.momento(12), timedelta(minutes=30))
+        self.assertEqual(livres, [
+            (self.momento(9), self.momento(9, 30)),
+            (self.momento(11), self.momento(12)),
+        ])
+        self.assertEqual(AgendaTrabalhador().livres(self.momento(8), self.momento(9), timedelta(hours=2)), [])
+
+
+class DisponibilidadeTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="dono", password="senha")
+        cls.empresa = Empresa.objects.create(
+            cnpj="11222333000181", nome_fantasia="Salão", razao_social="Salão LTDA", user=cls.user
+        )
+        cls.cliente = Cliente.objects.create(
+            nome="Cliente", cpf="52998224725", telefone="+5511999990000", endereco="Rua A", empresa=cls.empresa
+        )
+        cls.corte = TipoServico.objects.create(nome="Corte", preco=Decimal("50.00"), duracao=60, empresa=cls.empresa)
+        cls.ana = Trabalhador.objects.create(
+            nome="Ana", cpf="11144477735", telefone="+5511988880001", endereco="Rua B", empresa=cls.empresa
+        )
+        cls.bia = Trabalhador.objects.create(
+            nome="Bia", cpf="39053344705", telefone="+5511988880002", endereco="Rua C", empresa=cls.empresa
+        )
+        cls.dia = timezone.localdate() + timedelta(days=1)
+        cls.agendamento = cls.agendar(10)
+        cls.agendar(13, status=AGENDAMENTO_STATUS_CANCELADO)
+
+    @classmethod
+    def agendar(cls, hora: int, trabalhador=None, **campos) -> Agendamento:
+        return Agendamento.objects.create(
+            data_agendado=cls.momento(hora), cliente=cls.cliente, servico=cls.corte,
+            trabalhador=trabalhador or cls.ana, empresa=cls.empresa, **campos
+        )
+
+    @classmethod
+    def momento(cls, hora: int, minuto: int = 0) -> datetime:
+        return timezone.make_aware(datetime.combine(cls.dia, time(hora, minuto)))
+
+    def formulario(self, hora: int, minuto: int = 0, trabalhador=None, instance=None) -> AgendamentoForm:
+        return AgendamentoForm(data={
+            'data_agendado': self.momento(hora, minuto).strftime("%Y-%m-%dT%H:%M"),
+            'status': "P",
+            'cliente': self.cliente.pk,
+            'servico': self.corte.pk,
+            'trabalhador': (trabalhador or self.ana).pk,
+        }, empresa=self.empresa, instance=instance)
+
+    def test_agenda_carregada_em_uma_consulta(self):
+        with self.assertNumQueries(1):
+            agenda = AgendaTrabalhadores.carregar(self.empresa.pk, self.momento(8), self.momento(18))
+        # o cancelado das 13h não ocupa a agenda
+        self.assertEqual([c.agendamento_id for c in agenda.conflitos(self.ana.pk, self.momento(10, 30), self.momento(14))], [self.agendamento.pk])
+        self.assertEqual(agenda.conflitos(self.bia.pk, self.momento(10), self.momento(11)), [])
+        with self.assertRaises(ValueError):
+            agenda.conflitos(self.ana.pk, self.momento(7), self.momento(8, 30))
+
+        livres = horarios_livres_servico(self.empresa.pk, self.corte, self.momento(9), self.momento(12))
+        self.assertEqual(
+            [(livre.trabalhador_id, livre.inicio, livre.fim) for livre in livres],
+            [
+                (self.ana.pk, self.momento(9), self.momento(10)),
+                (self.bia.pk, self.momento(9), self.momento(12)),
+                (self.ana.pk, self.momento(11), self.momento(12)),
+            ]
+        )
+
+    def test_formulario_recusa_conflito_e_sugere_horarios(self):
+        formulario = self.formulario(10, 30)
+        self.assertFalse(formulario.is_valid())
+        self.assertIn("Ana já tem agendamento neste horário", formulario.errors['data_agendado'][0])
+        self.assertEqual(formulario.horarios_sugeridos[0], "Ana: a partir das 11:00 (livre até o fim do dia)")
+        self.assertIn("Bia: livre às 10:30", formulario.horarios_sugeridos)
+
+        self.assertTrue(self.formulario(11).is_valid())  # logo após o término
+        self.assertTrue(self.formulario(10, 30, trabalhador=self.bia).is_valid())
+        self.assertTrue(self.formulario(10, 30, instance=self.agendamento).is_valid())  # o próprio agendamento
+
+    def test_sugestao_limitada_pelo_proximo_agendamento(self):
+        self.agendar(15)
+        formulario = self.formulario(10, 30)
+        self.assertFalse(formulario.is_valid())
+        self.assertEqual(formulario.horarios_sugeridos[:2], [
+            "Ana: a partir das 11:00 (livre até 15:00)",
+            "Ana: a partir das 16:00 (livre até o fim do dia)",
+        ])
+
+    def test_create_view_exibe_horarios_livres(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['empresa_id'] = self.empresa.id
+        session.save()
+
+        resposta = self.client.post(reverse('servicos:agendamentos:create'), {
+            'data_agendado': self.momento(9, 30).strftime("%Y-%m-%dT%H:%M"),
+            'status': "P",
+            'cliente': self.cliente.pk,
+            'servico': self.corte.pk,
+            'trabalhador': self.ana.pk,
+        })
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(Agendamento.objects.filter(empresa=self.empresa).count(), 2)
+        self.assertContains(resposta, "Bia: livre às 09:30")
+
+
+class TransicaoStatusLoteTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(username="dono", password="senha")
+        cls.empresa = Empresa.objects.create(
+            cnpj="11222333000181", nome_fantasia="Salão", razao_social="Salão LTDA", user=cls.user
+        )
+        outra = Empresa.objects.create(
+            cnpj="11444777000161", nome_fantasia="Outro", razao_social="Outro LTDA", user=cls.user
+        )
+        cls.trabalhador = Trabalhador.objects.create(
+            nome="Ana", cpf="11144477735", telefone="+5511988880001", endereco="Rua B", empresa=cls.empresa
+        )
+        cls.agendamentos = {}
+        for empresa, cpf, telefone in ((cls.empresa, "52998224725", "+5511999990000"), (outra, "86288366757", "+5511999990001")):
+            cliente = Cliente.objects.create(
+                nome="Cliente", cpf=cpf, telefone=telefone, endereco="Rua A", empresa=empresa
+            )
+            servico = TipoServico.objects.create(nome="Corte", preco=Decimal("50.00"), empresa=empresa)
+            trabalhador = cls.trabalhador if empresa == cls.empresa else Trabalhador.objects.create(
+                nome="Bia", cpf="39053344705", telefone="+5511988880002", endereco="Rua C", empresa=empresa
+            )
+            for chave, status in (('P', "P"), ('E', "E"), ('F', "F")):
+                cls.agendamentos[(empresa.pk, chave)] = Agendamento.objects.create(
+                    data_agendado=timezone.now() - timedelta(hours=1), status=status, cliente=cliente,
+                    servico=servico, trabalhador=trabalhador, empresa=empresa
+                )
+        cls.outra = outra
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['empresa_id'] = self.empresa.id
+        session.save()
+
+    def ids(self, *chaves, empresa=None) -> list[int]:
+        return [self.agendamentos[((empresa or self.empresa).pk, chave)].pk for chave in chaves]
+
+    def test_um_update_com_resultado_por_id(self):
+        pendente, executando, finalizado = self.ids('P', 'E', 'F')
+        de_outra_empresa, = self.ids('P', empresa=self.outra)
+        antes = Agendamento.objects.get(pk=pendente).data_modificado
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultados = transicionar_status(
+                self.empresa.pk, [pendente, executando, finalizado, de_outra_empresa, 999999], AGENDAMENTO_STATUS_FINALIZADO
+            )
+
+        self.assertEqual(resultados, {
+            pendente: TRANSICAO_ATUALIZADO,
+            executando: TRANSICAO_ATUALIZADO,
+            finalizado: TRANSICAO_STATUS_INVALIDO,
+            de_outra_empresa: TRANSICAO_NAO_ENCONTRADO,
+            999999: TRANSICAO_NAO_ENCONTRADO,
+        })
+        tabela = Agendamento._meta.db_table
+        updates = [c['sql'] for c in consultas.captured_queries if c['sql'].startswith(f'UPDATE "{tabela}"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"status" IN', updates[0])
+
+        self.assertEqual(Agendamento.objects.get(pk=pendente).status, AGENDAMENTO_STATUS_FINALIZADO)
+        self.assertGreater(Agendamento.objects.get(pk=pendente).data_modificado, antes)
+        self.assertEqual(Agendamento.objects.get(pk=de_outra_empresa).status, "P")
+        # dados derivados atualizados pelo agendamento_alterado de cada linha
+        self.trabalhador.contadores.refresh_from_db()
+        self.assertEqual((self.trabalhador.contadores.pendentes, self.trabalhador.contadores.finalizados), (0, 3))
+
+    def test_alteracao_concorrente_fica_sem_sinal(self):
+        pendente, executando = self.ids('P', 'E')
+        carregar_estados = transicoes.carregar_estados
+
+        def ler_e_cancelar_o_pendente(agendamentos):
+            estados = carregar_estados(agendamentos)
+            # outra transação, entre a leitura e o UPDATE (SELECT ... FOR UPDATE não trava no SQLite)
+            Agendamento.objects.filter(pk=pendente).update(status=AGENDAMENTO_STATUS_CANCELADO)
+            return estados
+
+        with mock.patch.object(transicoes, 'carregar_estados', ler_e_cancelar_o_pendente):
+            resultados = transicionar_status(self.empresa.pk, [pendente, executando], AGENDAMENTO_STATUS_FINALIZADO)
+
+        self.assertEqual(resultados, {pendente: TRANSICAO_STATUS_INVALIDO, executando: TRANSICAO_ATUALIZADO})
+        self.assertEqual(Agendamento.objects.get(pk=pendente).status, AGENDAMENTO_STATUS_CANCELADO)
+        # o pendente não foi finalizado por este lote: só o agendamento em execução conta como finalizado
+        self.trabalhador.contadores.refresh_from_db()
+        self.assertEqual(self.trabalhador.contadores.finalizados, 2)
+
+    def test_endpoint_em_lote(self):
+        url = reverse('servicos:agendamentos:status-lote')
+        pendente, finalizado = self.ids('P', 'F')
+
+        resposta = self.client.post(url, {'status': "C", 'ids': [pendente, finalizado]})
+        self.assertEqual(resposta.json(), {
+            'status': "C",
+            'atualizados': 1,
+            'resultados': {str(pendente): TRANSICAO_ATUALIZADO, str(finalizado): TRANSICAO_STATUS_INVALIDO},
+        })
+        self.assertEqual(self.client.post(url, {'status': "X", 'ids': [pendente]}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'status': "P", 'ids': ["abc"]}).status_code, 400)
+
+    def test_finalizar_varios_selecionados(self):
+        resposta = self.client.post(reverse('servicos:agendamentos:finalizar'), {'selecao_id': self.ids('P', 'E')})
+        self.assertRedirects(resposta, reverse('home'), fetch_redirect_response=False)
+        self.assertEqual(
+            Agendamento.objects.filter(empresa=self.empresa, status=AGENDAMENTO_STATUS_FINALIZADO).count(), 3
+        )
+
+    def test_acao_do_admin_por_empresa(self):
+        ids = self.ids('P', 'E', 'F') + self.ids('P', empresa=self.outra)
+        self.client.post(reverse('admin:agendamentos_agendamento_changelist'), {
+            'action': "transicionar_para_c",
+            '_selected_action': ids,
+        })
+        self.assertEqual(
+            sorted(Agendamento.objects.filter(pk__in=ids, status=AGENDAMENTO_STATUS_CANCELADO).values_list('pk', flat=True)),
+            sorted(self.ids('P', 'E') + self.ids('P', empresa=self.outra))
+        )
@@ -0,0 +1,65 @@
+"""
+Transições de status em lote (fechamento do dia, ações do admin).
+
+Os agendamentos pedidos são lidos em uma consulta (travados até o fim da transação
+nos bancos com SELECT ... FOR UPDATE) e atualizados com um único
+UPDATE ... WHERE status IN (origens permitidas), no escopo da empresa. Como o UPDATE
+não passa pelo save(), agendamento_alterado é enviado para cada linha alterada, na
+mesma transação: estados dos trabalhadores, contadores, resumos e caches continuam
+corretos. Sem o travamento (SQLite), uma linha alterada por outra transação entre a
+leitura e o UPDATE fica de fora dele, e também do sinal.
+"""
+from collections.abc import Iterable
+from dataclasses import replace
+
+from django.db import transaction
+from django.utils import timezone
+
+from servicos.agendamentos.models import Agendamento
+from servicos.agendamentos.signals import agendamento_alterado, carregar_estados
+from servicos.agendamentos.choices import (
+    TRANSICOES_STATUS,
+    TRANSICAO_ATUALIZADO,
+    TRANSICAO_STATUS_INVALIDO,
+    TRANSICAO_NAO_ENCONTRADO
+)
+
+
+def transicionar_status(empresa_id: int, ids: Iterable[int], status: str) -> dict[int, str]:
+    """
+    Leva os agendamentos 'ids' da empresa para 'status', se o status atual de cada um permitir
+    (TRANSICOES_STATUS). Retorna o resultado de cada id (TRANSICAO_*).
+    """
+    if status not in TRANSICOES_STATUS:
+        raise ValueError(f"Status '{status}' não aceita transições em lote.")
+    origens = TRANSICOES_STATUS[status]
+    ids = set(ids)
+
+    with transaction.atomic():
+        agendamentos = Agendamento.objects.filter(empresa_id=empresa_id, ativo=True, pk__in=ids)
+        anteriores = {estado.pk: estado for estado in carregar_estados(agendamentos.select_for_update())}
+        permitidos = [pk for pk, estado in anteriores.items() if estado.status in origens]
+
+        if permitidos:
+            agora = timezone.now()
+            # a condição de origem também vale no UPDATE, não só na leitura acima
+            atualizados = agendamentos.filter(pk__in=permitidos, status__in=origens).update(
+                status=status,
+                data_modificado=agora # update() não aplica o auto_now
+            )
+            if atualizados != len(permitidos):
+                # alterados por outra transação após a leitura: só as linhas deste UPDATE recebem o sinal
+                permitidos = list(
+                    agendamentos.filter(pk__in=permitidos, status=status, data_modificado=agora)
+                    .values_list('pk', flat=True)
+                )
+            for pk in permitidos:
+                anterior = anteriores[pk]
+                agendamento_alterado.send(
+                    sender=Agendamento, instance=None, anterior=anterior, atual=replace(anterior, status=status)
+                )
+
+    resultados = dict.fromkeys(ids, TRANSICAO_NAO_ENCONTRADO)
+    resultados.update(dict.fromkeys(anteriores, TRANSICAO_STATUS_INVALIDO))
+    resultados.update(dict.fromkeys(permitidos, TRANSICAO_ATUALIZADO))
+    return resultados
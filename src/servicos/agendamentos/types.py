@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.utils import timezone
+
+
+@dataclass(frozen=True)
+class EstadoAgendamento:
+    """Retrato dos campos de um Agendamento que alimentam dados derivados (resumos, contadores...)."""
+    pk: int
+    empresa_id: int
+    cliente_id: int
+    servico_id: int
+    trabalhador_id: int
+    data_agendado: datetime
+    status: str
+    ativo: bool
+    preco: Decimal
+
+    @property
+    def dia(self) -> date:
+        return timezone.localdate(self.data_agendado)
+
+
+@dataclass(frozen=True)
+class AcaoCard:
+    """Botão de mudança de status de um card da planilha, com a URL já resolvida."""
+    url: str
+    button_class: str
+    fa_icon: str
+    size: str = ""
+    status_update: str | None = None
+    button_text: str = ""
+
+
+@dataclass(frozen=True)
+class CardAgendamento:
+    """Dados exibidos no card de um agendamento da planilha diária (ver servicos.agendamentos.planilha)."""
+    pk: int
+    status: str
+    data_agendado: datetime
+    cliente: str
+    servico: str
+    preco: Decimal
+    trabalhador: str
+    acoes: tuple[AcaoCard, ...]
+
+    @property
+    def horario(self) -> datetime:
+        return timezone.localtime(self.data_agendado)
+
+
+@dataclass(frozen=True)
+class TotalDiaPlanilha:
+    """Cabeçalho de um dia da planilha por período: quantidade de agendamentos por coluna (status)."""
+    dia: date
+    por_coluna: dict[str, int]
+
+    @property
+    def total(self) -> int:
+        return sum(self.por_coluna.values())
+
+    @property
+    def diferenca_dias(self) -> int:
+        """Diferença para hoje, como na URL da planilha diária."""
+        return (self.dia - timezone.localdate()).days
+
+
+@dataclass(frozen=True)
+class LinhaGradePlanilha:
+    """Agendamentos de um trabalhador no período: uma célula por dia, com os cards por coluna (status)."""
+    trabalhador: str
+    celulas: tuple[dict[str, list[CardAgendamento]], ...]
+
+
+@dataclass(frozen=True)
+class GradePlanilha:
+    dias: tuple[TotalDiaPlanilha, ...]
+    linhas: tuple[LinhaGradePlanilha, ...]
+
+    @property
+    def total(self) -> int:
+        return sum(dia.total for dia in self.dias)
+
+
+@dataclass(frozen=True)
+class IntervaloAgenda:
+    """Tempo ocupado por um agendamento: [inicio, fim), com a duração do serviço."""
+    agendamento_id: int
+    inicio: datetime
+    fim: datetime
+
+
+@dataclass(frozen=True)
+class HorarioLivre:
+    """Intervalo livre de um trabalhador em que cabe o serviço pedido (ver servicos.agendamentos.disponibilidade)."""
+    trabalhador_id: int
+    inicio: datetime
+    fim: datetime
@@ -3,8 +3,9 @@ from django.urls import path
 from servicos.agendamentos.views import (
     AgendamentoListView, AgendamentoCreateView, 
     AtualizarOuAvancarStatusFluxoAgendamentoView, VoltarStatusFluxoAgendamentoView, FinalizarAgendamentoView, 
+    TransicaoStatusLoteView,
     AgendamentoDeleteView,
-    PlanilhaDiariaView
+    PlanilhaDiariaView, PlanilhaPeriodoView, PlanilhaCardAgendamentoView
 )
 
 app_name = "agendamentos"
@@ -15,6 +16,9 @@ urlpatterns = [
     path("next-status/<int:pk>/", AtualizarOuAvancarStatusFluxoAgendamentoView.as_view(), name="next-status"), # type: ignore
     path("last-status/<int:pk>/", VoltarStatusFluxoAgendamentoView.as_view(), name="last-status"), # type: ignore
     path("finalizar/", FinalizarAgendamentoView.as_view(), name="finalizar"), # type: ignore
+    path("status-lote/", TransicaoStatusLoteView.as_view(), name="status-lote"), # type: ignore
     path("deletar/<int:pk>/", AgendamentoDeleteView.as_view(), name="delete"), # type: ignore
-    path("planilha_diaria/<negint:data_difference>/", PlanilhaDiariaView.as_view(), name="planilha_diaria") # type: ignore
+    path("planilha_diaria/<negint:data_difference>/", PlanilhaDiariaView.as_view(), name="planilha_diaria"), # type: ignore
+    path("planilha_diaria/card/<int:pk>/", PlanilhaCardAgendamentoView.as_view(), name="planilha_card"), # type: ignore
+    path("planilha_semanal/<negint:semana_difference>/", PlanilhaPeriodoView.as_view(), name="planilha_periodo") # type: ignore
 ]
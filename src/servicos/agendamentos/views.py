@@ -1,13 +1,14 @@
 from datetime import date, timedelta
 
 from django.views import View
-from django.views.generic import CreateView
+from django.views.generic import CreateView, DetailView
 from django.db.models import Q
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-from django.http import Http404
+from django.http import Http404, JsonResponse
 from django.urls import reverse_lazy
 from django.shortcuts import redirect, get_object_or_404
+from django.utils import timezone
 
 from core.bases.views import BasePageView, BaseDynamicListView, BaseDynamicFormView, SelecaoDynamicListView, BaseDeleteView
 from core.bases.mixins import AtivosQuerysetMixin, RedirecionarOrigemMixin
@@ -15,12 +16,17 @@ from cadastros.empresas.mixins import EscopoEmpresaQuerysetMixin, ContextoEmpres
 from servicos.agendamentos.models import Agendamento
 from servicos.agendamentos.forms import AgendamentoForm
 from servicos.agendamentos.mixins import AgendamentosSearchMixin
+from servicos.agendamentos.transicoes import transicionar_status
+from servicos.agendamentos.planilha import agendar_preaquecimento, card_agendamento, cards_do_dia, grade_do_periodo
 from servicos.agendamentos.choices import (
     AGENDAMENTO_STATUS_CANCELADO,
     C_TIPO_STATUS_AGENDAMENTO,
     AGENDAMENTO_STATUS_PENDENTE,
     AGENDAMENTO_STATUS_EXECUTANDO,
-    AGENDAMENTO_STATUS_FINALIZADO 
+    AGENDAMENTO_STATUS_FINALIZADO,
+    COLUNAS_PLANILHA,
+    TRANSICOES_STATUS,
+    TRANSICAO_ATUALIZADO
 )
 
 
@@ -28,6 +34,10 @@ from servicos.agendamentos.choices import (
 class PlanilhaDiariaView(LoginRequiredMixin, ContextoEmpresaMixin, BasePageView):
     template_name = "planilha-diaria.html"
     model = Agendamento
+    titulo = "Planilha Diária de Agendamentos"
+    descricao = "Visualize seus agendamentos do dia a dia."
+    # calcula o dia anterior e o seguinte após a resposta (ver planilha.agendar_preaquecimento)
+    preaquecer_adjacentes = True
     data_proxima_nomes_display: dict[int, str] = {
         -2: "Anteontem",
         -1: "Ontem",
@@ -52,7 +62,7 @@ class PlanilhaDiariaView(LoginRequiredMixin, ContextoEmpresaMixin, BasePageView)
                 messages.warning(self.request, "⚠️ Parâmetro de data inválido. Mostrando agendamentos de hoje.")
                 diferenca_dias = 0
 
-        data_referencia = date.today() + timedelta(days=diferenca_dias)
+        data_referencia = timezone.localdate() + timedelta(days=diferenca_dias)
         return data_referencia, diferenca_dias
     
     def get_data_referencia_display(self, diferenca_dias: int) -> str:
@@ -72,27 +82,18 @@ class PlanilhaDiariaView(LoginRequiredMixin, ContextoEmpresaMixin, BasePageView)
     def get_context_data(self, **kwargs):
         contexto = super().get_context_data(**kwargs)
 
+        contexto["title"] = self.titulo
+        contexto["description"] = self.descricao
+        contexto.update(self.get_contexto_planilha())
+        return contexto
+
+    def get_contexto_planilha(self) -> dict:
         data_referencia, diferenca_dias = self.get_data_agendado_offset()
+        contexto = {}
 
-        base_agendamentos_do_dia = self.model.objects.filter(
-            ativo=True,
-            cliente__ativo=True,
-            empresa=self.request.empresa,
-            data_agendado__date=data_referencia
-        ).select_related(
-            'cliente', 'servico', 'trabalhador'
-        ).order_by("data_agendado")
-
-        contexto["title"] = "Planilha Diária de Agendamentos"
-        contexto["description"] = "Visualize seus agendamentos do dia a dia."
-
-        # dict[list]
-        contexto["agendamentos_fluxo_dict"] = {
-            "pendente": base_agendamentos_do_dia.filter(status=AGENDAMENTO_STATUS_PENDENTE),
-            "executando": base_agendamentos_do_dia.filter(status=AGENDAMENTO_STATUS_EXECUTANDO),
-            "finalizado": base_agendamentos_do_dia.filter(status=AGENDAMENTO_STATUS_FINALIZADO),
-            "cancelado": base_agendamentos_do_dia.filter(status=AGENDAMENTO_STATUS_CANCELADO)
-        }
+        # dict[list[CardAgendamento]]: o dia inteiro em uma consulta (ou do cache), separado por status
+        contexto["agendamentos_fluxo_dict"] = cards_do_dia(self.request.empresa.pk, data_referencia)
+        contexto["data_referencia_iso"] = data_referencia.isoformat()
 
         contexto["data_referencia_display"] = self.get_data_referencia_display(diferenca_dias)
         contexto["data_referencia"] = data_referencia.strftime("%d/%m/%Y")
@@ -101,16 +102,97 @@ class PlanilhaDiariaView(LoginRequiredMixin, ContextoEmpresaMixin, BasePageView)
         contexto["dia_anterior_diff_display"] = (data_referencia - timedelta(days=1)).strftime("%d/%m")
         contexto["dia_seguinte_diff_display"] = (data_referencia + timedelta(days=1)).strftime("%d/%m")
 
-        contexto["urls_actions"] = {
-            "last_status_url": 'servicos:agendamentos:last-status',
-            "next_status_url": 'servicos:agendamentos:next-status',
-        }
-        
+        self.data_referencia = data_referencia
         return contexto
 
+    def preaquecer(self):
+        agendar_preaquecimento(self.request.empresa.pk, self.data_referencia)
+
+    def get(self, request, *args, **kwargs):
+        resposta = super().get(request, *args, **kwargs)
+        if self.preaquecer_adjacentes:
+            # depois de renderizar o dia pedido: os links de dia anterior/seguinte já encontram o cache
+            resposta.add_post_render_callback(lambda _: self.preaquecer())
+        return resposta
+
+
+class PlanilhaPeriodoView(PlanilhaDiariaView):
+    """
+    Planilha de uma semana (diferença em semanas na URL) ou de um intervalo escolhido
+    (parâmetros 'inicio' e 'fim', em ISO): todos os dias em uma consulta, em uma grade
+    de trabalhadores por dia, com os totais de cada dia.
+    """
+    template_name = "planilha-periodo.html"
+    titulo = "Planilha de Agendamentos por Período"
+    descricao = "Planeje a semana: agendamentos de cada trabalhador, dia a dia."
+    maximo_dias = 31
+    # os dias vizinhos são da planilha diária; a grade do período não usa o cache por dia
+    preaquecer_adjacentes = False
+
+    def get_intervalo_personalizado(self) -> tuple[date, date] | None:
+        inicio_str = self.request.GET.get("inicio", "").strip()
+        fim_str = self.request.GET.get("fim", "").strip()
+        if not inicio_str and not fim_str:
+            return None
+
+        try:
+            inicio, fim = date.fromisoformat(inicio_str), date.fromisoformat(fim_str)
+        except ValueError:
+            messages.warning(self.request, "⚠️ Período inválido. Mostrando a semana atual.")
+            return None
+
+        if fim < inicio or (fim - inicio).days >= self.maximo_dias:
+            messages.warning(self.request, f"⚠️ O período deve ter de 1 a {self.maximo_dias} dias. Mostrando a semana atual.")
+            return None
+        return inicio, fim
+
+    def get_semana(self) -> tuple[date, date, int]:
+        diferenca_semanas = int(self.kwargs.get("semana_difference", 0))
+        hoje = timezone.localdate()
+        segunda = hoje - timedelta(days=hoje.weekday()) + timedelta(weeks=diferenca_semanas)
+        return segunda, segunda + timedelta(days=6), diferenca_semanas
+
+    def get_contexto_planilha(self) -> dict:
+        intervalo = self.get_intervalo_personalizado()
+        if intervalo is None:
+            inicio, fim, diferenca_semanas = self.get_semana()
+        else:
+            (inicio, fim), diferenca_semanas = intervalo, None
+
+        return {
+            # uma consulta para todos os dias do período
+            "grade": grade_do_periodo(self.request.empresa.pk, inicio, fim),
+            "colunas": tuple(COLUNAS_PLANILHA.values()),
+            "inicio_iso": inicio.isoformat(),
+            "fim_iso": fim.isoformat(),
+            "periodo_display": f"{inicio.strftime('%d/%m/%Y')} a {fim.strftime('%d/%m/%Y')}",
+            "personalizado": diferenca_semanas is None,
+            "semana_atual": diferenca_semanas == 0,
+            "semana_anterior_diff": (diferenca_semanas or 0) - 1,
+            "semana_seguinte_diff": (diferenca_semanas or 0) + 1,
+            "maximo_dias": self.maximo_dias,
+        }
+
+
+class PlanilhaCardAgendamentoView(LoginRequiredMixin, ContextoEmpresaMixin, DetailView):
+    """
+    Card de um agendamento da planilha, isolado: buscado pela planilha aberta quando um
+    agendamento do dia é criado ou muda de status (ver core.tempo_real), sem recarregar a página.
+    """
+    model = Agendamento
+    template_name = "partials/planilhas/card-agendamento.html"
+    context_object_name = "card"
+
+    def get_object(self, queryset=None):
+        card = card_agendamento(self.request.empresa.pk, self.kwargs["pk"])
+        if card is None:
+            raise Http404("Agendamento não encontrado na planilha.")
+        return card
+
 #* CRUD
 class AgendamentoListView(AgendamentosSearchMixin, EscopoEmpresaQuerysetMixin, AtivosQuerysetMixin, BaseDynamicListView):
     model = Agendamento    
+    tipo_sugestoes = 'agendamentos'
 
     def get_fields_display(self):
         return ['data_agendado', 'status', 'cliente', 'servico', 'trabalhador']
@@ -135,10 +217,17 @@ class AgendamentoCreateView(FormFieldsComEscopoEmpresaMixin, BaseDynamicFormView
         messages.warning(self.request, "⚠️ Não foi possível registrar o Agendamento!")  
         return super().form_invalid(form)
 
+    def get_context_data(self, **kwargs):
+        contexto = super().get_context_data(**kwargs)
+        # preenchidos pela validação quando o horário conflita com a agenda do trabalhador
+        contexto["horarios_livres"] = contexto["form"].horarios_sugeridos
+        return contexto
+
 
 class BaseAgendamentoStatusUpdateView(LoginRequiredMixin, ContextoEmpresaMixin, RedirecionarOrigemMixin, View):
     model = Agendamento
-    fields = ['status']
+    # data_modificado (auto_now) só é gravado se estiver em update_fields: versões dos relatórios e ocupação dependem dele
+    fields = ['status', 'data_modificado']
     success_url = reverse_lazy('servicos:agendamentos:list')
 
     def get_object(self):
@@ -228,6 +317,7 @@ class VoltarStatusFluxoAgendamentoView(BaseAgendamentoStatusUpdateView):
 #* Funcionalidades
 class FinalizarAgendamentoView(LoginRequiredMixin, AgendamentosSearchMixin, EscopoEmpresaQuerysetMixin, RedirecionarOrigemMixin, SelecaoDynamicListView):
     model = Agendamento
+    selecao_multipla = True
     condicao_agendamento_valido = (
         Q(status=AGENDAMENTO_STATUS_PENDENTE) | Q(status=AGENDAMENTO_STATUS_EXECUTANDO)
     )
@@ -242,32 +332,57 @@ class FinalizarAgendamentoView(LoginRequiredMixin, AgendamentosSearchMixin, Esco
     
     def get_context_data(self, **kwargs):
         contexto = super().get_context_data(**kwargs)
-        contexto['title'] = "Finalize um agendamento"
-        contexto['description'] = "Selecione o seu atendimento pendente / em execução."
+        contexto['title'] = "Finalize agendamentos"
+        contexto['description'] = "Selecione os atendimentos pendentes / em execução."
         contexto['sidebar'] = True
         contexto['query'] = self.request.GET.get("query", "").strip()
         return contexto
     
     def post(self, request, *args, **kwargs):
-        agendamento_id = self.get_selecao_or_redirect(request)
+        agendamento_ids = self.get_selecoes(request)
 
-        if not agendamento_id:
+        if not agendamento_ids:
             messages.warning(request, "⚠️ Você precisa selecionar um agendamento.")
             return redirect(request.path)  # back to the same page
-        try:
-            agendamento = get_object_or_404(
-                Agendamento.objects.filter(self.condicao_agendamento_valido),
-                id=agendamento_id
-            )
-            agendamento.status = AGENDAMENTO_STATUS_FINALIZADO
-            agendamento.save(update_fields=['status'])
-            messages.success(request, "✅ Agendamento finalizado com sucesso!")
-        except Agendamento.DoesNotExist:
-            messages.error(request, "⚠️ Esse agendamento não pôde ser finalizado.")            
+
+        # todos os selecionados em um UPDATE (só os pendentes / em execução da empresa)
+        resultados = transicionar_status(request.empresa.pk, agendamento_ids, AGENDAMENTO_STATUS_FINALIZADO)
+        finalizados = sum(resultado == TRANSICAO_ATUALIZADO for resultado in resultados.values())
+        if finalizados:
+            messages.success(request, f"✅ {finalizados} agendamento(s) finalizado(s) com sucesso!")
+        if finalizados < len(resultados):
+            messages.error(request, f"⚠️ {len(resultados) - finalizados} agendamento(s) não puderam ser finalizados.")
 
         return redirect("home")
 
 
+class TransicaoStatusLoteView(LoginRequiredMixin, ContextoEmpresaMixin, View):
+    """
+    Muda o status de vários agendamentos da empresa de uma vez ('ids' e 'status' no POST),
+    com as mesmas regras de origem para cada status (TRANSICOES_STATUS).
+    Responde com o resultado de cada id.
+    """
+    maximo_ids = 500
+
+    def post(self, request, *args, **kwargs):
+        status = request.POST.get("status", "")
+        ids = request.POST.getlist("ids")
+
+        if status not in TRANSICOES_STATUS:
+            return JsonResponse({'erro': f"Status '{status}' inválido."}, status=400)
+        if not ids or not all(pk.isdigit() for pk in ids):
+            return JsonResponse({'erro': "Informe os ids dos agendamentos."}, status=400)
+        if len(ids) > self.maximo_ids:
+            return JsonResponse({'erro': f"No máximo {self.maximo_ids} agendamentos por vez."}, status=400)
+
+        resultados = transicionar_status(request.empresa.pk, map(int, ids), status)
+        return JsonResponse({
+            'status': status,
+            'atualizados': sum(resultado == TRANSICAO_ATUALIZADO for resultado in resultados.values()),
+            'resultados': {str(pk): resultado for pk, resultado in sorted(resultados.items())},
+        })
+
+
 class AgendamentoDeleteView(LoginRequiredMixin, ContextoEmpresaMixin, BaseDeleteView):
     model = Agendamento
     success_url = reverse_lazy('servicos:agendamentos:list')
\ No newline at end of file
@@ -4,5 +4,5 @@ from cadastros.empresas.models import BaseAssociadoEmpresa
 class BaseServicosModel(BaseAssociadoEmpresa):
     module_label = "servicos"
 
-    class Meta:
+    class Meta(BaseAssociadoEmpresa.Meta):
         abstract = True
\ No newline at end of file
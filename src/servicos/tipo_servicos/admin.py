@@ -23,7 +23,7 @@ class TipoServicoAdmin(BaseAssociadoEmpresaAdmin):
             (
                 "Basic",
                 {
-                    'fields': ('nome', 'preco')
+                    'fields': ('nome', 'preco', 'duracao')
                 }
             ),
         ]
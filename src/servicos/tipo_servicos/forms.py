@@ -6,8 +6,9 @@ from servicos.tipo_servicos.models import TipoServico
 class TipoServicoForm(forms.ModelForm):
     class Meta:
         model = TipoServico
-        fields = ['nome', 'preco']
+        fields = ['nome', 'preco', 'duracao']
         widgets = {
             'nome': forms.TextInput(attrs={'class': 'form-field', 'placeholder': "nome de nome"}),
             'CPF': forms.TextInput(attrs={'class': 'form-field', 'placeholder': "R$ XX.xx"}),
+            'duracao': forms.NumberInput(attrs={'class': 'form-field', 'placeholder': "minutos"}),
         }
\ No newline at end of file
@@ -1,8 +1,15 @@
+from datetime import timedelta
+
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
 from servicos.models import BaseServicosModel
 
 
+DURACAO_PADRAO_MINUTOS = 30
+DURACAO_MAXIMA_MINUTOS = 12 * 60 # limita quanto antes do período a agenda procura agendamentos em andamento
+
+
 class TipoServico(BaseServicosModel):
     nome = models.CharField(
         verbose_name="Nome do serviço",
@@ -15,10 +22,22 @@ class TipoServico(BaseServicosModel):
         max_digits=12,
         decimal_places=2
     )
+    duracao = models.PositiveSmallIntegerField(
+        verbose_name="Duração (minutos)",
+        default=DURACAO_PADRAO_MINUTOS,
+        validators=[MinValueValidator(1), MaxValueValidator(DURACAO_MAXIMA_MINUTOS)]
+    )
+
+    campos_str = ('nome', 'preco')
+
+    @classmethod
+    def formatar_str(cls, nome, preco) -> str:
+        return f"{nome} por R${preco}"
 
-    def __str__(self):
-        return f"{self.nome} por R${self.preco}"
+    @property
+    def duracao_timedelta(self) -> timedelta:
+        return timedelta(minutes=self.duracao)
     
-    class Meta:
+    class Meta(BaseServicosModel.Meta):
         verbose_name = "Tipo de Serviço"
         verbose_name_plural = "Tipos de Serviços"
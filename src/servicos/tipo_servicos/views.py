@@ -7,6 +7,7 @@ from django.urls import reverse_lazy
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 
+from core.busca import filtro_busca
 from core.bases.views import BaseDynamicListView, BaseDynamicFormView, BaseDeleteView
 from core.bases.mixins import AtivosQuerysetMixin, RedirecionarOrigemMixin
 from cadastros.empresas.mixins import EscopoEmpresaQuerysetMixin, EscopoEmpresaFormMixin
@@ -16,26 +17,31 @@ from servicos.tipo_servicos.forms import TipoServicoForm
 
 class TipoServicoListView(LoginRequiredMixin, EscopoEmpresaQuerysetMixin, AtivosQuerysetMixin, BaseDynamicListView):
     model = TipoServico
+    tipo_sugestoes = 'servicos'
 
     def get_fields_display(self):
-        return ['nome', 'preco']
+        return ['nome', 'preco', 'duracao']
 
     def get_queryset(self):
         queryset = super().get_queryset()
         query = self.request.GET.get("query", "").strip()
 
         if query:
-            condicao_nome = Q(nome__icontains=query)
+            empresa = getattr(self.request, 'empresa', None)
+            condicao = filtro_busca(
+                self.model, query, empresa and empresa.id,
+                alternativa=Q(nome__icontains=query)
+            )
             try:
-                value = floor(Decimal(query))
-                condicao_preco = Q(preco__gte=value, preco__lt=value + 1)
+                preco = Decimal(query.replace(',', '.'))
             except InvalidOperation:
-                # ignore invalid numbers, leave only name filter
-                pass
+                preco = None
+            # ignore invalid numbers, NaN/Infinity and values beyond the field, leave only name filter
+            if preco is not None and preco.is_finite() and preco.adjusted() < self.model._meta.get_field('preco').max_digits:
+                value = floor(preco)
+                condicao |= Q(preco__gte=value, preco__lt=value + 1)
 
-            queryset = queryset.filter(
-                condicao_nome | condicao_preco
-            )
+            queryset = queryset.filter(condicao)
 
         return queryset
 
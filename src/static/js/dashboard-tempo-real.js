@@ -0,0 +1,137 @@
+// Atualizações em tempo real da Home e da planilha diária (eventos de core.tempo_real)
+document.addEventListener('DOMContentLoaded', function() {
+    const planilha = document.querySelector('.planilha-diaria[data-dia]');
+    const listaTrabalhadores = document.querySelector('.worker-list');
+    const quickInfos = document.querySelectorAll('[data-quick-info]');
+
+    if (!planilha && !listaTrabalhadores && !quickInfos.length) {
+        return;
+    }
+
+    const handlers = {
+        quick_info: atualizarQuickInfos,
+        trabalhador: atualizarTrabalhadores,
+        agendamento: moverCard,
+    };
+
+    let tentativas = 0;
+
+    function conectar() {
+        const protocolo = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const socket = new WebSocket(`${protocolo}://${window.location.host}/ws/dashboard/`);
+
+        socket.addEventListener('open', () => {
+            tentativas = 0;
+        });
+        socket.addEventListener('message', (mensagem) => {
+            const { evento, dados } = JSON.parse(mensagem.data);
+            const handler = handlers[evento];
+            if (handler) {
+                handler(dados);
+            }
+        });
+        // reconexão com espera crescente, até 30s
+        socket.addEventListener('close', () => {
+            const espera = Math.min(30000, 1000 * 2 ** tentativas);
+            tentativas += 1;
+            setTimeout(conectar, espera);
+        });
+    }
+
+    function atualizarQuickInfos(itens) {
+        itens.forEach(item => {
+            const elemento = document.querySelector(`[data-quick-info="${item.chave}"]`);
+            if (!elemento) {
+                return;
+            }
+            elemento.querySelector('.dash-value').textContent = item.value;
+            elemento.querySelector('.dash-conclusion').textContent = item.conclusion;
+        });
+    }
+
+    function atualizarTrabalhadores(trabalhadores) {
+        if (!listaTrabalhadores) {
+            return;
+        }
+        trabalhadores.forEach(trabalhador => {
+            const item = listaTrabalhadores.querySelector(`[data-trabalhador="${trabalhador.id}"]`);
+            if (!item) {
+                return;
+            }
+            const status = item.querySelector('.worker-status');
+            const titulo = status.querySelector('.title-status');
+            titulo.className = `title-status status-${trabalhador.status}`;
+            titulo.textContent = trabalhador.status.charAt(0).toUpperCase() + trabalhador.status.slice(1);
+
+            const ocupadoDesde = atualizarLinha(
+                status, titulo, 'worker-ocupado-desde',
+                trabalhador.ocupado_desde && `Ficou ocupado às ${trabalhador.ocupado_desde}`
+            );
+            atualizarLinha(
+                status, ocupadoDesde || titulo, 'worker-proximo',
+                trabalhador.proximo && `Próximo: ${trabalhador.proximo}`
+            );
+        });
+    }
+
+    // linha de texto opcional do status (removida quando não há valor), criada logo após 'anterior'
+    function atualizarLinha(status, anterior, classe, texto) {
+        let linha = status.querySelector(`.${classe}`);
+        if (!texto) {
+            linha?.remove();
+            return null;
+        }
+        if (!linha) {
+            linha = document.createElement('p');
+            linha.className = classe;
+            anterior.after(linha);
+        }
+        linha.textContent = texto;
+        return linha;
+    }
+
+    function moverCard(agendamento) {
+        if (!planilha) {
+            return;
+        }
+        const dia = planilha.dataset.dia;
+        if (agendamento.dia !== dia && agendamento.dia_anterior !== dia) {
+            return;
+        }
+
+        planilha.querySelector(`[data-agendamento="${agendamento.id}"]`)?.remove();
+        if (agendamento.dia !== dia || !agendamento.coluna) {
+            return;
+        }
+
+        const container = planilha.querySelector(`[data-coluna="${agendamento.coluna}"] .cards-container`);
+        if (!container) {
+            return;
+        }
+
+        // o card vem renderizado pelo servidor (ações, CSRF), voltando para esta página após as ações
+        const url = `${agendamento.card_url}?next=${encodeURIComponent(window.location.pathname)}`;
+        fetch(url, { credentials: 'same-origin' })
+            .then(resposta => resposta.ok ? resposta.text() : null)
+            .then(html => {
+                if (!html) {
+                    return;
+                }
+                const modelo = document.createElement('template');
+                modelo.innerHTML = html.trim();
+                const card = modelo.content.firstElementChild;
+                // um evento mais recente do mesmo agendamento já moveu o card
+                if (!card || card.dataset.status !== agendamento.status) {
+                    return;
+                }
+
+                planilha.querySelector(`[data-agendamento="${agendamento.id}"]`)?.remove();
+                const seguinte = Array.from(container.querySelectorAll('[data-agendamento]'))
+                    .find(outro => outro.dataset.horario > card.dataset.horario);
+                container.insertBefore(card, seguinte || container.querySelector('.cards-empty'));
+            });
+    }
+
+    conectar();
+    console.log("Dashboard em tempo real iniciado.")
+});
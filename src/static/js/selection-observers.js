@@ -1,6 +1,6 @@
 
 
-// JS para tornar os rows de radio button clicável
+// JS para tornar os rows de radio button (ou checkbox) clicável
 document.addEventListener("DOMContentLoaded", function() {
     const rows = document.querySelectorAll("tbody tr[data-radio-id]");
 
@@ -11,8 +11,9 @@ document.addEventListener("DOMContentLoaded", function() {
 
             const radioId = this.dataset.radioId;
             const radio = document.getElementById(radioId);
-            if(radio) {
-                radio.checked = true;
+            if(radio && e.target !== radio) {
+                // checkbox (seleção múltipla) alterna; radio só marca
+                radio.checked = radio.type === 'checkbox' ? !radio.checked : true;
             }
         })
     })
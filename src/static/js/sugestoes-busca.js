@@ -0,0 +1,69 @@
+// Sugestões da busca enquanto digita (core.views.SugestoesView), para inputs com data-sugestoes
+document.addEventListener('DOMContentLoaded', function() {
+    const ESPERA_DIGITACAO = 200; // ms sem digitar antes de consultar
+    const TAMANHO_MINIMO = 2;
+
+    document.querySelectorAll('input[data-sugestoes]').forEach(input => {
+        const lista = document.createElement('ul');
+        lista.className = 'sugestoes';
+        lista.hidden = true;
+        input.after(lista);
+
+        let espera = null;
+        let requisicao = null;
+
+        function fechar() {
+            lista.hidden = true;
+            lista.replaceChildren();
+        }
+
+        function exibir(resultados) {
+            lista.replaceChildren(...resultados.map(resultado => {
+                const item = document.createElement('li');
+                item.textContent = resultado.texto;
+                // mousedown: antes do blur do input fechar a lista
+                item.addEventListener('mousedown', (evento) => {
+                    evento.preventDefault();
+                    input.value = resultado.busca;
+                    fechar();
+                    input.form.submit();
+                });
+                return item;
+            }));
+            lista.hidden = !resultados.length;
+        }
+
+        function consultar() {
+            const prefixo = input.value.trim();
+            requisicao?.abort();
+            if (prefixo.length < TAMANHO_MINIMO) {
+                fechar();
+                return;
+            }
+
+            requisicao = new AbortController();
+            fetch(`${input.dataset.sugestoes}?q=${encodeURIComponent(prefixo)}`, {
+                credentials: 'same-origin',
+                signal: requisicao.signal,
+            })
+                .then(resposta => resposta.ok ? resposta.json() : { resultados: [] })
+                .then(dados => exibir(dados.resultados))
+                .catch(erro => {
+                    if (erro.name !== 'AbortError') {
+                        fechar();
+                    }
+                });
+        }
+
+        input.addEventListener('input', () => {
+            clearTimeout(espera);
+            espera = setTimeout(consultar, ESPERA_DIGITACAO);
+        });
+        input.addEventListener('blur', fechar);
+        input.addEventListener('keydown', (evento) => {
+            if (evento.key === 'Escape') {
+                fechar();
+            }
+        });
+    });
+});